@@ -1,140 +1,109 @@
 # ─────────────────────────────────────────────────────────────────────────────
 #  🍳 Generator przepisów – wersja zoptymalizowana pod kątem szybkości
-#  (Streamlit  ≥ 1.31, Python 3.9+)
+#  (Streamlit  ≥ 1.37, Python 3.11+)
 # ─────────────────────────────────────────────────────────────────────────────
-import json
-from typing import List, Union, Optional
+import uuid
+from typing import Awaitable, Callable, List, Tuple, Optional
 
 import streamlit as st
-import google.generativeai as genai
-from pydantic import BaseModel, Field, field_validator
 from dotenv import load_dotenv
 import os
 
+from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni, przestrzen_cache, rozdziel_skladniki
+from recipe_core.clients import ROZGRZEWKA, WWatku, czekaj_na_petli_klientow
+from recipe_core.delta import miejsca_do_wymiany, uzupelnij_przepisy
+from recipe_core.fanout import WSKAZOWKI_ROZNORODNOSCI
+from recipe_core.generator import (
+    BladParsowania,
+    BladWalidacji,
+    PustaOdpowiedz,
+    czy_kompletne,
+    generuj_przepisy_async,
+    generuj_przepisy_rownolegle,
+)
+from recipe_core.hedging import PolitykaHedgingu, generuj_z_hedgingiem
+from recipe_core.kanonizacja import dopasuj_skladnik, klucz_skladnika, podpowiedzi
+from recipe_core.korpus import KorpusPrzepisow, wczytaj_korpus
+from recipe_core.models import Przepis, Przepisy
+from recipe_core.prompts import WERSJA_PROMPTU as WERSJA_PROMPTU_BAZOWA
+from recipe_core.providers import (
+    DOMYSLNY_MODEL_ANTHROPIC,
+    DOMYSLNY_MODEL_GEMINI,
+    AnthropicProvider,
+    GeminiProvider,
+    Provider,
+    rozgrzej_w_tle,
+    wspolny_provider,
+)
+from recipe_core.ratelimit import PrzekroczonyLimit, czy_przeciazenie
+from recipe_core.render import CSS_PRZEPISOW, html_przepisu
+from recipe_core.singleflight import PojedynczyLot
+from recipe_core.skladniki import KATEGORIE_SKLADNIKOW
+from recipe_core.spekulacja import Spekulator
+from recipe_core.telemetry import TELEMETRIA, uruchom_eksport
+from recipe_core.terminy import (
+    PrzekroczonyTermin,
+    Termin,
+    ZapytanieAnulowane,
+    anuluj_termin_sesji,
+    nowy_termin_sesji,
+    w_terminie,
+)
+from recipe_core.wyniki import MagazynWynikow
+
+from panel_telemetrii import czy_panel_admina, pokaz_panel_telemetrii
+
 # Wczytanie pliku .env
 load_dotenv()
 
+# Tryb strumieniowy – przepisy pojawiają się w miarę generowania (RECIPE_STREAM=0 wyłącza)
+TRYB_STRUMIENIOWY = os.getenv("RECIPE_STREAM", "1") != "0"
+
+# Tryb równoległy – trzy osobne zapytania o pojedynczy przepis (RECIPE_FANOUT=1 włącza)
+TRYB_ROWNOLEGLY = os.getenv("RECIPE_FANOUT", "0") == "1"
+
+# Hedging – gdy Gemini odpowiada zbyt długo, startuje Anthropic (RECIPE_HEDGE=1 + ANTHROPIC_API_KEY)
+HEDGING = os.getenv("RECIPE_HEDGE", "0") == "1"
+
+# Lokalny korpus – wybór pasujący do wcześniej wygenerowanych przepisów nie woła modelu
+# (RECIPE_CORPUS=0 wyłącza)
+KORPUS = os.getenv("RECIPE_CORPUS", "1") != "0"
+
+# Generowanie spekulatywne – gdy wybór składników się ustali, przepisy są generowane
+# w tle do cache, zanim padnie kliknięcie "Generuj" (RECIPE_SPECULATE=1 włącza)
+SPEKULACJA = os.getenv("RECIPE_SPECULATE", "0") == "1"
+
+# Tryb zmian – po niewielkiej zmianie wyboru zostają przepisy, które nadal da się
+# przygotować, a generowane są tylko brakujące (domyślny stan przełącznika, RECIPE_DELTA=0 wyłącza)
+TRYB_DELTY = os.getenv("RECIPE_DELTA", "1") != "0"
+
+MODEL_GEMINI = os.getenv("RECIPE_GEMINI_MODEL", DOMYSLNY_MODEL_GEMINI)
+MODEL_ZAPASOWY = os.getenv("RECIPE_ANTHROPIC_MODEL", DOMYSLNY_MODEL_ANTHROPIC)
+WERSJA_PROMPTU = WERSJA_PROMPTU_BAZOWA + ("-fanout" if TRYB_ROWNOLEGLY else "")
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  Konfiguracja strony
 # ─────────────────────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Generator Przepisów", layout="wide")
+# style kart przepisów – raz na stronę (fragmenty ich nie powtarzają)
+st.markdown(CSS_PRZEPISOW, unsafe_allow_html=True)
+
+
+@st.cache_resource(show_spinner=False)
+def _eksport_metryk() -> None:
+    """Raz na proces: endpoint /metrics (RECIPE_METRICS_PORT)."""
+    uruchom_eksport()
+
+
+_eksport_metryk()
+if czy_panel_admina():
+    pokaz_panel_telemetrii()
+    st.stop()
 
 # ─────────────────────────────────────────────────────────────────────────────
-#  Stałe – kategorie składników i ikony
+#  Stałe – ikony kategorii (same kategorie: recipe_core.skladniki)
 # ─────────────────────────────────────────────────────────────────────────────
-KATEGORIE_SKLADNIKOW = {
-    "Przyprawy i dodatki smakowe": [
-        "Sól",
-        "Pieprz czarny",
-        "Czosnek granulowany",
-        "Papryka słodka",
-        "Papryka ostra",
-        "Oregano",
-        "Bazylia",
-        "Curry",
-        "Kminek",
-        "Tymianek",
-        "Liść laurowy",
-        "Ziele angielskie",
-        "Imbir mielony",
-        "Sos sojowy",
-    ],
-    "Produkty zbożowe i mączne": [
-        "Makaron",
-        "Ryż biały",
-        "Kasza gryczana",
-        "Kasza jaglana",
-        "Mąka pszenna",
-        "Mąka żytnia",
-        "Płatki owsiane",
-        "Płatki kukurydziane",
-        "Bułka tarta",
-        "Chleb",
-        "Tortilla pszenna",
-        "Kuskus",
-        "Quinoa",
-    ],
-    "Produkty białkowe": [
-        "Jajka",
-        "Filet z kurczaka",
-        "Mięso mielone",
-        "Tuńczyk w puszce",
-        "Soczewica czerwona",
-        "Soczewica zielona",
-        "Ciecierzyca",
-        "Fasola czerwona",
-        "Fasola biała",
-        "Groszek zielony",
-        "Tofu",
-        "Tempeh",
-        "Parówki",
-        "Ser biały (twaróg)",
-    ],
-    "Produkty mleczne i zamienniki": [
-        "Mleko",
-        "Mleko roślinne (np. owsiane)",
-        "Masło",
-        "Margaryna",
-        "Jogurt naturalny",
-        "Ser żółty",
-        "Ser feta",
-        "Śmietana",
-        "Maślanka",
-        "Serek wiejski",
-        "Kefir",
-    ],
-    "Warzywa": [
-        "Ziemniaki",
-        "Marchewka",
-        "Cebula",
-        "Czosnek świeży",
-        "Kapusta",
-        "Ogórek",
-        "Papryka",
-        "Pomidory świeże",
-        "Pomidory w puszce",
-        "Cukinia",
-        "Brokuł",
-        "Kalafior",
-        "Sałata",
-        "Por",
-    ],
-    "Owoce": [
-        "Jabłko",
-        "Banan",
-        "Cytryna",
-        "Gruszka",
-        "Śliwka",
-        "Truskawki",
-        "Maliny",
-        "Winogrona",
-        "Ananas w puszce",
-        "Brzoskwinia",
-        "Awokado",
-    ],
-    "Tłuszcze i oleje": [
-        "Olej rzepakowy",
-        "Oliwa z oliwek",
-        "Olej kokosowy",
-        "Masło klarowane",
-        "Smalec",
-        "Olej lniany",
-        "Olej słonecznikowy",
-    ],
-    "Dodatki słodzące i konserwujące": [
-        "Cukier biały",
-        "Cukier trzcinowy",
-        "Miód",
-        "Syrop klonowy",
-        "Ocet spirytusowy",
-        "Ocet jabłkowy",
-        "Sól peklująca",
-        "Dżem",
-        "Musztarda",
-        "Ketchup",
-    ],
-}
 IKONY_KATEGORII = {
     "Przyprawy i dodatki smakowe": "🌶️",
     "Produkty zbożowe i mączne": "🌾",
@@ -148,171 +117,360 @@ IKONY_KATEGORII = {
 }
 
 # ─────────────────────────────────────────────────────────────────────────────
-#  Pydantic – modele z polskimi nazwami pól
+#  Pomocnicze funkcje – wygenerowanie przepisu, cache
 # ─────────────────────────────────────────────────────────────────────────────
-class Skladnik(BaseModel):
-    nazwa: str
-    ilosc: Union[str, int, float]
-    jednostka: str = ""
-    
-    @field_validator('jednostka', mode='before')
-    @classmethod
-    def validate_jednostka(cls, v):
-        """Zamień None na pusty string"""
-        return v if v is not None else ""
+def _hedging_aktywny() -> bool:
+    return HEDGING and bool(os.getenv("ANTHROPIC_API_KEY")) and not TRYB_ROWNOLEGLY
+
 
+def _utworz_providery(api_key: str) -> Tuple[Provider, Optional[Provider]]:
+    """Główny dostawca (Gemini) i – jeśli włączono hedging – zapasowy (Anthropic)."""
+    glowny = wspolny_provider(GeminiProvider.nazwa, api_key, MODEL_GEMINI)
+    zapasowy = None
+    if _hedging_aktywny():
+        zapasowy = wspolny_provider(
+            AnthropicProvider.nazwa, os.environ["ANTHROPIC_API_KEY"], MODEL_ZAPASOWY
+        )
+    return glowny, zapasowy
 
-class KrokPrzygotowania(BaseModel):
-    numer: int
-    opis: str
 
+@st.cache_resource(show_spinner=False)
+def _rozgrzej_klientow() -> None:
+    """Raz na proces: połączenia z API zestawione przed pierwszym zapytaniem."""
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if api_key:
+        rozgrzej_w_tle([p for p in _utworz_providery(api_key) if p is not None])
 
-class Przepis(BaseModel):
-    nazwa: str
-    czas_przygotowania: str
-    poziom_trudnosci: str
-    skladniki: List[Skladnik]
-    kroki: List[KrokPrzygotowania]
-    sugestie: str
 
+@st.cache_resource(show_spinner=False)
+def _polityka_hedgingu() -> PolitykaHedgingu:
+    """Statystyki czasów odpowiedzi współdzielone przez wszystkie sesje."""
+    return PolitykaHedgingu()
 
-class Przepisy(BaseModel):
-    przepisy: List[Przepis]
 
-# ─────────────────────────────────────────────────────────────────────────────
-#  Pomocnicze funkcje – wygenerowanie przepisu, cache
-# ─────────────────────────────────────────────────────────────────────────────
-def _generuj_przepisy(api_key: str, skladniki_str: str) -> Optional[Przepisy]:
-    """Komunikacja z modelem Gemini – zwraca obiekt Przepisy lub None w przypadku błędu."""
-    genai.configure(api_key=api_key)
-
-    prompt = f"""Jesteś asystentem kulinarnym. Odpowiadaj wyłącznie w języku polskim.
-Na podstawie podanych składników ("{skladniki_str}") zaproponuj TRZY różne przepisy.
-Każdy przepis powinien być inny i wykorzystywać dostępne składniki.
-
-WYNIK ZWRÓĆ WYŁĄCZNIE JAKO POPRAWNY JSON, bez żadnego dodatkowego tekstu, bez markdown, bez komentarzy.
-Użyj dokładnie następującej struktury i kluczy po polsku:
-
-{{
-  "przepisy": [
-    {{
-      "nazwa": "Nazwa przepisu 1",
-      "czas_przygotowania": "30 minut",
-      "poziom_trudnosci": "łatwy",
-      "skladniki": [
-        {{ "nazwa": "jajka", "ilosc": "2", "jednostka": "szt." }},
-        {{ "nazwa": "mąka", "ilosc": "200", "jednostka": "g" }}
-      ],
-      "kroki": [
-        {{ "numer": 1, "opis": "Pierwszy krok przygotowania." }},
-        {{ "numer": 2, "opis": "Drugi krok przygotowania." }}
-      ],
-      "sugestie": "Dodatkowe sugestie dotyczące przepisu."
-    }}
-  ]
-}}
-
-PRZYKŁAD POPRAWNEJ ODPOWIEDZI:
-{{
-  "przepisy": [
-    {{
-      "nazwa": "Sałatka z pomidorów i bazylii",
-      "czas_przygotowania": "15 minut",
-      "poziom_trudnosci": "łatwy",
-      "skladniki": [
-        {{ "nazwa": "pomidory", "ilosc": "3", "jednostka": "szt." }},
-        {{ "nazwa": "bazylia świeża", "ilosc": "1", "jednostka": "garść" }},
-        {{ "nazwa": "oliwa", "ilosc": "2", "jednostka": "łyżki" }},
-        {{ "nazwa": "sól", "ilosc": "1", "jednostka": "szczypta" }}
-      ],
-      "kroki": [
-        {{ "numer": 1, "opis": "Pokrój pomidory w cząstki." }},
-        {{ "numer": 2, "opis": "Dodaj listki bazylii, skrop oliwą i dopraw solą." }}
-      ],
-      "sugestie": "Można dodać ser mozzarella lub feta dla większej sytości."
-    }}
-  ]
-}}
-
-WAŻNE ZASADY:
-- Każdy przepis MUSI być kompletny i wykonalny
-- Użyj realistycznych ilości składników
-- Podaj jasne instrukcje krok po kroku
-- Zaproponuj przydatne sugestie
-- Wszystko w języku polskim
-- Zwróć WYŁĄCZNIE JSON, bez żadnego tekstu przed ani po
-- Użyj dokładnie tych kluczy: nazwa, czas_przygotowania, poziom_trudnosci, skladniki, kroki, sugestie
-- W składnikach: nazwa, ilosc, jednostka
-- W krokach: numer, opis
-
-Składniki do wykorzystania: {skladniki_str}"""
+def _w_watku(w_watku: WWatku, callback: Optional[Callable[..., None]]) -> Optional[Callable[..., None]]:
+    """Callback z pętli klientów wykonywany w wątku skryptu (rysowanie w Streamlit)."""
+    return (lambda *args: w_watku(callback, *args)) if callback is not None else None
+
+
+def _wygeneruj(
+    api_key: str,
+    skladniki_str: str,
+    on_przepis: Optional[Callable[[int, Przepis], None]] = None,
+    on_czekanie: Optional[Callable[[], None]] = None,
+) -> Przepisy:
+    """
+    Komunikacja z modelem – zwraca obiekt Przepisy albo rzuca wyjątek.
+
+    W trybie strumieniowym `on_przepis(idx, przepis)` jest wywoływany dla każdego
+    przepisu zaraz po domknięciu jego obiektu w tablicy "przepisy"; w trybie
+    równoległym – po zakończeniu każdego z trzech zapytań.
+
+    Zapytanie działa na wspólnej pętli klientów, a wątek skryptu rysuje
+    przepisy i co chwilę woła `on_czekanie` – zatrzymanie sesji (stop,
+    zamknięcie karty) przerywa wtedy oczekiwanie i anuluje zapytanie.
+    """
+    glowny, zapasowy = _utworz_providery(api_key)
+    if TRYB_ROWNOLEGLY:
+        return czekaj_na_petli_klientow(
+            lambda w_watku: generuj_przepisy_rownolegle(glowny, skladniki_str, _w_watku(w_watku, on_przepis)),
+            on_czekanie,
+        )
+    if zapasowy is not None:
+        return czekaj_na_petli_klientow(
+            lambda _: generuj_z_hedgingiem(glowny, zapasowy, skladniki_str, _polityka_hedgingu()),
+            on_czekanie,
+        )
+    return czekaj_na_petli_klientow(
+        lambda w_watku: generuj_przepisy_async(
+            glowny, skladniki_str, on_przepis=_w_watku(w_watku, on_przepis) if TRYB_STRUMIENIOWY else None
+        ),
+        on_czekanie,
+    )
+
+
+def _generowanie_async(api_key: str) -> Callable[[str], Awaitable[Przepisy]]:
+    """
+    Konfiguracja `_wygeneruj` bez strumienia, jako korutyna – do generowania
+    w tle, gdzie anulowanie zadania przerywa zapytanie. Dostawców i politykę
+    hedgingu pobieramy od razu, w wątku skryptu.
+    """
+    glowny, zapasowy = _utworz_providery(api_key)
+    if TRYB_ROWNOLEGLY:
+        return lambda skladniki_str: generuj_przepisy_rownolegle(glowny, skladniki_str)
+    if zapasowy is not None:
+        polityka = _polityka_hedgingu()
+        return lambda skladniki_str: generuj_z_hedgingiem(glowny, zapasowy, skladniki_str, polityka)
+    return lambda skladniki_str: generuj_przepisy_async(glowny, skladniki_str)
+
+
+def _pokaz_blad(blad: Exception) -> None:
+    """Komunikat o nieudanym generowaniu w bieżącej sesji."""
+    if isinstance(blad, ZapytanieAnulowane):
+        return  # sesja sama zrezygnowała z zapytania
+    if isinstance(blad, PrzekroczonyTermin):
+        st.error("Nie udało się wygenerować przepisów na czas – spróbuj ponownie za chwilę.")
+    elif isinstance(blad, PustaOdpowiedz):
+        st.error("Model nie zwrócił żadnej odpowiedzi. Spróbuj ponownie.")
+    elif isinstance(blad, BladParsowania):
+        st.error(str(blad))
+        st.error("Otrzymana odpowiedź:")
+        st.code(blad.surowa_odpowiedz)
+    elif isinstance(blad, BladWalidacji):
+        st.error(str(blad))
+        st.error("Model nie zwrócił odpowiedzi w oczekiwanym formacie polskim.")
+        with st.expander("Zobacz surową odpowiedź"):
+            st.code(blad.surowa_odpowiedz)
+    elif isinstance(blad, PrzekroczonyLimit) or czy_przeciazenie(blad):
+        st.error("Dostawca jest w tej chwili przeciążony – spróbuj ponownie za chwilę.")
+    else:
+        st.error(f"Błąd komunikacji z API Gemini: {blad}")
+        st.info("Spróbuj ponownie lub zmodyfikuj listę składników.")
+
+
+def _przestrzen() -> str:
+    """Przestrzeń kluczy cache dla bieżącej konfiguracji dostawców i promptu."""
+    provider, model = GeminiProvider.nazwa, MODEL_GEMINI
+    if _hedging_aktywny():
+        provider, model = f"{provider}+{AnthropicProvider.nazwa}", f"{model}+{MODEL_ZAPASOWY}"
+    return przestrzen_cache(provider, model, WERSJA_PROMPTU)
+
+
+@st.cache_resource(show_spinner=False)
+def _cache_przepisow() -> CachePrzepisow:
+    """Cache współdzielony przez sesje (L1) i procesy/restarty (SQLite)."""
+    cache = CachePrzepisow()
+    cache.rozgrzej(Przepisy)
+    return cache
+
+
+@st.cache_resource(show_spinner=False)
+def _korpus() -> KorpusPrzepisow:
+    """Korpus przepisów (plik RECIPE_CORPUS_PATH + wpisy cache), wspólny dla sesji."""
+    return wczytaj_korpus(cache=_cache_przepisow())
+
+
+@st.cache_resource(show_spinner=False)
+def _zapytania_w_locie() -> PojedynczyLot:
+    """Jednakowe zapytania z różnych sesji czekają na jedno wywołanie modelu."""
+    return PojedynczyLot()
+
+
+@st.cache_resource(show_spinner=False)
+def _spekulator() -> Spekulator:
+    """Plany, budżety i statystyki generowania spekulatywnego – wspólne dla sesji."""
+    return Spekulator()
+
+
+def _id_sesji() -> str:
+    if "id_sesji" not in st.session_state:
+        st.session_state.id_sesji = uuid.uuid4().hex
+    return st.session_state.id_sesji
+
+
+@st.cache_resource(show_spinner=False)
+def _magazyn_wynikow() -> MagazynWynikow[Przepisy]:
+    """Wyniki wspólne dla sesji – session_state trzyma tylko ich uchwyty."""
+    return MagazynWynikow()
+
+
+def _przepisy() -> Optional[Przepisy]:
+    """Przepisy pokazywane w sesji (None także dla uchwytu bezczynnej sesji)."""
+    return _magazyn_wynikow().wynik(_id_sesji(), st.session_state.przepisy)
+
+
+def _ustaw_przepisy(przepisy: Optional[Przepisy]) -> None:
+    st.session_state.przepisy = _magazyn_wynikow().zamien(_id_sesji(), st.session_state.przepisy, przepisy)
+
+
+def _baza() -> Optional[Tuple[str, Przepisy]]:
+    """(składniki, przepisy) ostatniego wyniku – punkt wyjścia trybu zmian i wymiany przepisu."""
+    baza = st.session_state.baza_przepisow
+    przepisy = _magazyn_wynikow().wynik(_id_sesji(), baza[1]) if baza is not None else None
+    return (baza[0], przepisy) if przepisy is not None else None
+
+
+def _ustaw_baze(skladniki_str: str, przepisy: Przepisy) -> None:
+    stara = st.session_state.baza_przepisow
+    uchwyt = _magazyn_wynikow().zamien(_id_sesji(), stara[1] if stara is not None else None, przepisy)
+    st.session_state.baza_przepisow = (skladniki_str, uchwyt)
+
+
+def generuj_przepisy_z_cache(
+    api_key: str,
+    skladniki_str: str,
+    on_przepis: Optional[Callable[[int, Przepis], None]] = None,
+    on_chybienie: Optional[Callable[[], None]] = None,
+    baza: Optional[Tuple[str, Przepisy]] = None,
+    on_czekanie: Optional[Callable[[], None]] = None,
+    termin: Optional[Termin] = None,
+) -> Optional[Przepisy]:
+    """
+    Wrapper z cache. Klucz cache jest wyliczany z modelu, wersji promptu
+    i posortowanej, znormalizowanej listy składników (bez klucza API).
+    Przy trafieniu w cache `on_przepis` nie jest wywoływany – całość
+    renderuje się od razu. `on_chybienie` jest wołany tuż przed
+    rozpoczęciem generowania.
+
+    `baza` to (składniki, przepisy) poprzedniego wyniku: po niewielkiej
+    zmianie wyboru zachowujemy przepisy, które nadal da się przygotować,
+    i generujemy tylko brakujące (`recipe_core.delta`).
+
+    Jeśli te same składniki są właśnie generowane w innej sesji, czekamy
+    na tamto wywołanie (przepisy ze strumienia trafiają do `on_przepis`
+    także tutaj). Zwraca None w przypadku błędu – komunikat jest już wyświetlony.
+
+    Po terminie (`termin`, także przy czekaniu na cudze zapytanie) zwraca
+    przepisy, które zdążyły powstać – z ostrzeżeniem i bez zapisu do cache.
+    """
+    skladniki = rozdziel_skladniki(skladniki_str)
+    # wybór w postaci, w jakiej przyszedł – do odtworzenia ruchu (bench_kanonizacja)
+    TELEMETRIA.zdarzenie("zapytanie", aplikacja="app_g", skladniki=skladniki_str.split(","))
+    klucz = klucz_w_przestrzeni(_przestrzen(), skladniki)
+    if SPEKULACJA and _spekulator().wykorzystaj(_id_sesji(), klucz) == "w_locie":
+        st.toast("⚡ Te przepisy już się generują w tle – zaraz będą gotowe")
+    cache = _cache_przepisow()
+    result = cache.pobierz(klucz, Przepisy)
+    if result is not None:
+        return result
+    korpus = _korpus() if KORPUS else None
+    if korpus is not None:
+        result = korpus.przepisy_dla(skladniki)
+        TELEMETRIA.cache("korpus" if result is not None else "korpus_chybienie")
+        if result is not None:
+            st.toast("📚 Przepisy z lokalnego korpusu – bez generowania")
+            return result
+    miejsca = None
+    if baza is not None:
+        miejsca = miejsca_do_wymiany(baza[1], rozdziel_skladniki(baza[0]), skladniki)
+        if miejsca == []:
+            # bez zapisu do cache – wyłączenie trybu zmian da nowe przepisy dla tego wyboru
+            st.toast("♻️ Dotychczasowe przepisy pasują do nowego wyboru")
+            return baza[1]
+    if on_chybienie is not None:
+        on_chybienie()
+
+    def _generuj_i_zapisz(opublikuj) -> Przepisy:
+        # poprzedni lot mógł zapisać wynik między naszym odczytem a startem
+        gotowe = cache.pobierz(klucz, Przepisy)
+        if gotowe is not None:
+            return gotowe
+        if miejsca is not None:
+            glowny, _ = _utworz_providery(api_key)
+            wynik = czekaj_na_petli_klientow(
+                lambda w_watku: uzupelnij_przepisy(
+                    glowny, ",".join(skladniki), baza[1], miejsca,
+                    lambda idx, p: w_watku(opublikuj, (idx, p)),
+                ),
+                on_czekanie,
+            )
+        else:
+            wynik = _wygeneruj(api_key, ",".join(skladniki), lambda idx, p: opublikuj((idx, p)), on_czekanie)
+        # niepełny wynik tylko pokazujemy – w cache zostałby na cały TTL
+        if czy_kompletne(wynik):
+            cache.zapisz(klucz, wynik, skladniki, _przestrzen())
+            if korpus is not None:
+                korpus.dodaj_przepisy(wynik)
+        return wynik
+
+    otrzymane: List[Przepis] = []
+
+    def _on_element(element: Tuple[int, Przepis]) -> None:
+        otrzymane.append(element[1])
+        if on_przepis is not None:
+            on_przepis(*element)
 
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash-exp")
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                response_mime_type="application/json",
-                temperature=0.7,
-                max_output_tokens=4000,
-                candidate_count=1,
-            ),
+        result = _zapytania_w_locie().wykonaj(
+            klucz,
+            _generuj_i_zapisz,
+            on_element=_on_element,
+            timeout=termin.limit_czekania() if termin is not None else None,
         )
-        
-        # Sprawdzenie czy response zawiera tekst
-        if not response.text or not response.text.strip():
-            st.error("Model nie zwrócił żadnej odpowiedzi. Spróbuj ponownie.")
-            return None
-            
-        try:
-            # Oczyszczenie odpowiedzi z ewentualnych znaczników markdown
-            clean_response = response.text.strip()
-            if clean_response.startswith("```json"):
-                clean_response = clean_response[7:]
-            if clean_response.endswith("```"):
-                clean_response = clean_response[:-3]
-            clean_response = clean_response.strip()
-            
-            recipes_dict = json.loads(clean_response)
-            
-            # Bezpośrednia walidacja Pydantic - bez konwersji
-            return Przepisy(**recipes_dict)
-            
-        except json.JSONDecodeError as je:
-            st.error(f"Błąd parsowania odpowiedzi JSON: {je}")
-            st.error("Otrzymana odpowiedź:")
-            st.code(response.text)
-            return None
-        except Exception as pe:
-            st.error(f"Błąd walidacji danych przepisów: {pe}")
-            st.error("Model nie zwrócił odpowiedzi w oczekiwanym formacie polskim.")
-            with st.expander("Zobacz surową odpowiedź"):
-                st.code(response.text)
-            return None
-            
     except Exception as e:
-        st.error(f"Błąd komunikacji z API Gemini: {e}")
-        st.info("Spróbuj ponownie lub zmodyfikuj listę składników.")
-        return None
+        po_terminie = isinstance(e, PrzekroczonyTermin) or (
+            isinstance(e, TimeoutError) and termin is not None and termin.minal()
+        )
+        czesciowe = getattr(e, "czesciowe", None) or (Przepisy(przepisy=otrzymane) if otrzymane else None)
+        if termin is not None:
+            termin.wynik = (
+                ("partial" if czesciowe is not None else "expired") if po_terminie
+                else "cancelled" if isinstance(e, ZapytanieAnulowane) else "error"
+            )
+        if not po_terminie or czesciowe is None:
+            _pokaz_blad(PrzekroczonyTermin(str(e)) if po_terminie else e)
+            return None
+        st.warning(
+            f"Minął czas na generowanie – pokazuję {len(czesciowe.przepisy)} z "
+            f"{len(WSKAZOWKI_ROZNORODNOSCI)} przepisów. Generuj ponownie, żeby uzupełnić resztę."
+        )
+        return czesciowe
+    if not czy_kompletne(result):
+        st.warning(
+            f"Udało się wygenerować {len(result.przepisy)} z "
+            f"{len(WSKAZOWKI_ROZNORODNOSCI)} przepisów."
+        )
+    return result
 
 
-@st.cache_data(show_spinner=False)
-def generuj_przepisy_z_cache(api_key: str, skladniki_str: str) -> Optional[Przepisy]:
+def znajdz_podobne_przepisy(skladniki_str: str, limit: int = 1) -> List[Tuple[float, Przepisy]]:
     """
-    Wrapper z cache. Klucz cache jest wyliczany z posortowanej,
-    znormalizowanej listy składników.
+    Przepisy z cache wygenerowane dla podzbioru bieżących składników
+    (np. bez dodanej właśnie "Soli"), od największego pokrycia.
     """
-    # Normalizacja – usuń spacje, małe litery, sortuj, połącz przecinkami
-    normalized = ",".join(
-        sorted([s.strip().lower() for s in skladniki_str.split(",") if s.strip()])
+    return _cache_przepisow().podobne(
+        _przestrzen(), rozdziel_skladniki(skladniki_str), Przepisy, limit=limit
     )
-    # Wywołujemy jednorazowo funkcję generującą (wynik zostanie zapamiętany)
-    return _generuj_przepisy(api_key, normalized)
+
+
+def _renderuj_przepis(idx: int, przepis: Przepis) -> None:
+    """Wyświetla jeden przepis w bieżącym kontenerze – jeden element na przepis."""
+    st.markdown(html_przepisu(idx, przepis), unsafe_allow_html=True)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  Callbacki – poprawione zarządzanie stanem
 # ─────────────────────────────────────────────────────────────────────────────
+def _spekuluj() -> None:
+    """
+    Po każdej zmianie wyboru: plan generowania w tle dla nowego zestawu
+    (start po ustaniu zmian). Poprzedni plan sesji jest porzucany, a jego
+    trwające wywołanie przerywane.
+    """
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not SPEKULACJA or not api_key:
+        return
+    spekulator = _spekulator()
+    skladniki = rozdziel_skladniki(",".join(_wszystkie_skladniki()))
+    if not skladniki:
+        spekulator.anuluj(_id_sesji())
+        return
+    # zasoby pobieramy tutaj – zadanie wykonuje się w wątku spekulatora
+    przestrzen = _przestrzen()
+    klucz = klucz_w_przestrzeni(przestrzen, skladniki)
+    cache = _cache_przepisow()
+    korpus = _korpus() if KORPUS else None
+    lot = _zapytania_w_locie()
+    generuj = _generowanie_async(api_key)
+
+    def _zadanie(wykonaj) -> None:
+        def _generuj_i_zapisz(opublikuj) -> Przepisy:
+            gotowe = cache.pobierz(klucz, Przepisy)
+            if gotowe is not None:
+                return gotowe
+            wynik = wykonaj(generuj(",".join(skladniki)))
+            if czy_kompletne(wynik):
+                cache.zapisz(klucz, wynik, skladniki, przestrzen)
+                if korpus is not None:
+                    korpus.dodaj_przepisy(wynik)
+            return wynik
+
+        # ten sam lot co przycisk "Generuj" – kliknięcie w trakcie dołącza do wywołania
+        lot.wykonaj(klucz, _generuj_i_zapisz)
+
+    spekulator.zaplanuj(_id_sesji(), klucz, _zadanie, gotowe=lambda: cache.zawiera(klucz))
+
+
 def _toggle_ingredient(skladnik_name):
     """
     Wywoływany po zmianie konkretnego checkboxa.
@@ -325,20 +483,50 @@ def _toggle_ingredient(skladnik_name):
     else:
         # Checkbox odznaczony - usuń składnik
         st.session_state.wybrane_skladniki.discard(skladnik_name)
+    _spekuluj()
+
+
+def _zaznacz_z_listy(skladnik: str) -> None:
+    """Zaznacza pozycję z listy (checkbox w panelu wyboru) – np. wpisaną ręcznie."""
+    st.session_state[f"cb_{skladnik}"] = True
+    st.session_state.wybrane_skladniki.add(skladnik)
+    # panel wyboru to osobny fragment – checkbox odświeży się przy pełnym przebiegu
+    st.session_state.przerysuj_wszystko = True
 
 
 def _add_custom():
     """
     Dodaje wpisany w polu tekstowym własny składnik.
+    Nazwa z listy w innej formie ("jajko", "pomidory") zaznacza pozycję listy,
+    a dla pozostałych proponujemy podobne pozycje ("Czy chodziło o...").
     """
     nowy = st.session_state.get("custom_input", "").strip()
+    st.session_state.podpowiedzi_skladnikow = []
     if nowy:
-        # unikamy duplikatów (ignorujemy wielkość liter)
-        dolower = [x.lower() for x in st.session_state.dodatkowe_skladniki]
-        if nowy.lower() not in dolower:
+        z_listy = dopasuj_skladnik(nowy)
+        if z_listy is not None:
+            _zaznacz_z_listy(z_listy)
+        # unikamy duplikatów ("świeży imbir" i "imbir świeży" to jeden składnik)
+        elif klucz_skladnika(nowy) not in map(klucz_skladnika, st.session_state.dodatkowe_skladniki):
             st.session_state.dodatkowe_skladniki.append(nowy)
+            st.session_state.podpowiedzi_skladnikow = podpowiedzi(nowy, limit=4)
+            st.session_state.ostatni_wlasny = nowy
     # czyścimy pole tekstowe
     st.session_state.custom_input = ""
+    _spekuluj()
+
+
+def _wybierz_podpowiedz():
+    """Zamienia ostatnio wpisany własny składnik na wskazaną pozycję z listy."""
+    wybrana = st.session_state.get("wybor_podpowiedzi")
+    if wybrana:
+        ostatni = st.session_state.get("ostatni_wlasny")
+        if ostatni in st.session_state.dodatkowe_skladniki:
+            st.session_state.dodatkowe_skladniki.remove(ostatni)
+        _zaznacz_z_listy(wybrana)
+    st.session_state.podpowiedzi_skladnikow = []
+    st.session_state.wybor_podpowiedzi = None
+    _spekuluj()
 
 
 def _clear_all():
@@ -354,19 +542,45 @@ def _clear_all():
     st.session_state.wybrane_skladniki = set()
     st.session_state.dodatkowe_skladniki = []
     
-    # Wyczyść przepisy
-    st.session_state.przepisy = None
+    # Wyczyść przepisy (baza_przepisow zostaje – tryb zmian skorzysta z niej,
+    # gdy kolejny wybór będzie podobny)
+    _ustaw_przepisy(None)
+    anuluj_termin_sesji(st.session_state)
+    _spekuluj()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  Inicjalizacja session_state (pierwszy dostęp)
 # ─────────────────────────────────────────────────────────────────────────────
+if ROZGRZEWKA:
+    _rozgrzej_klientow()
+
 if "wybrane_skladniki" not in st.session_state:
     st.session_state.wybrane_skladniki = set()
 if "dodatkowe_skladniki" not in st.session_state:
     st.session_state.dodatkowe_skladniki = []
 if "przepisy" not in st.session_state:
+    # uchwyt przepisów w `_magazyn_wynikow()` – sam obiekt Przepisy jest wspólny dla sesji
     st.session_state.przepisy = None
+if "tryb_natychmiastowy" not in st.session_state:
+    st.session_state.tryb_natychmiastowy = False
+if "podpowiedzi_skladnikow" not in st.session_state:
+    st.session_state.podpowiedzi_skladnikow = []
+if "tryb_zmian" not in st.session_state:
+    st.session_state.tryb_zmian = TRYB_DELTY
+if "baza_przepisow" not in st.session_state:
+    # (składniki, uchwyt przepisów) ostatniego wyniku – zob. `_baza()`
+    st.session_state.baza_przepisow = None
+_magazyn_wynikow().dotknij(_id_sesji())
+
+# Kod poza fragmentami wykonuje się tylko przy pełnym przebiegu skryptu –
+# wtedy podsumowanie trzeba narysować od nowa
+st.session_state.podpis_podsumowania = None
+
+
+def _wszystkie_skladniki() -> List[str]:
+    return list(st.session_state.wybrane_skladniki) + st.session_state.dodatkowe_skladniki
+
 
 # -------------------------------------------------------------------------
 #  Interfejs użytkownika
@@ -376,10 +590,82 @@ st.write(
     "Wybierz składniki z listy po lewej, dodaj własne, a otrzymasz 3 różne przepisy."
 )
 
+# -------------------------------------------------------------------------
+#  Główne kolumny: po lewej – kontrolki, po prawej – wyniki
+# -------------------------------------------------------------------------
+# Panele są niezależnymi fragmentami (st.fragment): zaznaczenie składnika
+# przerysowuje tylko listę wyboru i podsumowanie, a nie przepisy. Podsumowanie
+# i wyniki to miejsca (st.empty) podmieniane w całości przez fragmenty.
+col_controls, col_results = st.columns([2, 3])
+with col_controls:
+    podsumowanie = st.empty()
+with col_results:
+    # tu trafiają też przepisy strumieniowane w trakcie generowania
+    panel_wynikow = st.empty()
+
+
+def _podmien(miejsce):
+    """
+    Nowy kontener w miejscu `miejsce`. Najpierw czyścimy miejsce – inaczej
+    dzieci poprzedniej, dłuższej zawartości mogłyby zostać na stronie.
+    """
+    miejsce.empty()
+    return miejsce.container()
+
+
+def _renderuj_podsumowanie() -> None:
+    """Lista wybranych składników – tylko gdy się zmieniła od ostatniego rysowania."""
+    podpis = (
+        frozenset(st.session_state.wybrane_skladniki),
+        tuple(st.session_state.dodatkowe_skladniki),
+    )
+    if st.session_state.podpis_podsumowania == podpis:
+        return
+    st.session_state.podpis_podsumowania = podpis
+
+    with _podmien(podsumowanie):
+        st.subheader("🛒 Twoje wybrane składniki")
+        if not _wszystkie_skladniki():
+            st.info("👈 Zacznij wybierać składniki z listy po lewej.")
+            return
+        # grupowanie po kategoriach (tylko te, które naprawdę mają wybrane pozycje)
+        for kat, lista in KATEGORIE_SKLADNIKOW.items():
+            wybrane_w_kat = st.session_state.wybrane_skladniki.intersection(lista)
+            if wybrane_w_kat:
+                with st.container(border=True):
+                    st.markdown(f"**{IKONY_KATEGORII.get(kat, '🛒')} {kat}**")
+                    for s in sorted(wybrane_w_kat):
+                        st.markdown(f"&nbsp;&nbsp;&nbsp;• {s}")
+
+        # własne składniki – oddzielna sekcja
+        if st.session_state.dodatkowe_skladniki:
+            with st.container(border=True):
+                st.markdown(f"**{IKONY_KATEGORII['Dodatkowe']} Dodatkowe**")
+                for s in st.session_state.dodatkowe_skladniki:
+                    st.markdown(f"&nbsp;&nbsp;&nbsp;• {s}")
+
+
+def _renderuj_wyniki() -> None:
+    """Przepisy sesji w prawej kolumnie."""
+    przepisy = _przepisy()
+    if przepisy is None:
+        panel_wynikow.empty()
+        return
+    with _podmien(panel_wynikow):
+        if przepisy.przepisy:
+            st.header("📋 Twoje propozycje przepisów")
+            for idx, przepis in enumerate(przepisy.przepisy, start=1):
+                _renderuj_przepis(idx, przepis)
+        else:
+            # Przypadek gdy przepisy zostały ustawione ale są puste/nieprawidłowe
+            st.warning("Nie udało się wygenerować przepisów. Spróbuj ponownie z innymi składnikami.")
+
+
 # -------------------------------------------------------------------------
 #  Sidebar – wybór kategorii i składników (checkboxy z `on_change`)
 # -------------------------------------------------------------------------
-with st.sidebar:
+@st.fragment
+def _panel_wyboru() -> None:
     st.header("📦 Wybierz składniki")
     wybrana_kategoria = st.radio(
         "Kategoria:",
@@ -396,37 +682,79 @@ with st.sidebar:
             value=skladnik in st.session_state.wybrane_skladniki,
             on_change=lambda s=skladnik: _toggle_ingredient(s),
         )
+    _renderuj_podsumowanie()
+    if bool(_wszystkie_skladniki()) != st.session_state.pokazano_przyciski:
+        # pierwszy składnik / odznaczenie ostatniego – przyciski w panelu
+        # sterowania pojawiają się lub znikają, więc przerysowujemy całość
+        st.rerun()
+
+
+def _zaplanuj_wymiane(idx: int) -> None:
+    st.session_state.wymien_przepis = idx
+
+
+def _wymien_przepis(idx: int) -> None:
+    """Nowy przepis w miejsce przepisu nr `idx` (od 1); pozostałe zostają."""
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        st.error("Podaj klucz API Gemini.")
+        return
+    baza = _baza()
+    if baza is None:
+        return
+    skladniki_str, przepisy = baza
+    skladniki = rozdziel_skladniki(skladniki_str)
+    glowny, _ = _utworz_providery(api_key)
+    przerwa = st.empty()
+    with st.spinner("🤖 Szukam innego przepisu..."):
+        try:
+            with w_terminie(nowy_termin_sesji(st.session_state)):
+                wynik = czekaj_na_petli_klientow(
+                    lambda _: uzupelnij_przepisy(glowny, ",".join(skladniki), przepisy, [idx - 1]),
+                    przerwa.empty,
+                )
+        except Exception as e:
+            _pokaz_blad(e)
+            return
+    # wymieniony zestaw zastępuje wpis cache dla tych składników
+    if czy_kompletne(wynik):
+        _cache_przepisow().zapisz(klucz_w_przestrzeni(_przestrzen(), skladniki), wynik, skladniki, _przestrzen())
+        if KORPUS:
+            _korpus().dodaj_przepisy(wynik)
+    _ustaw_przepisy(wynik)
+    _ustaw_baze(skladniki_str, wynik)
+    TELEMETRIA.wyswietlone(len(wynik.przepisy), "app_g")
+    _renderuj_wyniki()
+
+
+def _panel_wymiany() -> None:
+    """
+    Przyciski "wymień ten przepis" – w panelu sterowania, bo fragment nie może
+    tworzyć widżetów w kolumnie wyników.
+    """
+    baza = _baza()
+    if baza is None or st.session_state.przepisy != st.session_state.baza_przepisow[1]:
+        return
+    idx = st.session_state.pop("wymien_przepis", None)
+    if idx is not None:
+        _wymien_przepis(idx)
+        baza = _baza() or baza
+    st.caption("🔄 Któryś przepis nie pasuje? Wymień tylko jego:")
+    for idx, przepis in enumerate(baza[1].przepisy, start=1):
+        st.button(
+            f"{idx}. {przepis.nazwa}",
+            key=f"wymien_{idx}",
+            on_click=_zaplanuj_wymiane,
+            args=(idx,),
+            use_container_width=True,
+        )
 
-# -------------------------------------------------------------------------
-#  Główne kolumny: po lewej – kontrolki, po prawej – wyniki
-# -------------------------------------------------------------------------
-col_controls, col_results = st.columns([2, 3])
 
 # ------------------------ POLE KONTROLE (lewa kolumna) --------------------
-with col_controls:
-    st.subheader("🛒 Twoje wybrane składniki")
-    wszystkie_skladniki = list(
-        st.session_state.wybrane_skladniki
-    ) + st.session_state.dodatkowe_skladniki
-
-    if not wszystkie_skladniki:
-        st.info("👈 Zacznij wybierać składniki z listy po lewej.")
-    else:
-        # grupowanie po kategoriach (tylko te, które naprawdę mają wybrane pozycje)
-        for kat, lista in KATEGORIE_SKLADNIKOW.items():
-            wybrane_w_kat = st.session_state.wybrane_skladniki.intersection(lista)
-            if wybrane_w_kat:
-                with st.container(border=True):
-                    st.markdown(f"**{IKONY_KATEGORII.get(kat, '🛒')} {kat}**")
-                    for s in sorted(wybrane_w_kat):
-                        st.markdown(f"&nbsp;&nbsp;&nbsp;• {s}")
-
-        # własne składniki – oddzielna sekcja
-        if st.session_state.dodatkowe_skladniki:
-            with st.container(border=True):
-                st.markdown(f"**{IKONY_KATEGORII['Dodatkowe']} Dodatkowe**")
-                for s in st.session_state.dodatkowe_skladniki:
-                    st.markdown(f"&nbsp;&nbsp;&nbsp;• {s}")
+@st.fragment
+def _panel_sterowania() -> None:
+    wszystkie_skladniki = _wszystkie_skladniki()
+    st.session_state.pokazano_przyciski = bool(wszystkie_skladniki)
 
     st.markdown("---")
     st.subheader("➕ Dodaj własne składniki")
@@ -437,69 +765,102 @@ with col_controls:
         on_change=_add_custom,
         label_visibility="collapsed",
     )
+    if st.session_state.podpowiedzi_skladnikow:
+        st.pills(
+            "Czy chodziło o:",
+            st.session_state.podpowiedzi_skladnikow,
+            key="wybor_podpowiedzi",
+            on_change=_wybierz_podpowiedz,
+        )
+    if st.session_state.pop("przerysuj_wszystko", False):
+        st.rerun()
+    _renderuj_podsumowanie()
+
+    if not wszystkie_skladniki:
+        return
+    st.markdown("---")
+    st.toggle(
+        "⚡ Natychmiastowe odpowiedzi",
+        key="tryb_natychmiastowy",
+        help="Pokazuj od razu przepisy z cache dla podobnego zestawu składników, "
+        "zanim nowe zostaną wygenerowane.",
+    )
+    st.toggle(
+        "♻️ Zachowuj pasujące przepisy",
+        key="tryb_zmian",
+        help="Po niewielkiej zmianie składników zostaw przepisy, które nadal da się "
+        "przygotować, i wygeneruj tylko brakujące.",
+    )
+    c1, c2 = st.columns(2)
+    if c1.button("🧹 Wyczyść wszystko", use_container_width=True, on_click=_clear_all):
+        st.rerun()  # checkboxy w panelu wyboru i wyniki też trzeba wyczyścić
+
+    if c2.button("🍳 Generuj przepisy!", type="primary", use_container_width=True):
+        # -----------------------------------------------------------------
+        #  Pobranie klucza API
+        # -----------------------------------------------------------------
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            st.error("Podaj klucz API Gemini.")
+            return
+        skladniki_str = ", ".join(sorted(ws.strip() for ws in wszystkie_skladniki))
+        podglad = panel_wynikow.container()
+        natychmiastowe = podglad.empty()
+        podobne: List[Tuple[float, Przepisy]] = []
+
+        def _pokaz_podobne() -> None:
+            podobne.extend(znajdz_podobne_przepisy(skladniki_str))
+            if not podobne or not st.session_state.tryb_natychmiastowy:
+                return
+            pokrycie, przepisy_z_cache = podobne[0]
+            with natychmiastowe.container():
+                st.info(
+                    f"⚡ Propozycje z cache dla {pokrycie:.0%} Twoich składników "
+                    "– trwa generowanie nowych przepisów..."
+                )
+                for idx, przepis in enumerate(przepisy_z_cache.przepisy, start=1):
+                    _renderuj_przepis(idx, przepis)
+
+        def _pokaz_przepis(idx: int, przepis: Przepis) -> None:
+            with podglad:
+                if idx == 1:
+                    natychmiastowe.empty()
+                    st.header("📋 Twoje propozycje przepisów")
+                _renderuj_przepis(idx, przepis)
+
+        # puste miejsce "odświeżane" w trakcie czekania – punkt, w którym Streamlit może przerwać przebieg
+        przerwa = st.empty()
+        termin = nowy_termin_sesji(st.session_state)
+        with st.spinner("🤖 Myślę nad przepisami..."), w_terminie(termin):
+            result = generuj_przepisy_z_cache(
+                api_key,
+                skladniki_str,
+                on_przepis=_pokaz_przepis,
+                on_chybienie=_pokaz_podobne,
+                baza=_baza() if st.session_state.tryb_zmian else None,
+                on_czekanie=przerwa.empty,
+                termin=termin,
+            )
+            if result is not None:
+                _ustaw_baze(skladniki_str, result)
+            elif podobne:
+                # awaria generowania – pokazujemy najbliższy zestaw z cache
+                st.info("Pokazuję najbardziej zbliżone przepisy zapisane wcześniej.")
+                result = podobne[0][1]
+            _ustaw_przepisy(result)
+            TELEMETRIA.wyswietlone(len(result.przepisy) if result else 0, "app_g")
+        # pełny wynik zastępuje podgląd strumieniowy
+        _renderuj_wyniki()
+    _panel_wymiany()
 
-    if wszystkie_skladniki:
-        st.markdown("---")
-        c1, c2 = st.columns(2)
-        if c1.button("🧹 Wyczyść wszystko", use_container_width=True, on_click=_clear_all):
-            pass  # Callback już wszystko obsłuży
-            
-        if c2.button("🍳 Generuj przepisy!", type="primary", use_container_width=True):
-            # -----------------------------------------------------------------
-            #  Pobranie klucza API
-            # -----------------------------------------------------------------
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                st.error("Podaj klucz API Gemini.")
-            else:
-                with st.spinner("🤖 Myślę nad przepisami..."):
-                    result = generuj_przepisy_z_cache(
-                        api_key, ", ".join(sorted(ws.strip() for ws in wszystkie_skladniki))
-                    )
-                    st.session_state.przepisy = result
 
 # ------------------------ POLE WYNIKI (prawa kolumna) --------------------
-with col_results:
-    # Bezpieczne sprawdzenie istnienia przepisów
-    if (hasattr(st.session_state, 'przepisy') and 
-        st.session_state.przepisy is not None and 
-        hasattr(st.session_state.przepisy, 'przepisy') and 
-        st.session_state.przepisy.przepisy):
-        
-        st.header("📋 Twoje propozycje przepisów")
-        for idx, przepis in enumerate(st.session_state.przepisy.przepisy, start=1):
-            with st.container(border=True):
-                st.markdown(f"### {idx}. {przepis.nazwa}")
-                c1, c2 = st.columns(2)
-                c1.metric("Czas przygotowania", przepis.czas_przygotowania)
-                c2.metric("Poziom trudności", przepis.poziom_trudnosci.capitalize())
-                st.markdown("---")
-                # składniki i instrukcje
-                col_ing, col_inst = st.columns([2, 3])
-                with col_ing:
-                    st.markdown("##### 🥑 Składniki:")
-                    for sklad in przepis.skladniki:
-                        ilosc = (
-                            f"{sklad.ilosc:.1f}"
-                            if isinstance(sklad.ilosc, float)
-                            else str(sklad.ilosc)
-                        )
-                        jednostka = f" {sklad.jednostka}" if sklad.jednostka else ""
-                        st.markdown(f"- **{sklad.nazwa}**: {ilosc}{jednostka}")
-                with col_inst:
-                    st.markdown("##### 📝 Sposób przygotowania:")
-                    for krok in sorted(przepis.kroki, key=lambda k: k.numer):
-                        st.markdown(f"**Krok {krok.numer}:** {krok.opis}")
-
-                if przepis.sugestie and przepis.sugestie.strip():
-                    with st.expander("💡 Sugestie i warianty"):
-                        st.write(przepis.sugestie)
-                st.write("")  # odstęp między przepisami
-                
-    elif (hasattr(st.session_state, 'przepisy') and 
-          st.session_state.przepisy is not None):
-        # Przypadek gdy przepisy zostały ustawione ale są puste/nieprawidłowe
-        st.warning("Nie udało się wygenerować przepisów. Spróbuj ponownie z innymi składnikami.")
+# przed fragmentami – generowanie w panelu sterowania podmienia je w tym samym przebiegu
+_renderuj_wyniki()
+with col_controls:
+    _panel_sterowania()
+with st.sidebar:
+    _panel_wyboru()
 
 # -------------------------------------------------------------------------
 #  Koniec skryptu
@@ -0,0 +1 @@
+"""Benchmarki potoku generowania przepisów (uruchamiane ręcznie, poza testami)."""
@@ -0,0 +1,422 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Lokalna atrapa API Gemini (REST) i Anthropic (Messages) do testów obciążenia
+#
+#  python -m benchmarks.atrapa_llm --port 8700 --opoznienie lognormalny:2,0.4 \
+#      --bledy-429 0.02 --bledy-5xx 0.01
+#
+#  Aplikacja kieruje zapytania do atrapy przez RECIPE_GEMINI_ENDPOINT
+#  i ANTHROPIC_BASE_URL. Odpowiedzi to poprawne przepisy (benchmarks.korpus),
+#  deterministyczne dla danego promptu; czas odpowiedzi, czas do pierwszego
+#  fragmentu i odsetek błędów 429/5xx są losowane z podanych rozkładów.
+#  Atrapa Anthropic naśladuje cache promptu: bloki systemowe z cache_control
+#  przy pierwszym zapytaniu liczą się jako zapis, przy kolejnych jako odczyt.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+from tornado.iostream import StreamClosedError
+
+from benchmarks.korpus import syntetyczne_przepisy
+
+
+@dataclass(frozen=True)
+class Rozklad:
+    """
+    Rozkład czasu w sekundach z napisu "rodzaj:parametry": `stala:2`
+    (albo samo `2`), `jednostajny:1,3`, `normalny:2,0.5`, `lognormalny:2,0.4`
+    (mediana, sigma) lub `wykladniczy:2` (średnia). Ujemne wartości są obcinane do 0.
+    """
+
+    rodzaj: str
+    parametry: Tuple[float, ...]
+
+    LICZBA_PARAMETROW = {"stala": 1, "jednostajny": 2, "normalny": 2, "lognormalny": 2, "wykladniczy": 1}
+
+    @classmethod
+    def z_napisu(cls, napis: str) -> "Rozklad":
+        rodzaj, _, parametry = napis.partition(":")
+        if not parametry:
+            rodzaj, parametry = "stala", rodzaj
+        try:
+            wartosci = tuple(float(p) for p in parametry.split(","))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Niepoprawne parametry rozkładu: {napis!r}")
+        if cls.LICZBA_PARAMETROW.get(rodzaj) != len(wartosci):
+            raise argparse.ArgumentTypeError(
+                f"Nieznany rozkład {napis!r} (dostępne: {', '.join(cls.LICZBA_PARAMETROW)})"
+            )
+        return cls(rodzaj, wartosci)
+
+    def losuj(self, rng: random.Random) -> float:
+        p = self.parametry
+        if self.rodzaj == "stala":
+            wartosc = p[0]
+        elif self.rodzaj == "jednostajny":
+            wartosc = rng.uniform(p[0], p[1])
+        elif self.rodzaj == "normalny":
+            wartosc = rng.gauss(p[0], p[1])
+        elif self.rodzaj == "lognormalny":
+            wartosc = rng.lognormvariate(math.log(p[0]), p[1]) if p[0] > 0 else 0.0
+        else:
+            wartosc = rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, wartosc)
+
+    def __str__(self) -> str:
+        return f"{self.rodzaj}:{','.join(f'{x:g}' for x in self.parametry)}"
+
+
+@dataclass
+class KonfiguracjaAtrapy:
+    opoznienie: Rozklad = Rozklad("lognormalny", (2.0, 0.4))  # cała odpowiedź
+    ttft: Rozklad = Rozklad("stala", (0.3,))  # pierwszy fragment strumienia
+    bledy_429: float = 0.0
+    bledy_5xx: float = 0.0
+    fragmenty: int = 40
+    ziarno: int = 0
+
+
+@dataclass
+class StatystykiAtrapy:
+    zapytania: Dict[str, int] = field(default_factory=dict)  # "gemini"/"anthropic" -> liczba
+    strumienie: int = 0
+    bledy: Dict[int, int] = field(default_factory=dict)
+    przerwane: int = 0
+    w_toku: int = 0
+    maks_w_toku: int = 0
+    cache_odczyty: int = 0
+    cache_zapisy: int = 0
+    # ostatnie ciało zapytania na dostawcę – do sprawdzania kształtu zapytań
+    ostatnie: Dict[str, dict] = field(default_factory=dict)
+
+    def slownik(self) -> dict:
+        return {
+            "zapytania": dict(self.zapytania),
+            "strumienie": self.strumienie,
+            "cache_promptu": {"odczyty": self.cache_odczyty, "zapisy": self.cache_zapisy},
+            "bledy": {str(k): v for k, v in sorted(self.bledy.items())},
+            "przerwane": self.przerwane,
+            "maks_w_toku": self.maks_w_toku,
+        }
+
+
+def tresc_odpowiedzi(prompt: str) -> str:
+    """Trzy przepisy (albo jeden, gdy prompt prosi o JEDEN) – stałe dla danego promptu."""
+    ziarno = zlib.crc32(prompt.encode("utf-8"))
+    przepisy = syntetyczne_przepisy(8, 6, 12, ziarno)
+    if "JEDEN przepis" in prompt:
+        return json.dumps(przepisy["przepisy"][0], ensure_ascii=False)
+    return json.dumps(przepisy, ensure_ascii=False)
+
+
+def _podziel(tekst: str, fragmenty: int) -> List[str]:
+    krok = max(1, -(-len(tekst) // max(1, fragmenty)))
+    return [tekst[i:i + krok] for i in range(0, len(tekst), krok)]
+
+
+class _ObslugaAtrapy(tornado.web.RequestHandler):
+    dostawca = ""
+    kod_przeciazenia = 503
+
+    def initialize(self, atrapa: "AtrapaLLM") -> None:
+        self.atrapa = atrapa
+        self._w_toku = False
+
+    def prepare(self) -> None:
+        s = self.atrapa.statystyki
+        s.zapytania[self.dostawca] = s.zapytania.get(self.dostawca, 0) + 1
+        s.w_toku += 1
+        s.maks_w_toku = max(s.maks_w_toku, s.w_toku)
+        self._w_toku = True
+
+    def _zwolnij(self) -> None:
+        if self._w_toku:
+            self._w_toku = False
+            self.atrapa.statystyki.w_toku -= 1
+
+    def on_finish(self) -> None:
+        self._zwolnij()
+
+    def on_connection_close(self) -> None:
+        if not self._finished:
+            self.atrapa.statystyki.przerwane += 1
+        self._zwolnij()
+
+    def _losowy_blad(self) -> Optional[int]:
+        k = self.atrapa.konfiguracja
+        los = self.atrapa.rng.random()
+        if los < k.bledy_429:
+            return 429
+        if los < k.bledy_429 + k.bledy_5xx:
+            return self.kod_przeciazenia
+        return None
+
+    def _odrzuc(self, kod: int) -> None:
+        s = self.atrapa.statystyki
+        s.bledy[kod] = s.bledy.get(kod, 0) + 1
+        self.set_status(kod)
+        if kod == 429:
+            self.set_header("Retry-After", "1")
+        self.finish(self.tresc_bledu(kod))
+
+    async def _strumieniuj(self, fragmenty: List[str], zapisz) -> None:
+        k = self.atrapa.konfiguracja
+        ttft, calosc = k.ttft.losuj(self.atrapa.rng), k.opoznienie.losuj(self.atrapa.rng)
+        przerwa = max(0.0, calosc - ttft) / max(1, len(fragmenty) - 1)
+        self.atrapa.statystyki.strumienie += 1
+        try:
+            await asyncio.sleep(ttft)
+            for i, fragment in enumerate(fragmenty):
+                if i:
+                    await asyncio.sleep(przerwa)
+                zapisz(i, fragment)
+                await self.flush()
+        except StreamClosedError:
+            return
+        self.finish()
+
+    def tresc_bledu(self, kod: int) -> dict:
+        raise NotImplementedError
+
+
+class _ObslugaGemini(_ObslugaAtrapy):
+    dostawca = "gemini"
+
+    def tresc_bledu(self, kod: int) -> dict:
+        status = {429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}[kod]
+        return {"error": {"code": kod, "message": f"Atrapa: {status}", "status": status}}
+
+    @staticmethod
+    def _odpowiedz(tekst: str, wejscie: int, wyjscie: int, koniec: bool) -> str:
+        kandydat = {"content": {"parts": [{"text": tekst}], "role": "model"}, "index": 0}
+        if koniec:
+            kandydat["finishReason"] = "STOP"
+        return json.dumps({
+            "candidates": [kandydat],
+            "usageMetadata": {
+                "promptTokenCount": wejscie,
+                "candidatesTokenCount": wyjscie,
+                "totalTokenCount": wejscie + wyjscie,
+            },
+        }, ensure_ascii=False)
+
+    async def post(self, model: str, metoda: str) -> None:
+        kod = self._losowy_blad()
+        if kod is not None:
+            return self._odrzuc(kod)
+        cialo = json.loads(self.request.body)
+        self.atrapa.statystyki.ostatnie[self.dostawca] = cialo
+        prompt = "".join(p.get("text", "") for c in cialo.get("contents", []) for p in c.get("parts", []))
+        tekst = tresc_odpowiedzi(prompt)
+        wejscie, wyjscie = len(prompt) // 4, len(tekst) // 4
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        if metoda == "generateContent":
+            await asyncio.sleep(self.atrapa.konfiguracja.opoznienie.losuj(self.atrapa.rng))
+            self.finish(self._odpowiedz(tekst, wejscie, wyjscie, True))
+            return
+        # REST streamGenerateContent: tablica JSON wysyłana po jednym elemencie
+        fragmenty = _podziel(tekst, self.atrapa.konfiguracja.fragmenty)
+
+        def _zapisz(i: int, fragment: str) -> None:
+            ostatni = i == len(fragmenty) - 1
+            self.write(("[" if i == 0 else ",\r\n") + self._odpowiedz(fragment, wejscie, wyjscie, ostatni))
+            if ostatni:
+                self.write("]")
+
+        await self._strumieniuj(fragmenty, _zapisz)
+
+    def get(self, model: str) -> None:
+        self.finish({"name": f"models/{model}", "displayName": model, "inputTokenLimit": 1048576,
+                     "outputTokenLimit": 8192, "supportedGenerationMethods": ["generateContent"]})
+
+
+class _ObslugaAnthropic(_ObslugaAtrapy):
+    dostawca = "anthropic"
+    kod_przeciazenia = 529
+
+    def tresc_bledu(self, kod: int) -> dict:
+        rodzaj = {429: "rate_limit_error", 529: "overloaded_error"}[kod]
+        return {"type": "error", "error": {"type": rodzaj, "message": f"Atrapa: {rodzaj}"}}
+
+    def _uzycie_wejscia(self, system, wiadomosci: str) -> dict:
+        """
+        Tokeny wejścia (~4 znaki na token) jak w API: prefiks do ostatniego
+        bloku z cache_control jest odczytem z cache, jeśli już go widziano
+        (bez limitu czasu i minimalnej długości), a inaczej zapisem.
+        """
+        if isinstance(system, str):
+            system = [{"type": "text", "text": system}]
+        teksty = [blok.get("text", "") for blok in system or []]
+        koniec = max((i + 1 for i, blok in enumerate(system or []) if blok.get("cache_control")), default=0)
+        prefiks, reszta = "".join(teksty[:koniec]), "".join(teksty[koniec:]) + wiadomosci
+        uzycie = {"input_tokens": len(reszta) // 4, "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        if prefiks:
+            s = self.atrapa.statystyki
+            if prefiks in self.atrapa.cache_promptu:
+                uzycie["cache_read_input_tokens"] = len(prefiks) // 4
+                s.cache_odczyty += 1
+            else:
+                self.atrapa.cache_promptu.add(prefiks)
+                uzycie["cache_creation_input_tokens"] = len(prefiks) // 4
+                s.cache_zapisy += 1
+        return uzycie
+
+    async def post(self) -> None:
+        kod = self._losowy_blad()
+        if kod is not None:
+            return self._odrzuc(kod)
+        cialo = json.loads(self.request.body)
+        self.atrapa.statystyki.ostatnie[self.dostawca] = cialo
+        wiadomosci = ""
+        for wiadomosc in cialo.get("messages", []):
+            tresc = wiadomosc.get("content", "")
+            wiadomosci += tresc if isinstance(tresc, str) else "".join(b.get("text", "") for b in tresc)
+        system = cialo.get("system") or []
+        prompt = (system if isinstance(system, str) else "".join(b.get("text", "") for b in system)) + wiadomosci
+        tekst = tresc_odpowiedzi(prompt)
+        model = cialo.get("model", "atrapa")
+        uzycie = {**self._uzycie_wejscia(system, wiadomosci), "output_tokens": len(tekst) // 4}
+        if not cialo.get("stream"):
+            await asyncio.sleep(self.atrapa.konfiguracja.opoznienie.losuj(self.atrapa.rng))
+            self.finish({
+                "id": f"msg_{zlib.crc32(prompt.encode()):08x}", "type": "message", "role": "assistant",
+                "model": model, "content": [{"type": "text", "text": tekst}],
+                "stop_reason": "end_turn", "stop_sequence": None, "usage": uzycie,
+            })
+            return
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        fragmenty = _podziel(tekst, self.atrapa.konfiguracja.fragmenty)
+
+        def _zdarzenie(nazwa: str, dane: dict) -> None:
+            self.write(f"event: {nazwa}\ndata: {json.dumps({'type': nazwa, **dane}, ensure_ascii=False)}\n\n")
+
+        def _zapisz(i: int, fragment: str) -> None:
+            if i == 0:
+                _zdarzenie("message_start", {"message": {
+                    "id": "msg_atrapa", "type": "message", "role": "assistant", "model": model,
+                    "content": [], "stop_reason": None, "stop_sequence": None,
+                    "usage": {**uzycie, "output_tokens": 1},
+                }})
+                _zdarzenie("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+            _zdarzenie("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": fragment}})
+            if i == len(fragmenty) - 1:
+                _zdarzenie("content_block_stop", {"index": 0})
+                _zdarzenie("message_delta", {
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": uzycie["output_tokens"]},
+                })
+                _zdarzenie("message_stop", {})
+
+        await self._strumieniuj(fragmenty, _zapisz)
+
+    def get(self) -> None:
+        self.finish({"data": [], "has_more": False, "first_id": None, "last_id": None})
+
+
+class AtrapaLLM:
+    """
+    Serwer atrapy we własnym wątku i pętli asyncio (jedno zapytanie = jedno
+    zadanie, więc atrapa nie ogranicza współbieżności testowanej aplikacji).
+    `uruchom()` zwraca adres bazowy, `statystyki` zbiera liczbę zapytań,
+    wstrzykniętych błędów i największą liczbę zapytań w toku.
+    """
+
+    def __init__(self, konfiguracja: Optional[KonfiguracjaAtrapy] = None):
+        self.konfiguracja = konfiguracja or KonfiguracjaAtrapy()
+        self.rng = random.Random(self.konfiguracja.ziarno)
+        self.statystyki = StatystykiAtrapy()
+        self.cache_promptu: Set[str] = set()
+        self.port: Optional[int] = None
+        self._petla: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._watek: Optional[threading.Thread] = None
+
+    @property
+    def adres(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def aplikacja(self) -> tornado.web.Application:
+        opcje = {"atrapa": self}
+        return tornado.web.Application([
+            (r"/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)", _ObslugaGemini, opcje),
+            (r"/v1beta/models/([^/:]+)", _ObslugaGemini, opcje),
+            (r"/v1/messages", _ObslugaAnthropic, opcje),
+            (r"/v1/models", _ObslugaAnthropic, opcje),
+        ], log_function=lambda obsluga: None)  # wstrzyknięte 429/5xx bez logów dostępu
+
+    async def _serwuj(self, port: int, gotowy: threading.Event) -> None:
+        gniazda = tornado.netutil.bind_sockets(port, "127.0.0.1")
+        serwer = tornado.httpserver.HTTPServer(self.aplikacja())
+        serwer.add_sockets(gniazda)
+        self.port = gniazda[0].getsockname()[1]
+        self._petla, self._stop = asyncio.get_running_loop(), asyncio.Event()
+        gotowy.set()
+        await self._stop.wait()
+        serwer.stop()
+
+    def uruchom(self, port: int = 0) -> str:
+        gotowy = threading.Event()
+        self._watek = threading.Thread(
+            target=lambda: asyncio.run(self._serwuj(port, gotowy)), name="atrapa-llm", daemon=True
+        )
+        self._watek.start()
+        if not gotowy.wait(10):
+            raise RuntimeError("Atrapa LLM nie wystartowała")
+        return self.adres
+
+    def zatrzymaj(self) -> None:
+        if self._petla is not None:
+            self._petla.call_soon_threadsafe(self._stop.set)
+            self._watek.join(timeout=5)
+
+
+def dodaj_argumenty(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--opoznienie", type=Rozklad.z_napisu, default=KonfiguracjaAtrapy.opoznienie,
+                        help="rozkład czasu całej odpowiedzi, np. lognormalny:2,0.4")
+    parser.add_argument("--ttft", type=Rozklad.z_napisu, default=KonfiguracjaAtrapy.ttft,
+                        help="rozkład czasu do pierwszego fragmentu strumienia")
+    parser.add_argument("--bledy-429", type=float, default=0.0, help="odsetek odpowiedzi 429")
+    parser.add_argument("--bledy-5xx", type=float, default=0.0, help="odsetek odpowiedzi 503/529")
+    parser.add_argument("--fragmenty", type=int, default=KonfiguracjaAtrapy.fragmenty,
+                        help="liczba fragmentów odpowiedzi strumieniowej")
+    parser.add_argument("--ziarno", type=int, default=0)
+
+
+def konfiguracja_z_argumentow(args: argparse.Namespace) -> KonfiguracjaAtrapy:
+    return KonfiguracjaAtrapy(args.opoznienie, args.ttft, args.bledy_429, args.bledy_5xx,
+                              args.fragmenty, args.ziarno)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Atrapa API Gemini/Anthropic do testów obciążenia")
+    parser.add_argument("--port", type=int, default=8700)
+    dodaj_argumenty(parser)
+    args = parser.parse_args(argv)
+
+    atrapa = AtrapaLLM(konfiguracja_z_argumentow(args))
+    adres = atrapa.uruchom(args.port)
+    print(f"RECIPE_GEMINI_ENDPOINT={adres} ANTHROPIC_BASE_URL={adres}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(atrapa.statystyki.slownik()), file=sys.stderr)
+    except KeyboardInterrupt:
+        atrapa.zatrzymaj()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
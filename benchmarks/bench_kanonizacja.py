@@ -0,0 +1,143 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Trafienia cache przed i po kanonizacji składników – odtworzenie ruchu
+#
+#  python -m benchmarks.bench_kanonizacja                       # ruch syntetyczny
+#  python -m benchmarks.bench_kanonizacja --log logs/telemetria.jsonl
+#
+#  Log to JSONL: zdarzenia "zapytanie" z dziennika telemetrii
+#  (RECIPE_TELEMETRY_LOG) albo wiersze wejścia trybu wsadowego
+#  ({"skladniki": "a, b"} / lista). Cache jest nieograniczony – trafienie
+#  to wybór, którego klucz już się pojawił.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from recipe_core.cache import klucze_skladnikow
+from recipe_core.kanonizacja import podpowiedzi
+from recipe_core.skladniki import SLOWNIK_SKLADNIKOW
+
+# Jak ludzie wpisują składniki z listy w polu "Dodaj własne składniki"
+WARIANTY: Dict[str, List[str]] = {
+    "Jajka": ["jajko", "jaja", "jajek", "JAJKA"],
+    "Pomidory świeże": ["pomidory", "pomidor", "świeże pomidory"],
+    "Pomidory w puszce": ["pomidory z puszki", "pomidory krojone"],
+    "Filet z kurczaka": ["kurczak", "pierś z kurczaka", "filety z kurczaka"],
+    "Cebula": ["cebule", "cebula "],
+    "Czosnek świeży": ["czosnek", "ząbki czosnku"],
+    "Ziemniaki": ["ziemniak", "ziemniaków"],
+    "Marchewka": ["marchew", "marchewki"],
+    "Mąka pszenna": ["mąka", "maka pszenna"],
+    "Ser biały (twaróg)": ["twaróg", "twarożek"],
+    "Ser żółty": ["ser", "żółty ser"],
+    "Mleko": ["mleka"],
+    "Masło": ["masła", "maslo"],
+    "Ryż biały": ["ryż", "biały ryż"],
+    "Oliwa z oliwek": ["oliwa"],
+    "Papryka": ["papryka czerwona", "papryki"],
+    "Makaron": ["makaronu"],
+    "Pieprz czarny": ["pieprz"],
+}
+WLASNE = [["świeży imbir", "imbir świeży", "imbir"], ["pieczarki", "pieczarka"], ["szpinak", "świeży szpinak"]]
+
+
+def _zipf(rng: random.Random, n: int, s: float = 1.1) -> int:
+    wagi = [1 / (k + 1) ** s for k in range(n)]
+    return rng.choices(range(n), weights=wagi)[0]
+
+
+def ruch_syntetyczny(zapytania: int, zestawy: int, ziarno: int = 0) -> Iterator[List[str]]:
+    """
+    Użytkownicy wybierają popularne zestawy (rozkład Zipfa), a każdy składnik
+    z prawdopodobieństwem 0.3 wpisują ręcznie w jednej z form z WARIANTY.
+    """
+    rng = random.Random(ziarno)
+    popularne = list(WARIANTY) + [s for s in SLOWNIK_SKLADNIKOW if s not in WARIANTY]
+    bazy = []
+    for _ in range(zestawy):
+        zestaw = {popularne[_zipf(rng, len(popularne), 0.8)] for _ in range(rng.randint(2, 5))}
+        wlasne = [rng.choice(WLASNE)] if rng.random() < 0.2 else []
+        bazy.append((sorted(zestaw), wlasne))
+    for _ in range(zapytania):
+        zestaw, wlasne = bazy[_zipf(rng, len(bazy))]
+        wybor = [
+            rng.choice(WARIANTY[s]) if s in WARIANTY and rng.random() < 0.3 else s
+            for s in zestaw
+        ]
+        wybor += [rng.choice(warianty) for warianty in wlasne]
+        rng.shuffle(wybor)
+        yield wybor
+
+
+def ruch_z_logu(sciezka: str) -> Iterator[List[str]]:
+    with open(sciezka, encoding="utf-8") as f:
+        for linia in f:
+            if not linia.strip():
+                continue
+            wpis = json.loads(linia)
+            if "rodzaj" in wpis and wpis["rodzaj"] != "zapytanie":
+                continue
+            skladniki = wpis.get("skladniki")
+            if isinstance(skladniki, str):
+                skladniki = skladniki.split(",")
+            if skladniki:
+                yield list(skladniki)
+
+
+def klucz_przed(skladniki: Iterable[str]) -> str:
+    """Normalizacja sprzed kanonizacji: strip().lower() i sortowanie."""
+    return ",".join(sorted({s.strip().lower() for s in skladniki if s and s.strip()}))
+
+
+def klucz_po(skladniki: Iterable[str]) -> str:
+    return ",".join(klucze_skladnikow(skladniki))
+
+
+def odtworz(ruch: List[List[str]], klucz: Callable[[Iterable[str]], str]) -> Dict[str, float]:
+    widziane = set()
+    trafienia = 0
+    start = time.perf_counter()
+    for wybor in ruch:
+        k = klucz(wybor)
+        trafienia += k in widziane
+        widziane.add(k)
+    czas = time.perf_counter() - start
+    return {
+        "zapytania": len(ruch),
+        "rozne_klucze": len(widziane),
+        "trafienia": trafienia,
+        "wspolczynnik_trafien": round(trafienia / len(ruch), 4) if ruch else 0.0,
+        "us_na_zapytanie": round(czas / max(len(ruch), 1) * 1e6, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Wpływ kanonizacji składników na trafienia cache")
+    parser.add_argument("--log", help="JSONL z zapytaniami (dziennik telemetrii lub wejście wsadowe)")
+    parser.add_argument("--zapytania", type=int, default=20000)
+    parser.add_argument("--zestawy", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    ruch = list(ruch_z_logu(args.log) if args.log else ruch_syntetyczny(args.zapytania, args.zestawy))
+    przed, po = odtworz(ruch, klucz_przed), odtworz(ruch, klucz_po)
+
+    prefiksy = ["ja", "pom", "kurcz", "twar", "mąka p", "cukni", "oliw"] * 200
+    start = time.perf_counter()
+    for p in prefiksy:
+        podpowiedzi(p)
+    podpowiedzi_us = (time.perf_counter() - start) / len(prefiksy) * 1e6
+
+    print(json.dumps({
+        "przed": przed,
+        "po": po,
+        "przyrost_pp": round((po["wspolczynnik_trafien"] - przed["wspolczynnik_trafien"]) * 100, 2),
+        "podpowiedzi_us": round(podpowiedzi_us, 1),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Wyszukiwanie w lokalnym korpusie: czas zapytania przy N przepisach
+#
+#  python -m benchmarks.bench_korpus                    # 1 000 000 przepisów
+#  python -m benchmarks.bench_korpus --przepisy 100000 --zapytania 500
+#
+#  Macierz jest losowa (5–12 składników na przepis ze słownika panelu
+#  wyboru), a zapytania to losowe wybory 3–10 składników. Mierzony jest
+#  pełny `szukaj` – ocena wszystkich wierszy, ranking i walidacja trafień.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.kanonizacja import klucz_skladnika
+from recipe_core.korpus import BITY_SLOWA, KorpusPrzepisow
+from recipe_core.skladniki import SLOWNIK_SKLADNIKOW
+
+
+def losowa_macierz(przepisy: int, skladniki: int, rng: np.random.Generator) -> np.ndarray:
+    """Wiersze z 5–12 losowymi bitami spośród `skladniki` kolumn."""
+    slowa = -(-skladniki // BITY_SLOWA)
+    bity = np.zeros((przepisy, slowa), dtype=np.uint64)
+    rozmiary = rng.integers(5, 13, size=przepisy)
+    for k in range(12):
+        wiersze = np.flatnonzero(rozmiary > k)
+        kolumny = rng.integers(0, skladniki, size=wiersze.size)
+        np.bitwise_or.at(
+            bity,
+            (wiersze, kolumny // BITY_SLOWA),
+            np.uint64(1) << (kolumny % BITY_SLOWA).astype(np.uint64),
+        )
+    return bity
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Czas wyszukiwania w korpusie przepisów")
+    parser.add_argument("--przepisy", type=int, default=1_000_000)
+    parser.add_argument("--zapytania", type=int, default=200)
+    parser.add_argument("--maks-brakujacych", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    kolumny = [klucz_skladnika(s) for s in SLOWNIK_SKLADNIKOW]
+    start = time.perf_counter()
+    bity = losowa_macierz(args.przepisy, len(kolumny), rng)
+    # treść wszystkich wierszy jest ta sama – liczy się tylko macierz
+    przepis = json.dumps(syntetyczne_przepisy(8, 5, 10, liczba_przepisow=1)["przepisy"][0]).encode()
+    korpus = KorpusPrzepisow.z_tablic(kolumny, bity, [przepis] * args.przepisy)
+    budowa_s = time.perf_counter() - start
+
+    czasy, trafienia = [], []
+    for _ in range(args.zapytania):
+        wybor = rng.choice(kolumny, size=int(rng.integers(3, 11)), replace=False).tolist()
+        start = time.perf_counter()
+        wynik = korpus.szukaj(wybor, 3, maks_brakujacych=args.maks_brakujacych, min_pokrycie=0.0)
+        czasy.append(time.perf_counter() - start)
+        trafienia.append(len(wynik))
+
+    czasy.sort()
+    print(json.dumps({
+        **korpus.raport(),
+        "budowa_s": round(budowa_s, 2),
+        "zapytania": args.zapytania,
+        "p50_ms": round(statistics.median(czasy) * 1000, 2),
+        "p95_ms": round(czasy[int(0.95 * (len(czasy) - 1))] * 1000, 2),
+        "max_ms": round(czasy[-1] * 1000, 2),
+        "srednio_trafien": round(statistics.mean(trafienia), 2),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
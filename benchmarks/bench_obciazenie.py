@@ -0,0 +1,321 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Test obciążenia: N równoległych sesji app_g.py na atrapie API modeli
+#
+#  python -m benchmarks.bench_obciazenie --sesje 20 --generowania 3
+#  python -m benchmarks.bench_obciazenie --sesje 50 --opoznienie lognormalny:3,0.5 \
+#      --bledy-429 0.02 --zapisz przed.json
+#  python -m benchmarks.bench_obciazenie --sesje 50 --porownaj przed.json --prog 10
+#
+#  Każda sesja to klient protokołu przeglądarki (benchmarks.bench_ui) przechodzący
+#  zwykłą ścieżkę: kategoria -> zaznaczenie składników -> "Generuj" (wynik
+#  wyświetlony) -> "Wyczyść". Serwer Streamlit rozmawia z lokalną atrapą Gemini
+#  i Anthropic (benchmarks.atrapa_llm). Pamięć, wątki i CPU procesu serwera są
+#  próbkowane z /proc (Linux). `--prog` kończy się kodem 1, gdy przepustowość
+#  spadła albo p95 wzrosło o więcej niż podany procent względem `--porownaj`.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.atrapa_llm import AtrapaLLM, dodaj_argumenty, konfiguracja_z_argumentow
+from benchmarks.bench_ui import APP, KlientStreamlit, _uruchom_serwer, _wolny_port
+from recipe_core.skladniki import KATEGORIE_SKLADNIKOW
+
+GENERUJ = "🍳 Generuj przepisy!"
+WYCZYSC = "🧹 Wyczyść wszystko"
+KATEGORIA = "Kategoria:"
+# zestawy wybierane przez wiele sesji (trafienia cache / wspólne wywołania)
+WSPOLNE_ZESTAWY = 5
+
+
+def kwantyl(wartosci: List[float], q: float) -> float:
+    if not wartosci:
+        return 0.0
+    posortowane = sorted(wartosci)
+    return posortowane[min(len(posortowane) - 1, int(q * len(posortowane)))]
+
+
+class ProbkowanieProcesu:
+    """RSS, liczba wątków i czas CPU procesu `pid` co `okres` sekund (z /proc)."""
+
+    def __init__(self, pid: int, okres: float = 0.1):
+        self.pid = pid
+        self.okres = okres
+        self.probki: List[Dict[str, float]] = []
+        self._stop = threading.Event()
+        self._watek = threading.Thread(target=self._probkuj, name="probkowanie", daemon=True)
+        self._takt = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def probka(self) -> Optional[Dict[str, float]]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                pola = dict(linia.split(":", 1) for linia in f if ":" in linia)
+            with open(f"/proc/{self.pid}/stat") as f:
+                stat = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return {
+            "czas": time.perf_counter(),
+            "rss_mb": int(pola["VmRSS"].split()[0]) / 1024,
+            "watki": int(pola["Threads"]),
+            "cpu_s": (int(stat[11]) + int(stat[12])) / self._takt,  # utime + stime
+        }
+
+    def _probkuj(self) -> None:
+        while not self._stop.wait(self.okres):
+            probka = self.probka()
+            if probka is not None:
+                self.probki.append(probka)
+
+    def start(self) -> None:
+        self._watek.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._watek.join()
+
+
+class Sesja:
+    """Jeden symulowany użytkownik; czasy w sekundach."""
+
+    def __init__(self, nr: int, url: str, args: argparse.Namespace):
+        self.nr = nr
+        self.url = url
+        self.args = args
+        self.rng = random.Random(args.ziarno * 100_003 + nr)
+        self.generowania: List[float] = []
+        self.nieudane: List[float] = []
+        self.wybor: List[float] = []
+        self.blad: Optional[str] = None
+
+    def _zestaw(self) -> Tuple[int, List[str]]:
+        kategorie = list(KATEGORIE_SKLADNIKOW)
+        rng = self.rng
+        if self.args.wspolne and rng.random() < self.args.wspolne:
+            rng = random.Random(rng.randrange(WSPOLNE_ZESTAWY))
+        kategoria = rng.randrange(len(kategorie))
+        skladniki = KATEGORIE_SKLADNIKOW[kategorie[kategoria]]
+        return kategoria, rng.sample(skladniki, min(self.args.skladniki, len(skladniki)))
+
+    def przebieg(self, koniec: threading.Event) -> None:
+        try:
+            klient = KlientStreamlit(self.url)
+        except OSError as e:
+            self.blad = f"{type(e).__name__}: {e}"
+            return
+        try:
+            klient.uruchom()
+            for i in range(self.args.generowania):
+                if i:
+                    klient.ustaw(WYCZYSC, "trigger_value", True)
+                    klient.zapomnij_stany()  # zaznaczenia wyczyściła aplikacja
+                kategoria, skladniki = self._zestaw()
+                if kategoria:
+                    klient.ustaw(KATEGORIA, "int_value", kategoria)
+                for skladnik in skladniki:
+                    self.wybor.append(klient.ustaw(skladnik, "bool_value", True)[0])
+                bledy = klient.bledy
+                czas = klient.ustaw(GENERUJ, "trigger_value", True)[0]
+                (self.generowania if klient.bledy == bledy else self.nieudane).append(czas)
+                if self.args.przerwa:
+                    time.sleep(self.rng.uniform(0, 2 * self.args.przerwa))
+            # połączenie zostaje otwarte do pomiaru pamięci wszystkich sesji
+            koniec.wait()
+        except Exception as e:
+            self.blad = f"{type(e).__name__}: {e}"
+        finally:
+            klient.zamknij()
+
+
+def _podsumuj_probki(probki: List[Dict[str, float]], bazowa: Dict[str, float],
+                     start: float, stop: float) -> Dict[str, float]:
+    okno = [p for p in probki if start <= p["czas"] <= stop] or probki[-1:]
+    watki = [p["watki"] for p in okno]
+    zajete = statistics.fmean(watki) - bazowa["watki"]
+    cpu_s = okno[-1]["cpu_s"] - okno[0]["cpu_s"] if len(okno) > 1 else 0.0
+    czas = max(stop - start, 1e-9)
+    return {
+        "bazowe": bazowa["watki"],
+        "srednio": round(statistics.fmean(watki), 1),
+        "maks": max(watki),
+        # wątki ponad stan spoczynku ~ przebiegi skryptu w toku (także czekające na model)
+        "zajete_srednio": round(zajete, 1),
+        "cpu_procesu_proc": round(100 * cpu_s / czas, 1),
+        # niski odsetek = wątki skryptu głównie czekają na odpowiedź modelu
+        "cpu_na_zajety_watek_proc": round(100 * cpu_s / czas / zajete, 1) if zajete > 0.5 else None,
+    }
+
+
+def zmierz(args: argparse.Namespace) -> dict:
+    atrapa = AtrapaLLM(konfiguracja_z_argumentow(args))
+    adres = atrapa.uruchom()
+    env = {
+        "RECIPE_GEMINI_ENDPOINT": adres,
+        "ANTHROPIC_BASE_URL": adres,
+        "ANTHROPIC_API_KEY": "benchmark" if args.hedging else "",
+        "RECIPE_HEDGE": "1" if args.hedging else "0",
+        "RECIPE_STREAM": "0" if args.bez_strumienia else "1",
+        **dict(e.partition("=")[::2] for e in args.env),
+    }
+    with tempfile.TemporaryDirectory() as katalog:
+        port = _wolny_port()
+        serwer = _uruchom_serwer(args.app, port, katalog, env)
+        probkowanie = ProbkowanieProcesu(serwer.pid)
+        try:
+            time.sleep(1.0)  # serwer po starcie dokańcza inicjalizację
+            bazowa = probkowanie.probka()
+            if bazowa is None:
+                raise RuntimeError("Brak /proc – pomiar zasobów procesu wymaga Linuksa")
+            url = f"ws://127.0.0.1:{port}/_stcore/stream"
+            sesje = [Sesja(nr, url, args) for nr in range(args.sesje)]
+            koniec = threading.Event()
+            watki = []
+            probkowanie.start()
+            start = time.perf_counter()
+            for nr, sesja in enumerate(sesje):
+                watek = threading.Thread(target=sesja.przebieg, args=(koniec,), name=f"sesja-{nr}", daemon=True)
+                watek.start()
+                watki.append(watek)
+                if args.rampa:
+                    time.sleep(args.rampa / args.sesje)
+            while any(len(s.generowania) + len(s.nieudane) < args.generowania and s.blad is None
+                      for s in sesje):
+                time.sleep(0.05)
+            stop = time.perf_counter()
+            time.sleep(0.5)
+            po = probkowanie.probka() or bazowa
+            koniec.set()
+            for watek in watki:
+                watek.join(timeout=10)
+            probkowanie.stop()
+        finally:
+            serwer.terminate()
+            serwer.wait(timeout=10)
+            atrapa.zatrzymaj()
+
+    czasy = [c for s in sesje for c in s.generowania]
+    nieudane = sum(len(s.nieudane) for s in sesje)
+    wybor = [c for s in sesje for c in s.wybor]
+    czas = stop - start
+    return {
+        "konfiguracja": {
+            "app": args.app, "sesje": args.sesje, "generowania": args.generowania,
+            "opoznienie": str(args.opoznienie), "ttft": str(args.ttft),
+            "bledy_429": args.bledy_429, "bledy_5xx": args.bledy_5xx,
+            "strumien": not args.bez_strumienia, "hedging": args.hedging, "wspolne": args.wspolne,
+            "env": args.env,
+        },
+        "generowanie": {
+            "udane": len(czasy),
+            "nieudane": nieudane,
+            "sesje_przerwane": sum(s.blad is not None for s in sesje),
+            "czas_s": round(czas, 2),
+            "przepustowosc_na_s": round(len(czasy) / czas, 3) if czas else 0.0,
+            "p50_ms": round(kwantyl(czasy, 0.50) * 1000, 1),
+            "p95_ms": round(kwantyl(czasy, 0.95) * 1000, 1),
+            "p99_ms": round(kwantyl(czasy, 0.99) * 1000, 1),
+            "maks_ms": round(max(czasy, default=0.0) * 1000, 1),
+        },
+        "wybor_skladnika": {
+            "p50_ms": round(kwantyl(wybor, 0.50) * 1000, 1),
+            "p95_ms": round(kwantyl(wybor, 0.95) * 1000, 1),
+        },
+        "pamiec": {
+            "rss_start_mb": round(bazowa["rss_mb"], 1),
+            "rss_koniec_mb": round(po["rss_mb"], 1),
+            "na_sesje_mb": round((po["rss_mb"] - bazowa["rss_mb"]) / max(args.sesje, 1), 2),
+        },
+        "watki": _podsumuj_probki(probkowanie.probki, bazowa, start, stop),
+        "atrapa": atrapa.statystyki.slownik(),
+        "bledy_sesji": sorted({s.blad for s in sesje if s.blad})[:5],
+    }
+
+
+# (sekcja, metryka, czy większa wartość jest lepsza)
+POROWNYWANE = [
+    ("generowanie", "przepustowosc_na_s", True),
+    ("generowanie", "p50_ms", False),
+    ("generowanie", "p95_ms", False),
+    ("generowanie", "p99_ms", False),
+    ("pamiec", "na_sesje_mb", False),
+    ("watki", "maks", False),
+]
+# metryki, których pogorszenie ponad --prog kończy test kodem 1
+BRAMKOWANE = [("generowanie", "przepustowosc_na_s", True), ("generowanie", "p95_ms", False)]
+
+
+def regresje(raport: dict, bazowy: dict, prog: float) -> List[str]:
+    """Metryki gorsze od bazowych o więcej niż `prog` procent (przepustowość i p95)."""
+    wynik = []
+    for sekcja, metryka, wiecej_lepiej in BRAMKOWANE:
+        teraz, bylo = raport[sekcja][metryka], bazowy[sekcja][metryka]
+        if not bylo:
+            continue
+        zmiana = (teraz - bylo) / bylo * 100
+        if (-zmiana if wiecej_lepiej else zmiana) > prog:
+            wynik.append(f"{sekcja}.{metryka}: {bylo} -> {teraz} ({zmiana:+.1f}%)")
+    return wynik
+
+
+def wypisz(raport: dict, bazowy: Optional[dict] = None) -> None:
+    k = raport["konfiguracja"]
+    print(f"# {k['app']}: {k['sesje']} sesji × {k['generowania']} generowań, opóźnienie {k['opoznienie']}")
+    for sekcja, metryka, _ in POROWNYWANE:
+        linia = f"  {sekcja + '.' + metryka:<32} {raport[sekcja][metryka]!s:>10}"
+        if bazowy:
+            linia += f"   (było {bazowy[sekcja][metryka]!s:>10})"
+        print(linia)
+    g = raport["generowanie"]
+    print(f"  udane/nieudane/przerwane sesje  {g['udane']}/{g['nieudane']}/{g['sesje_przerwane']}")
+    print(f"  wątki                           {raport['watki']}")
+    print(f"  atrapa                          {raport['atrapa']}")
+    for blad in raport["bledy_sesji"]:
+        print(f"  ! {blad}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Test obciążenia app_g.py z atrapą API modeli")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--sesje", type=int, default=20, help="liczba równoległych sesji")
+    parser.add_argument("--generowania", type=int, default=3, help="generowań na sesję")
+    parser.add_argument("--skladniki", type=int, default=3, help="składników w jednym wyborze")
+    parser.add_argument("--wspolne", type=float, default=0.0,
+                        help=f"odsetek wyborów z {WSPOLNE_ZESTAWY} wspólnych zestawów")
+    parser.add_argument("--przerwa", type=float, default=0.0, help="średni czas namysłu między generowaniami [s]")
+    parser.add_argument("--rampa", type=float, default=0.0, help="czas rozłożenia startu sesji [s]")
+    parser.add_argument("--bez-strumienia", action="store_true", help="RECIPE_STREAM=0")
+    parser.add_argument("--hedging", action="store_true", help="RECIPE_HEDGE=1 z atrapą Anthropic jako zapasem")
+    parser.add_argument("--env", action="append", default=[], metavar="ZMIENNA=WARTOSC",
+                        help="dodatkowe zmienne środowiska serwera, np. RECIPE_GEMINI_RPM=100000")
+    dodaj_argumenty(parser)
+    parser.add_argument("--zapisz", help="zapisz raport do pliku JSON")
+    parser.add_argument("--porownaj", help="raport JSON innej wersji")
+    parser.add_argument("--prog", type=float, help="dopuszczalne pogorszenie [%%] względem --porownaj")
+    args = parser.parse_args(argv)
+
+    raport = zmierz(args)
+    bazowy = None
+    if args.porownaj:
+        with open(args.porownaj, encoding="utf-8") as f:
+            bazowy = json.load(f)
+    wypisz(raport, bazowy)
+    if args.zapisz:
+        with open(args.zapisz, "w", encoding="utf-8") as f:
+            json.dump(raport, f, ensure_ascii=False, indent=2)
+    if bazowy is not None and args.prog is not None:
+        pogorszone = regresje(raport, bazowy, args.prog)
+        for opis in pogorszone:
+            print(f"  REGRESJA {opis}")
+        return 1 if pogorszone else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
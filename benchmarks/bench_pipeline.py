@@ -0,0 +1,201 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Mikro-benchmarki potoku: generowanie -> oczyszczanie -> JSON -> walidacja -> render
+#
+#  python -m benchmarks.bench_pipeline                      # tabela wyników
+#  python -m benchmarks.bench_pipeline --zapisz przed.json  # zapis do porównania
+#  python -m benchmarks.bench_pipeline --porownaj przed.json
+#  python -m benchmarks.bench_pipeline --e2e --opoznienie 0.5
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Dict, Optional
+
+import pydantic
+
+from benchmarks.korpus import korpus_syntetyczny, wczytaj_korpus
+from recipe_core.decoding import ADAPTER_PRZEPISY, BladGenerowania, dekoduj_przepisy, wyodrebnij_json
+from recipe_core.generator import generuj_przepisy
+from recipe_core.models import Przepisy
+from recipe_core.providers import FakeProvider
+from recipe_core.render import html_przepisu, tekst_przepisu, zbuduj_html, zbuduj_tekst
+
+Statystyki = Dict[str, float]
+
+
+def _statystyki(serie, wywolania: int) -> Statystyki:
+    serie = sorted(serie)
+    return {
+        "min": serie[0],
+        "mediana": statistics.median(serie),
+        "srednia": statistics.fmean(serie),
+        "odch_std": statistics.stdev(serie) if len(serie) > 1 else 0.0,
+        "p95": serie[min(len(serie) - 1, int(0.95 * len(serie)))],
+        "wywolania": wywolania,
+    }
+
+
+def zmierz(fn: Callable[[], object], powtorzenia: int = 7, min_czas: float = 0.05) -> Statystyki:
+    """
+    Czas jednego wywołania w mikrosekundach. Liczba wywołań w serii jest
+    dobierana tak, by seria trwała co najmniej `min_czas`; statystyki liczone
+    są z `powtorzenia` serii.
+    """
+    timer = timeit.Timer(fn)
+    liczba, _ = timer.autorange()
+    liczba = max(1, int(liczba * min_czas / 0.2))
+    serie = [t / liczba * 1e6 for t in timer.repeat(repeat=powtorzenia, number=liczba)]
+    return _statystyki(serie, liczba)
+
+
+def _bez_wyjatku(fn: Callable[[], object]) -> Callable[[], object]:
+    def _opakowane():
+        try:
+            fn()
+        except (BladGenerowania, ValueError, TypeError):
+            pass
+
+    return _opakowane
+
+
+def etapy_dla(tekst: str) -> Dict[str, Callable[[], object]]:
+    """Funkcje do zmierzenia dla jednej odpowiedzi – etap po etapie."""
+    etapy: Dict[str, Callable[[], object]] = {
+        "oczyszczanie": lambda: wyodrebnij_json(tekst),
+        "dekodowanie_calosc": _bez_wyjatku(lambda: dekoduj_przepisy(tekst)),
+    }
+    oczyszczony = wyodrebnij_json(tekst)
+    try:
+        dane = json.loads(oczyszczony)
+    except json.JSONDecodeError:
+        etapy["json_loads"] = _bez_wyjatku(lambda: json.loads(oczyszczony))
+        return etapy
+    etapy["json_loads"] = lambda: json.loads(oczyszczony)
+    etapy["walidacja"] = _bez_wyjatku(lambda: Przepisy(**dane))
+    etapy["walidacja_z_json"] = _bez_wyjatku(lambda: ADAPTER_PRZEPISY.validate_json(oczyszczony))
+    try:
+        przepisy = Przepisy(**dane)
+    except (pydantic.ValidationError, TypeError):
+        return etapy
+    etapy["render_tekst"] = lambda: [zbuduj_tekst(0, p) for p in przepisy.przepisy]
+    etapy["render_html"] = lambda: [zbuduj_html(i, p) for i, p in enumerate(przepisy.przepisy, 1)]
+    # rerun z wynikami w sesji: widoki z pamięci po skrócie treści
+    etapy["render_tekst_pamiec"] = lambda: [tekst_przepisu(p) for p in przepisy.przepisy]
+    etapy["render_html_pamiec"] = lambda: [html_przepisu(i, p) for i, p in enumerate(przepisy.przepisy, 1)]
+    return etapy
+
+
+def zmierz_e2e(tekst: str, opoznienie: float, powtorzenia: int) -> Dict[str, Statystyki]:
+    """Pełne wywołanie z atrapą dostawcy: czas całkowity i czas do pierwszego przepisu."""
+    calosc, pierwszy = [], []
+    for _ in range(powtorzenia):
+        provider = FakeProvider(tekst, opoznienie)
+        start = time.perf_counter()
+        pierwszy_czas = []
+
+        def _on_przepis(idx, _przepis):
+            if idx == 1:
+                pierwszy_czas.append(time.perf_counter() - start)
+
+        try:
+            generuj_przepisy(provider, "jajka, mąka", on_przepis=_on_przepis)
+        except BladGenerowania:
+            pass
+        calosc.append((time.perf_counter() - start) * 1e6)
+        if pierwszy_czas:
+            pierwszy.append(pierwszy_czas[0] * 1e6)
+
+    wynik = {"e2e_strumien": _statystyki(calosc, 1)}
+    if pierwszy:
+        wynik["e2e_pierwszy_przepis"] = _statystyki(pierwszy, 1)
+    return wynik
+
+
+def _rewizja() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def uruchom_benchmarki(
+    korpus: Dict[str, str],
+    powtorzenia: int,
+    e2e: bool = False,
+    opoznienie: float = 0.0,
+) -> dict:
+    wyniki: Dict[str, Dict[str, Statystyki]] = {}
+    for przypadek, tekst in korpus.items():
+        wyniki[przypadek] = {etap: zmierz(fn, powtorzenia) for etap, fn in etapy_dla(tekst).items()}
+        if e2e:
+            wyniki[przypadek].update(zmierz_e2e(tekst, opoznienie, powtorzenia))
+    return {
+        "meta": {
+            "rewizja": _rewizja(),
+            "python": platform.python_version(),
+            "pydantic": pydantic.VERSION,
+            "powtorzenia": powtorzenia,
+            "opoznienie_e2e": opoznienie if e2e else None,
+        },
+        "wyniki": wyniki,
+    }
+
+
+def _format_us(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:9.3f} s "
+    if us >= 1e3:
+        return f"{us / 1e3:9.3f} ms"
+    return f"{us:9.2f} µs"
+
+
+def wypisz(raport: dict, bazowy: Optional[dict] = None) -> None:
+    meta = raport["meta"]
+    print(f"# rewizja {meta['rewizja'] or '?'}  python {meta['python']}  pydantic {meta['pydantic']}")
+    if bazowy:
+        print(f"# porównanie z rewizją {bazowy['meta'].get('rewizja') or '?'}")
+    for przypadek, etapy in raport["wyniki"].items():
+        print(f"\n[{przypadek}]")
+        for etap, stat in etapy.items():
+            linia = f"  {etap:<22} mediana {_format_us(stat['mediana'])}  ±{_format_us(stat['odch_std'])}"
+            baza = (bazowy or {}).get("wyniki", {}).get(przypadek, {}).get(etap)
+            if baza:
+                zmiana = (stat["mediana"] - baza["mediana"]) / baza["mediana"] * 100
+                szum = stat["odch_std"] + baza["odch_std"]
+                istotna = abs(stat["mediana"] - baza["mediana"]) > szum and abs(zmiana) > 5
+                linia += f"  vs {_format_us(baza['mediana'])}  {zmiana:+6.1f}%{' *' if istotna else ''}"
+            print(linia)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mikro-benchmarki potoku przepisów")
+    parser.add_argument("--korpus", help="katalog z nagranymi odpowiedziami (*.txt, *.json)")
+    parser.add_argument("--powtorzenia", type=int, default=7)
+    parser.add_argument("--e2e", action="store_true", help="dodaj pomiar end-to-end z atrapą dostawcy")
+    parser.add_argument("--opoznienie", type=float, default=0.2, help="opóźnienie atrapy w sekundach")
+    parser.add_argument("--zapisz", help="zapisz wyniki do pliku JSON")
+    parser.add_argument("--porownaj", help="plik JSON z wynikami innej rewizji")
+    args = parser.parse_args(argv)
+
+    korpus = wczytaj_korpus(args.korpus) if args.korpus else korpus_syntetyczny()
+    raport = uruchom_benchmarki(korpus, args.powtorzenia, args.e2e, args.opoznienie)
+    bazowy = None
+    if args.porownaj:
+        with open(args.porownaj, encoding="utf-8") as f:
+            bazowy = json.load(f)
+    wypisz(raport, bazowy)
+    if args.zapisz:
+        with open(args.zapisz, "w", encoding="utf-8") as f:
+            json.dump(raport, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
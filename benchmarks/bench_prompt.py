@@ -0,0 +1,70 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Tryb promptu "pelny" vs "schemat": tokeny wejściowe, czas i koszt
+#
+#  python -m benchmarks.bench_prompt                   # szacunek offline
+#  GOOGLE_API_KEY=... python -m benchmarks.bench_prompt --na-zywo 5
+#
+#  Offline liczy tokeny szacunkowo (jak limity w recipe_core.ratelimit).
+#  Z kluczem Gemini pyta count_tokens (prompt + schemat), a z --na-zywo
+#  wykonuje N zapytań w każdym trybie i wypisuje zużycie z pola usage.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import os
+import sys
+import time
+
+from recipe_core.generator import dekoduj_przepisy, prompt_i_schemat
+from recipe_core.prompts import METRYKI, TRYB_PELNY, TRYB_SCHEMAT
+from recipe_core.providers import DOMYSLNY_MODEL_GEMINI, GeminiProvider, schemat_gemini
+from recipe_core.ratelimit import szacuj_tokeny
+
+SKLADNIKI = "jajka, mąka pszenna, mleko, masło, cebula, pomidory, ser żółty"
+TRYBY = (TRYB_PELNY, TRYB_SCHEMAT)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Porównanie trybów promptu")
+    parser.add_argument("--skladniki", default=SKLADNIKI)
+    parser.add_argument("--model", default=os.getenv("RECIPE_GEMINI_MODEL", DOMYSLNY_MODEL_GEMINI))
+    parser.add_argument("--na-zywo", type=int, default=0, metavar="N",
+                        help="wykonaj N zapytań do Gemini w każdym trybie")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    provider = GeminiProvider(api_key, args.model) if api_key else None
+    wyniki = {}
+    for tryb in TRYBY:
+        # bez klucza liczymy tak, jakby dostawca obsługiwał schemat
+        prompt, schemat = prompt_i_schemat(provider or _BezSieci, args.skladniki, tryb)
+        wynik = {"znaki_promptu": len(prompt), "tokeny_szacunek": szacuj_tokeny(prompt)}
+        if schemat is not None:
+            # schemat też jest częścią wejścia modelu
+            wynik["tokeny_schematu_szacunek"] = szacuj_tokeny(json.dumps(schemat_gemini(schemat), ensure_ascii=False))
+        if provider is not None:
+            odpowiedz = provider._model.count_tokens(
+                prompt, generation_config=provider._config(4000, schemat)
+            )
+            wynik["tokeny_count_tokens"] = odpowiedz.total_tokens
+        wyniki[tryb] = wynik
+
+    if provider is not None and args.na_zywo:
+        METRYKI.zeruj()
+        for tryb in TRYBY:
+            prompt, schemat = prompt_i_schemat(provider, args.skladniki, tryb)
+            for _ in range(args.na_zywo):
+                start = time.perf_counter()
+                dekoduj_przepisy(provider.generuj(prompt, schemat=schemat))
+                wyniki[tryb].setdefault("czasy_s", []).append(round(time.perf_counter() - start, 2))
+        wyniki["usage"] = METRYKI.raport()
+
+    print(json.dumps(wyniki, ensure_ascii=False, indent=2))
+    return 0
+
+
+class _BezSieci:
+    obsluguje_schemat = True
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Pamięć wyników w sesjach: własne kopie Przepisy vs uchwyty do magazynu
+#
+#  python -m benchmarks.bench_sesje                     # 1 000 sesji
+#  python -m benchmarks.bench_sesje --sesje 5000 --zestawy 200 --bezczynne 0.5
+#
+#  Każda sesja trzyma wynik w dwóch miejscach, jak app_g.py (`przepisy`
+#  i `baza_przepisow`). Zestawy składników są wybierane z rozkładu Zipfa –
+#  kilka popularnych, długi ogon rzadkich. "kopie" to dotychczasowy stan:
+#  każda sesja ma własny obiekt (odczyt z SQLite / osobne generowanie),
+#  "uchwyty" – session_state z samymi uchwytami i `MagazynWynikow`.
+#  Pamięć mierzy tracemalloc; na końcu część sesji przestaje być aktywna
+#  i `usun_bezczynne` zwalnia ich uchwyty.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+import numpy as np
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.models import Przepisy
+from recipe_core.wyniki import MagazynWynikow
+
+
+def _zajete(buduj: Callable[[], object]) -> int:
+    """Bajty zaalokowane przez `buduj()` i wciąż żywe, dopóki trzymamy wynik."""
+    tracemalloc.start()
+    przed = tracemalloc.get_traced_memory()[0]
+    wynik = buduj()
+    po = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del wynik
+    return po - przed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pamięć wyników przy wielu sesjach Streamlit")
+    parser.add_argument("--sesje", type=int, default=1000)
+    parser.add_argument("--zestawy", type=int, default=100, help="liczba różnych zestawów składników")
+    parser.add_argument("--zipf", type=float, default=1.2, help="wykładnik rozkładu popularności zestawów")
+    parser.add_argument("--bezczynne", type=float, default=0.3, help="część sesji, które przestają być aktywne")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    zestawy: List[str] = [
+        json.dumps(syntetyczne_przepisy(8, 6, 120, ziarno=i), ensure_ascii=False) for i in range(args.zestawy)
+    ]
+    wagi = 1.0 / np.arange(1, args.zestawy + 1) ** args.zipf
+    wybory = rng.choice(args.zestawy, size=args.sesje, p=wagi / wagi.sum()).tolist()
+    sesje = [f"sesja-{i}" for i in range(args.sesje)]
+
+    def kopie():
+        return [
+            {"przepisy": (p := Przepisy.model_validate_json(zestawy[z])), "baza_przepisow": (f"zestaw {z}", p)}
+            for z in wybory
+        ]
+
+    magazyn: MagazynWynikow[Przepisy] = MagazynWynikow()
+
+    def uchwyty():
+        # nowa treść powstaje raz (generowanie / odczyt z cache), kolejne sesje ją współdzielą
+        obiekty = {}
+        stany = []
+        for sesja, z in zip(sesje, wybory):
+            if z not in obiekty:
+                obiekty[z] = Przepisy.model_validate_json(zestawy[z])
+            stany.append({
+                "przepisy": magazyn.zatrzymaj(sesja, obiekty[z]),
+                "baza_przepisow": (f"zestaw {z}", magazyn.zatrzymaj(sesja, obiekty[z])),
+            })
+        obiekty.clear()
+        return stany
+
+    bajty_kopii = _zajete(kopie)
+    stany = []
+    bajty_uchwytow = _zajete(lambda: stany.extend(uchwyty()))
+
+    # część sesji zamknęła kartę – pozostałe wykonują skrypt dalej
+    poczatek = time.monotonic()
+    time.sleep(0.01)
+    aktywne = rng.random(args.sesje) >= args.bezczynne
+    for sesja, aktywna in zip(sesje, aktywne):
+        if aktywna:
+            magazyn.dotknij(sesja)
+    przed = magazyn.raport()
+    usuniete = magazyn.usun_bezczynne(maks_bezczynnosc=time.monotonic() - poczatek)
+    po = magazyn.raport()
+
+    print(json.dumps({
+        "sesje": args.sesje,
+        "zestawy": args.zestawy,
+        "rozne_zestawy_w_sesjach": len(set(wybory)),
+        "kopie_bajty_razem": bajty_kopii,
+        "kopie_bajty_na_sesje": round(bajty_kopii / args.sesje),
+        "uchwyty_bajty_razem": bajty_uchwytow,
+        "uchwyty_bajty_na_sesje": round(bajty_uchwytow / args.sesje),
+        "oszczednosc": round(1 - bajty_uchwytow / bajty_kopii, 3),
+        "magazyn": przed,
+        "bezczynne_sesje": usuniete,
+        "magazyn_po_sprzataniu": po,
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
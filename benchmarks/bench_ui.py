@@ -0,0 +1,233 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Pomiar reruns app_g.py: czas po stronie serwera i rozmiar delt websocket
+#
+#  python -m benchmarks.bench_ui                        # bieżąca wersja app_g.py
+#  python -m benchmarks.bench_ui --app /tmp/stary/app_g.py --zapisz przed.json
+#  python -m benchmarks.bench_ui --porownaj przed.json
+#
+#  Uruchamia prawdziwy serwer Streamlit i rozmawia z nim jak przeglądarka
+#  (BackMsg/ForwardMsg przez /_stcore/stream). Cache jest wstępnie zasilony
+#  przepisami, więc "Generuj przepisy!" nie woła modelu.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from websockets.sync.client import connect
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni, przestrzen_cache
+from recipe_core.models import Przepisy
+from recipe_core.prompts import WERSJA_PROMPTU
+from recipe_core.providers import DOMYSLNY_MODEL_GEMINI, GeminiProvider
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_g.py")
+SKLADNIKI = ["Sól", "Pieprz czarny"]
+PRZELACZANY = "Oregano"
+
+
+class KlientStreamlit:
+    """Minimalny klient protokołu przeglądarki: stan widżetów, cache wiadomości, fragmenty."""
+
+    def __init__(self, url: str):
+        self._ws = connect(url, subprotocols=["streamlit"], max_size=None)
+        self.widzety: Dict[str, Tuple[str, str]] = {}  # etykieta -> (id, fragment_id)
+        self._stany: Dict[str, object] = {}
+        self._hashe: set = set()
+        self.bledy = 0  # st.error / wyjątki wyświetlone w sesji
+
+    def _wyslij(self, fragment_id: str = "") -> Tuple[float, int, int]:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        stan = msg.rerun_script
+        stan.query_string = ""
+        stan.page_script_hash = ""
+        stan.fragment_id = fragment_id
+        stan.cached_message_hashes.extend(sorted(self._hashe))
+        stan.widget_states.widgets.extend(self._stany.values())
+        start = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        bajty = delty = 0
+        while True:
+            surowa = self._ws.recv()
+            bajty += len(surowa)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(surowa)
+            if fwd.metadata.cacheable and fwd.hash:
+                self._hashe.add(fwd.hash)
+            rodzaj = fwd.WhichOneof("type")
+            if rodzaj == "delta":
+                delty += 1
+                self._zapamietaj_widzet(fwd)
+            elif rodzaj == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                # st.rerun() we fragmencie: liczymy też następujący po nim pełny przebieg
+                return time.perf_counter() - start, bajty, delty
+        # nieosiągalne
+
+    def _zapamietaj_widzet(self, fwd) -> None:
+        from streamlit.proto.Alert_pb2 import Alert
+
+        element = fwd.delta.new_element
+        rodzaj = element.WhichOneof("type")
+        if rodzaj is None:
+            return
+        if rodzaj == "exception" or (rodzaj == "alert" and element.alert.format == Alert.ERROR):
+            self.bledy += 1
+        proto = getattr(element, rodzaj)
+        if getattr(proto, "id", "") and getattr(proto, "label", ""):
+            self.widzety[proto.label] = (proto.id, fwd.delta.fragment_id)
+
+    def uruchom(self) -> Tuple[float, int, int]:
+        return self._wyslij()
+
+    def ustaw(self, etykieta: str, pole: str, wartosc) -> Tuple[float, int, int]:
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        id_, fragment_id = self.widzety[etykieta]
+        stan = WidgetState(id=id_)
+        setattr(stan, pole, wartosc)
+        self._stany[id_] = stan
+        wynik = self._wyslij(fragment_id)
+        if pole == "trigger_value":  # przycisk "wraca" po jednym przebiegu
+            del self._stany[id_]
+        return wynik
+
+    def zapomnij_stany(self) -> None:
+        """Kolejne przebiegi bez dotychczasowych wartości widżetów (domyślne z aplikacji)."""
+        self._stany.clear()
+
+    def zamknij(self) -> None:
+        self._ws.close()
+
+
+def _wolny_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _zasil_cache(sciezka: str) -> None:
+    przestrzen = przestrzen_cache(
+        GeminiProvider.nazwa, os.getenv("RECIPE_GEMINI_MODEL", DOMYSLNY_MODEL_GEMINI), WERSJA_PROMPTU
+    )
+    skladniki = sorted(s.lower() for s in SKLADNIKI)
+    cache = CachePrzepisow(sciezka)
+    cache.zapisz(
+        klucz_w_przestrzeni(przestrzen, skladniki),
+        Przepisy(**syntetyczne_przepisy(12, 10, 25)),
+        skladniki,
+        przestrzen,
+    )
+    cache.zamknij()
+
+
+def _uruchom_serwer(app: str, port: int, katalog: str, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "RECIPE_CACHE_PATH": os.path.join(katalog, "przepisy.sqlite3"),
+        "RECIPE_WARMUP": "0",
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "benchmark"),
+        **(env or {}),
+    }
+    proces = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(os.path.abspath(app)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    termin = time.monotonic() + 30
+    while time.monotonic() < termin:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proces
+        except OSError:
+            time.sleep(0.2)
+    proces.kill()
+    raise RuntimeError("Serwer Streamlit nie wystartował")
+
+
+def _statystyki(pomiary: List[Tuple[float, int, int]]) -> Dict[str, float]:
+    return {
+        "czas_ms": statistics.median(p[0] for p in pomiary) * 1000,
+        "bajty": statistics.median(p[1] for p in pomiary),
+        "delty": statistics.median(p[2] for p in pomiary),
+    }
+
+
+def zmierz(app: str, powtorzenia: int) -> dict:
+    with tempfile.TemporaryDirectory() as katalog:
+        os.environ["RECIPE_CACHE_PATH"] = os.path.join(katalog, "przepisy.sqlite3")
+        _zasil_cache(os.environ["RECIPE_CACHE_PATH"])
+        port = _wolny_port()
+        serwer = _uruchom_serwer(app, port, katalog)
+        try:
+            klient = KlientStreamlit(f"ws://127.0.0.1:{port}/_stcore/stream")
+            wyniki: Dict[str, List[Tuple[float, int, int]]] = {}
+            wyniki["start"] = [klient.uruchom()]
+            for nazwa in SKLADNIKI:
+                wyniki.setdefault("wybor_skladnika", []).append(klient.ustaw(nazwa, "bool_value", True))
+            wyniki["generowanie_z_cache"] = [klient.ustaw("🍳 Generuj przepisy!", "trigger_value", True)]
+            for i in range(powtorzenia):
+                wyniki.setdefault("wybor_przy_wynikach", []).append(
+                    klient.ustaw(PRZELACZANY, "bool_value", i % 2 == 0)
+                )
+            for _ in range(powtorzenia):
+                # pełny przebieg skryptu z przepisami w sesji (np. odświeżenie strony)
+                wyniki.setdefault("pelny_rerun_z_wynikami", []).append(klient.uruchom())
+            kategorie = list(klient.widzety)
+            if "Kategoria:" in kategorie:
+                for i in range(powtorzenia):
+                    wyniki.setdefault("zmiana_kategorii", []).append(
+                        klient.ustaw("Kategoria:", "int_value", (i + 1) % 2)
+                    )
+            klient.zamknij()
+        finally:
+            serwer.terminate()
+            serwer.wait(timeout=10)
+    return {"app": app, "wyniki": {k: _statystyki(v) for k, v in wyniki.items()}}
+
+
+def wypisz(raport: dict, bazowy: Optional[dict] = None) -> None:
+    print(f"# {raport['app']}")
+    for etap, s in raport["wyniki"].items():
+        linia = f"  {etap:<22} {s['czas_ms']:8.1f} ms  {s['bajty']:9.0f} B  {s['delty']:5.0f} delt"
+        baza = (bazowy or {}).get("wyniki", {}).get(etap)
+        if baza:
+            linia += f"   (było {baza['czas_ms']:8.1f} ms  {baza['bajty']:9.0f} B  {baza['delty']:5.0f} delt)"
+        print(linia)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Czas reruns i rozmiar delt app_g.py")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--powtorzenia", type=int, default=10)
+    parser.add_argument("--zapisz", help="zapisz wyniki do pliku JSON")
+    parser.add_argument("--porownaj", help="plik JSON z wynikami innej wersji")
+    args = parser.parse_args(argv)
+
+    raport = zmierz(args.app, args.powtorzenia)
+    bazowy = None
+    if args.porownaj:
+        with open(args.porownaj, encoding="utf-8") as f:
+            bazowy = json.load(f)
+    wypisz(raport, bazowy)
+    if args.zapisz:
+        with open(args.zapisz, "w", encoding="utf-8") as f:
+            json.dump(raport, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
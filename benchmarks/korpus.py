@@ -0,0 +1,80 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Korpus odpowiedzi modelu do benchmarków (syntetyczny i nagrany)
+# ─────────────────────────────────────────────────────────────────────────────
+import json
+import os
+import random
+from typing import Dict
+
+SLOWA = (
+    "pokrój drobno cebulę i zeszklij ją na oleju na średnim ogniu dodaj czosnek "
+    "wymieszaj dokładnie dopraw solą i pieprzem gotuj pod przykryciem aż zmięknie "
+    "podawaj na ciepło posyp świeżymi ziołami odstaw na kilka minut"
+).split()
+SKLADNIKI = (
+    "jajka", "mąka pszenna", "mleko", "masło", "cebula", "czosnek", "pomidory", "ryż",
+    "makaron", "ser żółty", "papryka", "cukinia", "marchewka", "ziemniaki", "oliwa",
+    "filet z kurczaka", "śmietana", "bazylia", "sól", "pieprz",
+)
+
+
+def _zdanie(rng: random.Random, dlugosc: int) -> str:
+    return " ".join(rng.choice(SLOWA) for _ in range(dlugosc)).capitalize() + "."
+
+
+def syntetyczne_przepisy(
+    liczba_skladnikow: int,
+    liczba_krokow: int,
+    dlugosc_kroku: int,
+    ziarno: int = 0,
+    liczba_przepisow: int = 3,
+) -> dict:
+    rng = random.Random(ziarno)
+    return {
+        "przepisy": [
+            {
+                "nazwa": f"Przepis {i + 1}: {_zdanie(rng, 3)}",
+                "czas_przygotowania": f"{rng.randint(10, 90)} minut",
+                "poziom_trudnosci": rng.choice(["łatwy", "średni", "trudny"]),
+                "skladniki": [
+                    {
+                        "nazwa": rng.choice(SKLADNIKI),
+                        "ilosc": rng.choice([str(rng.randint(1, 500)), rng.randint(1, 5), 0.5]),
+                        "jednostka": rng.choice(["g", "szt.", "łyżka", "ml", None]),
+                    }
+                    for _ in range(liczba_skladnikow)
+                ],
+                "kroki": [
+                    {"numer": n + 1, "opis": _zdanie(rng, dlugosc_kroku)}
+                    for n in range(liczba_krokow)
+                ],
+                "sugestie": _zdanie(rng, dlugosc_kroku),
+            }
+            for i in range(liczba_przepisow)
+        ]
+    }
+
+
+def korpus_syntetyczny() -> Dict[str, str]:
+    """Nazwa przypadku -> surowy tekst odpowiedzi, tak jak zwraca go model."""
+    maly = json.dumps(syntetyczne_przepisy(3, 3, 8), ensure_ascii=False)
+    duzy = json.dumps(syntetyczne_przepisy(15, 12, 30, ziarno=1), ensure_ascii=False, indent=2)
+    return {
+        "maly": maly,
+        "duzy": duzy,
+        "w_markdown": f"```json\n{duzy}\n```",
+        "z_komentarzem": f"Oto propozycje przepisów:\n{maly}\nSmacznego!",
+        # odpowiedź ucięta na max_output_tokens w połowie trzeciego przepisu
+        "uciety": duzy[: int(len(duzy) * 0.8)],
+        "zly_schemat": maly.replace('"kroki"', '"instrukcje"'),
+    }
+
+
+def wczytaj_korpus(katalog: str) -> Dict[str, str]:
+    """Nagrane odpowiedzi: każdy plik *.txt / *.json w katalogu to jeden przypadek."""
+    korpus = {}
+    for nazwa in sorted(os.listdir(katalog)):
+        if nazwa.endswith((".txt", ".json")):
+            with open(os.path.join(katalog, nazwa), encoding="utf-8") as f:
+                korpus[os.path.splitext(nazwa)[0]] = f.read()
+    return korpus
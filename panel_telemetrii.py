@@ -0,0 +1,55 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Strona administracyjna z telemetrią (RECIPE_ADMIN=1, adres z ?admin=1)
+# ─────────────────────────────────────────────────────────────────────────────
+import os
+
+import streamlit as st
+
+from recipe_core.telemetry import PORT_METRYK, TELEMETRIA
+
+ADMIN = os.getenv("RECIPE_ADMIN", "0") == "1"
+
+
+def czy_panel_admina() -> bool:
+    """Czy bieżące żądanie to strona administracyjna."""
+    return ADMIN and st.query_params.get("admin") == "1"
+
+
+def pokaz_panel_telemetrii() -> None:
+    """Kwantyle i rozkłady histogramów oraz liczniki z `recipe_core.telemetry`."""
+    st.title("📈 Telemetria generowania")
+    if PORT_METRYK:
+        st.caption(f"Prometheus: http://127.0.0.1:{PORT_METRYK}/metrics")
+    if st.button("🔄 Odśwież"):
+        st.rerun()
+
+    histogramy = TELEMETRIA.histogramy()
+    if not histogramy:
+        st.info("Brak pomiarów – wygeneruj przepisy w aplikacji.")
+    for nazwa, serie in histogramy.items():
+        st.subheader(nazwa)
+        st.dataframe(
+            [
+                {"seria": seria or "–", **{k: v for k, v in dane.items() if k != "kubelki"}}
+                for seria, dane in serie.items()
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        # numer przed granicą kubełka – wykres sortuje oś X alfabetycznie
+        st.bar_chart(
+            {
+                seria or "–": {f"{i:02d} ≤{g}": ile for i, (g, ile) in enumerate(dane["kubelki"].items())}
+                for seria, dane in serie.items()
+            },
+            stack=False,
+        )
+
+    st.subheader("Liczniki")
+    for nazwa, serie in TELEMETRIA.liczniki().items():
+        with st.expander(nazwa, expanded=True):
+            st.dataframe(
+                [{"seria": seria or "–", "wartość": wartosc} for seria, wartosc in serie.items()],
+                hide_index=True,
+                use_container_width=True,
+            )
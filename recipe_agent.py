@@ -1,176 +1,274 @@
-import streamlit as st
-from pydantic import BaseModel, Field
-from typing import List, Union
-import json
-from anthropic import Anthropic
-
-# Cache w pamięci (słownik)
-cache_memory = {}
-
-class Skladnik(BaseModel):
-    nazwa: str = Field(description="Nazwa składnika")
-    ilosc: Union[str, int] = Field(description="Ilość składnika")
-    jednostka: str = Field(description="Jednostka miary, np. gram, łyżka, sztuka")
-
-class KrokPrzygotowania(BaseModel):
-    numer: int = Field(description="Numer kroku")
-    opis: str = Field(description="Opis czynności do wykonania")
-
-class Przepis(BaseModel):
-    nazwa: str = Field(description="Nazwa potrawy")
-    czas_przygotowania: str = Field(description="Czas potrzebny na przygotowanie")
-    poziom_trudnosci: str = Field(description="Poziom trudności: łatwy, średni lub trudny")
-    skladniki: List[Skladnik] = Field(description="Lista składników potrzebnych do przygotowania")
-    kroki: List[KrokPrzygotowania] = Field(description="Lista kroków przygotowania potrawy")
-    sugestie: str = Field(description="Dodatkowe sugestie lub warianty przepisu")
-
-class Przepisy(BaseModel):
-    przepisy: List[Przepis] = Field(description="Lista przepisów na podstawie podanych składników")
-
-def _generuj_przepisy(api_key: str, skladniki_w_lodowce: str) -> Przepisy:
-    client = Anthropic(api_key=api_key)
-
-    prompt = f"""Na podstawie podanych składników, które użytkownik ma w lodówce, zaproponuj TRZY różne przepisy kulinarne.
-Składniki dostępne w lodówce: {skladniki_w_lodowce}
-
-Utwórz 3 różne przepisy, które wykorzystują te składniki. Każdy przepis powinien być inny - np. z innej kuchni świata
-lub reprezentować inny typ dania (przystawka, danie główne, deser). Jeśli brakuje jakichś podstawowych składników,
-możesz założyć, że użytkownik ma je w swojej kuchni (jak sól, pieprz, oliwa).
-
-{{
-  "przepisy": [
-    {{
-      "nazwa": "Nazwa przepisu 1",
-      "czas_przygotowania": "np. 30 minut",
-      "poziom_trudnosci": "łatwy, średni lub trudny",
-      "skladniki": [
-        {{ "nazwa": "składnik 1", "ilosc": "liczba", "jednostka": "np. gram, sztuka lub łyżka" }},
-        {{ "nazwa": "składnik 2", "ilosc": "liczba", "jednostka": "np. gram, sztuka lub łyżka" }}
-      ],
-      "kroki": [
-        {{ "numer": 1, "opis": "Pierwszy krok przygotowania" }},
-        {{ "numer": 2, "opis": "Drugi krok przygotowania" }}
-      ],
-      "sugestie": "Dodatkowe sugestie dotyczące przepisu"
-    }},
-    {{
-      "nazwa": "Nazwa przepisu 2",
-      "czas_przygotowania": "np. 45 minut",
-      "poziom_trudnosci": "łatwy, średni lub trudny",
-      "skladniki": [
-        {{ "nazwa": "składnik 1", "ilosc": "liczba", "jednostka": "np. gram, sztuka lub łyżka" }}
-      ],
-      "kroki": [
-        {{ "numer": 1, "opis": "Pierwszy krok przygotowania" }}
-      ],
-      "sugestie": "Dodatkowe sugestie dotyczące przepisu"
-    }},
-    {{
-      "nazwa": "Nazwa przepisu 3",
-      "czas_przygotowania": "np. 20 minut",
-      "poziom_trudnosci": "łatwy, średni lub trudny",
-      "skladniki": [
-        {{ "nazwa": "składnik 1", "ilosc": "liczba", "jednostka": "np. gram, sztuka lub łyżka" }}
-      ],
-      "kroki": [
-        {{ "numer": 1, "opis": "Pierwszy krok przygotowania" }}
-      ],
-      "sugestie": "Dodatkowe sugestie dotyczące przepisu"
-    }}
-  ]
-}}
-"""
-
-    response = client.messages.create(
-        model="claude-3-7-sonnet-20250219",
-        max_tokens=4000,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-    )
-
-    response_text = response.content[0].text
-    json_start = response_text.find('{')
-    json_end = response_text.rfind('}') + 1
-    json_str = response_text[json_start:json_end]
-
-    try:
-        recipes_dict = json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print("Błąd parsowania JSON:", e)
-        print("Odpowiedź API:", response_text)
-        raise e
-    
-    przepisy = Przepisy(**recipes_dict)
-    return przepisy
-
-# Cache w pamięci + cache Streamlit
-@st.cache_data(show_spinner=False)
-def generuj_przepisy_z_cache_streamlit(api_key: str, skladniki_w_lodowce: str) -> Przepisy:
-    key = skladniki_w_lodowce.strip().lower()
-    if key in cache_memory:
-        return cache_memory[key]
-    przepisy = _generuj_przepisy(api_key, skladniki_w_lodowce)
-    cache_memory[key] = przepisy
-    return przepisy
-
-def main():
-    st.title("Generator przepisów kulinarnych 🍳")
-    st.write("Podaj składniki, które masz w lodówce, a ja zaproponuję Ci 3 różne przepisy.")
-
-    api_key = st.text_input("Wpisz swój klucz API Anthropic (ukryty)", type="password")
-    skladniki = st.text_area("Składniki (oddzielone przecinkami)", height=100)
-
-    if st.button("Generuj przepisy"):
-        if not api_key:
-            st.error("Proszę podać klucz API Anthropic.")
-            return
-        if not skladniki.strip():
-            st.error("Proszę podać składniki.")
-            return
-
-        with st.spinner("Generuję przepisy..."):
-            try:
-                przepisy = generuj_przepisy_z_cache_streamlit(api_key, skladniki)
-
-                # Tworzymy 5 kolumn: 3 na przepisy (25% każda), 2 na odstępy (12.5% każda)
-                cols = st.columns([0.5, 0.05, 0.5, 0.05, 0.5])
-
-                for i, przepis in enumerate(przepisy.przepisy):
-                    col = cols[i*2]
-                    with col:
-                        przepis_text = f"Przepis: {przepis.nazwa}\nCzas przygotowania: {przepis.czas_przygotowania}\nPoziom trudności: {przepis.poziom_trudnosci}\n\nSkładniki:\n"
-                        for skladnik in przepis.skladniki:
-                            przepis_text += f"- {skladnik.ilosc} {skladnik.jednostka} {skladnik.nazwa}\n"
-                        przepis_text += "\nSposób przygotowania:\n"
-                        for krok in przepis.kroki:
-                            przepis_text += f"{krok.numer}. {krok.opis}\n"
-                        if przepis.sugestie.strip():
-                            przepis_text += f"\nSugestie:\n{przepis.sugestie}\n"
-                
-                        # Wstrzykujemy CSS, aby wymusić szerokość textarea w tej kolumnie
-                        st.markdown(
-                            f"""
-                            <style>
-                            div[data-testid="stTextArea"][data-key="przepis_{i}"] > div > textarea {{
-                                width: 100% !important;
-                                min-width: 500px;  /* lub inna szerokość */
-                                white-space: pre-wrap;
-                            }}
-                            </style>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-                
-                        st.text_area(label="", value=przepis_text, width = 600, height=400, max_chars=None, key=f"przepis_{i}", disabled=False)
-
-            except Exception as e:
-                st.error(f"Wystąpił błąd podczas generowania przepisów: {e}")
-
-if __name__ == "__main__":
-    main()
-
-
-
-
-
-
+import streamlit as st
+import logging
+import os
+from typing import Callable, Optional
+
+from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni, przestrzen_cache, rozdziel_skladniki
+from recipe_core.clients import ROZGRZEWKA, czekaj_na_petli_klientow
+from recipe_core.generator import (
+    BladParsowania,
+    OnPostep,
+    OnPrzepis,
+    czy_kompletne,
+    generuj_przepisy_async,
+    generuj_przepisy_rownolegle,
+)
+from recipe_core.hedging import PolitykaHedgingu, generuj_z_hedgingiem
+from recipe_core.models import Przepis, Przepisy
+from recipe_core.prompts import WERSJA_PROMPTU as WERSJA_PROMPTU_BAZOWA
+from recipe_core.providers import (
+    DOMYSLNY_MODEL_ANTHROPIC,
+    DOMYSLNY_MODEL_GEMINI,
+    AnthropicProvider,
+    GeminiProvider,
+    rozgrzej_w_tle,
+    wspolny_provider,
+)
+from recipe_core.ratelimit import PrzekroczonyLimit, czy_przeciazenie
+from recipe_core.render import CSS_PRZEPISOW, tekst_przepisu
+from recipe_core.singleflight import PojedynczyLot
+from recipe_core.streaming import czesciowa_nazwa
+from recipe_core.telemetry import TELEMETRIA, uruchom_eksport
+from recipe_core.terminy import PrzekroczonyTermin, Termin, nowy_termin_sesji, w_terminie
+
+from panel_telemetrii import czy_panel_admina, pokaz_panel_telemetrii
+
+logger = logging.getLogger(__name__)
+
+# Tryb strumieniowy – przepis trafia do swojej kolumny zaraz po domknięciu (RECIPE_STREAM=0 wyłącza)
+TRYB_STRUMIENIOWY = os.getenv("RECIPE_STREAM", "1") != "0"
+# Tryb równoległy – trzy osobne zapytania o pojedynczy przepis (RECIPE_FANOUT=1 włącza)
+TRYB_ROWNOLEGLY = os.getenv("RECIPE_FANOUT", "0") == "1"
+# Hedging – gdy Claude odpowiada zbyt długo, startuje Gemini (RECIPE_HEDGE=1 + GOOGLE_API_KEY)
+HEDGING = os.getenv("RECIPE_HEDGE", "0") == "1"
+
+MODEL_ANTHROPIC = os.getenv("RECIPE_ANTHROPIC_MODEL", DOMYSLNY_MODEL_ANTHROPIC)
+MODEL_ZAPASOWY = os.getenv("RECIPE_GEMINI_MODEL", DOMYSLNY_MODEL_GEMINI)
+WERSJA_PROMPTU = WERSJA_PROMPTU_BAZOWA + ("-fanout" if TRYB_ROWNOLEGLY else "")
+
+LICZBA_KOLUMN = 3
+# orientacyjna długość JSON-a jednego przepisu – skala paska postępu w kolumnie
+SZACOWANA_DLUGOSC_PRZEPISU = 1800
+
+def _hedging_aktywny() -> bool:
+    return HEDGING and bool(os.getenv("GOOGLE_API_KEY")) and not TRYB_ROWNOLEGLY
+
+@st.cache_resource(show_spinner=False)
+def _polityka_hedgingu() -> PolitykaHedgingu:
+    return PolitykaHedgingu()
+
+def _generuj_przepisy(
+    api_key: str,
+    skladniki_w_lodowce: str,
+    on_przepis: Optional[OnPrzepis] = None,
+    on_postep: Optional[OnPostep] = None,
+    on_czekanie: Optional[Callable[[], None]] = None,
+) -> Przepisy:
+    """
+    Zapytanie działa na wspólnej pętli klientów, a ten wątek tylko rysuje
+    (callbacki przez `w_watku`) i co chwilę woła `on_czekanie` – rerun
+    lub stop sesji przerywa wtedy oczekiwanie i anuluje zapytanie.
+    """
+    glowny = wspolny_provider(AnthropicProvider.nazwa, api_key, MODEL_ANTHROPIC)
+
+    def _w_watku(w_watku, callback):
+        return (lambda *args: w_watku(callback, *args)) if callback is not None else None
+
+    if TRYB_ROWNOLEGLY:
+        return czekaj_na_petli_klientow(
+            lambda w_watku: generuj_przepisy_rownolegle(glowny, skladniki_w_lodowce, _w_watku(w_watku, on_przepis)),
+            on_czekanie,
+        )
+    if _hedging_aktywny():
+        zapasowy = wspolny_provider(GeminiProvider.nazwa, os.environ["GOOGLE_API_KEY"], MODEL_ZAPASOWY)
+        return czekaj_na_petli_klientow(
+            lambda _: generuj_z_hedgingiem(glowny, zapasowy, skladniki_w_lodowce, _polityka_hedgingu()),
+            on_czekanie,
+        )
+
+    try:
+        # Messages API ze strumieniem; przepisy i postęp z przyrostowego parsera
+        return czekaj_na_petli_klientow(
+            lambda w_watku: generuj_przepisy_async(
+                glowny,
+                skladniki_w_lodowce,
+                on_przepis=_w_watku(w_watku, on_przepis) if TRYB_STRUMIENIOWY else None,
+                on_postep=_w_watku(w_watku, on_postep),
+            ),
+            on_czekanie,
+        )
+    except BladParsowania as e:
+        logger.warning("Błąd parsowania JSON: %s", e)
+        logger.debug("Odpowiedź API: %s", e.surowa_odpowiedz)
+        TELEMETRIA.zdarzenie("blad_parsowania", blad=str(e), odpowiedz=e.surowa_odpowiedz[:2000])
+        raise e
+
+# Cache dwupoziomowy (LRU w procesie + SQLite), wspólny dla sesji i replik
+@st.cache_resource(show_spinner=False)
+def _cache_przepisow() -> CachePrzepisow:
+    cache = CachePrzepisow()
+    cache.rozgrzej(Przepisy)
+    return cache
+
+# Jednakowe zapytania z wielu sesji naraz -> jedno wywołanie API
+@st.cache_resource(show_spinner=False)
+def _zapytania_w_locie() -> PojedynczyLot:
+    return PojedynczyLot()
+
+def _przestrzen() -> str:
+    provider, model = AnthropicProvider.nazwa, MODEL_ANTHROPIC
+    if _hedging_aktywny():
+        provider, model = f"{provider}+{GeminiProvider.nazwa}", f"{model}+{MODEL_ZAPASOWY}"
+    return przestrzen_cache(provider, model, WERSJA_PROMPTU)
+
+def generuj_przepisy_z_cache_streamlit(
+    api_key: str,
+    skladniki_w_lodowce: str,
+    on_przepis: Optional[OnPrzepis] = None,
+    on_postep: Optional[OnPostep] = None,
+    on_czekanie: Optional[Callable[[], None]] = None,
+    termin: Optional[Termin] = None,
+) -> Przepisy:
+    """
+    Przepisy z cache albo z modelu. Przy generowaniu `on_przepis` dostaje każdy
+    przepis zaraz po domknięciu (także w sesji, która czeka na to samo zapytanie
+    z innej sesji), a `on_postep` – napływający przepis (tylko sesja wołająca model).
+    Sesja czekająca na cudze zapytanie czeka najwyżej do swojego `termin`.
+    """
+    skladniki = rozdziel_skladniki(skladniki_w_lodowce)
+    TELEMETRIA.zdarzenie("zapytanie", aplikacja="recipe_agent", skladniki=skladniki_w_lodowce.split(","))
+    key = klucz_w_przestrzeni(_przestrzen(), skladniki)
+    cache = _cache_przepisow()
+    przepisy = cache.pobierz(key, Przepisy)
+    if przepisy is not None:
+        return przepisy
+
+    def _generuj_i_zapisz(opublikuj) -> Przepisy:
+        gotowe = cache.pobierz(key, Przepisy)
+        if gotowe is not None:
+            return gotowe
+        wynik = _generuj_przepisy(
+            api_key, skladniki_w_lodowce, lambda idx, p: opublikuj((idx, p)), on_postep, on_czekanie
+        )
+        if czy_kompletne(wynik):
+            cache.zapisz(key, wynik, skladniki, _przestrzen())
+        return wynik
+
+    return _zapytania_w_locie().wykonaj(
+        key,
+        _generuj_i_zapisz,
+        on_element=(lambda el: on_przepis(*el)) if on_przepis is not None else None,
+        timeout=termin.limit_czekania() if termin is not None else None,
+    )
+
+
+class _KolumnyPrzepisow:
+    """
+    Trzy kolumny z miejscem na przepis: pasek postępu dla przepisu, który
+    właśnie napływa, i pole tekstowe, gdy przepis jest gotowy.
+    """
+
+    def __init__(self):
+        # Style pól tekstowych – jeden blok dla wszystkich kolumn
+        st.markdown(CSS_PRZEPISOW, unsafe_allow_html=True)
+        # Tworzymy 5 kolumn: 3 na przepisy (25% każda), 2 na odstępy (12.5% każda)
+        cols = st.columns([0.5, 0.05, 0.5, 0.05, 0.5])
+        self.miejsca = [cols[i * 2].empty() for i in range(LICZBA_KOLUMN)]
+        self.pokazane = set()
+        self._postep = {}
+
+    def przepis(self, idx: int, przepis: Przepis) -> None:
+        if idx in self.pokazane or idx > len(self.miejsca):
+            return
+        self.pokazane.add(idx)
+        self.miejsca[idx - 1].text_area(label="", value=tekst_przepisu(przepis), width = 600, height=400, max_chars=None, key=f"przepis_{idx - 1}", disabled=False)
+
+    def postep(self, idx: int, obiekt: str) -> None:
+        if idx in self.pokazane or idx > len(self.miejsca):
+            return
+        nazwa = czesciowa_nazwa(obiekt)
+        procent = min(int(100 * len(obiekt) / SZACOWANA_DLUGOSC_PRZEPISU), 95)
+        # nowy stan paska tylko po zmianie – fragmenty strumienia przychodzą co kilka znaków
+        if self._postep.get(idx) == (procent, nazwa):
+            return
+        self._postep[idx] = (procent, nazwa)
+        self.miejsca[idx - 1].progress(procent, text=f"✍️ {nazwa}" if nazwa else "✍️ Piszę przepis...")
+
+    def wyczysc_pozostale(self) -> None:
+        for idx, miejsce in enumerate(self.miejsca, start=1):
+            if idx not in self.pokazane:
+                miejsce.empty()
+
+# Rozgrzewka klienta z klucza w środowisku – raz na proces
+@st.cache_resource(show_spinner=False)
+def _rozgrzej_klientow() -> None:
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if api_key:
+        rozgrzej_w_tle([wspolny_provider(AnthropicProvider.nazwa, api_key, MODEL_ANTHROPIC)])
+
+# Endpoint /metrics (RECIPE_METRICS_PORT) – raz na proces
+@st.cache_resource(show_spinner=False)
+def _eksport_metryk() -> None:
+    uruchom_eksport()
+
+def main():
+    _eksport_metryk()
+    if czy_panel_admina():
+        pokaz_panel_telemetrii()
+        return
+    if ROZGRZEWKA:
+        _rozgrzej_klientow()
+    st.title("Generator przepisów kulinarnych 🍳")
+    st.write("Podaj składniki, które masz w lodówce, a ja zaproponuję Ci 3 różne przepisy.")
+
+    api_key = st.text_input("Wpisz swój klucz API Anthropic (ukryty)", type="password")
+    skladniki = st.text_area("Składniki (oddzielone przecinkami)", height=100)
+
+    if st.button("Generuj przepisy"):
+        if not api_key:
+            st.error("Proszę podać klucz API Anthropic.")
+            return
+        if not skladniki.strip():
+            st.error("Proszę podać składniki.")
+            return
+
+        komunikat = st.empty()
+        kolumny = _KolumnyPrzepisow()
+        # puste miejsce "odświeżane" w trakcie czekania – punkt, w którym Streamlit może przerwać przebieg
+        przerwa = st.empty()
+        termin = nowy_termin_sesji(st.session_state)
+        with komunikat, st.spinner("Generuję przepisy..."):
+            try:
+                with w_terminie(termin):
+                    przepisy = generuj_przepisy_z_cache_streamlit(
+                        api_key, skladniki, kolumny.przepis, kolumny.postep, przerwa.empty, termin
+                    )
+                # trafienie w cache albo tryb bez strumienia – wszystkie naraz
+                for idx, przepis in enumerate(przepisy.przepisy, start=1):
+                    kolumny.przepis(idx, przepis)
+                TELEMETRIA.wyswietlone(len(przepisy.przepisy), "recipe_agent")
+
+            except Exception as e:
+                if isinstance(e, PrzekroczonyTermin) or (isinstance(e, TimeoutError) and termin.minal()):
+                    if kolumny.pokazane:
+                        st.warning(
+                            f"Minął czas na generowanie – pokazuję {len(kolumny.pokazane)} z {LICZBA_KOLUMN} "
+                            "przepisów. Spróbuj ponownie, żeby dostać pozostałe."
+                        )
+                    else:
+                        st.error("Nie udało się wygenerować przepisów na czas – spróbuj ponownie za chwilę.")
+                elif isinstance(e, PrzekroczonyLimit) or czy_przeciazenie(e):
+                    st.error("API Anthropic jest w tej chwili przeciążone – spróbuj ponownie za chwilę.")
+                else:
+                    st.error(f"Wystąpił błąd podczas generowania przepisów: {e}")
+            finally:
+                kolumny.wyczysc_pozostale()
+
+if __name__ == "__main__":
+    main()
+
+
+
+
+
+
@@ -0,0 +1 @@
+"""Wspólna logika generatora przepisów (bez zależności od Streamlit)."""
@@ -0,0 +1,180 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  RecipeAgent: API bez Streamlit – skrypty, zadania wsadowe, serwery
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import os
+from typing import Callable, Iterable, List, NoReturn, Optional, Tuple, Union
+
+from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni, normalizuj_skladniki, przestrzen_cache
+from recipe_core.generator import OnPrzepis, czy_kompletne, generuj_przepisy, generuj_przepisy_async
+from recipe_core.models import Przepis, Przepisy
+from recipe_core.prompts import WERSJA_PROMPTU
+from recipe_core.providers import AnthropicProvider, GeminiProvider, Provider, wspolny_provider
+from recipe_core.singleflight import PojedynczyLot, PojedynczyLotAsync
+from recipe_core.terminy import PrzekroczonyTermin, Termin, w_terminie
+
+# Zmienne środowiskowe z kluczami API, gdy nie podano `api_key`
+ZMIENNE_KLUCZY = {
+    AnthropicProvider.nazwa: "ANTHROPIC_API_KEY",
+    GeminiProvider.nazwa: "GOOGLE_API_KEY",
+}
+
+Skladniki = Union[str, Iterable[str]]
+
+
+def jako_liste_skladnikow(skladniki: Skladniki) -> List[str]:
+    """Napis "a, b, c" albo lista składników -> znormalizowana lista."""
+    if isinstance(skladniki, str):
+        skladniki = skladniki.split(",")
+    return normalizuj_skladniki(skladniki)
+
+
+def _zbierajac(
+    on_przepis: Optional[OnPrzepis],
+) -> Tuple[List[Przepis], Callable[[Tuple[int, Przepis]], None]]:
+    """on_element dla koalescencji: przepisy ze strumienia do listy i do `on_przepis`."""
+    otrzymane: List[Przepis] = []
+
+    def _on_element(element: Tuple[int, Przepis]) -> None:
+        otrzymane.append(element[1])
+        if on_przepis is not None:
+            on_przepis(*element)
+
+    return otrzymane, _on_element
+
+
+def _po_terminie(blad: TimeoutError, termin: Termin, otrzymane: List[Przepis]) -> NoReturn:
+    """Czekanie na zapytanie w locie przerwane terminem – `PrzekroczonyTermin` z tym, co doszło."""
+    if isinstance(blad, PrzekroczonyTermin) or not termin.minal():
+        raise blad
+    raise PrzekroczonyTermin(
+        f"Minął czas na wygenerowanie przepisów ({termin.czas:g} s).",
+        czesciowe=Przepisy(przepisy=otrzymane) if otrzymane else None,
+    ) from blad
+
+
+class RecipeAgent:
+    """
+    Generator trzech przepisów z listy składników, z tym samym cache
+    i koalescencją zapytań co aplikacje Streamlit.
+
+    `provider` to nazwa dostawcy ("anthropic" / "gemini") albo gotowy obiekt
+    `Provider`. `cache=True` używa domyślnego pliku SQLite, `False`/`None`
+    wyłącza cache, można też przekazać własny `CachePrzepisow`.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        provider: Union[str, Provider] = AnthropicProvider.nazwa,
+        model: Optional[str] = None,
+        cache: Union[bool, None, CachePrzepisow] = True,
+        zapytania_w_locie: Optional[PojedynczyLot] = None,
+    ):
+        if isinstance(provider, Provider):
+            self.provider = provider
+        else:
+            api_key = api_key or os.getenv(ZMIENNE_KLUCZY.get(provider, ""), "")
+            if not api_key:
+                raise ValueError(f"Brak klucza API dla dostawcy {provider!r}.")
+            self.provider = wspolny_provider(provider, api_key, model)
+        if cache is True:
+            cache = CachePrzepisow()
+            cache.rozgrzej(Przepisy)
+        self.cache = cache if isinstance(cache, CachePrzepisow) else None
+        self.zapytania_w_locie = zapytania_w_locie or PojedynczyLot()
+        self.zapytania_w_locie_async = PojedynczyLotAsync()
+
+    @property
+    def przestrzen(self) -> str:
+        return przestrzen_cache(self.provider.nazwa, self.provider.model, WERSJA_PROMPTU)
+
+    def generuj(
+        self,
+        skladniki: Skladniki,
+        on_przepis: Optional[OnPrzepis] = None,
+        termin: Optional[Termin] = None,
+    ) -> Przepisy:
+        """
+        Trzy przepisy dla podanych składników. Wyjątki z `recipe_core.generator`
+        (`BladGenerowania` i pochodne) oraz błędy SDK dostawcy są przekazywane dalej.
+
+        `termin` ogranicza całe wywołanie (domyślnie termin ustawiony wyżej
+        przez `w_terminie` albo nowy z RECIPE_DEADLINE). Po terminie rzucamy
+        `PrzekroczonyTermin` z przepisami, które zdążyły dojść, w `czesciowe`.
+        """
+        lista = jako_liste_skladnikow(skladniki)
+        if not lista:
+            raise ValueError("Nie podano składników.")
+        klucz = klucz_w_przestrzeni(self.przestrzen, lista)
+        if self.cache is not None:
+            wynik = self.cache.pobierz(klucz, Przepisy)
+            if wynik is not None:
+                return wynik
+
+        def _generuj_i_zapisz(opublikuj) -> Przepisy:
+            if self.cache is not None:
+                gotowe = self.cache.pobierz(klucz, Przepisy)
+                if gotowe is not None:
+                    return gotowe
+            callback = (lambda idx, p: opublikuj((idx, p))) if on_przepis is not None else None
+            wynik = generuj_przepisy(self.provider, ",".join(lista), callback)
+            if self.cache is not None and czy_kompletne(wynik):
+                self.cache.zapisz(klucz, wynik, lista, self.przestrzen)
+            return wynik
+
+        otrzymane, on_element = _zbierajac(on_przepis)
+        with w_terminie(termin) as termin:
+            try:
+                return self.zapytania_w_locie.wykonaj(
+                    klucz, _generuj_i_zapisz, on_element=on_element, timeout=termin.limit_czekania()
+                )
+            except TimeoutError as e:
+                _po_terminie(e, termin, otrzymane)
+
+    async def generuj_async(
+        self,
+        skladniki: Skladniki,
+        on_przepis: Optional[OnPrzepis] = None,
+        termin: Optional[Termin] = None,
+    ) -> Przepisy:
+        """
+        `generuj` dla serwerów asynchronicznych: wywołanie modelu nie zajmuje
+        wątku, a jednakowe zapytania w locie na tej samej pętli współdzielą
+        jedno wywołanie (`PojedynczyLotAsync`). Odczyt i zapis cache SQLite
+        są krótkie i zostają w pętli. Termin – jak w `generuj`.
+        """
+        lista = jako_liste_skladnikow(skladniki)
+        if not lista:
+            raise ValueError("Nie podano składników.")
+        klucz = klucz_w_przestrzeni(self.przestrzen, lista)
+        if self.cache is not None:
+            wynik = self.cache.pobierz(klucz, Przepisy)
+            if wynik is not None:
+                return wynik
+
+        # zawsze strumieniowo – dołączający w trakcie mogą chcieć kolejnych przepisów
+        async def _generuj_i_zapisz(opublikuj) -> Przepisy:
+            wynik = await generuj_przepisy_async(
+                self.provider, ",".join(lista), on_przepis=lambda idx, p: opublikuj((idx, p))
+            )
+            if self.cache is not None and czy_kompletne(wynik):
+                self.cache.zapisz(klucz, wynik, lista, self.przestrzen)
+            return wynik
+
+        otrzymane, on_element = _zbierajac(on_przepis)
+        with w_terminie(termin) as termin:
+            try:
+                # dołączający do cudzego zapytania czeka najwyżej do swojego terminu
+                async with asyncio.timeout(termin.limit_czekania()):
+                    return await self.zapytania_w_locie_async.wykonaj(klucz, _generuj_i_zapisz, on_element=on_element)
+            except TimeoutError as e:
+                _po_terminie(e, termin, otrzymane)
+
+    def generate_recipes(self, ingredients: Skladniki) -> List[Przepis]:
+        """Lista przepisów – API opisane w README."""
+        return self.generuj(ingredients).przepisy
+
+    def zamknij(self) -> None:
+        if self.cache is not None:
+            self.cache.zamknij()
@@ -0,0 +1,238 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Tryb wsadowy: JSONL z listami składników -> JSONL z przepisami
+#
+#  python -m recipe_core.batch wejscie.jsonl wyjscie.jsonl --watki 16 \
+#      --limit anthropic=4 --limit gemini=8
+#
+#  Wiersz wejścia: {"id": "...", "skladniki": "jajka, mąka" | [...], "provider": "gemini"}
+#  albo sam napis / lista składników. Ponowne uruchomienie z tym samym plikiem
+#  wyjściowym pomija zadania, które już mają zapisane przepisy.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from recipe_core.agent import RecipeAgent, jako_liste_skladnikow
+from recipe_core.cache import CachePrzepisow
+from recipe_core.clients import METRYKI as METRYKI_POLACZEN
+from recipe_core.models import Przepisy
+from recipe_core.providers import AnthropicProvider
+from recipe_core.singleflight import PojedynczyLot
+from recipe_core.telemetry import TELEMETRIA, uruchom_eksport
+
+DOMYSLNE_WATKI = int(os.getenv("RECIPE_BATCH_WORKERS", "8"))
+DOMYSLNY_LIMIT_DOSTAWCY = int(os.getenv("RECIPE_BATCH_PROVIDER_LIMIT", "4"))
+
+
+@dataclass
+class Zadanie:
+    id: str
+    skladniki: List[str]
+    provider: str
+
+
+def _id_zadania(skladniki: List[str], provider: str) -> str:
+    return hashlib.sha256(f"{provider}\x1f{','.join(skladniki)}".encode("utf-8")).hexdigest()[:16]
+
+
+def wczytaj_zadania(sciezka: str, domyslny_provider: str) -> Iterator[Zadanie]:
+    """Zadania z pliku JSONL, leniwie – plik wejściowy może być duży."""
+    with open(sciezka, encoding="utf-8") as f:
+        for nr, linia in enumerate(f, 1):
+            linia = linia.strip()
+            if not linia:
+                continue
+            try:
+                wpis = json.loads(linia)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{sciezka}:{nr}: niepoprawny JSON ({e})") from e
+            if not isinstance(wpis, dict):
+                wpis = {"skladniki": wpis}
+            skladniki = jako_liste_skladnikow(wpis.get("skladniki") or [])
+            if not skladniki:
+                raise ValueError(f"{sciezka}:{nr}: brak składników")
+            provider = wpis.get("provider") or domyslny_provider
+            id_ = str(wpis.get("id") or _id_zadania(skladniki, provider))
+            yield Zadanie(id_, skladniki, provider)
+
+
+def wykonane_zadania(sciezka: str) -> Set[str]:
+    """
+    Identyfikatory zadań z zapisanymi przepisami. Niedokończony ostatni
+    wiersz (przerwany zapis) jest obcinany, żeby dopisywanie zaczęło się
+    od czystej linii. Zadania zakończone błędem są wykonywane ponownie.
+    """
+    if not os.path.exists(sciezka):
+        return set()
+    with open(sciezka, "rb+") as f:
+        dane = f.read()
+        koniec = dane.rfind(b"\n") + 1
+        if koniec < len(dane):
+            f.truncate(koniec)
+    wykonane = set()
+    for linia in dane[:koniec].splitlines():
+        try:
+            wpis = json.loads(linia)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(wpis, dict) and "przepisy" in wpis:
+            wykonane.add(wpis["id"])
+    return wykonane
+
+
+class _Wyjscie:
+    """Dopisywanie wyników z wielu wątków; każdy wiersz jest od razu na dysku."""
+
+    def __init__(self, sciezka: str):
+        self._plik = open(sciezka, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def zapisz(self, wpis: dict) -> None:
+        linia = json.dumps(wpis, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._plik.write(linia)
+            self._plik.flush()
+            os.fsync(self._plik.fileno())
+
+    def zamknij(self) -> None:
+        self._plik.close()
+
+
+def przetworz_wsadowo(
+    wejscie: str,
+    wyjscie: str,
+    agent_dla: Callable[[str], RecipeAgent],
+    watki: int = DOMYSLNE_WATKI,
+    limity: Optional[Dict[str, int]] = None,
+    domyslny_provider: str = AnthropicProvider.nazwa,
+    on_wynik: Optional[Callable[[Zadanie, Optional[Przepisy], Optional[Exception]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Przetwarza zadania z `wejscie` i dopisuje wyniki do `wyjscie`.
+
+    Każdy dostawca ma własną pulę wątków o rozmiarze z `limity` (domyślnie
+    RECIPE_BATCH_PROVIDER_LIMIT), a `watki` ogranicza łączną liczbę zadań
+    w toku – plik wejściowy nie jest wczytywany w całości do pamięci.
+    """
+    limity = limity or {}
+    pominiete = wykonane_zadania(wyjscie)
+    statystyki = {"zadania": 0, "pominiete": 0, "udane": 0, "bledy": 0}
+    w_toku = threading.BoundedSemaphore(watki)
+    pule: Dict[str, ThreadPoolExecutor] = {}
+    lock = threading.Lock()
+    out = _Wyjscie(wyjscie)
+
+    def _wykonaj(zadanie: Zadanie) -> Przepisy:
+        return agent_dla(zadanie.provider).generuj(zadanie.skladniki)
+
+    def _zakonczone(zadanie: Zadanie, przyszlosc: Future) -> None:
+        try:
+            blad = przyszlosc.exception()
+            wpis = {"id": zadanie.id, "provider": zadanie.provider, "skladniki": zadanie.skladniki}
+            if blad is None:
+                wynik = przyszlosc.result()
+                wpis["przepisy"] = wynik.model_dump()["przepisy"]
+            else:
+                wynik = None
+                wpis["blad"] = f"{type(blad).__name__}: {blad}"
+            out.zapisz(wpis)
+            with lock:
+                statystyki["udane" if blad is None else "bledy"] += 1
+            if on_wynik is not None:
+                on_wynik(zadanie, wynik, blad)
+        finally:
+            w_toku.release()
+
+    try:
+        for zadanie in wczytaj_zadania(wejscie, domyslny_provider):
+            with lock:
+                statystyki["zadania"] += 1
+                if zadanie.id in pominiete:
+                    statystyki["pominiete"] += 1
+                    continue
+                pominiete.add(zadanie.id)  # duplikaty w pliku wejściowym
+            if zadanie.provider not in pule:
+                pule[zadanie.provider] = ThreadPoolExecutor(
+                    max_workers=limity.get(zadanie.provider, DOMYSLNY_LIMIT_DOSTAWCY),
+                    thread_name_prefix=f"batch-{zadanie.provider}",
+                )
+            w_toku.acquire()
+            przyszlosc = pule[zadanie.provider].submit(_wykonaj, zadanie)
+            przyszlosc.add_done_callback(lambda p, z=zadanie: _zakonczone(z, p))
+    finally:
+        for pula in pule.values():
+            pula.shutdown(wait=True)
+        out.zamknij()
+    return statystyki
+
+
+def _parsuj_limity(wartosci: List[str]) -> Dict[str, int]:
+    limity = {}
+    for wartosc in wartosci:
+        nazwa, _, liczba = wartosc.partition("=")
+        if not liczba.isdigit() or int(liczba) < 1:
+            raise argparse.ArgumentTypeError(f"Niepoprawny limit: {wartosc!r} (oczekiwano dostawca=N)")
+        limity[nazwa] = int(liczba)
+    return limity
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Wsadowe generowanie przepisów z pliku JSONL")
+    parser.add_argument("wejscie", help="plik JSONL z listami składników")
+    parser.add_argument("wyjscie", help="plik JSONL z wynikami (dopisywany, wznawialny)")
+    parser.add_argument("--provider", default=AnthropicProvider.nazwa, help="domyślny dostawca")
+    parser.add_argument("--model", action="append", default=[], metavar="DOSTAWCA=MODEL")
+    parser.add_argument("--watki", type=int, default=DOMYSLNE_WATKI, help="maks. zadań w toku")
+    parser.add_argument("--limit", action="append", default=[], metavar="DOSTAWCA=N",
+                        help="maks. równoległych zapytań do dostawcy")
+    parser.add_argument("--bez-cache", action="store_true", help="nie używaj cache przepisów")
+    args = parser.parse_args(argv)
+
+    modele = dict(m.partition("=")[::2] for m in args.model)
+    cache = None if args.bez_cache else CachePrzepisow()
+    zapytania_w_locie = PojedynczyLot()
+    agenci: Dict[str, RecipeAgent] = {}
+    lock = threading.Lock()
+
+    def _agent_dla(provider: str) -> RecipeAgent:
+        with lock:
+            if provider not in agenci:
+                agenci[provider] = RecipeAgent(
+                    provider=provider,
+                    model=modele.get(provider),
+                    cache=cache,
+                    zapytania_w_locie=zapytania_w_locie,
+                )
+            return agenci[provider]
+
+    uruchom_eksport()
+    start = time.perf_counter()
+
+    def _postep(zadanie: Zadanie, _wynik, blad) -> None:
+        status = "OK" if blad is None else f"BŁĄD {blad}"
+        print(f"[{time.perf_counter() - start:7.1f}s] {zadanie.id} {status}", file=sys.stderr)
+
+    statystyki = przetworz_wsadowo(
+        args.wejscie,
+        args.wyjscie,
+        _agent_dla,
+        watki=args.watki,
+        limity=_parsuj_limity(args.limit),
+        domyslny_provider=args.provider,
+        on_wynik=_postep,
+    )
+    if cache is not None:
+        cache.zamknij()
+    print(json.dumps({**statystyki, "polaczenia": METRYKI_POLACZEN.raport(), "telemetria": TELEMETRIA.liczniki()}, ensure_ascii=False))
+    return 0 if statystyki["bledy"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Dwupoziomowy cache przepisów: LRU w pamięci procesu + SQLite na dysku
+# ─────────────────────────────────────────────────────────────────────────────
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from recipe_core.index import IndeksSkladnikow
+from recipe_core.kanonizacja import kanonizuj_liste, klucz_skladnika
+from recipe_core.telemetry import TELEMETRIA
+
+M = TypeVar("M", bound=BaseModel)
+
+DOMYSLNA_SCIEZKA = os.getenv("RECIPE_CACHE_PATH", ".cache/przepisy.sqlite3")
+DOMYSLNY_TTL = float(os.getenv("RECIPE_CACHE_TTL", str(7 * 24 * 3600)))
+DOMYSLNY_LIMIT_BAJTOW = int(os.getenv("RECIPE_CACHE_L1_BYTES", str(32 * 1024 * 1024)))
+DOMYSLNA_ROZGRZEWKA = int(os.getenv("RECIPE_CACHE_WARM", "500"))
+
+
+def normalizuj_skladniki(skladniki: Iterable[str]) -> List[str]:
+    """
+    Kanoniczne nazwy bez duplikatów: "Jajka"/"jajko", "pomidory"/"Pomidory świeże"
+    czy "świeży imbir"/"imbir świeży" to ten sam składnik (recipe_core.kanonizacja).
+    """
+    return kanonizuj_liste(skladniki)
+
+
+def klucze_skladnikow(skladniki: Iterable[str]) -> List[str]:
+    """Posortowane klucze składników – podstawa klucza cache i indeksu podzbiorów."""
+    return sorted({klucz_skladnika(s) for s in normalizuj_skladniki(skladniki)})
+
+
+def rozdziel_skladniki(skladniki_str: str) -> List[str]:
+    """Zamienia napis "a, b, c" na znormalizowaną listę składników."""
+    return normalizuj_skladniki(skladniki_str.split(","))
+
+
+def przestrzen_cache(provider: str, model: str, wersja_promptu: str) -> str:
+    """Przestrzeń kluczy: wpisy z różnych przestrzeni nigdy się nie mieszają."""
+    return f"{provider}/{model}/{wersja_promptu}"
+
+
+def klucz_w_przestrzeni(przestrzen: str, skladniki: Iterable[str]) -> str:
+    """Klucz wpisu: przestrzeń + zbiór kluczy składników (skrót SHA-256)."""
+    surowy = "\x1f".join([przestrzen, ",".join(klucze_skladnikow(skladniki))])
+    return hashlib.sha256(surowy.encode("utf-8")).hexdigest()
+
+
+def klucz_cache(provider: str, model: str, wersja_promptu: str, skladniki: Iterable[str]) -> str:
+    """
+    Klucz wpisu: provider + model + wersja promptu + znormalizowany zbiór składników.
+    Klucz API celowo nie jest jego częścią.
+    """
+    return klucz_w_przestrzeni(przestrzen_cache(provider, model, wersja_promptu), skladniki)
+
+
+class CachePrzepisow:
+    """
+    Poziom L1 to LRU w pamięci z limitem liczonym w bajtach zserializowanego
+    JSON-a (nie w liczbie wpisów). Poziom L2 to plik SQLite w trybie WAL,
+    współdzielony przez wszystkie procesy wskazujące tę samą ścieżkę.
+    Wpisy L2 wygasają po `ttl` sekundach.
+    """
+
+    def __init__(
+        self,
+        sciezka: str = DOMYSLNA_SCIEZKA,
+        ttl: float = DOMYSLNY_TTL,
+        limit_bajtow: int = DOMYSLNY_LIMIT_BAJTOW,
+        rozgrzewka: int = DOMYSLNA_ROZGRZEWKA,
+        okres_synchronizacji: float = 5.0,
+    ):
+        self.sciezka = sciezka
+        self.ttl = ttl
+        self.limit_bajtow = limit_bajtow
+        self._l1: "OrderedDict[str, Tuple[BaseModel, int, float]]" = OrderedDict()
+        self._bajty_l1 = 0
+        # trafienia L1 zliczamy w pamięci i zapisujemy do L2 paczkami
+        self._oczekujace_trafienia: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.statystyki: Dict[str, int] = {
+            "trafienia_l1": 0,
+            "trafienia_l2": 0,
+            "chybienia": 0,
+            "eksmisje_l1": 0,
+            "wygasle_l2": 0,
+            "zapisy": 0,
+            "trafienia_podzbiorow": 0,
+            "chybienia_podzbiorow": 0,
+        }
+
+        katalog = os.path.dirname(sciezka)
+        if katalog and sciezka != ":memory:":
+            os.makedirs(katalog, exist_ok=True)
+        self._db = sqlite3.connect(sciezka, check_same_thread=False, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS przepisy (
+                klucz TEXT PRIMARY KEY,
+                skladniki TEXT NOT NULL,
+                wartosc TEXT NOT NULL,
+                utworzono REAL NOT NULL,
+                wygasa REAL NOT NULL,
+                trafienia INTEGER NOT NULL DEFAULT 0,
+                przestrzen TEXT NOT NULL DEFAULT ''
+            )"""
+        )
+        kolumny = {w[1] for w in self._db.execute("PRAGMA table_info(przepisy)")}
+        if "przestrzen" not in kolumny:
+            self._db.execute("ALTER TABLE przepisy ADD COLUMN przestrzen TEXT NOT NULL DEFAULT ''")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_trafienia ON przepisy (trafienia DESC)")
+        self._db.commit()
+        self._do_rozgrzania = rozgrzewka
+
+        # indeks odwrócony składników – osobny dla każdej przestrzeni kluczy
+        self._indeksy: Dict[str, IndeksSkladnikow] = {}
+        self._znacznik_indeksu = 0.0
+        self._ostatnia_synchronizacja = 0.0
+        self.okres_synchronizacji = okres_synchronizacji
+        self._synchronizuj_indeks()
+
+    # ---------------------------------------------------------------- L1 --
+    def _l1_wstaw(self, klucz: str, obiekt: BaseModel, rozmiar: int, wygasa: float) -> None:
+        if rozmiar > self.limit_bajtow:
+            return
+        self._l1_usun(klucz)
+        self._l1[klucz] = (obiekt, rozmiar, wygasa)
+        self._bajty_l1 += rozmiar
+        while self._bajty_l1 > self.limit_bajtow:
+            _, (_, r, _) = self._l1.popitem(last=False)
+            self._bajty_l1 -= r
+            self.statystyki["eksmisje_l1"] += 1
+
+    def _l1_usun(self, klucz: str) -> None:
+        stary = self._l1.pop(klucz, None)
+        if stary is not None:
+            self._bajty_l1 -= stary[1]
+
+    def _splucz_trafienia(self) -> None:
+        if not self._oczekujace_trafienia:
+            return
+        self._db.executemany(
+            "UPDATE przepisy SET trafienia = trafienia + ? WHERE klucz = ?",
+            [(n, k) for k, n in self._oczekujace_trafienia.items()],
+        )
+        self._db.commit()
+        self._oczekujace_trafienia.clear()
+
+    # ------------------------------------------------------------ publiczne --
+    def rozgrzej(self, model_cls: Type[M], limit: Optional[int] = None) -> int:
+        """Ładuje do L1 najpopularniejsze, nieprzeterminowane wpisy z L2."""
+        limit = self._do_rozgrzania if limit is None else limit
+        if limit <= 0:
+            return 0
+        with self._lock:
+            self._splucz_trafienia()
+            wiersze = self._db.execute(
+                "SELECT klucz, wartosc, wygasa FROM przepisy WHERE wygasa > ? "
+                "ORDER BY trafienia DESC LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+            zaladowane = 0
+            for klucz, wartosc, wygasa in reversed(wiersze):
+                try:
+                    obiekt = model_cls.model_validate_json(wartosc)
+                except ValueError:
+                    continue
+                self._l1_wstaw(klucz, obiekt, len(wartosc.encode("utf-8")), wygasa)
+                zaladowane += 1
+            return zaladowane
+
+    def _odczytaj(self, klucz: str, model_cls: Type[M]) -> Tuple[Optional[M], str]:
+        """Odczyt z L1, a w razie braku z L2 (promując wpis do L1); zwraca (obiekt, poziom)."""
+        teraz = time.time()
+        wpis = self._l1.get(klucz)
+        if wpis is not None and wpis[2] <= teraz:
+            self._l1_usun(klucz)
+        elif wpis is not None and isinstance(wpis[0], model_cls):
+            self._l1.move_to_end(klucz)
+            self._oczekujace_trafienia[klucz] = self._oczekujace_trafienia.get(klucz, 0) + 1
+            if len(self._oczekujace_trafienia) >= 64:
+                self._splucz_trafienia()
+            return wpis[0], "l1"
+
+        wiersz = self._db.execute(
+            "SELECT wartosc, wygasa FROM przepisy WHERE klucz = ?", (klucz,)
+        ).fetchone()
+        if wiersz is None:
+            return None, ""
+        wartosc, wygasa = wiersz
+        if wygasa <= teraz:
+            self._db.execute("DELETE FROM przepisy WHERE klucz = ?", (klucz,))
+            self._db.commit()
+            for indeks in self._indeksy.values():
+                indeks.usun(klucz)
+            self.statystyki["wygasle_l2"] += 1
+            return None, ""
+        try:
+            obiekt = model_cls.model_validate_json(wartosc)
+        except ValueError:
+            return None, ""
+        self._db.execute(
+            "UPDATE przepisy SET trafienia = trafienia + 1 WHERE klucz = ?", (klucz,)
+        )
+        self._db.commit()
+        self._l1_wstaw(klucz, obiekt, len(wartosc.encode("utf-8")), wygasa)
+        return obiekt, "l2"
+
+    def pobierz(self, klucz: str, model_cls: Type[M]) -> Optional[M]:
+        """Zwraca obiekt z L1, a w razie braku z L2 (promując go do L1)."""
+        with self._lock:
+            obiekt, poziom = self._odczytaj(klucz, model_cls)
+            if obiekt is None:
+                self.statystyki["chybienia"] += 1
+            else:
+                self.statystyki[f"trafienia_{poziom}"] += 1
+        TELEMETRIA.cache(poziom or "chybienie")
+        return obiekt
+
+    def zawiera(self, klucz: str) -> bool:
+        """Czy jest nieprzeterminowany wpis – bez deserializacji, promocji do L1 i liczników."""
+        teraz = time.time()
+        with self._lock:
+            wpis = self._l1.get(klucz)
+            if wpis is not None and wpis[2] > teraz:
+                return True
+            return self._db.execute(
+                "SELECT 1 FROM przepisy WHERE klucz = ? AND wygasa > ?", (klucz, teraz)
+            ).fetchone() is not None
+
+    def podobne(
+        self,
+        przestrzen: str,
+        skladniki: Iterable[str],
+        model_cls: Type[M],
+        limit: int = 3,
+        min_pokrycie: float = 0.5,
+    ) -> List[Tuple[float, M]]:
+        """
+        Wpisy z tej samej przestrzeni (provider/model/wersja promptu), wygenerowane
+        dla podzbioru podanych składników – od największego pokrycia.
+        """
+        with self._lock:
+            if time.time() - self._ostatnia_synchronizacja > self.okres_synchronizacji:
+                self._synchronizuj_indeks()
+            indeks = self._indeksy.get(przestrzen)
+            if indeks is None:
+                return []
+            wyniki: List[Tuple[float, M]] = []
+            for klucz, pokrycie in indeks.podzbiory(klucze_skladnikow(skladniki), limit, min_pokrycie):
+                obiekt, _ = self._odczytaj(klucz, model_cls)
+                if obiekt is not None:
+                    wyniki.append((pokrycie, obiekt))
+            self.statystyki["trafienia_podzbiorow" if wyniki else "chybienia_podzbiorow"] += 1
+        TELEMETRIA.cache("podzbior" if wyniki else "podzbior_chybienie")
+        return wyniki
+
+    def _synchronizuj_indeks(self) -> None:
+        """Dokłada do indeksu wpisy zapisane od ostatniej synchronizacji (także przez inne procesy)."""
+        teraz = time.time()
+        wiersze = self._db.execute(
+            "SELECT klucz, przestrzen, skladniki, utworzono FROM przepisy "
+            "WHERE utworzono >= ? AND wygasa > ?",
+            (self._znacznik_indeksu, teraz),
+        )
+        for klucz, przestrzen, skladniki, utworzono in wiersze:
+            nazwy = skladniki.split(",") if skladniki else ()
+            self._indeks(przestrzen).dodaj(klucz, klucze_skladnikow(nazwy))
+            self._znacznik_indeksu = max(self._znacznik_indeksu, utworzono)
+        self._ostatnia_synchronizacja = teraz
+
+    def _indeks(self, przestrzen: str) -> IndeksSkladnikow:
+        indeks = self._indeksy.get(przestrzen)
+        if indeks is None:
+            indeks = self._indeksy[przestrzen] = IndeksSkladnikow()
+        return indeks
+
+    def zapisz(
+        self,
+        klucz: str,
+        obiekt: BaseModel,
+        skladniki: Iterable[str] = (),
+        przestrzen: str = "",
+    ) -> None:
+        """Zapisuje obiekt w obu poziomach i dokłada go do indeksu składników."""
+        wartosc = obiekt.model_dump_json()
+        skladniki = normalizuj_skladniki(skladniki)
+        teraz = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO przepisy (klucz, skladniki, wartosc, utworzono, wygasa, przestrzen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(klucz) DO UPDATE SET wartosc = excluded.wartosc, "
+                "utworzono = excluded.utworzono, wygasa = excluded.wygasa",
+                (klucz, ",".join(skladniki), wartosc, teraz, teraz + self.ttl, przestrzen),
+            )
+            self._db.commit()
+            self._indeks(przestrzen).dodaj(klucz, klucze_skladnikow(skladniki))
+            self._l1_wstaw(klucz, obiekt, len(wartosc.encode("utf-8")), teraz + self.ttl)
+            self.statystyki["zapisy"] += 1
+
+    def wpisy(self, przestrzen: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Nieprzeterminowane wpisy L2 jako [(przestrzeń, JSON)] – np. do budowy korpusu."""
+        zapytanie = "SELECT przestrzen, wartosc FROM przepisy WHERE wygasa > ?"
+        parametry: tuple = (time.time(),)
+        if przestrzen is not None:
+            zapytanie += " AND przestrzen = ?"
+            parametry += (przestrzen,)
+        with self._lock:
+            return self._db.execute(zapytanie, parametry).fetchall()
+
+    def usun_przeterminowane(self) -> int:
+        """Usuwa z L2 wszystkie wygasłe wpisy; zwraca ich liczbę."""
+        with self._lock:
+            teraz = time.time()
+            for (klucz,) in self._db.execute("SELECT klucz FROM przepisy WHERE wygasa <= ?", (teraz,)):
+                for indeks in self._indeksy.values():
+                    indeks.usun(klucz)
+            kursor = self._db.execute("DELETE FROM przepisy WHERE wygasa <= ?", (teraz,))
+            self._db.commit()
+            self.statystyki["wygasle_l2"] += kursor.rowcount
+            return kursor.rowcount
+
+    def raport(self) -> Dict[str, float]:
+        """Liczniki trafień/chybień/eksmisji oraz bieżące zajęcie L1."""
+        with self._lock:
+            trafienia = self.statystyki["trafienia_l1"] + self.statystyki["trafienia_l2"]
+            wszystkie = trafienia + self.statystyki["chybienia"]
+            return {
+                **self.statystyki,
+                "wpisy_l1": len(self._l1),
+                "bajty_l1": self._bajty_l1,
+                "wpisy_indeksu": sum(len(i) for i in self._indeksy.values()),
+                "wspolczynnik_trafien": trafienia / wszystkie if wszystkie else 0.0,
+            }
+
+    def zamknij(self) -> None:
+        with self._lock:
+            self._splucz_trafienia()
+            self._db.close()
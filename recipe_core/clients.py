@@ -0,0 +1,243 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Długo żyjące klienty HTTP: pula połączeń keep-alive, wspólna pętla asyncio
+#  i liczniki ponownego użycia połączeń
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Dict, Optional, TypeVar
+
+from recipe_core.terminy import biezacy_termin
+
+T = TypeVar("T")
+# w_watku(fn, *args) – fn(*args) zostanie wykonane w wątku czekającym na wynik
+WWatku = Callable[..., None]
+
+ROZMIAR_PULI = int(os.getenv("RECIPE_HTTP_POOL", "20"))
+ROZMIAR_PULI_KEEPALIVE = int(os.getenv("RECIPE_HTTP_KEEPALIVE", "10"))
+CZAS_KEEPALIVE = float(os.getenv("RECIPE_HTTP_KEEPALIVE_EXPIRY", "120"))
+ROZGRZEWKA = os.getenv("RECIPE_WARMUP", "1") != "0"
+
+
+class MetrykiPolaczen:
+    """
+    Zapytania HTTP vs. nowo zestawione połączenia (TCP + TLS), na podstawie
+    zdarzeń `trace` z httpcore. Czas zaoszczędzony = średni czas zestawienia
+    połączenia × liczba zapytań obsłużonych na istniejącym połączeniu.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zeruj()
+
+    def zeruj(self) -> None:
+        with self._lock:
+            self.zapytania = 0
+            self.nowe_polaczenia = 0
+            self.czas_zestawiania_s = 0.0
+            self.utworzone_klienty = 0
+            self.pobrania_klientow = 0
+            self.czas_tworzenia_klientow_s = 0.0
+
+    def klient(self, czas_tworzenia_s: Optional[float]) -> None:
+        """Pobranie klienta z rejestru; `czas_tworzenia_s` tylko dla nowego."""
+        with self._lock:
+            self.pobrania_klientow += 1
+            if czas_tworzenia_s is not None:
+                self.utworzone_klienty += 1
+                self.czas_tworzenia_klientow_s += czas_tworzenia_s
+
+    def _zdarzenie(self, nazwa: str, starty: Dict[str, float]) -> None:
+        etap, _, faza = nazwa.rpartition(".")
+        if etap not in ("connection.connect_tcp", "connection.start_tls"):
+            return
+        if faza == "started":
+            starty[etap] = time.perf_counter()
+        elif faza == "complete" and etap in starty:
+            with self._lock:
+                self.czas_zestawiania_s += time.perf_counter() - starty.pop(etap)
+                if etap == "connection.connect_tcp":
+                    self.nowe_polaczenia += 1
+
+    def _zapytanie(self) -> Dict[str, float]:
+        with self._lock:
+            self.zapytania += 1
+        return {}
+
+    def hak(self, request) -> None:
+        """Hak `request` dla httpx.Client – podpina śledzenie połączeń."""
+        starty = self._zapytanie()
+        request.extensions["trace"] = lambda nazwa, info: self._zdarzenie(nazwa, starty)
+
+    async def hak_async(self, request) -> None:
+        """Hak `request` dla httpx.AsyncClient."""
+        starty = self._zapytanie()
+
+        async def _trace(nazwa, info):
+            self._zdarzenie(nazwa, starty)
+
+        request.extensions["trace"] = _trace
+
+    def raport(self) -> Dict[str, float]:
+        with self._lock:
+            ponowne = max(0, self.zapytania - self.nowe_polaczenia)
+            sredni = self.czas_zestawiania_s / self.nowe_polaczenia if self.nowe_polaczenia else 0.0
+            sredni_klient = (
+                self.czas_tworzenia_klientow_s / self.utworzone_klienty if self.utworzone_klienty else 0.0
+            )
+            return {
+                "zapytania_http": self.zapytania,
+                "nowe_polaczenia": self.nowe_polaczenia,
+                "wspolczynnik_ponownego_uzycia": ponowne / self.zapytania if self.zapytania else 0.0,
+                "sredni_czas_zestawiania_ms": sredni * 1000,
+                "zaoszczedzony_czas_s": sredni * ponowne,
+                "utworzone_klienty": self.utworzone_klienty,
+                "pobrania_klientow": self.pobrania_klientow,
+                "zaoszczedzony_czas_tworzenia_s": sredni_klient
+                * (self.pobrania_klientow - self.utworzone_klienty),
+            }
+
+
+METRYKI = MetrykiPolaczen()
+
+
+def limity_puli():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=ROZMIAR_PULI,
+        max_keepalive_connections=ROZMIAR_PULI_KEEPALIVE,
+        keepalive_expiry=CZAS_KEEPALIVE,
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Wspólna pętla asyncio dla klientów asynchronicznych
+# ─────────────────────────────────────────────────────────────────────────────
+# Klienty async (httpx.AsyncClient, gRPC aio) są związane z pętlą, na której
+# powstały. `uruchom` tworzy nową pętlę na każde wywołanie, więc same zapytania
+# do API wykonujemy na jednej, długo żyjącej pętli w wątku w tle – połączenia
+# przeżywają pojedyncze wywołanie, a callbacki zostają w wątku wywołującego.
+_petla: Optional[asyncio.AbstractEventLoop] = None
+_petla_lock = threading.Lock()
+
+
+def petla_klientow() -> asyncio.AbstractEventLoop:
+    global _petla
+    with _petla_lock:
+        if _petla is None:
+            _petla = asyncio.new_event_loop()
+            threading.Thread(target=_petla.run_forever, name="recipe-klienty", daemon=True).start()
+        return _petla
+
+
+def _na_petli(korutyna: Coroutine[Any, Any, T], petla: asyncio.AbstractEventLoop) -> "concurrent.futures.Future[T]":
+    """
+    `run_coroutine_threadsafe` w kontekście (contextvars) wywołującego – zadanie
+    na wspólnej pętli widzi np. termin zapytania (`recipe_core.terminy`).
+    """
+    kontekst = contextvars.copy_context()
+
+    async def _w_kontekscie() -> T:
+        return await asyncio.get_running_loop().create_task(korutyna, context=kontekst)
+
+    return asyncio.run_coroutine_threadsafe(_w_kontekscie(), petla)
+
+
+async def na_petli_klientow(fabryka: Callable[[], Awaitable[T]]) -> T:
+    """
+    Wykonuje `fabryka()` na wspólnej pętli i czeka na wynik w bieżącej.
+    Anulowanie oczekującego zadania anuluje zapytanie na wspólnej pętli.
+    """
+    petla = petla_klientow()
+    if asyncio.get_running_loop() is petla:
+        return await fabryka()
+    return await asyncio.wrap_future(_na_petli(fabryka(), petla))
+
+
+async def strumien_na_petli_klientow(fabryka: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+    """
+    Jak `na_petli_klientow`, ale dla strumienia: `fabryka()` jest iterowana
+    na wspólnej pętli, a fragmenty trafiają do bieżącej przez kolejkę.
+    Przerwanie iteracji (anulowanie, `aclose`) zamyka strumień na wspólnej pętli.
+    """
+    petla = petla_klientow()
+    biezaca = asyncio.get_running_loop()
+    if biezaca is petla:
+        async for element in fabryka():
+            yield element
+        return
+
+    koniec = object()
+    kolejka: asyncio.Queue = asyncio.Queue()
+
+    async def _przekazuj() -> None:
+        try:
+            async for element in fabryka():
+                biezaca.call_soon_threadsafe(kolejka.put_nowait, (element, None))
+        except BaseException as e:
+            biezaca.call_soon_threadsafe(kolejka.put_nowait, (koniec, e))
+            raise
+        biezaca.call_soon_threadsafe(kolejka.put_nowait, (koniec, None))
+
+    przyszlosc = _na_petli(_przekazuj(), petla)
+    try:
+        while True:
+            element, blad = await kolejka.get()
+            if element is koniec:
+                if blad is not None:
+                    raise blad
+                return
+            yield element
+    finally:
+        przyszlosc.cancel()
+
+
+def czekaj_na_petli_klientow(
+    fabryka: Callable[[WWatku], Awaitable[T]],
+    on_czekanie: Optional[Callable[[], None]] = None,
+    co_ile: float = 1.0,
+) -> T:
+    """
+    Wersja synchroniczna: `fabryka(w_watku)` wykonuje się na wspólnej pętli,
+    a bieżący wątek czeka na wynik. Callbacki przekazane przez
+    `w_watku(fn, *args)` (np. rysowanie przepisu w Streamlit) wykonują się
+    w bieżącym wątku, a `on_czekanie()` – co `co_ile` sekund bez nich.
+
+    Wyjątek w wątku czekającym (także rerun/stop Streamlit zgłoszony przy
+    rysowaniu w `on_czekanie`) oraz anulowanie terminu przerywają zapytanie
+    na pętli – wątek nie czeka na odpowiedź, której nikt już nie pokaże.
+    """
+    petla = petla_klientow()
+    koniec = object()
+    kolejka: "queue.SimpleQueue" = queue.SimpleQueue()
+    termin = biezacy_termin()
+
+    def _w_watku(fn: Callable[..., None], *args) -> None:
+        kolejka.put((fn, args))
+
+    przyszlosc = _na_petli(fabryka(_w_watku), petla)
+    przyszlosc.add_done_callback(lambda _: kolejka.put((koniec, ())))
+    try:
+        while True:
+            try:
+                fn, args = kolejka.get(timeout=co_ile)
+            except queue.Empty:
+                if termin is not None and termin.anulowany:
+                    termin.sprawdz()
+                if on_czekanie is not None:
+                    on_czekanie()
+                continue
+            if fn is koniec:
+                return przyszlosc.result()
+            fn(*args)
+    except BaseException:
+        if termin is not None and not przyszlosc.done():
+            termin.anuluj()
+        raise
+    finally:
+        przyszlosc.cancel()
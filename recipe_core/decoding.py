@@ -0,0 +1,172 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Dekodowanie odpowiedzi modelu: walidacja pydantic-core prosto z tekstu JSON
+# ─────────────────────────────────────────────────────────────────────────────
+import threading
+import time
+from typing import Dict, List, Tuple, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from recipe_core.models import CzesciowePrzepisy, Przepis, Przepisy
+from recipe_core.streaming import StrumieniowyParserPrzepisow
+from recipe_core.telemetry import TELEMETRIA
+
+# Schematy walidacji budowane raz, przy imporcie modułu
+ADAPTER_PRZEPISY = TypeAdapter(Przepisy)
+ADAPTER_PRZEPIS = TypeAdapter(Przepis)
+
+Tekst = Union[str, bytes]
+
+
+class BladGenerowania(Exception):
+    """Model odpowiedział, ale odpowiedzi nie da się użyć."""
+
+    def __init__(self, komunikat: str, surowa_odpowiedz: str = ""):
+        super().__init__(komunikat)
+        self.surowa_odpowiedz = surowa_odpowiedz
+
+
+class PustaOdpowiedz(BladGenerowania):
+    pass
+
+
+class BladParsowania(BladGenerowania):
+    pass
+
+
+class BladWalidacji(BladGenerowania):
+    pass
+
+
+class MetrykiDekodowania:
+    """Liczniki dekodowania: czas, odrzucone odpowiedzi i odzyskane przepisy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zeruj()
+
+    def zeruj(self) -> None:
+        with self._lock:
+            self.dekodowania = 0
+            self.czas_s = 0.0
+            self.bledy_parsowania = 0
+            self.bledy_walidacji = 0
+            self.uciete = 0  # odpowiedzi niepoprawne jako całość, z których coś odzyskano
+            self.odzyskane_przepisy = 0
+
+    def zapisz(self, czas_s: float, rodzaj: str = "", odzyskane: int = 0) -> None:
+        TELEMETRIA.dekodowanie("odzyskane" if odzyskane else (rodzaj or "ok"), czas_s, odzyskane)
+        with self._lock:
+            self.dekodowania += 1
+            self.czas_s += czas_s
+            if rodzaj in ("parsowanie", "pusta"):
+                self.bledy_parsowania += 1
+            elif rodzaj == "walidacja":
+                self.bledy_walidacji += 1
+            if odzyskane:
+                self.uciete += 1
+                self.odzyskane_przepisy += odzyskane
+
+    def raport(self) -> Dict[str, float]:
+        with self._lock:
+            nieudane = self.bledy_parsowania
+            return {
+                "dekodowania": self.dekodowania,
+                "sredni_czas_ms": self.czas_s / self.dekodowania * 1000 if self.dekodowania else 0.0,
+                "bledy_parsowania": self.bledy_parsowania,
+                "bledy_walidacji": self.bledy_walidacji,
+                "odzyskane_odpowiedzi": self.uciete,
+                "odzyskane_przepisy": self.odzyskane_przepisy,
+                # odsetek uszkodzonych odpowiedzi, z których udało się coś uratować
+                "wspolczynnik_odzysku": self.uciete / nieudane if nieudane else 0.0,
+            }
+
+
+METRYKI = MetrykiDekodowania()
+
+
+def granice_json(tekst: Tekst) -> Tuple[int, int]:
+    """
+    Zakres [start, koniec) JSON-a w odpowiedzi: pomija znaczniki ```json
+    i tekst wokół. Gdy brak zamykającego "}" (odpowiedź ucięta), koniec = len.
+    Działa na str i bytes bez kopiowania całej odpowiedzi.
+    """
+    otwarcie, zamkniecie = (b"{", b"}") if isinstance(tekst, bytes) else ("{", "}")
+    start = tekst.find(otwarcie)
+    if start == -1:
+        return 0, len(tekst)
+    koniec = tekst.rfind(zamkniecie)
+    return start, (koniec + 1 if koniec > start else len(tekst))
+
+
+def wyodrebnij_json(tekst: str) -> str:
+    """Usuwa znaczniki markdown i tekst wokół JSON-a (od pierwszego "{" do ostatniego "}")."""
+    start, koniec = granice_json(tekst)
+    return tekst[start:koniec].strip()
+
+
+def _jako_str(tekst: Tekst) -> str:
+    return tekst.decode("utf-8", errors="replace") if isinstance(tekst, bytes) else tekst
+
+
+def _czy_blad_json(blad: ValidationError) -> bool:
+    return any(e["type"] == "json_invalid" for e in blad.errors(include_url=False))
+
+
+def odzyskaj_przepisy(tekst: Tekst) -> List[Przepis]:
+    """Kompletne (domknięte i poprawne) przepisy z uciętej lub uszkodzonej odpowiedzi."""
+    parser = StrumieniowyParserPrzepisow(surowe=True)
+    przepisy = []
+    for fragment in parser.feed(_jako_str(tekst)):
+        try:
+            przepisy.append(ADAPTER_PRZEPIS.validate_json(fragment))
+        except ValidationError:
+            continue
+    return przepisy
+
+
+def dekoduj_przepisy(tekst: Tekst, odzyskuj: bool = True) -> Przepisy:
+    """
+    Jednoprzebiegowe parsowanie i walidacja (bez pośredniego drzewa słowników).
+    Jeśli odpowiedź jest ucięta (np. na max_output_tokens), zwraca przepisy,
+    które zdążyły się domknąć, jako `CzesciowePrzepisy` – błąd tylko wtedy,
+    gdy nie ma żadnego.
+    """
+    start_czasu = time.perf_counter()
+    if not tekst or not tekst.strip():
+        METRYKI.zapisz(time.perf_counter() - start_czasu, "pusta")
+        raise PustaOdpowiedz("Model nie zwrócił żadnej odpowiedzi.", _jako_str(tekst or ""))
+
+    start, koniec = granice_json(tekst)
+    try:
+        wynik = ADAPTER_PRZEPISY.validate_json(tekst[start:koniec])
+    except ValidationError as blad:
+        rodzaj = "parsowanie" if _czy_blad_json(blad) else "walidacja"
+        odzyskane = odzyskaj_przepisy(tekst) if odzyskuj and rodzaj == "parsowanie" else []
+        METRYKI.zapisz(time.perf_counter() - start_czasu, rodzaj, len(odzyskane))
+        if odzyskane:
+            return CzesciowePrzepisy(przepisy=odzyskane)
+        if rodzaj == "parsowanie":
+            raise BladParsowania(f"Błąd parsowania odpowiedzi JSON: {blad}", _jako_str(tekst)) from blad
+        raise BladWalidacji(f"Błąd walidacji danych przepisów: {blad}", _jako_str(tekst)) from blad
+    METRYKI.zapisz(time.perf_counter() - start_czasu)
+    return wynik
+
+
+def dekoduj_przepis(tekst: Tekst) -> Przepis:
+    """Pojedynczy przepis (tryb równoległy) – bez odzyskiwania."""
+    start_czasu = time.perf_counter()
+    if not tekst or not tekst.strip():
+        METRYKI.zapisz(time.perf_counter() - start_czasu, "pusta")
+        raise PustaOdpowiedz("Model nie zwrócił żadnej odpowiedzi.", _jako_str(tekst or ""))
+    start, koniec = granice_json(tekst)
+    try:
+        wynik = ADAPTER_PRZEPIS.validate_json(tekst[start:koniec])
+    except ValidationError as blad:
+        rodzaj = "parsowanie" if _czy_blad_json(blad) else "walidacja"
+        METRYKI.zapisz(time.perf_counter() - start_czasu, rodzaj)
+        if rodzaj == "parsowanie":
+            raise BladParsowania(f"Błąd parsowania odpowiedzi JSON: {blad}", _jako_str(tekst)) from blad
+        raise BladWalidacji(f"Błąd walidacji danych przepisów: {blad}", _jako_str(tekst)) from blad
+    METRYKI.zapisz(time.perf_counter() - start_czasu)
+    return wynik
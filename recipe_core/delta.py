@@ -0,0 +1,140 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Zmiana wyboru bez generowania od zera: przepisy, które nadal da się
+#  przygotować, zostają, a model uzupełnia tylko zwolnione miejsca
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import os
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from recipe_core.cache import klucze_skladnikow
+from recipe_core.fanout import WSKAZOWKI_ROZNORODNOSCI, BladGenerowaniaRownoleglego
+from recipe_core.generator import OnPrzepis, generuj_przepis_async
+from recipe_core.kanonizacja import klucz_skladnika
+from recipe_core.models import CzesciowePrzepisy, Przepis, Przepisy
+from recipe_core.providers import Provider
+from recipe_core.skladniki import ZAWSZE_DOSTEPNE
+from recipe_core.telemetry import TELEMETRIA
+from recipe_core.terminy import sprawdz_termin
+
+# Poniżej tego podobieństwa (Jaccard kluczy składników) wybór to już inny
+# zestaw – generujemy trzy nowe przepisy zamiast łatać poprzednie
+MIN_PODOBIENSTWO = float(os.getenv("RECIPE_DELTA_MIN_SIMILARITY", "0.5"))
+LICZBA_PRZEPISOW = len(WSKAZOWKI_ROZNORODNOSCI)
+
+_ZAWSZE_DOSTEPNE = frozenset(map(klucz_skladnika, ZAWSZE_DOSTEPNE))
+
+
+def podobienstwo(poprzednie: Iterable[str], skladniki: Iterable[str]) -> float:
+    a, b = set(klucze_skladnikow(poprzednie)), set(klucze_skladnikow(skladniki))
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def _slowa(klucz: str) -> FrozenSet[str]:
+    return frozenset(klucz.split())
+
+
+def niewykonalne(przepisy: Przepisy, poprzednie: Iterable[str], skladniki: Iterable[str]) -> List[int]:
+    """
+    Indeksy przepisów, które używają składnika usuniętego z wyboru. Składnik
+    przepisu pasuje do usuniętego, gdy słowa jednego klucza zawierają się
+    w drugim ("jajka kurze" ~ "Jajka", "pierś z kurczaka" ~ "Filet z kurczaka").
+    Składniki spoza poprzedniego wyboru to podstawy, które model założył
+    (sól, oliwa) – zakładamy je nadal, tak jak prompt.
+    """
+    usuniete = [
+        _slowa(k)
+        for k in set(klucze_skladnikow(poprzednie)) - set(klucze_skladnikow(skladniki))
+        if k not in _ZAWSZE_DOSTEPNE
+    ]
+    if not usuniete:
+        return []
+    wynik = []
+    for i, przepis in enumerate(przepisy.przepisy):
+        slowa = [_slowa(klucz_skladnika(s.nazwa)) for s in przepis.skladniki]
+        if any(s and (s <= u or u <= s) for s in slowa for u in usuniete):
+            wynik.append(i)
+    return wynik
+
+
+def miejsca_do_wymiany(
+    przepisy: Przepisy,
+    poprzednie: Iterable[str],
+    skladniki: Iterable[str],
+    min_podobienstwo: float = MIN_PODOBIENSTWO,
+) -> Optional[List[int]]:
+    """
+    Miejsca do wygenerowania po zmianie wyboru z `poprzednie` na `skladniki`:
+    niewykonalne przepisy i brakujące do trzech pozycje. None – zmiana jest
+    zbyt duża (albo nie ma czego zachować) i trzeba wygenerować całość.
+    """
+    poprzednie, skladniki = list(poprzednie), list(skladniki)
+    if podobienstwo(poprzednie, skladniki) < min_podobienstwo:
+        return None
+    miejsca = niewykonalne(przepisy, poprzednie, skladniki)
+    miejsca += range(len(przepisy.przepisy), LICZBA_PRZEPISOW)
+    if len(miejsca) >= LICZBA_PRZEPISOW:
+        return None
+    return miejsca
+
+
+async def uzupelnij_przepisy(
+    provider: Provider,
+    skladniki_str: str,
+    przepisy: Przepisy,
+    miejsca: Sequence[int],
+    on_przepis: Optional[OnPrzepis] = None,
+    tryb: Optional[str] = None,
+) -> Przepisy:
+    """
+    Zachowuje przepisy spoza `miejsca`, a na każde z `miejsca` generuje
+    równolegle jeden nowy (indeks poza listą – przepis dopisany na końcu).
+    Nowe zapytania dostają nazwy wszystkich obecnych przepisów jako "nie
+    powtarzaj". `on_przepis` dostaje najpierw zachowane, potem nowe przepisy
+    w kolejności ukończenia; wynik zachowuje kolejność miejsc. Nieudane
+    miejsce znika z wyniku, który jest wtedy `CzesciowePrzepisy` (bez zapisu
+    do cache), a gdy nie uda się żadne – rzucamy wyjątek.
+    """
+    miejsca = sorted(set(miejsca))
+    zachowane = {i: p for i, p in enumerate(przepisy.przepisy) if i not in miejsca}
+    unikaj = [p.nazwa for p in przepisy.przepisy]
+    pokazane = 0
+
+    def _pokaz(przepis: Przepis) -> None:
+        nonlocal pokazane
+        pokazane += 1
+        if on_przepis is not None:
+            on_przepis(pokazane, przepis)
+
+    for przepis in zachowane.values():
+        _pokaz(przepis)
+
+    async def _jedno(miejsce: int) -> Tuple[int, Przepis]:
+        wskazowka = WSKAZOWKI_ROZNORODNOSCI[miejsce % LICZBA_PRZEPISOW]
+        return miejsce, await generuj_przepis_async(provider, skladniki_str, wskazowka, unikaj, tryb)
+
+    zadania = [asyncio.ensure_future(_jedno(m)) for m in miejsca]
+    nowe: Dict[int, Przepis] = {}
+    bledy: List[BaseException] = []
+    try:
+        for gotowe in asyncio.as_completed(zadania):
+            try:
+                miejsce, przepis = await gotowe
+            except Exception as e:
+                bledy.append(e)
+                continue
+            nowe[miejsce] = przepis
+            _pokaz(przepis)
+    finally:
+        for zadanie in zadania:
+            zadanie.cancel()
+
+    TELEMETRIA.licz("recipe_delta_recipes_total", len(zachowane), kind="kept")
+    TELEMETRIA.licz("recipe_delta_recipes_total", len(nowe), kind="regenerated")
+    if bledy:
+        TELEMETRIA.licz("recipe_delta_recipes_total", len(bledy), kind="failed")
+    if miejsca and not nowe:
+        sprawdz_termin()
+        raise BladGenerowaniaRownoleglego(bledy)
+    wynik = {**zachowane, **nowe}
+    klasa = CzesciowePrzepisy if bledy else Przepisy
+    return klasa(przepisy=[wynik[i] for i in sorted(wynik)])
@@ -0,0 +1,76 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Równoległe generowanie: trzy niezależne zapytania o pojedynczy przepis
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Każde zapytanie dostaje inną wskazówkę, żeby trzy przepisy się nie powtarzały
+WSKAZOWKI_ROZNORODNOSCI = (
+    "danie główne z kuchni polskiej lub domowej",
+    "lekkie danie lub przystawka z innej kuchni świata (np. śródziemnomorskiej albo azjatyckiej)",
+    "deser, śniadanie lub szybka przekąska",
+)
+
+
+class BladGenerowaniaRownoleglego(Exception):
+    """Żadne z równoległych zapytań nie zwróciło poprawnego przepisu."""
+
+    def __init__(self, bledy: Sequence[BaseException]):
+        self.bledy = list(bledy)
+        opis = "; ".join(f"{type(b).__name__}: {b}" for b in self.bledy)
+        super().__init__(f"Wszystkie zapytania zakończyły się błędem ({opis})")
+
+
+async def generuj_rownolegle(
+    zapytaj: Callable[[str], Awaitable[str]],
+    waliduj: Callable[[str], T],
+    wskazowki: Sequence[str] = WSKAZOWKI_ROZNORODNOSCI,
+    on_wynik: Optional[Callable[[int, T], None]] = None,
+) -> Tuple[List[T], List[BaseException]]:
+    """
+    Wysyła jednocześnie po jednym zapytaniu na każdą wskazówkę.
+
+    `zapytaj(wskazowka)` zwraca surowy tekst odpowiedzi, `waliduj(tekst)`
+    zamienia go w obiekt (lub rzuca wyjątek). Wyniki są zbierane w kolejności
+    ukończenia, a `on_wynik(idx, obiekt)` jest wołany od razu po walidacji.
+    Błąd jednego zapytania nie przerywa pozostałych.
+    """
+
+    async def _jedno(wskazowka: str) -> T:
+        return waliduj(await zapytaj(wskazowka))
+
+    zadania = [asyncio.ensure_future(_jedno(w)) for w in wskazowki]
+    wyniki: List[T] = []
+    bledy: List[BaseException] = []
+    try:
+        for gotowe in asyncio.as_completed(zadania):
+            try:
+                wynik = await gotowe
+            except Exception as e:
+                bledy.append(e)
+                continue
+            wyniki.append(wynik)
+            if on_wynik is not None:
+                on_wynik(len(wyniki), wynik)
+    finally:
+        # anulowanie całości (np. timeout wywołującego) nie zostawia osieroconych zapytań
+        for zadanie in zadania:
+            zadanie.cancel()
+    return wyniki, bledy
+
+
+def uruchom(korutyna: Awaitable[T]) -> T:
+    """asyncio.run także wtedy, gdy w bieżącym wątku działa już pętla zdarzeń."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(korutyna)
+    # pętla już działa (np. w serwerze async) – wykonujemy w osobnym wątku,
+    # w kontekście wywołującego (termin zapytania z recipe_core.terminy)
+    kontekst = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as pula:
+        return pula.submit(kontekst.run, asyncio.run, korutyna).result()
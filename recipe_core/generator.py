@@ -0,0 +1,222 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Generowanie przepisów: prompt -> dostawca -> JSON -> walidacja Pydantic
+# ─────────────────────────────────────────────────────────────────────────────
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from recipe_core.decoding import (  # noqa: F401 – re-eksport dla aplikacji
+    ADAPTER_PRZEPIS,
+    BladGenerowania,
+    BladParsowania,
+    BladWalidacji,
+    PustaOdpowiedz,
+    dekoduj_przepis,
+    dekoduj_przepisy,
+    wyodrebnij_json,
+)
+from recipe_core.fanout import WSKAZOWKI_ROZNORODNOSCI, BladGenerowaniaRownoleglego, generuj_rownolegle
+from recipe_core.models import CzesciowePrzepisy, Przepis, Przepisy
+from recipe_core.prompts import (
+    TRYB_PROMPTU,
+    TRYB_SCHEMAT,
+    zbuduj_prompt,
+    zbuduj_prompt_kompaktowy,
+    zbuduj_prompt_pojedynczy,
+    zbuduj_prompt_pojedynczy_kompaktowy,
+)
+from recipe_core.providers import Provider, Schemat
+from recipe_core.streaming import StrumieniowyParserPrzepisow
+from recipe_core.terminy import PrzekroczonyTermin, biezacy_termin, sprawdz_termin
+
+OnPrzepis = Callable[[int, Przepis], None]
+# (numer napływającego przepisu, jego dotychczasowy tekst JSON)
+OnPostep = Callable[[int, str], None]
+
+# limit odpowiedzi przy zapytaniu o pojedynczy przepis
+MAKS_TOKENOW_PRZEPISU = 1500
+
+
+def czy_kompletne(przepisy: Przepisy) -> bool:
+    """
+    Czy wynik nadaje się do cache i korpusu: pełna liczba przepisów i nie
+    `CzesciowePrzepisy`. Niepełny wynik tylko się pokazuje.
+    """
+    return not isinstance(przepisy, CzesciowePrzepisy) and len(przepisy.przepisy) >= len(WSKAZOWKI_ROZNORODNOSCI)
+
+
+def _ze_schematem(provider: Provider, tryb: Optional[str]) -> bool:
+    return (tryb or TRYB_PROMPTU) == TRYB_SCHEMAT and provider.obsluguje_schemat
+
+
+def prompt_i_schemat(provider: Provider, skladniki_str: str, tryb: Optional[str] = None) -> Tuple[str, Schemat]:
+    """Prompt o trzy przepisy i schemat odpowiedzi dla trybu `tryb` (domyślnie RECIPE_PROMPT_MODE)."""
+    if _ze_schematem(provider, tryb):
+        return zbuduj_prompt_kompaktowy(skladniki_str), Przepisy
+    return zbuduj_prompt(skladniki_str), None
+
+
+def prompt_pojedynczy(
+    provider: Provider,
+    skladniki_str: str,
+    wskazowka: str,
+    unikaj: Sequence[str] = (),
+    tryb: Optional[str] = None,
+) -> Tuple[str, Schemat]:
+    """Prompt o jeden przepis (bez powtórzeń z `unikaj`) i schemat odpowiedzi."""
+    if _ze_schematem(provider, tryb):
+        return zbuduj_prompt_pojedynczy_kompaktowy(skladniki_str, wskazowka, unikaj), Przepis
+    return zbuduj_prompt_pojedynczy(skladniki_str, wskazowka, unikaj), None
+
+
+def generuj_przepisy(
+    provider: Provider,
+    skladniki_str: str,
+    on_przepis: Optional[OnPrzepis] = None,
+    tryb: Optional[str] = None,
+    on_postep: Optional[OnPostep] = None,
+) -> Przepisy:
+    """
+    Jedno zapytanie o trzy przepisy. Jeśli podano `on_przepis`, odpowiedź
+    jest strumieniowana i każdy przepis trafia do callbacku zaraz po domknięciu,
+    a `on_postep` dostaje po każdym fragmencie początek przepisu, który napływa.
+    Gdy termin zapytania minie w trakcie strumienia, `PrzekroczonyTermin`
+    niesie w `czesciowe` przepisy domknięte do tej chwili.
+    """
+    prompt, schemat = prompt_i_schemat(provider, skladniki_str, tryb)
+    if on_przepis is None:
+        return dekoduj_przepisy(provider.generuj(prompt, schemat=schemat))
+
+    parser = StrumieniowyParserPrzepisow(surowe=True)
+    gotowe: List[Przepis] = []
+    try:
+        for fragment in provider.strumieniuj(prompt, schemat=schemat):
+            _przekaz_domkniete(parser, fragment, gotowe, on_przepis, on_postep)
+    except TimeoutError as e:
+        _po_terminie(e, gotowe)
+        raise
+    return _wynik_strumienia(parser, gotowe)
+
+
+def _wynik_strumienia(parser: StrumieniowyParserPrzepisow, gotowe: List[Przepis]) -> Przepisy:
+    """
+    Wynik zgodny z tym, co już trafiło do `on_przepis`. Ucięty strumień
+    dekoder sam zamienia na domknięte przepisy (`CzesciowePrzepisy`). Gdy
+    cała odpowiedź nie przechodzi walidacji (np. jeden przepis bez pola),
+    a część przepisów została już pokazana, wynikiem są właśnie one – jako
+    `CzesciowePrzepisy`, w tej samej kolejności i numeracji.
+    """
+    try:
+        return dekoduj_przepisy(parser.tekst)
+    except BladGenerowania:
+        if not gotowe:
+            raise
+        return CzesciowePrzepisy(przepisy=gotowe)
+
+
+def _po_terminie(blad: TimeoutError, gotowe: List[Przepis]) -> None:
+    """
+    Strumień przerwany limitem czasu po terminie zapytania: `PrzekroczonyTermin`
+    z domkniętymi dotąd przepisami. Limit jednej próby przed terminem – bez zmian.
+    """
+    termin = biezacy_termin()
+    if isinstance(blad, PrzekroczonyTermin):
+        komunikat = str(blad)
+    elif termin is not None and termin.minal():
+        komunikat = f"Minął czas na wygenerowanie przepisów ({termin.czas:g} s)."
+    else:
+        return
+    raise PrzekroczonyTermin(komunikat, czesciowe=Przepisy(przepisy=gotowe) if gotowe else None) from blad
+
+
+def _przekaz_domkniete(
+    parser: StrumieniowyParserPrzepisow,
+    fragment: str,
+    gotowe: List[Przepis],
+    on_przepis: OnPrzepis,
+    on_postep: Optional[OnPostep] = None,
+) -> None:
+    for obiekt in parser.feed(fragment):
+        try:
+            przepis = ADAPTER_PRZEPIS.validate_json(obiekt)
+        except ValidationError:
+            continue  # niepoprawny przepis – pomijamy go też w wyniku (`_wynik_strumienia`)
+        gotowe.append(przepis)
+        on_przepis(len(gotowe), przepis)
+    if on_postep is not None and parser.biezacy_obiekt is not None:
+        on_postep(len(gotowe) + 1, parser.biezacy_obiekt)
+
+
+async def generuj_przepisy_async(
+    provider: Provider,
+    skladniki_str: str,
+    tryb: Optional[str] = None,
+    on_przepis: Optional[OnPrzepis] = None,
+    on_postep: Optional[OnPostep] = None,
+) -> Przepisy:
+    """Jak `generuj_przepisy`, bez blokowania pętli zdarzeń (także strumieniowo)."""
+    prompt, schemat = prompt_i_schemat(provider, skladniki_str, tryb)
+    if on_przepis is None:
+        return dekoduj_przepisy(await provider.generuj_async(prompt, schemat=schemat))
+
+    parser = StrumieniowyParserPrzepisow(surowe=True)
+    gotowe: List[Przepis] = []
+    try:
+        async for fragment in provider.strumieniuj_async(prompt, schemat=schemat):
+            _przekaz_domkniete(parser, fragment, gotowe, on_przepis, on_postep)
+    except TimeoutError as e:
+        _po_terminie(e, gotowe)
+        raise
+    return _wynik_strumienia(parser, gotowe)
+
+
+def generuj_przepis(
+    provider: Provider,
+    skladniki_str: str,
+    wskazowka: str,
+    unikaj: Sequence[str] = (),
+    tryb: Optional[str] = None,
+) -> Przepis:
+    """Jeden przepis – np. w miejsce przepisu, którego użytkownik nie chce."""
+    prompt, schemat = prompt_pojedynczy(provider, skladniki_str, wskazowka, unikaj, tryb)
+    return dekoduj_przepis(provider.generuj(prompt, max_tokenow=MAKS_TOKENOW_PRZEPISU, schemat=schemat))
+
+
+async def generuj_przepis_async(
+    provider: Provider,
+    skladniki_str: str,
+    wskazowka: str,
+    unikaj: Sequence[str] = (),
+    tryb: Optional[str] = None,
+) -> Przepis:
+    prompt, schemat = prompt_pojedynczy(provider, skladniki_str, wskazowka, unikaj, tryb)
+    return dekoduj_przepis(
+        await provider.generuj_async(prompt, max_tokenow=MAKS_TOKENOW_PRZEPISU, schemat=schemat)
+    )
+
+
+async def generuj_przepisy_rownolegle(
+    provider: Provider,
+    skladniki_str: str,
+    on_przepis: Optional[OnPrzepis] = None,
+    tryb: Optional[str] = None,
+) -> Przepisy:
+    """
+    Trzy równoległe zapytania o pojedynczy przepis z różnymi wskazówkami.
+    Błąd jednego zapytania nie odrzuca pozostałych przepisów – wynik to
+    wtedy `CzesciowePrzepisy` z mniej niż trzema pozycjami.
+    """
+
+    async def _zapytaj(wskazowka: str) -> str:
+        prompt, schemat = prompt_pojedynczy(provider, skladniki_str, wskazowka, tryb=tryb)
+        return await provider.generuj_async(prompt, max_tokenow=MAKS_TOKENOW_PRZEPISU, schemat=schemat)
+
+    przepisy, bledy = await generuj_rownolegle(
+        _zapytaj, dekoduj_przepis, WSKAZOWKI_ROZNORODNOSCI, on_wynik=on_przepis
+    )
+    if not przepisy:
+        sprawdz_termin()
+        raise BladGenerowaniaRownoleglego(bledy)
+    if bledy:
+        return CzesciowePrzepisy(przepisy=przepisy)
+    return Przepisy(przepisy=przepisy)
@@ -0,0 +1,163 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Hedging: zapasowy dostawca startuje, gdy główny odpowiada zbyt długo
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from recipe_core.generator import generuj_przepisy_async
+from recipe_core.models import Przepisy
+from recipe_core.providers import Provider
+
+T = TypeVar("T")
+
+DOMYSLNY_PERCENTYL = float(os.getenv("RECIPE_HEDGE_PERCENTILE", "0.9"))
+DOMYSLNE_MIN_OPOZNIENIE = float(os.getenv("RECIPE_HEDGE_MIN_DELAY", "1.0"))
+DOMYSLNE_MAX_OPOZNIENIE = float(os.getenv("RECIPE_HEDGE_MAX_DELAY", "20.0"))
+DOMYSLNE_OPOZNIENIE = float(os.getenv("RECIPE_HEDGE_DEFAULT_DELAY", "8.0"))
+
+
+class PolitykaHedgingu:
+    """
+    Opóźnienie hedgingu = wybrany percentyl ostatnich czasów odpowiedzi
+    głównego dostawcy, ograniczony do [min_opoznienie, max_opoznienie].
+    Dopóki nie zbierzemy `min_probek` pomiarów, używamy `domyslne_opoznienie`.
+
+    Główny dostawca przerwany po wygranej zapasowego też daje próbkę – czas
+    do przerwania, czyli dolne ograniczenie czasu odpowiedzi ("ucięta"
+    próbka). Bez niej okno zawierałoby tylko szybkie odpowiedzi, a opóźnienie
+    hedgingu malałoby z każdym hedgingiem. Ucięta próbka krótsza niż bieżące
+    opóźnienie (przerwanie przed hedgingiem) nic nie mówi o czasie odpowiedzi
+    i jest pomijana. Błędy głównego nie dają próbek: seria szybkich 429
+    sprowadziłaby opóźnienie do zera i podwoiła ruch akurat przy przeciążeniu.
+    """
+
+    def __init__(
+        self,
+        percentyl: float = DOMYSLNY_PERCENTYL,
+        min_opoznienie: float = DOMYSLNE_MIN_OPOZNIENIE,
+        max_opoznienie: float = DOMYSLNE_MAX_OPOZNIENIE,
+        domyslne_opoznienie: float = DOMYSLNE_OPOZNIENIE,
+        okno: int = 200,
+        min_probek: int = 20,
+    ):
+        self.percentyl = percentyl
+        self.min_opoznienie = min_opoznienie
+        self.max_opoznienie = max_opoznienie
+        self.domyslne_opoznienie = domyslne_opoznienie
+        self.okno = okno
+        self.min_probek = min_probek
+        self._czasy: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.statystyki = {"wywolania": 0, "hedge": 0, "wygrane_zapasowego": 0, "uciete_probki": 0}
+
+    def zarejestruj(self, klucz: str, czas: float, pelny: bool = True) -> None:
+        """Czas odpowiedzi głównego dostawcy; `pelny=False` – ucięty przerwaniem."""
+        if not pelny and czas < self.opoznienie(klucz):
+            return
+        with self._lock:
+            self._czasy.setdefault(klucz, deque(maxlen=self.okno)).append(czas)
+            if not pelny:
+                self.statystyki["uciete_probki"] += 1
+
+    def licz(self, statystyka: str) -> None:
+        with self._lock:
+            self.statystyki[statystyka] += 1
+
+    def opoznienie(self, klucz: str) -> float:
+        with self._lock:
+            czasy = sorted(self._czasy.get(klucz, ()))
+        if len(czasy) < self.min_probek:
+            return self.domyslne_opoznienie
+        idx = min(len(czasy) - 1, int(self.percentyl * len(czasy)))
+        return min(self.max_opoznienie, max(self.min_opoznienie, czasy[idx]))
+
+
+async def z_hedgingiem(
+    glowne: Callable[[], Awaitable[T]],
+    zapasowe: Callable[[], Awaitable[T]],
+    opoznienie: float,
+    on_czas_glownego: Optional[Callable[[float, bool], None]] = None,
+    on_wygrana: Optional[Callable[[bool], None]] = None,
+) -> T:
+    """
+    Uruchamia `glowne()`. Jeśli nie zakończy się poprawnie w ciągu
+    `opoznienie` sekund (albo wcześniej rzuci wyjątek), uruchamia `zapasowe()`
+    i zwraca pierwszy poprawny wynik, anulując przegrane zadanie.
+    Obie funkcje powinny same walidować wynik – wyjątek oznacza porażkę.
+
+    `on_czas_glownego(czas, pelny)` dostaje czas poprawnej odpowiedzi głównego
+    zadania albo czas do jego anulowania (`pelny=False`); błąd głównego nie
+    daje pomiaru. `on_wygrana(zapasowe)` – które zadanie dało zwrócony wynik.
+    """
+    start = time.perf_counter()
+
+    async def _glowne() -> T:
+        try:
+            wynik = await glowne()
+        except asyncio.CancelledError:
+            if on_czas_glownego is not None:
+                on_czas_glownego(time.perf_counter() - start, False)
+            raise
+        if on_czas_glownego is not None:
+            on_czas_glownego(time.perf_counter() - start, True)
+        return wynik
+
+    def _wygrana(zadanie: "asyncio.Future[T]") -> T:
+        if on_wygrana is not None:
+            on_wygrana(zadanie is not zadanie_glowne)
+        return zadanie.result()
+
+    zadanie_glowne = asyncio.ensure_future(_glowne())
+    oczekujace = {zadanie_glowne}
+    bledy = []
+    try:
+        done, _ = await asyncio.wait(oczekujace, timeout=opoznienie)
+        if zadanie_glowne in done and zadanie_glowne.exception() is None:
+            return _wygrana(zadanie_glowne)
+        if zadanie_glowne in done:
+            bledy.append(zadanie_glowne.exception())
+            oczekujace.clear()
+
+        oczekujace.add(asyncio.ensure_future(zapasowe()))
+        while oczekujace:
+            done, oczekujace = await asyncio.wait(oczekujace, return_when=asyncio.FIRST_COMPLETED)
+            for zadanie in done:
+                if zadanie.exception() is None:
+                    return _wygrana(zadanie)
+                bledy.append(zadanie.exception())
+        raise bledy[-1]
+    finally:
+        for zadanie in oczekujace:
+            zadanie.cancel()
+        zadanie_glowne.cancel()
+
+
+async def generuj_z_hedgingiem(
+    glowny: Provider,
+    zapasowy: Provider,
+    skladniki_str: str,
+    polityka: PolitykaHedgingu,
+) -> Przepisy:
+    """Trzy przepisy od głównego dostawcy, z hedgingiem na zapasowego."""
+    klucz = f"{glowny.nazwa}/{glowny.model}"
+    polityka.licz("wywolania")
+
+    async def _zapasowe() -> Przepisy:
+        polityka.licz("hedge")
+        return await generuj_przepisy_async(zapasowy, skladniki_str)
+
+    def _wygrana(zapasowe: bool) -> None:
+        if zapasowe:
+            polityka.licz("wygrane_zapasowego")
+
+    return await z_hedgingiem(
+        lambda: generuj_przepisy_async(glowny, skladniki_str),
+        _zapasowe,
+        polityka.opoznienie(klucz),
+        on_czas_glownego=lambda czas, pelny: polityka.zarejestruj(klucz, czas, pelny),
+        on_wygrana=_wygrana,
+    )
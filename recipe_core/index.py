@@ -0,0 +1,108 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Indeks odwrócony: składnik -> identyfikatory wpisów w cache
+# ─────────────────────────────────────────────────────────────────────────────
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+
+class _Wezel:
+    __slots__ = ("dzieci", "ids", "liczba", "max_rozmiar")
+
+    def __init__(self):
+        self.dzieci: Dict[str, "_Wezel"] = {}
+        self.ids: Set[str] = set()
+        self.liczba = 0  # liczba wpisów w poddrzewie
+        self.max_rozmiar = 0  # największy rozmiar zbioru w poddrzewie (ograniczenie górne)
+
+
+class IndeksSkladnikow:
+    """
+    Pozwala znaleźć wpisy, których zbiór składników jest podzbiorem
+    bieżącego wyboru użytkownika, uszeregowane malejąco według pokrycia
+    (|składniki wpisu| / |wybór|).
+
+    Indeks to drzewo zbiorów (set-trie): każdy wpis jest wstawiany jako
+    posortowana ścieżka składników, więc dzieci korzenia tworzą listy
+    odwrócone "składnik -> wpisy", a głębsze poziomy zawężają je do
+    kombinacji. Zapytanie schodzi wyłącznie gałęziami złożonymi ze
+    składników wyboru i odcina poddrzewa, w których nie da się już
+    osiągnąć wymaganego pokrycia – koszt nie rośnie z liczbą wpisów.
+    """
+
+    def __init__(self):
+        self._korzen = _Wezel()
+        self._zbiory: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._zbiory)
+
+    def dodaj(self, identyfikator: str, skladniki: Iterable[str]) -> None:
+        sciezka = tuple(sorted(set(skladniki)))
+        if not sciezka:
+            return
+        with self._lock:
+            self.usun(identyfikator)
+            self._zbiory[identyfikator] = sciezka
+            wezel = self._korzen
+            for skladnik in sciezka:
+                wezel.liczba += 1
+                wezel.max_rozmiar = max(wezel.max_rozmiar, len(sciezka))
+                wezel = wezel.dzieci.setdefault(skladnik, _Wezel())
+            wezel.liczba += 1
+            wezel.max_rozmiar = max(wezel.max_rozmiar, len(sciezka))
+            wezel.ids.add(identyfikator)
+
+    def usun(self, identyfikator: str) -> None:
+        with self._lock:
+            sciezka = self._zbiory.pop(identyfikator, None)
+            if sciezka is None:
+                return
+            wezel = self._korzen
+            for skladnik in sciezka:
+                wezel.liczba -= 1
+                dziecko = wezel.dzieci[skladnik]
+                if dziecko.liczba == 1:
+                    # tylko ten wpis korzystał z gałęzi – odcinamy ją w całości
+                    del wezel.dzieci[skladnik]
+                    return
+                wezel = dziecko
+            wezel.liczba -= 1
+            wezel.ids.discard(identyfikator)
+
+    def zbior(self, identyfikator: str) -> FrozenSet[str]:
+        return frozenset(self._zbiory.get(identyfikator, ()))
+
+    def podzbiory(
+        self,
+        skladniki: Iterable[str],
+        limit: int = 3,
+        min_pokrycie: float = 0.5,
+    ) -> List[Tuple[str, float]]:
+        """Zwraca [(identyfikator, pokrycie)] dla wpisów będących podzbiorem wyboru."""
+        wybor = sorted(set(skladniki))
+        n = len(wybor)
+        if n == 0:
+            return []
+        min_rozmiar = max(1, int(n * min_pokrycie + 0.999999))
+        wyniki: List[Tuple[str, float]] = []
+
+        with self._lock:
+            stos = [(self._korzen, 0, 0)]  # (węzeł, pozycja w wyborze, głębokość)
+            while stos:
+                wezel, start, glebokosc = stos.pop()
+                if glebokosc >= min_rozmiar and wezel.ids:
+                    wyniki.extend((i, glebokosc / n) for i in wezel.ids)
+                dzieci = wezel.dzieci
+                if not dzieci:
+                    continue
+                for j in range(start, n):
+                    # nawet biorąc wszystkie pozostałe składniki nie osiągniemy progu
+                    if glebokosc + (n - j) < min_rozmiar:
+                        break
+                    dziecko = dzieci.get(wybor[j])
+                    if dziecko is not None and dziecko.max_rozmiar >= min_rozmiar:
+                        stos.append((dziecko, j + 1, glebokosc + 1))
+
+        wyniki.sort(key=lambda w: w[1], reverse=True)
+        return wyniki[:limit]
@@ -0,0 +1,187 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Kanonizacja nazw składników: odmiana, liczba mnoga, polskie znaki,
+#  kolejność słów i synonimy -> jedna nazwa i jeden klucz na składnik
+# ─────────────────────────────────────────────────────────────────────────────
+import bisect
+import difflib
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from recipe_core.skladniki import SLOWNIK_SKLADNIKOW, SYNONIMY
+
+_BEZ_OGONKOW = str.maketrans("ąćęłńóśźż", "acelnoszz")
+_NAWIAS = re.compile(r"\(([^)]*)\)")
+_NIE_LITERY = re.compile(r"[^\w]+")
+
+# Słowa bez znaczenia dla tożsamości składnika ("filet z kurczaka" = "kurczak filet")
+SLOWA_POMIJANE = frozenset({"z", "ze", "w", "we", "i", "oraz", "na", "do", "od", "np", "lub"})
+# Rdzenie cech domyślnych: "czosnek świeży" to po prostu czosnek
+CECHY_DOMYSLNE = frozenset({"śwież", "swiez"})
+# Końcówki fleksyjne (także pisane bez ogonków), od najdłuższych
+KONCOWKI = (
+    "ami", "ach", "ego", "emu", "ymi", "imi", "ych", "ich", "iem",
+    "ów", "ow", "om", "ej", "em",
+    "a", "ą", "e", "ę", "i", "o", "u", "y",
+)
+MIN_RDZEN = 3
+# Dopasowanie nazwy pisanej bez polskich znaków ("maslo" -> "Masło") tylko dla
+# rdzeni co najmniej tej długości – krótsze po odcięciu końcówki się zlewają
+# ("mak" i "mąka" bez ogonków to ten sam rdzeń "mak")
+MIN_RDZEN_BEZ_OGONKOW = 4
+# Zmiana `rdzen`/`klucz_tekstu` zmienia klucze składników (cache, korpus)
+WERSJA_KLUCZY = "2"
+
+
+def bez_ogonkow(tekst: str) -> str:
+    return tekst.lower().translate(_BEZ_OGONKOW)
+
+
+def rdzen(slowo: str) -> str:
+    """
+    Przybliżony rdzeń polskiego słowa: jajka/jajko/jajek -> jajk,
+    pomidory/pomidorów -> pomidor, w puszce/z puszki -> puszk. Polskie
+    znaki zostają – "mąka" (mąk) i "mak" to różne składniki.
+    """
+    s = slowo.lower()
+    if len(s) > 4 and s.endswith("ce"):
+        s = s[:-2] + "k"  # oboczność k:c – puszka/puszce
+    elif len(s) > 5 and s.endswith("rze"):
+        s = s[:-2]  # oboczność r:rz – pomidor/pomidorze
+    else:
+        for koncowka in KONCOWKI:
+            if s.endswith(koncowka) and len(s) - len(koncowka) >= MIN_RDZEN:
+                s = s[: -len(koncowka)]
+                break
+    if len(s) > 4 and s.endswith("ek"):
+        s = s[:-2] + "k"  # e ruchome – jajek/jajka, czosnek/czosnku
+    return s
+
+
+def _slowa(nazwa: str) -> List[str]:
+    return [s for s in _NIE_LITERY.split(nazwa.lower()) if s]
+
+
+def klucz_tekstu(nazwa: str) -> str:
+    """Posortowane rdzenie słów bez słów pomijanych i cech domyślnych."""
+    rdzenie = {rdzen(s) for s in _slowa(_NAWIAS.sub(" ", nazwa)) if s not in SLOWA_POMIJANE}
+    znaczace = rdzenie - CECHY_DOMYSLNE
+    return " ".join(sorted(znaczace or rdzenie))
+
+
+class Kanonizator:
+    """
+    Słownik aliasów (klucz tekstu -> pozycja słownika) zbudowany z kategorii
+    panelu wyboru i tabeli synonimów. Każda pozycja ma aliasy: pełną nazwę,
+    nazwę bez nawiasu i treść nawiasu ("Ser biały (twaróg)" -> "twaróg").
+
+    Nazwa pisana bez polskich znaków trafia w pozycję przez drugi słownik
+    (klucze bez ogonków), o ile wynik jest jednoznaczny, a każdy rdzeń ma
+    co najmniej `MIN_RDZEN_BEZ_OGONKOW` liter.
+
+    Podpowiedzi korzystają z posortowanej listy napisów (pełne aliasy i ich
+    pojedyncze słowa, bez ogonków): wszystkie napisy z danym prefiksem leżą
+    obok siebie, więc wystarczy bisect do pierwszego z nich – jak zejście
+    w drzewie prefiksowym. Gdy nic nie pasuje, szukamy podobnych napisów
+    (literówki) przez difflib.
+    """
+
+    def __init__(self, slownik: Iterable[str] = SLOWNIK_SKLADNIKOW, synonimy: Dict[str, str] = SYNONIMY):
+        self.slownik: List[str] = list(slownik)
+        self._pozycje: Dict[str, str] = {}  # klucz aliasu -> nazwa ze słownika
+        self._klucze: Dict[str, str] = {}  # nazwa ze słownika -> jej klucz
+        aliasy: List[Tuple[str, str]] = []
+        for nazwa in self.slownik:
+            self._klucze[nazwa] = klucz_tekstu(nazwa)
+            warianty = [nazwa, _NAWIAS.sub(" ", nazwa)]
+            warianty += [w for w in _NAWIAS.findall(nazwa) if not w.strip().lower().startswith("np")]
+            aliasy.extend((w, nazwa) for w in warianty)
+        aliasy.extend((alias, nazwa) for alias, nazwa in synonimy.items() if nazwa in self._klucze)
+        for alias, nazwa in aliasy:
+            # pierwsza pozycja wygrywa – kolejność słownika rozstrzyga konflikty
+            self._pozycje.setdefault(klucz_tekstu(alias), nazwa)
+        # klucz bez ogonków -> pozycja; None, gdy pasuje do kilku pozycji
+        self._bez_ogonkow: Dict[str, Optional[str]] = {}
+        for klucz, nazwa in self._pozycje.items():
+            klucz = bez_ogonkow(klucz)
+            if self._bez_ogonkow.setdefault(klucz, nazwa) != nazwa:
+                self._bez_ogonkow[klucz] = None
+
+        prefiksy = set()
+        for alias, nazwa in aliasy:
+            tekst = " ".join(_slowa(bez_ogonkow(alias)))
+            prefiksy.add((tekst, nazwa))
+            prefiksy.update((s, nazwa) for s in tekst.split() if s not in SLOWA_POMIJANE)
+        self._prefiksy: List[Tuple[str, str]] = sorted(prefiksy)
+        self._napisy: List[str] = [p[0] for p in self._prefiksy]
+        self._kolejnosc = {nazwa: i for i, nazwa in enumerate(self.slownik)}
+
+    def dopasuj(self, nazwa: str) -> Optional[str]:
+        """Pozycja słownika dla nazwy ("jajko", "pomidory", "twaróg", "maslo") albo None."""
+        klucz = klucz_tekstu(nazwa)
+        pozycja = self._pozycje.get(klucz)
+        if pozycja is not None:
+            return pozycja
+        if all(len(r) >= MIN_RDZEN_BEZ_OGONKOW for r in klucz.split()):
+            return self._bez_ogonkow.get(bez_ogonkow(klucz))
+        return None
+
+    def klucz(self, nazwa: str) -> str:
+        """Klucz składnika – ten sam dla wszystkich zapisów tego samego składnika."""
+        pozycja = self.dopasuj(nazwa)
+        return self._klucze[pozycja] if pozycja is not None else klucz_tekstu(nazwa)
+
+    def kanonizuj(self, nazwa: str) -> str:
+        """Nazwa do cache i promptu: pozycja słownika albo oczyszczony tekst użytkownika."""
+        pozycja = self.dopasuj(nazwa)
+        return (pozycja if pozycja is not None else " ".join(nazwa.split())).lower()
+
+    def podpowiedzi(self, tekst: str, limit: int = 8) -> List[str]:
+        """Pozycje słownika pasujące do początku wpisywanego tekstu (lub podobne do niego)."""
+        zapytanie = " ".join(_slowa(bez_ogonkow(tekst)))
+        if not zapytanie:
+            return []
+        trafienia = set()
+        i = bisect.bisect_left(self._napisy, zapytanie)
+        while i < len(self._napisy) and self._napisy[i].startswith(zapytanie):
+            trafienia.add(self._prefiksy[i][1])
+            i += 1
+        if not trafienia:
+            for napis in difflib.get_close_matches(zapytanie, self._napisy, n=limit, cutoff=0.75):
+                i = bisect.bisect_left(self._napisy, napis)
+                while i < len(self._napisy) and self._napisy[i] == napis:
+                    trafienia.add(self._prefiksy[i][1])
+                    i += 1
+        return sorted(trafienia, key=self._kolejnosc.__getitem__)[:limit]
+
+
+KANONIZATOR = Kanonizator()
+
+
+@lru_cache(maxsize=4096)
+def klucz_skladnika(nazwa: str) -> str:
+    return KANONIZATOR.klucz(nazwa)
+
+
+@lru_cache(maxsize=4096)
+def kanonizuj(nazwa: str) -> str:
+    return KANONIZATOR.kanonizuj(nazwa)
+
+
+def kanonizuj_liste(skladniki: Iterable[str]) -> List[str]:
+    """
+    Kanoniczne nazwy bez duplikatów ("Jajka", "jajko" -> jedna pozycja),
+    uporządkowane według klucza – ta sama lista dla każdego zapisu wyboru.
+    """
+    wynik: Dict[str, str] = {}
+    for nazwa in sorted(s.strip() for s in skladniki if s and s.strip()):
+        wynik.setdefault(klucz_skladnika(nazwa), kanonizuj(nazwa))
+    return [wynik[k] for k in sorted(wynik)]
+
+
+def dopasuj_skladnik(nazwa: str) -> Optional[str]:
+    return KANONIZATOR.dopasuj(nazwa)
+
+
+def podpowiedzi(tekst: str, limit: int = 8) -> List[str]:
+    return KANONIZATOR.podpowiedzi(tekst, limit)
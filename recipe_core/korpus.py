@@ -0,0 +1,360 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Lokalny korpus przepisów: macierz bitowa przepisy × składniki (NumPy)
+#  i wektorowe dopasowanie do wyboru użytkownika – bez wywołania modelu
+#
+#  python -m recipe_core.korpus zbuduj [--cache PLIK] [--wyjscie PLIK]
+#  python -m recipe_core.korpus szukaj "jajka, mleko, mąka pszenna"
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from recipe_core.decoding import ADAPTER_PRZEPIS
+from recipe_core.models import Przepis, Przepisy
+from recipe_core.kanonizacja import WERSJA_KLUCZY, klucz_skladnika
+from recipe_core.skladniki import SLOWNIK_SKLADNIKOW, ZAWSZE_DOSTEPNE
+
+DOMYSLNA_SCIEZKA = os.getenv("RECIPE_CORPUS_PATH", ".cache/korpus.npz")
+# Dobre dopasowanie: ile składników przepisu może brakować i jaka część wyboru ma być użyta
+MAKS_BRAKUJACYCH = int(os.getenv("RECIPE_CORPUS_MAX_MISSING", "0"))
+MIN_POKRYCIE = float(os.getenv("RECIPE_CORPUS_MIN_COVERAGE", "0.5"))
+
+BITY_SLOWA = 64
+_ZAWSZE_DOSTEPNE = frozenset(map(klucz_skladnika, ZAWSZE_DOSTEPNE))
+
+
+@dataclass(frozen=True)
+class Trafienie:
+    """Przepis z korpusu i jego dopasowanie do wyboru użytkownika."""
+
+    indeks: int
+    pokrycie: float  # część wybranych składników użyta w przepisie
+    brakujace: int  # składniki przepisu, których użytkownik nie wybrał
+    jaccard: float
+    przepis: Przepis
+
+
+def _skrot(dane: bytes) -> int:
+    """64-bitowy skrót treści przepisu – do pomijania duplikatów."""
+    return int.from_bytes(hashlib.sha256(dane).digest()[:8], "little")
+
+
+class KorpusPrzepisow:
+    """
+    Każdy przepis to wiersz macierzy `uint64` (po bicie na kanoniczny
+    składnik), obok liczba jego składników. Wybór użytkownika zamieniamy
+    na taki sam wektor bitów, a pokrycie, liczbę brakujących składników
+    i podobieństwo Jaccarda liczymy dla wszystkich wierszy naraz:
+    AND + popcount po kilku słowach na przepis.
+
+    Kolumny to klucze składników (recipe_core.kanonizacja), więc "jajko"
+    z przepisu trafia w "Jajka" z wyboru. Zaczynają się od słownika z panelu
+    wyboru; nowe składniki z wygenerowanych przepisów dostają kolejne bity
+    (macierz poszerza się o słowo co 64 składniki). Treść przepisów jest trzymana jako JSON
+    i walidowana dopiero dla zwracanych trafień.
+    """
+
+    def __init__(self, slownik: Iterable[str] = SLOWNIK_SKLADNIKOW, pojemnosc: int = 1024):
+        self._kolumny: Dict[str, int] = {}
+        for nazwa in slownik:
+            self._kolumna(klucz_skladnika(nazwa))
+        slowa = max(1, -(-len(self._kolumny) // BITY_SLOWA))
+        # układ kolumnowy: słowo s wszystkich przepisów leży w pamięci obok siebie
+        self._bity = np.zeros((slowa, pojemnosc), dtype=np.uint64)
+        self._rozmiary = np.zeros(pojemnosc, dtype=np.uint16)
+        self._skroty = np.zeros(pojemnosc, dtype=np.uint64)
+        self._dane: List[bytes] = []
+        self._znane: set = set()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._dane)
+
+    # ------------------------------------------------------------ budowa --
+    def _kolumna(self, nazwa: str) -> int:
+        kolumna = self._kolumny.get(nazwa)
+        if kolumna is None:
+            kolumna = self._kolumny[nazwa] = len(self._kolumny)
+        return kolumna
+
+    def _wiersz(self, skladniki: Iterable[str]) -> Tuple[np.ndarray, int]:
+        """Bity składników (nowe nazwy dostają kolumny) i ich liczba."""
+        kolumny = {
+            self._kolumna(nazwa)
+            for nazwa in map(klucz_skladnika, skladniki)
+            if nazwa and nazwa not in _ZAWSZE_DOSTEPNE
+        }
+        slowa = self._bity.shape[0]
+        if kolumny and max(kolumny) >= slowa * BITY_SLOWA:
+            nowe = -(-(max(kolumny) + 1) // BITY_SLOWA)
+            self._bity = np.vstack([self._bity, np.zeros((nowe - slowa, self._bity.shape[1]), np.uint64)])
+            slowa = nowe
+        wiersz = np.zeros(slowa, dtype=np.uint64)
+        for k in kolumny:
+            wiersz[k // BITY_SLOWA] |= np.uint64(1) << np.uint64(k % BITY_SLOWA)
+        return wiersz, len(kolumny)
+
+    def _zapewnij_miejsce(self, dodatkowe: int) -> None:
+        potrzebne = len(self._dane) + dodatkowe
+        if potrzebne <= self._bity.shape[1]:
+            return
+        pojemnosc = max(potrzebne, 2 * self._bity.shape[1])
+        dopelnienie = pojemnosc - self._bity.shape[1]
+        self._bity = np.hstack([self._bity, np.zeros((self._bity.shape[0], dopelnienie), np.uint64)])
+        self._rozmiary = np.concatenate([self._rozmiary, np.zeros(dopelnienie, np.uint16)])
+        self._skroty = np.concatenate([self._skroty, np.zeros(dopelnienie, np.uint64)])
+
+    def dodaj(self, przepis: Przepis) -> bool:
+        """Dokłada przepis do korpusu; False, jeśli identyczny już w nim jest."""
+        dane = ADAPTER_PRZEPIS.dump_json(przepis)
+        skrot = _skrot(dane)
+        with self._lock:
+            if skrot in self._znane:
+                return False
+            wiersz, rozmiar = self._wiersz(s.nazwa for s in przepis.skladniki)
+            if rozmiar == 0:
+                return False
+            self._zapewnij_miejsce(1)
+            i = len(self._dane)
+            self._bity[:, i] = wiersz
+            self._rozmiary[i] = rozmiar
+            self._skroty[i] = skrot
+            self._dane.append(dane)
+            self._znane.add(skrot)
+            return True
+
+    def dodaj_przepisy(self, przepisy: Przepisy) -> int:
+        """Dokłada wszystkie przepisy z wyniku generowania; zwraca liczbę nowych."""
+        return sum(self.dodaj(p) for p in przepisy.przepisy)
+
+    @classmethod
+    def z_cache(cls, cache, przestrzen: Optional[str] = None, **kwargs) -> "KorpusPrzepisow":
+        """Korpus z wyników zapisanych w `CachePrzepisow` (wszystkie przestrzenie lub jedna)."""
+        korpus = cls(**kwargs)
+        korpus.uzupelnij_z_cache(cache, przestrzen)
+        return korpus
+
+    def uzupelnij_z_cache(self, cache, przestrzen: Optional[str] = None) -> int:
+        nowe = 0
+        for _, wartosc in cache.wpisy(przestrzen):
+            try:
+                nowe += self.dodaj_przepisy(Przepisy.model_validate_json(wartosc))
+            except ValueError:
+                continue
+        return nowe
+
+    # --------------------------------------------------------- zapytania --
+    def _wektor(self, skladniki: Iterable[str]) -> Tuple[np.ndarray, int]:
+        """Bity wyboru (tylko znane kolumny) i liczba wybranych składników."""
+        wybor = {n for n in map(klucz_skladnika, skladniki) if n and n not in _ZAWSZE_DOSTEPNE}
+        wektor = np.zeros(self._bity.shape[0], dtype=np.uint64)
+        for nazwa in wybor:
+            k = self._kolumny.get(nazwa)
+            # nieznany składnik nie trafi w żaden przepis, ale liczy się do wyboru
+            if k is not None:
+                wektor[k // BITY_SLOWA] |= np.uint64(1) << np.uint64(k % BITY_SLOWA)
+        return wektor, len(wybor)
+
+    def _wspolne(self, skladniki: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Liczba wspólnych składników i rozmiar każdego przepisu oraz rozmiar wyboru."""
+        with self._lock:
+            n = len(self._dane)
+            wektor, rozmiar_wyboru = self._wektor(skladniki)
+            wspolne = np.zeros(n, dtype=np.uint16)
+            # słowa bez żadnego wybranego składnika nic nie wnoszą
+            for s in np.flatnonzero(wektor):
+                wspolne += np.bitwise_count(self._bity[s, :n] & wektor[s])
+            rozmiary = self._rozmiary[:n]
+        return wspolne, rozmiary, rozmiar_wyboru
+
+    @staticmethod
+    def _miary(wspolne: np.ndarray, rozmiary: np.ndarray, rozmiar_wyboru: int) -> Dict[str, np.ndarray]:
+        suma = rozmiary + rozmiar_wyboru - wspolne
+        return {
+            "wspolne": wspolne,
+            "brakujace": rozmiary - wspolne,
+            "pokrycie": wspolne / max(rozmiar_wyboru, 1),
+            "jaccard": np.divide(wspolne, suma, out=np.zeros(len(suma)), where=suma > 0),
+        }
+
+    def oceny(self, skladniki: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Dla każdego przepisu: wspólne składniki, brakujące, pokrycie wyboru i Jaccard."""
+        return self._miary(*self._wspolne(skladniki))
+
+    def szukaj_indeksow(
+        self,
+        skladniki: Iterable[str],
+        limit: int = 3,
+        maks_brakujacych: int = MAKS_BRAKUJACYCH,
+        min_pokrycie: float = MIN_POKRYCIE,
+    ) -> List[Tuple[int, float, int, float]]:
+        """
+        Najlepsze przepisy jako [(indeks, pokrycie, brakujące, Jaccard)]:
+        najpierw najmniej brakujących składników, potem największy Jaccard.
+        """
+        wspolne, rozmiary, rozmiar_wyboru = self._wspolne(skladniki)
+        # progi na liczbach całkowitych, a ułamki tylko dla kandydatów
+        min_wspolnych = max(1, int(np.ceil(min_pokrycie * rozmiar_wyboru - 1e-9)))
+        kandydaci = np.flatnonzero((rozmiary - wspolne <= maks_brakujacych) & (wspolne >= min_wspolnych))
+        if kandydaci.size == 0:
+            return []
+        miary = self._miary(wspolne[kandydaci], rozmiary[kandydaci], rozmiar_wyboru)
+        # brakujące są całkowite, a Jaccard w [0, 1] – jedna liczba porządkuje oba kryteria
+        klucz = 2.0 * miary["brakujace"] - miary["jaccard"]
+        if kandydaci.size > limit:
+            najlepsze = np.argpartition(klucz, limit - 1)[:limit]
+        else:
+            najlepsze = np.arange(kandydaci.size)
+        najlepsze = najlepsze[np.argsort(klucz[najlepsze], kind="stable")]
+        return [
+            (
+                int(kandydaci[j]),
+                float(miary["pokrycie"][j]),
+                int(miary["brakujace"][j]),
+                float(miary["jaccard"][j]),
+            )
+            for j in najlepsze
+        ]
+
+    def szukaj(self, skladniki: Iterable[str], limit: int = 3, **kwargs) -> List[Trafienie]:
+        """Jak `szukaj_indeksow`, ale z gotowymi obiektami `Przepis`."""
+        trafienia = []
+        for i, pokrycie, brakujace, jaccard in self.szukaj_indeksow(skladniki, limit, **kwargs):
+            przepis = ADAPTER_PRZEPIS.validate_json(self._dane[i])
+            trafienia.append(Trafienie(i, pokrycie, brakujace, jaccard, przepis))
+        return trafienia
+
+    def przepisy_dla(self, skladniki: Iterable[str], liczba: int = 3, **kwargs) -> Optional[Przepisy]:
+        """`liczba` dobrze dopasowanych przepisów albo None, gdy korpus ich nie ma."""
+        trafienia = self.szukaj(skladniki, liczba, **kwargs)
+        if len(trafienia) < liczba:
+            return None
+        return Przepisy(przepisy=[t.przepis for t in trafienia])
+
+    # ------------------------------------------------------------- plik --
+    def zapisz(self, sciezka: str = DOMYSLNA_SCIEZKA) -> None:
+        """Zapis do .npz bez pickle: macierz, skróty, kolumny i JSON przepisów."""
+        with self._lock:
+            n = len(self._dane)
+            dlugosci = np.fromiter((len(d) for d in self._dane), dtype=np.int64, count=n)
+            tablice = {
+                "bity": self._bity[:, :n].T,
+                "skroty": self._skroty[:n],
+                "kolumny": np.array(sorted(self._kolumny, key=self._kolumny.get), dtype=str),
+                "dane": np.frombuffer(b"".join(self._dane), dtype=np.uint8),
+                "przesuniecia": np.concatenate([[0], np.cumsum(dlugosci)]),
+                "wersja_kluczy": np.array(WERSJA_KLUCZY),
+            }
+        katalog = os.path.dirname(sciezka)
+        if katalog:
+            os.makedirs(katalog, exist_ok=True)
+        tymczasowy = f"{sciezka}.{os.getpid()}.tmp.npz"
+        np.savez(tymczasowy, **tablice)
+        os.replace(tymczasowy, sciezka)
+
+    @classmethod
+    def z_tablic(
+        cls,
+        kolumny: Sequence[str],
+        bity: np.ndarray,
+        dane: List[bytes],
+        skroty: Optional[np.ndarray] = None,
+    ) -> "KorpusPrzepisow":
+        """
+        Korpus z gotowej macierzy (wiersz i = przepis `dane[i]`, `kolumny` to klucze
+        składników w kolejności bitów). Bez `skroty` kolejne `dodaj` nie rozpoznają
+        duplikatów tych wierszy.
+        """
+        n = len(dane)
+        korpus = cls(slownik=(), pojemnosc=max(1, n))
+        korpus._kolumny = {k: i for i, k in enumerate(kolumny)}
+        korpus._bity = np.zeros((max(bity.shape[1], 1), max(n, 1)), dtype=np.uint64)
+        korpus._bity[: bity.shape[1], :n] = bity.T
+        korpus._rozmiary[:n] = np.bitwise_count(bity).sum(axis=1)
+        if skroty is not None:
+            korpus._skroty[:n] = skroty
+            korpus._znane = set(skroty.tolist())
+        korpus._dane = dane
+        return korpus
+
+    @classmethod
+    def wczytaj(cls, sciezka: str = DOMYSLNA_SCIEZKA) -> "KorpusPrzepisow":
+        with np.load(sciezka, allow_pickle=False) as plik:
+            dane = plik["dane"].tobytes()
+            przesuniecia = plik["przesuniecia"].tolist()
+            przepisy = [dane[a:b] for a, b in zip(przesuniecia, przesuniecia[1:])]
+            if "wersja_kluczy" not in plik.files or str(plik["wersja_kluczy"]) != WERSJA_KLUCZY:
+                # kolumny to klucze z innej wersji kanonizacji – indeksujemy przepisy od nowa
+                korpus = cls()
+                for przepis in przepisy:
+                    korpus.dodaj(ADAPTER_PRZEPIS.validate_json(przepis))
+                return korpus
+            return cls.z_tablic(plik["kolumny"].tolist(), plik["bity"], przepisy, plik["skroty"])
+
+    def raport(self) -> Dict[str, float]:
+        with self._lock:
+            n = len(self._dane)
+            return {
+                "przepisy": n,
+                "skladniki": len(self._kolumny),
+                "slowa_na_przepis": self._bity.shape[0],
+                "bajty_macierzy": self._bity[:, :n].nbytes + self._rozmiary[:n].nbytes,
+                "bajty_przepisow": sum(len(d) for d in self._dane),
+            }
+
+
+def wczytaj_korpus(sciezka: str = DOMYSLNA_SCIEZKA, cache=None) -> KorpusPrzepisow:
+    """Korpus z pliku (jeśli istnieje) uzupełniony przepisami z `CachePrzepisow`."""
+    korpus = KorpusPrzepisow.wczytaj(sciezka) if os.path.exists(sciezka) else KorpusPrzepisow()
+    if cache is not None:
+        korpus.uzupelnij_z_cache(cache)
+    return korpus
+
+
+def main(argv=None) -> int:
+    from recipe_core.cache import DOMYSLNA_SCIEZKA as SCIEZKA_CACHE, CachePrzepisow
+
+    parser = argparse.ArgumentParser(description="Lokalny korpus przepisów")
+    podkomendy = parser.add_subparsers(dest="komenda", required=True)
+    zbuduj = podkomendy.add_parser("zbuduj", help="dołóż do korpusu przepisy z cache")
+    zbuduj.add_argument("--cache", default=SCIEZKA_CACHE)
+    zbuduj.add_argument("--wyjscie", default=DOMYSLNA_SCIEZKA)
+    szukaj = podkomendy.add_parser("szukaj", help="najlepiej pasujące przepisy")
+    szukaj.add_argument("skladniki", help='np. "jajka, mleko, mąka pszenna"')
+    szukaj.add_argument("--korpus", default=DOMYSLNA_SCIEZKA)
+    szukaj.add_argument("--limit", type=int, default=3)
+    szukaj.add_argument("--maks-brakujacych", type=int, default=MAKS_BRAKUJACYCH)
+    szukaj.add_argument("--min-pokrycie", type=float, default=MIN_POKRYCIE)
+    args = parser.parse_args(argv)
+
+    if args.komenda == "zbuduj":
+        cache = CachePrzepisow(args.cache)
+        korpus = wczytaj_korpus(args.wyjscie, cache)
+        cache.zamknij()
+        korpus.zapisz(args.wyjscie)
+        print(json.dumps(korpus.raport(), ensure_ascii=False))
+        return 0
+
+    korpus = KorpusPrzepisow.wczytaj(args.korpus)
+    start = time.perf_counter()
+    trafienia = korpus.szukaj(
+        args.skladniki.split(","), args.limit,
+        maks_brakujacych=args.maks_brakujacych, min_pokrycie=args.min_pokrycie,
+    )
+    czas_ms = (time.perf_counter() - start) * 1000
+    for t in trafienia:
+        print(f"{t.przepis.nazwa}  pokrycie={t.pokrycie:.0%} brakujące={t.brakujace} jaccard={t.jaccard:.2f}")
+    print(f"# {len(trafienia)} trafień w {czas_ms:.1f} ms ({len(korpus)} przepisów)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
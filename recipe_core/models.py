@@ -0,0 +1,43 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Pydantic – modele z polskimi nazwami pól (wspólne dla obu aplikacji)
+# ─────────────────────────────────────────────────────────────────────────────
+from typing import List, Union
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class Skladnik(BaseModel):
+    nazwa: str = Field(description="Nazwa składnika")
+    ilosc: Union[str, int, float] = Field(description="Ilość składnika")
+    jednostka: str = Field(default="", description="Jednostka miary, np. gram, łyżka, sztuka")
+
+    @field_validator('jednostka', mode='before')
+    @classmethod
+    def validate_jednostka(cls, v):
+        """Zamień None na pusty string"""
+        return v if v is not None else ""
+
+
+class KrokPrzygotowania(BaseModel):
+    numer: int = Field(description="Numer kroku")
+    opis: str = Field(description="Opis czynności do wykonania")
+
+
+class Przepis(BaseModel):
+    nazwa: str = Field(description="Nazwa potrawy")
+    czas_przygotowania: str = Field(description="Czas potrzebny na przygotowanie")
+    poziom_trudnosci: str = Field(description="Poziom trudności: łatwy, średni lub trudny")
+    skladniki: List[Skladnik] = Field(description="Lista składników potrzebnych do przygotowania")
+    kroki: List[KrokPrzygotowania] = Field(description="Lista kroków przygotowania potrawy")
+    sugestie: str = Field(description="Dodatkowe sugestie lub warianty przepisu")
+
+
+class Przepisy(BaseModel):
+    przepisy: List[Przepis] = Field(description="Lista przepisów na podstawie podanych składników")
+
+
+class CzesciowePrzepisy(Przepisy):
+    """
+    Niepełny wynik (np. przepisy odzyskane z uciętej odpowiedzi) – do
+    pokazania użytkownikowi, ale nie do cache ani korpusu.
+    """
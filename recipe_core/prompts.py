@@ -0,0 +1,257 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Prompty wspólne dla wszystkich dostawców
+# ─────────────────────────────────────────────────────────────────────────────
+import logging
+import os
+import threading
+from typing import Dict, Sequence, Tuple
+
+# Tryb promptu (RECIPE_PROMPT_MODE):
+#   "pelny"   – szablon JSON, przykład i lista zasad w treści promptu,
+#   "schemat" – krótki prompt, a kształt odpowiedzi wymusza schemat `Przepisy`
+#               przekazany dostawcy (structured output). Dostawcy bez obsługi
+#               schematu (`Provider.obsluguje_schemat`) dostają pełny prompt.
+TRYB_PELNY = "pelny"
+TRYB_SCHEMAT = "schemat"
+TRYB_PROMPTU = os.getenv("RECIPE_PROMPT_MODE", TRYB_PELNY)
+if TRYB_PROMPTU not in (TRYB_PELNY, TRYB_SCHEMAT):
+    raise ValueError(f"RECIPE_PROMPT_MODE: nieznany tryb {TRYB_PROMPTU!r} (pelny / schemat)")
+
+# Zmiana treści promptów wymaga podbicia wersji – unieważnia to wpisy w cache
+WERSJA_PROMPTU = "v4" + ("-schemat" if TRYB_PROMPTU == TRYB_SCHEMAT else "")
+
+log = logging.getLogger(__name__)
+
+
+PREFIKS_PRZEPISOW = """Jesteś asystentem kulinarnym. Odpowiadaj wyłącznie w języku polskim.
+Na podstawie składników podanych na końcu zaproponuj TRZY różne przepisy.
+Każdy przepis powinien być inny – np. z innej kuchni świata lub reprezentować inny typ dania
+(przystawka, danie główne, deser). Jeśli brakuje jakichś podstawowych składników,
+możesz założyć, że użytkownik ma je w swojej kuchni (jak sól, pieprz, oliwa).
+
+WYNIK ZWRÓĆ WYŁĄCZNIE JAKO POPRAWNY JSON, bez żadnego dodatkowego tekstu, bez markdown, bez komentarzy.
+Użyj dokładnie następującej struktury i kluczy po polsku:
+
+{
+  "przepisy": [
+    {
+      "nazwa": "Nazwa przepisu 1",
+      "czas_przygotowania": "30 minut",
+      "poziom_trudnosci": "łatwy",
+      "skladniki": [
+        { "nazwa": "jajka", "ilosc": "2", "jednostka": "szt." },
+        { "nazwa": "mąka", "ilosc": "200", "jednostka": "g" }
+      ],
+      "kroki": [
+        { "numer": 1, "opis": "Pierwszy krok przygotowania." },
+        { "numer": 2, "opis": "Drugi krok przygotowania." }
+      ],
+      "sugestie": "Dodatkowe sugestie dotyczące przepisu."
+    }
+  ]
+}
+
+PRZYKŁAD POPRAWNEJ ODPOWIEDZI:
+{
+  "przepisy": [
+    {
+      "nazwa": "Sałatka z pomidorów i bazylii",
+      "czas_przygotowania": "15 minut",
+      "poziom_trudnosci": "łatwy",
+      "skladniki": [
+        { "nazwa": "pomidory", "ilosc": "3", "jednostka": "szt." },
+        { "nazwa": "bazylia świeża", "ilosc": "1", "jednostka": "garść" },
+        { "nazwa": "oliwa", "ilosc": "2", "jednostka": "łyżki" },
+        { "nazwa": "sól", "ilosc": "1", "jednostka": "szczypta" }
+      ],
+      "kroki": [
+        { "numer": 1, "opis": "Pokrój pomidory w cząstki." },
+        { "numer": 2, "opis": "Dodaj listki bazylii, skrop oliwą i dopraw solą." }
+      ],
+      "sugestie": "Można dodać ser mozzarella lub feta dla większej sytości."
+    }
+  ]
+}
+
+WAŻNE ZASADY:
+- Każdy przepis MUSI być kompletny i wykonalny
+- Użyj realistycznych ilości składników
+- Podaj jasne instrukcje krok po kroku
+- Zaproponuj przydatne sugestie
+- Wszystko w języku polskim
+- Zwróć WYŁĄCZNIE JSON, bez żadnego tekstu przed ani po
+- Użyj dokładnie tych kluczy: nazwa, czas_przygotowania, poziom_trudnosci, skladniki, kroki, sugestie
+- W składnikach: nazwa, ilosc, jednostka
+- W krokach: numer, opis
+
+FORMAT PÓL:
+- "nazwa": krótka nazwa potrawy (2–6 słów), bez cudzysłowów i emoji, np. "Placki ziemniaczane z jogurtem".
+- "czas_przygotowania": łączny czas słownie z jednostką, np. "15 minut", "1 godzina", "1 godzina 20 minut";
+  bez przedziałów w rodzaju "20-30 minut".
+- "poziom_trudnosci": dokładnie jedno z: "łatwy", "średni", "trudny" (małymi literami).
+- "skladniki": każdy składnik osobno, także przyprawy i tłuszcz do smażenia. "nazwa" w mianowniku
+  i bez ilości (np. "cebula", a nie "2 cebule"); składniki użytkownika nazywaj tak jak na jego liście.
+- "ilosc": liczba zapisana jako tekst ("200", "0.5", "1/2"); gdy ilość jest umowna – "do smaku"
+  i pusta "jednostka".
+- "jednostka": jedna z: "g", "kg", "ml", "l", "szt.", "łyżka", "łyżki", "łyżeczka", "łyżeczki",
+  "szklanka", "szklanki", "szczypta", "garść", "ząbek", "ząbki", "plaster", "plastry", "opakowanie"
+  albo pusty tekst.
+- "kroki": od 3 do 8 kroków numerowanych od 1 bez przerw. Każdy "opis" to jedno lub dwa zdania
+  w trybie rozkazującym, z czasem i temperaturą, gdy mają znaczenie (np. "Piecz 25 minut w 180°C.").
+- "sugestie": jedno lub dwa zdania – wariant, zamiennik składnika albo sposób podania; bez powtarzania kroków.
+- Trzy przepisy mają różne nazwy i nie mogą być wariantami tego samego dania.
+- Poza składnikami użytkownika używaj tylko podstaw (sól, pieprz, olej, oliwa, woda, cukier);
+  dodatek, bez którego danie się nie uda, wymień w "sugestie" jako opcję.
+- Składnik użytkownika, który nie pasuje do danego dania, po prostu pomiń w tym przepisie.
+- Nie dodawaj pól spoza szablonu i nie zostawiaj pustych list "skladniki" ani "kroki"."""
+
+
+def zbuduj_prompt(skladniki_str: str) -> str:
+    """Prompt o TRZY przepisy, z szablonem JSON i przykładem."""
+    return f"{PREFIKS_PRZEPISOW}\n\nSkładniki do wykorzystania: {skladniki_str}"
+
+
+def _bez_powtorzen(unikaj: Sequence[str]) -> str:
+    """Wiersz z przepisami, których model ma nie powtarzać (pusty, gdy brak)."""
+    if not unikaj:
+        return ""
+    return "\nNie powtarzaj tych przepisów – zaproponuj wyraźnie inne danie: " + "; ".join(unikaj) + "."
+
+
+PREFIKS_PRZEPISU = """Jesteś asystentem kulinarnym. Odpowiadaj wyłącznie w języku polskim.
+Na podstawie składników podanych na końcu zaproponuj JEDEN przepis wskazanego rodzaju.
+Jeśli brakuje jakichś podstawowych składników, możesz założyć, że użytkownik ma je
+w swojej kuchni (jak sól, pieprz, oliwa).
+
+WYNIK ZWRÓĆ WYŁĄCZNIE JAKO POPRAWNY JSON (jeden obiekt), bez markdown i komentarzy:
+
+{
+  "nazwa": "Nazwa przepisu",
+  "czas_przygotowania": "30 minut",
+  "poziom_trudnosci": "łatwy",
+  "skladniki": [
+    { "nazwa": "jajka", "ilosc": "2", "jednostka": "szt." }
+  ],
+  "kroki": [
+    { "numer": 1, "opis": "Pierwszy krok przygotowania." }
+  ],
+  "sugestie": "Dodatkowe sugestie dotyczące przepisu."
+}
+
+WAŻNE ZASADY:
+- Przepis MUSI być kompletny i wykonalny, z realistycznymi ilościami
+- Wszystko w języku polskim
+- Użyj dokładnie tych kluczy: nazwa, czas_przygotowania, poziom_trudnosci, skladniki, kroki, sugestie"""
+
+
+def zbuduj_prompt_pojedynczy(skladniki_str: str, wskazowka: str, unikaj: Sequence[str] = ()) -> str:
+    """
+    Prompt o JEDEN przepis – używany w trybie równoległym oraz przy wymianie
+    pojedynczego przepisu (`unikaj` – nazwy przepisów, które już są na liście).
+    """
+    return f"""{PREFIKS_PRZEPISU}
+
+Rodzaj przepisu: {wskazowka}.{_bez_powtorzen(unikaj)}
+Składniki do wykorzystania: {skladniki_str}"""
+
+
+_ZASADY_KOMPAKTOWE = """Jesteś asystentem kulinarnym. Odpowiadaj wyłącznie po polsku.
+Jeśli brakuje podstawowych składników (sól, pieprz, oliwa), załóż, że są w kuchni.
+Ilości realistyczne, kroki jasne i ponumerowane od 1, poziom trudności: łatwy, średni lub trudny."""
+
+
+def zbuduj_prompt_kompaktowy(skladniki_str: str) -> str:
+    """Prompt o TRZY przepisy dla trybu ze schematem – bez szablonu i przykładu."""
+    return f"""{_ZASADY_KOMPAKTOWE}
+Zaproponuj TRZY różne przepisy (np. inna kuchnia świata lub inny typ dania).
+
+Składniki: {skladniki_str}"""
+
+
+def zbuduj_prompt_pojedynczy_kompaktowy(skladniki_str: str, wskazowka: str, unikaj: Sequence[str] = ()) -> str:
+    """Prompt o JEDEN przepis dla trybu ze schematem."""
+    return f"""{_ZASADY_KOMPAKTOWE}
+Zaproponuj JEDEN przepis. Rodzaj przepisu: {wskazowka}.{_bez_powtorzen(unikaj)}
+
+Składniki: {skladniki_str}"""
+
+
+# Stałe początki promptów. Dostawcy z cache promptu (Anthropic) wysyłają prefiks
+# osobno jako blok do zapamiętania po stronie API, a w wiadomości użytkownika
+# tylko zmienną resztę. Dane zapytania (składniki, rodzaj) muszą być za prefiksem.
+PREFIKSY = (PREFIKS_PRZEPISOW, PREFIKS_PRZEPISU, _ZASADY_KOMPAKTOWE)
+
+
+def podziel_prompt(prompt: str) -> Tuple[str, str]:
+    """(stały prefiks, zmienna reszta) – prefiks pusty, gdy prompt nie zaczyna się od żadnego z `PREFIKSY`."""
+    for prefiks in PREFIKSY:
+        if prompt.startswith(prefiks):
+            return prefiks, prompt[len(prefiks):].lstrip("\n")
+    return "", prompt
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Zużycie tokenów wejściowych w rozbiciu na tryb promptu
+# ─────────────────────────────────────────────────────────────────────────────
+class MetrykiPromptow:
+    """
+    Tokeny wejściowe/wyjściowe i czas odpowiedzi na (dostawca, tryb) –
+    liczby z pola `usage` odpowiedzi API, gdy dostawca je podaje.
+    `cache_odczyt` / `cache_zapis` to tokeny prefiksu odczytane z cache
+    promptu i zapisane do niego (Anthropic liczy je osobno od `tokeny_wejscia`).
+    Każde wywołanie jest też logowane (logger `recipe_core.prompts`, INFO).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dane: Dict[str, Dict[str, float]] = {}
+
+    def zapisz(
+        self,
+        provider: str,
+        tryb: str,
+        tokeny_wejscia: int,
+        tokeny_wyjscia: int,
+        czas_s: float,
+        cache_odczyt: int = 0,
+        cache_zapis: int = 0,
+    ) -> None:
+        log.info(
+            "%s tryb=%s tokeny_wejscia=%d tokeny_wyjscia=%d cache_odczyt=%d cache_zapis=%d czas=%.2fs",
+            provider, tryb, tokeny_wejscia, tokeny_wyjscia, cache_odczyt, cache_zapis, czas_s,
+        )
+        with self._lock:
+            wpis = self._dane.setdefault(
+                f"{provider}/{tryb}",
+                {"wywolania": 0, "tokeny_wejscia": 0, "tokeny_wyjscia": 0, "cache_odczyt": 0,
+                 "cache_zapis": 0, "trafienia_cache": 0, "czas_s": 0.0},
+            )
+            wpis["wywolania"] += 1
+            wpis["tokeny_wejscia"] += tokeny_wejscia
+            wpis["tokeny_wyjscia"] += tokeny_wyjscia
+            wpis["cache_odczyt"] += cache_odczyt
+            wpis["cache_zapis"] += cache_zapis
+            wpis["trafienia_cache"] += cache_odczyt > 0
+            wpis["czas_s"] += czas_s
+
+    def zeruj(self) -> None:
+        with self._lock:
+            self._dane.clear()
+
+    def raport(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                klucz: {
+                    "wywolania": d["wywolania"],
+                    "srednio_tokeny_wejscia": d["tokeny_wejscia"] / d["wywolania"],
+                    "srednio_tokeny_wyjscia": d["tokeny_wyjscia"] / d["wywolania"],
+                    "srednio_cache_odczyt": d["cache_odczyt"] / d["wywolania"],
+                    "srednio_cache_zapis": d["cache_zapis"] / d["wywolania"],
+                    "trafienia_cache": d["trafienia_cache"] / d["wywolania"],
+                    "sredni_czas_s": d["czas_s"] / d["wywolania"],
+                }
+                for klucz, d in self._dane.items()
+            }
+
+
+METRYKI = MetrykiPromptow()
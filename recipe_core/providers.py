@@ -0,0 +1,540 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Dostawcy LLM – jeden interfejs dla Gemini, Anthropic i atrap testowych
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from recipe_core.clients import METRYKI, limity_puli, na_petli_klientow, strumien_na_petli_klientow
+from recipe_core.prompts import METRYKI as METRYKI_PROMPTOW
+from recipe_core.prompts import TRYB_PELNY, TRYB_SCHEMAT, podziel_prompt
+from recipe_core.telemetry import TELEMETRIA
+from recipe_core.terminy import biezacy_termin, limit_proby
+
+logger = logging.getLogger(__name__)
+
+Schemat = Optional[Type[BaseModel]]
+
+DOMYSLNY_MODEL_GEMINI = "gemini-2.0-flash-exp"
+DOMYSLNY_MODEL_ANTHROPIC = "claude-3-7-sonnet-20250219"
+# Inny adres API Gemini (np. lokalna atrapa z benchmarks.bench_obciazenie) – wtedy
+# przez REST, bo gRPC wymaga TLS. Anthropic: zmienna ANTHROPIC_BASE_URL z SDK.
+ENDPOINT_GEMINI = os.getenv("RECIPE_GEMINI_ENDPOINT", "")
+# Cache promptu Anthropic – stały prefiks promptu jako blok systemowy z cache_control
+# (RECIPE_ANTHROPIC_PROMPT_CACHE=0 wysyła cały prompt jedną wiadomością jak wcześniej)
+CACHE_PROMPTU_ANTHROPIC = os.getenv("RECIPE_ANTHROPIC_PROMPT_CACHE", "1") != "0"
+# Najkrótszy prefiks (w tokenach), który API zapisuje w cache promptu – krótszy
+# z cache_control jest po prostu przetwarzany od nowa przy każdym zapytaniu
+MIN_TOKENOW_CACHE = 1024
+MIN_TOKENOW_CACHE_HAIKU = 2048
+# Zaniżony szacunek bez tokenizera: polski tekst i JSON to zwykle 2,5–3 znaki na token
+ZNAKI_NA_TOKEN = 3.5
+
+
+def min_tokenow_cache(model: str) -> int:
+    return MIN_TOKENOW_CACHE_HAIKU if "haiku" in model else MIN_TOKENOW_CACHE
+
+
+def szacuj_tokeny(tekst: str) -> int:
+    """Dolne oszacowanie liczby tokenów tekstu."""
+    return int(len(tekst) / ZNAKI_NA_TOKEN)
+
+
+@functools.lru_cache(maxsize=32)
+def prefiks_do_cache(model: str, prefiks: str) -> bool:
+    """Czy prefiks na pewno przekracza minimum cache promptu modelu (ostrzeżenie raz na prefiks)."""
+    tokeny, minimum = szacuj_tokeny(prefiks), min_tokenow_cache(model)
+    if tokeny < minimum:
+        logger.warning(
+            "Prefiks promptu (ok. %d tokenów, %s...) jest krótszy niż minimum cache promptu %s (%d) – "
+            "wysyłam go bez cache_control",
+            tokeny, prefiks[:40].replace("\n", " "), model, minimum,
+        )
+        return False
+    return True
+
+
+class Provider:
+    """
+    Wspólny interfejs dostawcy. Implementacje zwracają surowy tekst
+    odpowiedzi – parsowanie i walidacja odbywają się w `recipe_core.generator`.
+
+    Wersja asynchroniczna domyślnie deleguje do wątku, a strumieniowe
+    (`strumieniuj`, `strumieniuj_async`) zwracają całą odpowiedź jednym
+    fragmentem – dostawcy nadpisują je, jeśli SDK ma natywne odpowiedniki.
+
+    `schemat` to model Pydantic opisujący odpowiedź; dostawcy z
+    `obsluguje_schemat = True` przekazują go do API jako structured output,
+    pozostali go ignorują (kształt odpowiedzi opisuje wtedy prompt).
+    """
+
+    nazwa = "provider"
+    obsluguje_schemat = False
+
+    def __init__(self, model: str, temperatura: float = 0.7):
+        self.model = model
+        self.temperatura = temperatura
+
+    def generuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        raise NotImplementedError
+
+    async def generuj_async(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        return await asyncio.to_thread(self.generuj, prompt, max_tokenow, schemat)
+
+    def strumieniuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> Iterator[str]:
+        yield self.generuj(prompt, max_tokenow, schemat)
+
+    async def strumieniuj_async(
+        self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None
+    ) -> AsyncIterator[str]:
+        yield await self.generuj_async(prompt, max_tokenow, schemat)
+
+    def _zapisz_uzycie(
+        self,
+        schemat: Schemat,
+        tokeny_wejscia: int,
+        tokeny_wyjscia: int,
+        start: float,
+        cache_odczyt: int = 0,
+        cache_zapis: int = 0,
+    ) -> None:
+        tryb = TRYB_SCHEMAT if schemat is not None else TRYB_PELNY
+        METRYKI_PROMPTOW.zapisz(
+            self.nazwa, tryb, tokeny_wejscia, tokeny_wyjscia, time.perf_counter() - start, cache_odczyt, cache_zapis
+        )
+        TELEMETRIA.tokeny(self.nazwa, tryb, tokeny_wejscia, tokeny_wyjscia, cache_odczyt, cache_zapis)
+
+    def rozgrzej(self) -> None:
+        """Zestawia połączenie z API bez generowania (domyślnie nic nie robi)."""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(model={self.model!r})"
+
+
+@functools.lru_cache(maxsize=None)
+def schemat_gemini(model_cls: Type[BaseModel]) -> dict:
+    """
+    JSON Schema modelu Pydantic przycięty do podzbioru OpenAPI, który przyjmuje
+    `response_schema` Gemini: bez $ref, tytułów i unii. Unia typów (np.
+    `Skladnik.ilosc: str | int | float`) staje się pierwszym typem – napis
+    i tak przechodzi walidację modelu.
+    """
+    pelny = model_cls.model_json_schema()
+    definicje = pelny.get("$defs", {})
+
+    def _wezel(w: dict) -> dict:
+        if "$ref" in w:
+            w = {**definicje[w["$ref"].rsplit("/", 1)[-1]], **{k: v for k, v in w.items() if k != "$ref"}}
+        if "anyOf" in w:
+            warianty = [x for x in w["anyOf"] if x.get("type") != "null"]
+            wynik = _wezel(warianty[0])
+            if len(warianty) < len(w["anyOf"]):
+                wynik["nullable"] = True
+        else:
+            wynik = {"type": w["type"]}
+            if "properties" in w:
+                wynik["properties"] = {k: _wezel(v) for k, v in w["properties"].items()}
+                wynik["required"] = list(w.get("required", []))
+            if "items" in w:
+                wynik["items"] = _wezel(w["items"])
+        if "description" in w:
+            wynik["description"] = w["description"]
+        return wynik
+
+    return _wezel(pelny)
+
+
+class GeminiProvider(Provider):
+    nazwa = "gemini"
+    obsluguje_schemat = True
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DOMYSLNY_MODEL_GEMINI,
+        temperatura: float = 0.7,
+        endpoint: str = ENDPOINT_GEMINI,
+    ):
+        super().__init__(model, temperatura)
+        import google.ai.generativelanguage as glm
+        import google.generativeai as genai
+        from google.api_core.client_options import ClientOptions
+
+        self._genai = genai
+        self._glm = glm
+        # klient async SDK działa tylko przez gRPC – przy REST wersje async idą do wątku
+        self._rest = bool(endpoint)
+        self._opcje_klienta = ClientOptions(api_key=api_key, **({"api_endpoint": endpoint} if endpoint else {}))
+        # Własne klienty zamiast `genai.configure` – globalna konfiguracja SDK
+        # sprawiłaby, że każdy nowy dostawca (inny klucz, inny adres) podmienia
+        # klucz i adres wszystkim utworzonym wcześniej
+        self._client = glm.GenerativeServiceClient(
+            client_options=self._opcje_klienta, transport="rest" if endpoint else None
+        )
+        self._model = genai.GenerativeModel(model)
+        self._model._client = self._client
+
+    def _config(self, max_tokenow: int, schemat: Schemat = None):
+        opcje = {"response_schema": schemat_gemini(schemat)} if schemat is not None else {}
+        return self._genai.GenerationConfig(
+            response_mime_type="application/json",
+            temperature=self.temperatura,
+            max_output_tokens=max_tokenow,
+            candidate_count=1,
+            **opcje,
+        )
+
+    @staticmethod
+    def _opcje_zapytania() -> dict:
+        """Limit czasu jednej próby z terminu zapytania (`recipe_core.terminy`)."""
+        return {"timeout": limit_proby()}
+
+    def _model_async(self):
+        """Model z klientem gRPC aio – tworzonym na wspólnej pętli, z którą jest związany."""
+        if self._model._async_client is None:
+            self._model._async_client = self._glm.GenerativeServiceAsyncClient(client_options=self._opcje_klienta)
+        return self._model
+
+    async def _generuj_async(self, prompt: str, max_tokenow: int, schemat: Schemat):
+        return await self._model_async().generate_content_async(
+            prompt, generation_config=self._config(max_tokenow, schemat), request_options=self._opcje_zapytania()
+        )
+
+    def _uzycie(self, response, schemat: Schemat, start: float) -> None:
+        meta = getattr(response, "usage_metadata", None)
+        if meta is not None:
+            self._zapisz_uzycie(schemat, meta.prompt_token_count, meta.candidates_token_count, start)
+
+    def generuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        start = time.perf_counter()
+        response = self._model.generate_content(
+            prompt, generation_config=self._config(max_tokenow, schemat), request_options=self._opcje_zapytania()
+        )
+        self._uzycie(response, schemat, start)
+        return response.text
+
+    async def generuj_async(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        if self._rest:
+            return await super().generuj_async(prompt, max_tokenow, schemat)
+        start = time.perf_counter()
+        response = await na_petli_klientow(lambda: self._generuj_async(prompt, max_tokenow, schemat))
+        self._uzycie(response, schemat, start)
+        return response.text
+
+    def strumieniuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> Iterator[str]:
+        start = time.perf_counter()
+        response = self._model.generate_content(
+            prompt, generation_config=self._config(max_tokenow, schemat), stream=True,
+            request_options=self._opcje_zapytania(),
+        )
+        for chunk in response:
+            yield chunk.text
+        self._uzycie(response, schemat, start)
+
+    async def _strumien_async(self, prompt: str, max_tokenow: int, schemat: Schemat) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        response = await self._model_async().generate_content_async(
+            prompt, generation_config=self._config(max_tokenow, schemat), stream=True,
+            request_options=self._opcje_zapytania(),
+        )
+        async for chunk in response:
+            yield chunk.text
+        self._uzycie(response, schemat, start)
+
+    async def strumieniuj_async(
+        self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None
+    ) -> AsyncIterator[str]:
+        if self._rest:
+            yield await self.generuj_async(prompt, max_tokenow, schemat)
+            return
+        async for fragment in strumien_na_petli_klientow(lambda: self._strumien_async(prompt, max_tokenow, schemat)):
+            yield fragment
+
+    def rozgrzej(self) -> None:
+        klient = self._glm.ModelServiceClient(
+            client_options=self._opcje_klienta, transport="rest" if self._rest else None
+        )
+        klient.get_model(name=f"models/{self.model}")
+
+
+class AnthropicProvider(Provider):
+    nazwa = "anthropic"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DOMYSLNY_MODEL_ANTHROPIC,
+        temperatura: float = 0.3,
+        max_ponowien: int = 2,
+        cache_promptu: bool = CACHE_PROMPTU_ANTHROPIC,
+    ):
+        super().__init__(model, temperatura)
+        from anthropic import Anthropic, DefaultHttpxClient
+
+        self._api_key = api_key
+        self._max_ponowien = max_ponowien
+        self.cache_promptu = cache_promptu
+        self._client = Anthropic(
+            api_key=api_key,
+            max_retries=max_ponowien,
+            http_client=DefaultHttpxClient(limits=limity_puli(), event_hooks={"request": [METRYKI.hak]}),
+        )
+        # w terminie zapytania ponawia recipe_core.ratelimit – SDK ponawiałby
+        # po przekroczeniu limitu próby bez oglądania się na termin
+        self._client_w_terminie = self._client.with_options(max_retries=0)
+        # klient async powstaje na wspólnej pętli (recipe_core.clients) przy pierwszym użyciu
+        self._async_client = None
+        self._async_client_w_terminie = None
+
+    def _klient(self):
+        return self._client_w_terminie if biezacy_termin() is not None else self._client
+
+    def _klient_async(self):
+        if self._async_client is None:
+            from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+            self._async_client = AsyncAnthropic(
+                api_key=self._api_key,
+                max_retries=self._max_ponowien,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=limity_puli(), event_hooks={"request": [METRYKI.hak_async]}
+                ),
+            )
+            self._async_client_w_terminie = self._async_client.with_options(max_retries=0)
+        return self._async_client_w_terminie if biezacy_termin() is not None else self._async_client
+
+    def _parametry(self, prompt: str, max_tokenow: int) -> dict:
+        """
+        Stały prefiks promptu (`recipe_core.prompts.PREFIKSY`) idzie jako blok
+        systemowy, a wiadomość użytkownika niesie tylko składniki. Punkt cache
+        (`cache_control`) dostaje tylko prefiks, który przekracza minimum modelu
+        (`prefiks_do_cache`) – API zapamiętuje go wtedy na kilka minut.
+        `timeout` to limit jednej próby z terminu zapytania (`recipe_core.terminy`).
+        """
+        prefiks, reszta = podziel_prompt(prompt) if self.cache_promptu else ("", prompt)
+        parametry = {
+            "model": self.model,
+            "max_tokens": max_tokenow,
+            "messages": [{"role": "user", "content": reszta}],
+            "temperature": self.temperatura,
+            "timeout": limit_proby(),
+        }
+        if prefiks:
+            blok = {"type": "text", "text": prefiks}
+            if prefiks_do_cache(self.model, prefiks):
+                blok["cache_control"] = {"type": "ephemeral"}
+            parametry["system"] = [blok]
+        return parametry
+
+    def _uzycie(self, response, start: float) -> None:
+        uzycie = response.usage
+        self._zapisz_uzycie(
+            None, uzycie.input_tokens, uzycie.output_tokens, start,
+            cache_odczyt=getattr(uzycie, "cache_read_input_tokens", None) or 0,
+            cache_zapis=getattr(uzycie, "cache_creation_input_tokens", None) or 0,
+        )
+
+    def generuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        start = time.perf_counter()
+        response = self._klient().messages.create(**self._parametry(prompt, max_tokenow))
+        self._uzycie(response, start)
+        return response.content[0].text
+
+    async def generuj_async(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        start = time.perf_counter()
+        response = await na_petli_klientow(
+            lambda: self._klient_async().messages.create(**self._parametry(prompt, max_tokenow))
+        )
+        self._uzycie(response, start)
+        return response.content[0].text
+
+    def strumieniuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> Iterator[str]:
+        start = time.perf_counter()
+        with self._klient().messages.stream(**self._parametry(prompt, max_tokenow)) as stream:
+            for tekst in stream.text_stream:
+                yield tekst
+            self._uzycie(stream.get_final_message(), start)
+
+    async def _strumien_async(self, prompt: str, max_tokenow: int) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        async with self._klient_async().messages.stream(**self._parametry(prompt, max_tokenow)) as stream:
+            async for tekst in stream.text_stream:
+                yield tekst
+            self._uzycie(await stream.get_final_message(), start)
+
+    async def strumieniuj_async(
+        self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None
+    ) -> AsyncIterator[str]:
+        async for fragment in strumien_na_petli_klientow(lambda: self._strumien_async(prompt, max_tokenow)):
+            yield fragment
+
+    def rozgrzej(self) -> None:
+        self._client.models.list(limit=1)
+
+
+Odpowiedz = Union[str, BaseException, Callable[[str], str]]
+
+
+class FakeProvider(Provider):
+    """
+    Lokalna atrapa do testów i benchmarków – bez sieci.
+
+    `odpowiedzi` to tekst, wyjątek albo funkcja prompt -> tekst; lista
+    odpowiedzi jest zużywana po kolei (ostatnia się powtarza).
+    `opoznienie` (sekundy lub funkcja bez argumentów) symuluje czas generowania,
+    rozłożony równo na `fragmenty` w trybie strumieniowym. Opóźnienie dłuższe
+    niż limit próby (`recipe_core.terminy.limit_proby`) kończy się
+    `TimeoutError`, jak zapytanie SDK – strumień po tych fragmentach, które
+    zdążyły przyjść przed limitem. Przekazane schematy trafiają do
+    `schematy` (równolegle do `wywolania`).
+    """
+
+    def __init__(
+        self,
+        odpowiedzi: Union[Odpowiedz, Sequence[Odpowiedz]],
+        opoznienie: Union[float, Callable[[], float]] = 0.0,
+        nazwa: str = "fake",
+        model: str = "fake-model",
+        fragmenty: int = 20,
+        obsluguje_schemat: bool = False,
+    ):
+        super().__init__(model)
+        self.nazwa = nazwa
+        self.obsluguje_schemat = obsluguje_schemat
+        if isinstance(odpowiedzi, (str, BaseException)) or callable(odpowiedzi):
+            odpowiedzi = [odpowiedzi]
+        self._odpowiedzi: List[Odpowiedz] = list(odpowiedzi)
+        self._opoznienie = opoznienie
+        self.fragmenty = fragmenty
+        self.wywolania: List[str] = []
+        self.schematy: List[Schemat] = []
+        self.anulowane = 0
+
+    def _czas(self) -> float:
+        return self._opoznienie() if callable(self._opoznienie) else self._opoznienie
+
+    def _limit(self, czas: float) -> Optional[float]:
+        """Czas do przekroczenia limitu próby albo None, gdy `czas` się w nim mieści."""
+        limit = limit_proby()
+        return limit if czas > limit else None
+
+    def _odpowiedz(self, prompt: str, schemat: Schemat) -> str:
+        idx = min(len(self.wywolania), len(self._odpowiedzi) - 1)
+        self.wywolania.append(prompt)
+        self.schematy.append(schemat)
+        odpowiedz = self._odpowiedzi[idx]
+        if isinstance(odpowiedz, BaseException):
+            raise odpowiedz
+        return odpowiedz(prompt) if callable(odpowiedz) else odpowiedz
+
+    def generuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        czas = self._czas()
+        limit = self._limit(czas)
+        time.sleep(czas if limit is None else limit)
+        if limit is not None:
+            raise TimeoutError(f"Atrapa: odpowiedź po {czas:g} s, limit próby {limit:g} s")
+        return self._odpowiedz(prompt, schemat)
+
+    async def generuj_async(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        czas = self._czas()
+        limit = self._limit(czas)
+        try:
+            await asyncio.sleep(czas if limit is None else limit)
+        except asyncio.CancelledError:
+            self.anulowane += 1
+            raise
+        if limit is not None:
+            raise TimeoutError(f"Atrapa: odpowiedź po {czas:g} s, limit próby {limit:g} s")
+        return self._odpowiedz(prompt, schemat)
+
+    def _fragmenty(self, prompt: str, schemat: Schemat) -> Tuple[List[str], float, Optional[float]]:
+        """Fragmenty odpowiedzi, przerwa między nimi i limit próby (None – mieści się)."""
+        czas = self._czas()
+        limit = self._limit(czas)
+        tekst = self._odpowiedz(prompt, schemat)
+        krok = max(1, -(-len(tekst) // self.fragmenty))
+        return [tekst[i:i + krok] for i in range(0, len(tekst), krok)], czas / self.fragmenty, limit
+
+    def strumieniuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> Iterator[str]:
+        fragmenty, przerwa, limit = self._fragmenty(prompt, schemat)
+        koniec = None if limit is None else time.monotonic() + limit
+        for fragment in fragmenty:
+            if koniec is not None and time.monotonic() + przerwa > koniec:
+                time.sleep(max(0.0, koniec - time.monotonic()))
+                raise TimeoutError(f"Atrapa: strumień dłuższy niż limit próby {limit:g} s")
+            time.sleep(przerwa)
+            yield fragment
+
+    async def strumieniuj_async(
+        self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None
+    ) -> AsyncIterator[str]:
+        fragmenty, przerwa, limit = self._fragmenty(prompt, schemat)
+        koniec = None if limit is None else time.monotonic() + limit
+        try:
+            for fragment in fragmenty:
+                if koniec is not None and time.monotonic() + przerwa > koniec:
+                    await asyncio.sleep(max(0.0, koniec - time.monotonic()))
+                    raise TimeoutError(f"Atrapa: strumień dłuższy niż limit próby {limit:g} s")
+                await asyncio.sleep(przerwa)
+                yield fragment
+        except (asyncio.CancelledError, GeneratorExit):
+            self.anulowane += 1
+            raise
+
+
+def utworz_provider(nazwa: str, api_key: str, model: Optional[str] = None, **opcje) -> Provider:
+    """Fabryka dostawców po nazwie ("gemini" / "anthropic")."""
+    if nazwa == GeminiProvider.nazwa:
+        return GeminiProvider(api_key, model or DOMYSLNY_MODEL_GEMINI, **opcje)
+    if nazwa == AnthropicProvider.nazwa:
+        return AnthropicProvider(api_key, model or DOMYSLNY_MODEL_ANTHROPIC, **opcje)
+    raise ValueError(f"Nieznany dostawca: {nazwa}")
+
+
+# Dostawcy współdzieleni przez cały proces: (nazwa, skrót klucza API, model) -> Provider
+_wspolni: Dict[Tuple[str, str, str], Provider] = {}
+_wspolni_lock = threading.Lock()
+
+
+def wspolny_provider(nazwa: str, api_key: str, model: Optional[str] = None) -> Provider:
+    """
+    Jak `utworz_provider`, ale zwraca długo żyjący obiekt z pulą połączeń
+    keep-alive, wspólny dla wszystkich sesji i wątków procesu, opakowany
+    we wspólne limity i ponowienia (`recipe_core.ratelimit`).
+    """
+    from recipe_core.ratelimit import LimitowanyProvider  # ratelimit importuje ten moduł
+
+    klucz = (nazwa, hashlib.sha256(api_key.encode("utf-8")).hexdigest(), model or "")
+    with _wspolni_lock:
+        provider = _wspolni.get(klucz)
+        if provider is not None:
+            METRYKI.klient(None)
+            return provider
+        start = time.perf_counter()
+        # ponowienia robi LimitowanyProvider – SDK nie powinno ich dublować
+        opcje = {"max_ponowien": 0} if nazwa == AnthropicProvider.nazwa else {}
+        provider = _wspolni[klucz] = LimitowanyProvider(utworz_provider(nazwa, api_key, model, **opcje))
+        METRYKI.klient(time.perf_counter() - start)
+        return provider
+
+
+def rozgrzej_w_tle(providery: Iterable[Provider]) -> threading.Thread:
+    """Rozgrzewka połączeń w wątku w tle – start aplikacji nie czeka na sieć."""
+
+    def _rozgrzej():
+        for provider in providery:
+            try:
+                provider.rozgrzej()
+            except Exception as e:  # rozgrzewka jest tylko optymalizacją
+                logger.warning("Rozgrzewka %r nie powiodła się: %s", provider, e)
+
+    watek = threading.Thread(target=_rozgrzej, name="recipe-rozgrzewka", daemon=True)
+    watek.start()
+    return watek
@@ -0,0 +1,559 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Kontrola ruchu do dostawców: kubełki tokenów (zapytania/min i tokeny/min),
+#  adaptacyjna współbieżność AIMD i ponowienia z backoffem (tenacity)
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_before_delay,
+    wait_random_exponential,
+)
+
+from recipe_core.providers import Provider, Schemat
+from recipe_core.telemetry import TELEMETRIA
+from recipe_core.terminy import (
+    PrzekroczonyTermin,
+    ZapytanieAnulowane,
+    biezacy_termin,
+    czekaj,
+    czekaj_async,
+    proba_w_terminie,
+    sprawdz_termin,
+)
+
+LICZBA_PROB = int(os.getenv("RECIPE_RETRY_ATTEMPTS", "4"))
+MAKS_CZAS_PONOWIEN = float(os.getenv("RECIPE_RETRY_MAX_TIME", "60"))
+BACKOFF_POCZATKOWY = float(os.getenv("RECIPE_RETRY_INITIAL", "0.5"))
+BACKOFF_MAKS = float(os.getenv("RECIPE_RETRY_MAX_WAIT", "20"))
+# Dłuższe czekanie na wolne miejsce odrzucamy od razu – kolejka bez końca
+# tylko wydłuża odpowiedzi tym, którzy i tak się nie doczekają
+MAKS_OCZEKIWANIE = float(os.getenv("RECIPE_RATE_MAX_WAIT", "30"))
+
+KODY_PRZECIAZENIA = {429, 529}
+KODY_PRZEJSCIOWE = {500, 502, 503, 504}
+
+
+def _env(nazwa: str, parametr: str, domyslna: str) -> float:
+    return float(os.getenv(f"RECIPE_{nazwa.upper()}_{parametr}", domyslna))
+
+
+class PrzekroczonyLimit(Exception):
+    """Zapytanie odrzucone lokalnie – brak miejsca w limicie dostawcy."""
+
+    status_code = 429
+
+    def __init__(self, komunikat: str, retry_after: Optional[float] = None):
+        super().__init__(komunikat)
+        self.retry_after = retry_after
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Klasyfikacja błędów dostawców (bez importu SDK)
+# ─────────────────────────────────────────────────────────────────────────────
+def _kod_bledu(blad: BaseException) -> Optional[int]:
+    kod = getattr(blad, "status_code", None)
+    if kod is None:
+        kod = getattr(blad, "code", None)  # google.api_core.exceptions
+    return kod if isinstance(kod, int) else None
+
+
+def czy_przeciazenie(blad: BaseException) -> bool:
+    """429 / 529 – dostawca odrzuca zapytania z powodu limitów lub przeciążenia."""
+    return _kod_bledu(blad) in KODY_PRZECIAZENIA
+
+
+def czy_ponowic(blad: BaseException) -> bool:
+    if isinstance(blad, PrzekroczonyLimit):
+        return False  # odrzucone lokalnie po odczekaniu MAKS_OCZEKIWANIE
+    if isinstance(blad, (PrzekroczonyTermin, ZapytanieAnulowane)):
+        return False  # kolejna próba i tak nie zdąży / nikt nie czeka na wynik
+    if czy_przeciazenie(blad) or _kod_bledu(blad) in KODY_PRZEJSCIOWE:
+        return True
+    if isinstance(blad, (TimeoutError, ConnectionError)):
+        return True
+    nazwa = type(blad).__name__  # np. anthropic.APIConnectionError / APITimeoutError
+    return "Connection" in nazwa or "Timeout" in nazwa
+
+
+def retry_after(blad: BaseException) -> Optional[float]:
+    """Sugerowany przez dostawcę czas do ponowienia (sekundy), jeśli jest."""
+    wartosc = getattr(blad, "retry_after", None)
+    if wartosc is not None:
+        return float(wartosc)
+    naglowki = getattr(getattr(blad, "response", None), "headers", None) or {}
+    if naglowki.get("retry-after-ms"):
+        try:
+            return float(naglowki["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if naglowki.get("retry-after"):
+        try:
+            return float(naglowki["retry-after"])
+        except ValueError:
+            data = email.utils.parsedate_to_datetime(naglowki["retry-after"])
+            return max(0.0, data.timestamp() - time.time())
+    for szczegol in getattr(blad, "details", None) or ():  # google.rpc.RetryInfo
+        opoznienie = getattr(szczegol, "retry_delay", None)
+        if opoznienie is not None:
+            return opoznienie.seconds + opoznienie.nanos / 1e9
+    return None
+
+
+def _czekaj(retry_state: RetryCallState) -> float:
+    """Losowy backoff wykładniczy, ale nie krócej niż retry-after dostawcy."""
+    wykladniczy = wait_random_exponential(multiplier=BACKOFF_POCZATKOWY, max=BACKOFF_MAKS)(retry_state)
+    blad = retry_state.outcome.exception() if retry_state.outcome else None
+    sugerowany = retry_after(blad) if blad is not None else None
+    if sugerowany is None:
+        return wykladniczy
+    return max(wykladniczy, sugerowany + random.uniform(0, BACKOFF_POCZATKOWY))
+
+
+def _maks_oczekiwanie() -> float:
+    """Kolejka w limicie współbieżności – najwyżej do terminu bieżącego zapytania."""
+    termin = biezacy_termin()
+    return MAKS_OCZEKIWANIE if termin is None else min(MAKS_OCZEKIWANIE, termin.pozostalo())
+
+
+def szacuj_tokeny(tekst: str) -> int:
+    """Zgrubnie: ~4 znaki na token."""
+    return len(tekst) // 4 + 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Kubełek tokenów i adaptacyjna współbieżność
+# ─────────────────────────────────────────────────────────────────────────────
+class KubelekTokenow:
+    """
+    Kubełek z rezerwacją: `zarezerwuj(n)` od razu zdejmuje `n` tokenów
+    (stan może zejść poniżej zera) i zwraca, ile trzeba odczekać, aż
+    rezerwacja będzie pokryta. Działa tak samo dla wątków i korutyn.
+    `na_minute <= 0` oznacza brak limitu.
+    """
+
+    def __init__(self, na_minute: float, pojemnosc: Optional[float] = None):
+        self.na_minute = na_minute
+        self.pojemnosc = pojemnosc if pojemnosc is not None else na_minute
+        self._stan = self.pojemnosc
+        self._czas = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _uzupelnij(self) -> None:
+        teraz = time.monotonic()
+        self._stan = min(self.pojemnosc, self._stan + (teraz - self._czas) * self.na_minute / 60)
+        self._czas = teraz
+
+    def zarezerwuj(self, ilosc: float, maks_oczekiwanie: float = MAKS_OCZEKIWANIE) -> float:
+        if self.na_minute <= 0:
+            return 0.0
+        with self._lock:
+            self._uzupelnij()
+            ilosc = min(ilosc, self.pojemnosc)
+            brak = ilosc - self._stan
+            opoznienie = max(0.0, brak * 60 / self.na_minute)
+            if opoznienie > maks_oczekiwanie:
+                raise PrzekroczonyLimit(
+                    f"Limit {self.na_minute:g}/min wyczerpany", retry_after=opoznienie
+                )
+            self._stan -= ilosc
+            return opoznienie
+
+    def zwroc(self, ilosc: float) -> None:
+        """Korekta rezerwacji (np. faktycznie zużyto mniej tokenów)."""
+        if self.na_minute <= 0:
+            return
+        with self._lock:
+            self._uzupelnij()
+            self._stan = min(self.pojemnosc, self._stan + ilosc)
+
+
+class AdaptacyjnaWspolbieznosc:
+    """
+    Limit równoległych zapytań sterowany AIMD: każde udane zapytanie
+    podnosi limit o 1/limit (ok. +1 na "rundę"), a 429 zmniejsza go o połowę.
+    Wzrost opóźnień (szybka średnia > `tolerancja` × wolna średnia) też
+    zmniejsza limit, łagodniej. Spadki najwyżej raz na typowy czas zapytania
+    (przed pierwszym pomiarem – raz na `okres` sekund), żeby seria 429
+    z jednej fali nie zbiła limitu do minimum.
+    """
+
+    def __init__(self, minimum: int = 1, maksimum: int = 16, start: int = 4,
+                 tolerancja: float = 2.0, okres: float = 1.0):
+        self.minimum = minimum
+        self.maksimum = maksimum
+        self.limit = float(max(minimum, min(maksimum, start)))
+        self.tolerancja = tolerancja
+        self.okres = okres
+        self.w_toku = 0
+        self._szybka: Optional[float] = None
+        self._wolna: Optional[float] = None
+        self._ostatni_spadek = 0.0
+        self._warunek = threading.Condition()
+
+    def _wolne(self) -> bool:
+        return self.w_toku < int(self.limit)
+
+    def zajmij(self, timeout: float = MAKS_OCZEKIWANIE) -> None:
+        with self._warunek:
+            if not self._warunek.wait_for(self._wolne, timeout):
+                raise PrzekroczonyLimit("Brak wolnego miejsca w limicie współbieżności")
+            self.w_toku += 1
+
+    def sprobuj_zajac(self) -> bool:
+        with self._warunek:
+            if not self._wolne():
+                return False
+            self.w_toku += 1
+            return True
+
+    async def zajmij_async(self, timeout: float = MAKS_OCZEKIWANIE) -> None:
+        termin = time.monotonic() + timeout
+        przerwa = 0.01
+        while not self.sprobuj_zajac():
+            if time.monotonic() >= termin:
+                raise PrzekroczonyLimit("Brak wolnego miejsca w limicie współbieżności")
+            await asyncio.sleep(przerwa)
+            przerwa = min(0.2, przerwa * 2)
+
+    def _zmniejsz(self, mnoznik: float) -> None:
+        # najwyżej jeden spadek na "rundę" (typowy czas zapytania), jak w TCP
+        teraz = time.monotonic()
+        if teraz - self._ostatni_spadek >= (self._wolna or self.okres):
+            self.limit = max(float(self.minimum), self.limit * mnoznik)
+            self._ostatni_spadek = teraz
+
+    def zwolnij(self, czas: Optional[float] = None, przeciazenie: bool = False) -> None:
+        """`czas` – opóźnienie udanego zapytania; None dla błędu/anulowania."""
+        with self._warunek:
+            self.w_toku -= 1
+            if przeciazenie:
+                self._zmniejsz(0.5)
+            elif czas is not None:
+                self._szybka = czas if self._szybka is None else 0.7 * self._szybka + 0.3 * czas
+                self._wolna = czas if self._wolna is None else 0.95 * self._wolna + 0.05 * czas
+                if self._szybka > self.tolerancja * self._wolna:
+                    self._zmniejsz(0.9)
+                elif self.w_toku + 1 >= int(self.limit):
+                    # wzrost tylko, gdy limit faktycznie ogranicza ruch
+                    self.limit = min(float(self.maksimum), self.limit + 1 / self.limit)
+            self._warunek.notify_all()
+
+
+async def _nastepny(strumien: AsyncIterator[str]) -> Optional[str]:
+    """Kolejny fragment strumienia w limicie jednej próby (None – koniec)."""
+    async with proba_w_terminie():
+        return await anext(strumien, None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Ogranicznik dostawcy i provider z kontrolą ruchu
+# ─────────────────────────────────────────────────────────────────────────────
+class OgranicznikDostawcy:
+    """Limity jednego dostawcy, współdzielone przez wszystkie sesje procesu."""
+
+    def __init__(self, zapytania_na_minute: float, tokeny_na_minute: float,
+                 wspolbieznosc: AdaptacyjnaWspolbieznosc):
+        self.zapytania = KubelekTokenow(zapytania_na_minute)
+        self.tokeny = KubelekTokenow(tokeny_na_minute)
+        self.wspolbieznosc = wspolbieznosc
+        self._lock = threading.Lock()
+        self.statystyki: Dict[str, float] = {
+            "wywolania": 0, "udane": 0, "przeciazenia": 0, "ponowienia": 0,
+            "odrzucone_lokalnie": 0, "czas_oczekiwania_s": 0.0,
+        }
+
+    @classmethod
+    def z_env(cls, nazwa: str) -> "OgranicznikDostawcy":
+        """RECIPE_<DOSTAWCA>_RPM / _TPM / _MAX_CONCURRENCY / _START_CONCURRENCY."""
+        return cls(
+            _env(nazwa, "RPM", "120"),
+            _env(nazwa, "TPM", "0"),
+            AdaptacyjnaWspolbieznosc(
+                maksimum=int(_env(nazwa, "MAX_CONCURRENCY", "16")),
+                start=int(_env(nazwa, "START_CONCURRENCY", "4")),
+            ),
+        )
+
+    def _licz(self, klucz: str, ile: float = 1) -> None:
+        with self._lock:
+            self.statystyki[klucz] += ile
+
+    def _rezerwuj(self, tokeny: int) -> float:
+        try:
+            opoznienie = self.zapytania.zarezerwuj(1)
+            try:
+                return max(opoznienie, self.tokeny.zarezerwuj(tokeny))
+            except PrzekroczonyLimit:
+                self.zapytania.zwroc(1)
+                raise
+        except PrzekroczonyLimit:
+            self._licz("odrzucone_lokalnie")
+            raise
+
+    def _po_bledzie(self, blad: BaseException, tokeny: int) -> None:
+        przeciazenie = czy_przeciazenie(blad)
+        if przeciazenie:
+            self._licz("przeciazenia")
+        else:
+            self.tokeny.zwroc(tokeny)  # odrzucone zapytanie nie zużyło limitu tokenów
+        self.wspolbieznosc.zwolnij(przeciazenie=przeciazenie)
+
+    def _po_sukcesie(self, start: float, zarezerwowane: int, zuzyte: int) -> None:
+        self.tokeny.zwroc(max(0, zarezerwowane - zuzyte))
+        self.wspolbieznosc.zwolnij(time.monotonic() - start)
+        self._licz("udane")
+
+    def raport(self) -> Dict[str, float]:
+        with self._lock:
+            return {**self.statystyki, "limit_wspolbieznosci": round(self.wspolbieznosc.limit, 2),
+                    "w_toku": self.wspolbieznosc.w_toku}
+
+
+_ograniczniki: Dict[str, OgranicznikDostawcy] = {}
+_ograniczniki_lock = threading.Lock()
+
+
+def ogranicznik(nazwa: str) -> OgranicznikDostawcy:
+    """Ogranicznik dostawcy o danej nazwie – jeden na proces."""
+    with _ograniczniki_lock:
+        if nazwa not in _ograniczniki:
+            _ograniczniki[nazwa] = OgranicznikDostawcy.z_env(nazwa)
+        return _ograniczniki[nazwa]
+
+
+def raport_limitow() -> Dict[str, Dict[str, float]]:
+    with _ograniczniki_lock:
+        return {nazwa: o.raport() for nazwa, o in _ograniczniki.items()}
+
+
+class LimitowanyProvider(Provider):
+    """
+    Opakowanie dostawcy: każde zapytanie przechodzi przez kubełki
+    i limit współbieżności, a błędy przejściowe (429/5xx/sieć) są ponawiane
+    z losowym backoffem wykładniczym, z uwzględnieniem retry-after.
+    Strumień jest ponawiany tylko przed pierwszym fragmentem.
+
+    Kolejka i backoff kończą się przed terminem zapytania
+    (`recipe_core.terminy`) – sen, po którym nie zdążyłaby już żadna próba,
+    od razu rzuca `PrzekroczonyTermin`. Po stronie asyncio każda próba
+    (i każda przerwa między fragmentami strumienia) ma limit `limit_proby()`.
+    """
+
+    def __init__(self, wewnetrzny: Provider, limity: Optional[OgranicznikDostawcy] = None):
+        super().__init__(wewnetrzny.model, wewnetrzny.temperatura)
+        self.wewnetrzny = wewnetrzny
+        self.nazwa = wewnetrzny.nazwa
+        self.limity = limity or ogranicznik(wewnetrzny.nazwa)
+        self.obsluguje_schemat = wewnetrzny.obsluguje_schemat
+
+    def _parametry_ponowien(self, sen=czekaj) -> dict:
+        def _przed_snem(retry_state: RetryCallState) -> None:
+            self.limity._licz("ponowienia")
+
+        return {
+            "retry": retry_if_exception(czy_ponowic),
+            "wait": _czekaj,
+            "stop": stop_after_attempt(LICZBA_PROB) | stop_before_delay(MAKS_CZAS_PONOWIEN),
+            "before_sleep": _przed_snem,
+            "sleep": sen,
+            "reraise": True,
+        }
+
+    def _zwroc_rezerwacje(self, tokeny: int) -> None:
+        """Zapytanie nie wyszło (termin, anulowanie, brak miejsca) – nie zużyło limitów."""
+        self.limity.zapytania.zwroc(1)
+        self.limity.tokeny.zwroc(tokeny)
+
+    def _zajmij(self, prompt: str, max_tokenow: int) -> int:
+        tokeny = szacuj_tokeny(prompt) + max_tokenow
+        opoznienie = self.limity._rezerwuj(tokeny)
+        try:
+            if opoznienie:
+                self.limity._licz("czas_oczekiwania_s", opoznienie)
+                czekaj(opoznienie)
+            try:
+                self.limity.wspolbieznosc.zajmij(_maks_oczekiwanie())
+            except PrzekroczonyLimit:
+                sprawdz_termin()
+                self.limity._licz("odrzucone_lokalnie")
+                raise
+        except BaseException:
+            self._zwroc_rezerwacje(tokeny)
+            raise
+        self.limity._licz("wywolania")
+        return tokeny
+
+    async def _zajmij_async(self, prompt: str, max_tokenow: int) -> int:
+        tokeny = szacuj_tokeny(prompt) + max_tokenow
+        opoznienie = self.limity._rezerwuj(tokeny)
+        try:
+            if opoznienie:
+                self.limity._licz("czas_oczekiwania_s", opoznienie)
+                await czekaj_async(opoznienie)
+            try:
+                await self.limity.wspolbieznosc.zajmij_async(_maks_oczekiwanie())
+            except PrzekroczonyLimit:
+                sprawdz_termin()
+                self.limity._licz("odrzucone_lokalnie")
+                raise
+        except BaseException:
+            self._zwroc_rezerwacje(tokeny)
+            raise
+        self.limity._licz("wywolania")
+        return tokeny
+
+    def _jedna_proba(self, prompt: str, max_tokenow: int, schemat: Schemat) -> str:
+        tokeny = self._zajmij(prompt, max_tokenow)
+        start = time.monotonic()
+        try:
+            tekst = self.wewnetrzny.generuj(prompt, max_tokenow, schemat)
+        except BaseException as e:
+            self.limity._po_bledzie(e, tokeny)
+            raise
+        self.limity._po_sukcesie(start, tokeny, szacuj_tokeny(prompt) + szacuj_tokeny(tekst))
+        return tekst
+
+    def generuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        start, proby = time.perf_counter(), 0
+        try:
+            for proba in Retrying(**self._parametry_ponowien()):
+                with proba:
+                    proby = proba.retry_state.attempt_number
+                    tekst = self._jedna_proba(prompt, max_tokenow, schemat)
+        except BaseException as e:
+            TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start, proby, blad=e)
+            raise
+        TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start, proby)
+        return tekst
+
+    async def _jedna_proba_async(self, prompt: str, max_tokenow: int, schemat: Schemat) -> str:
+        tokeny = await self._zajmij_async(prompt, max_tokenow)
+        start = time.monotonic()
+        try:
+            async with proba_w_terminie():
+                tekst = await self.wewnetrzny.generuj_async(prompt, max_tokenow, schemat)
+        except BaseException as e:  # także anulowanie przez hedging / fan-out
+            self.limity._po_bledzie(e, tokeny)
+            raise
+        self.limity._po_sukcesie(start, tokeny, szacuj_tokeny(prompt) + szacuj_tokeny(tekst))
+        return tekst
+
+    async def generuj_async(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> str:
+        start, proby = time.perf_counter(), 0
+        try:
+            async for proba in AsyncRetrying(**self._parametry_ponowien(czekaj_async)):
+                with proba:
+                    proby = proba.retry_state.attempt_number
+                    tekst = await self._jedna_proba_async(prompt, max_tokenow, schemat)
+        except BaseException as e:  # także anulowanie przez hedging / fan-out
+            TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start, proby, blad=e)
+            raise
+        TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start, proby)
+        return tekst
+
+    def _otworz_strumien(self, prompt: str, max_tokenow: int, schemat: Schemat):
+        """Zajmuje miejsce i pobiera pierwszy fragment – tylko ten etap jest ponawiany."""
+        tokeny = self._zajmij(prompt, max_tokenow)
+        start = time.monotonic()
+        strumien = self.wewnetrzny.strumieniuj(prompt, max_tokenow, schemat)
+        try:
+            pierwszy = next(strumien, None)
+        except BaseException as e:
+            self.limity._po_bledzie(e, tokeny)
+            strumien.close()
+            raise
+        return strumien, pierwszy, tokeny, start
+
+    def strumieniuj(self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None) -> Iterator[str]:
+        start_wywolania, proby = time.perf_counter(), 0
+        try:
+            for proba in Retrying(**self._parametry_ponowien()):
+                with proba:
+                    proby = proba.retry_state.attempt_number
+                    strumien, pierwszy, tokeny, start = self._otworz_strumien(prompt, max_tokenow, schemat)
+        except BaseException as e:
+            TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start_wywolania, proby, blad=e)
+            raise
+        # czas do pierwszego fragmentu z perspektywy wywołującego (z kolejką i ponowieniami)
+        ttft = time.perf_counter() - start_wywolania
+        odebrane = 0
+        try:
+            if pierwszy is not None:
+                odebrane += len(pierwszy)
+                yield pierwszy
+            for fragment in strumien:
+                sprawdz_termin()
+                odebrane += len(fragment)
+                yield fragment
+        except BaseException as e:
+            # GeneratorExit (wywołujący przestał czytać: termin, rerun) telemetria
+            # liczy jako "anulowane", a nie błąd wywołania
+            self.limity._po_bledzie(e, tokeny)
+            TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start_wywolania, proby, ttft, e)
+            raise
+        finally:
+            # strumień SDK i jego połączenie z puli – od razu, a nie dopiero przy GC
+            strumien.close()
+        self.limity._po_sukcesie(start, tokeny, szacuj_tokeny(prompt) + odebrane // 4 + 1)
+        TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start_wywolania, proby, ttft)
+
+    async def _otworz_strumien_async(self, prompt: str, max_tokenow: int, schemat: Schemat):
+        tokeny = await self._zajmij_async(prompt, max_tokenow)
+        start = time.monotonic()
+        strumien = self.wewnetrzny.strumieniuj_async(prompt, max_tokenow, schemat)
+        try:
+            pierwszy = await _nastepny(strumien)
+        except BaseException as e:
+            self.limity._po_bledzie(e, tokeny)
+            await strumien.aclose()
+            raise
+        return strumien, pierwszy, tokeny, start
+
+    async def strumieniuj_async(
+        self, prompt: str, max_tokenow: int = 4000, schemat: Schemat = None
+    ) -> AsyncIterator[str]:
+        start_wywolania, proby = time.perf_counter(), 0
+        try:
+            async for proba in AsyncRetrying(**self._parametry_ponowien(czekaj_async)):
+                with proba:
+                    proby = proba.retry_state.attempt_number
+                    strumien, pierwszy, tokeny, start = await self._otworz_strumien_async(
+                        prompt, max_tokenow, schemat
+                    )
+        except BaseException as e:
+            TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start_wywolania, proby, blad=e)
+            raise
+        ttft = time.perf_counter() - start_wywolania
+        odebrane = 0
+        try:
+            if pierwszy is not None:
+                odebrane += len(pierwszy)
+                yield pierwszy
+            while (fragment := await _nastepny(strumien)) is not None:
+                odebrane += len(fragment)
+                yield fragment
+        except BaseException as e:  # także przerwanie przez klienta HTTP / anulowanie
+            self.limity._po_bledzie(e, tokeny)
+            TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start_wywolania, proby, ttft, e)
+            raise
+        finally:
+            await strumien.aclose()
+        self.limity._po_sukcesie(start, tokeny, szacuj_tokeny(prompt) + odebrane // 4 + 1)
+        TELEMETRIA.wywolanie_llm(self.nazwa, time.perf_counter() - start_wywolania, proby, ttft)
+
+    def rozgrzej(self) -> None:
+        self.wewnetrzny.rozgrzej()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.wewnetrzny!r})"
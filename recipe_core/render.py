@@ -0,0 +1,157 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Gotowe widoki przepisów: jeden blok HTML / tekst na przepis, zapamiętany
+#  po skrócie treści – rerun wysyła jeden element zamiast kilkudziesięciu
+# ─────────────────────────────────────────────────────────────────────────────
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from html import escape
+from typing import Callable, Dict, Tuple
+
+from recipe_core.decoding import ADAPTER_PRZEPIS
+from recipe_core.models import Przepis
+
+ROZMIAR_PAMIECI = int(os.getenv("RECIPE_RENDER_CACHE", "1024"))
+
+# Style kart z html_przepisu – wstrzykiwane raz na stronę, nie przy każdym przepisie
+CSS_PRZEPISOW = """<style>
+.przepis{border:1px solid rgba(49,51,63,.2);border-radius:.5rem;padding:1rem 1.25rem;margin-bottom:1rem}
+.przepis h3{margin:0 0 .75rem 0;padding:0}
+.przepis-metryki{display:flex;gap:2rem;margin-bottom:.75rem}
+.przepis-metryki div{flex:1}
+.przepis-metryki small{display:block;opacity:.7;font-size:.875rem}
+.przepis-metryki span{font-size:1.75rem;line-height:1.3}
+.przepis-tresc{display:grid;grid-template-columns:2fr 3fr;gap:1.5rem;border-top:1px solid rgba(49,51,63,.2);padding-top:.75rem}
+.przepis-tresc h5{margin:0 0 .5rem 0;padding:0}
+.przepis-tresc ul{margin:0;padding-left:1.2rem}
+.przepis-tresc p{margin:0 0 .5rem 0}
+.przepis details{margin-top:.75rem}
+.przepis summary{cursor:pointer}
+@media (max-width:640px){.przepis-tresc{grid-template-columns:1fr}}
+div[class*="st-key-przepis_"] textarea{width:100% !important;min-width:500px;white-space:pre-wrap}
+</style>"""
+
+
+# id(obiekt) -> (słaba referencja, skrót); przepisy z cache L1 to te same obiekty
+# przy każdym rerunie, więc skrót liczymy raz na obiekt. Przepisy są traktowane
+# jako niezmienne – nikt ich nie modyfikuje po walidacji.
+_skroty: Dict[int, Tuple[weakref.ref, str]] = {}
+
+
+def skrot_przepisu(przepis: Przepis) -> str:
+    """Skrót treści przepisu (kanoniczny JSON z pydantic-core)."""
+    klucz = id(przepis)
+    wpis = _skroty.get(klucz)
+    if wpis is not None and wpis[0]() is przepis:
+        return wpis[1]
+    skrot = hashlib.sha256(ADAPTER_PRZEPIS.dump_json(przepis)).hexdigest()
+    _skroty[klucz] = (weakref.ref(przepis, lambda _, k=klucz: _skroty.pop(k, None)), skrot)
+    return skrot
+
+
+def _ilosc(ilosc) -> str:
+    return f"{ilosc:.1f}" if isinstance(ilosc, float) else str(ilosc)
+
+
+def _tekst_html(tekst: str) -> str:
+    # pusta linia zakończyłaby blok HTML w markdown – akapity jako <br>
+    return escape(tekst.strip()).replace("\n", "<br>")
+
+
+def zbuduj_html(idx: int, przepis: Przepis) -> str:
+    czesci = [
+        '<div class="przepis">',
+        f"<h3>{idx}. {_tekst_html(przepis.nazwa)}</h3>",
+        '<div class="przepis-metryki">',
+        f"<div><small>Czas przygotowania</small><span>{_tekst_html(przepis.czas_przygotowania)}</span></div>",
+        f"<div><small>Poziom trudności</small><span>{_tekst_html(przepis.poziom_trudnosci.capitalize())}</span></div>",
+        "</div>",
+        '<div class="przepis-tresc"><div><h5>🥑 Składniki:</h5><ul>',
+    ]
+    for sklad in przepis.skladniki:
+        jednostka = f" {_tekst_html(sklad.jednostka)}" if sklad.jednostka else ""
+        czesci.append(
+            f"<li><strong>{_tekst_html(sklad.nazwa)}</strong>: {_tekst_html(_ilosc(sklad.ilosc))}{jednostka}</li>"
+        )
+    czesci.append("</ul></div><div><h5>📝 Sposób przygotowania:</h5>")
+    for krok in sorted(przepis.kroki, key=lambda k: k.numer):
+        czesci.append(f"<p><strong>Krok {krok.numer}:</strong> {_tekst_html(krok.opis)}</p>")
+    czesci.append("</div></div>")
+    if przepis.sugestie and przepis.sugestie.strip():
+        czesci.append(
+            f"<details><summary>💡 Sugestie i warianty</summary><p>{_tekst_html(przepis.sugestie)}</p></details>"
+        )
+    czesci.append("</div>")
+    return "".join(czesci)
+
+
+def zbuduj_tekst(_idx: int, przepis: Przepis) -> str:
+    linie = [
+        f"Przepis: {przepis.nazwa}",
+        f"Czas przygotowania: {przepis.czas_przygotowania}",
+        f"Poziom trudności: {przepis.poziom_trudnosci}",
+        "",
+        "Składniki:",
+    ]
+    linie.extend(f"- {s.ilosc} {s.jednostka} {s.nazwa}" for s in przepis.skladniki)
+    linie.append("")
+    linie.append("Sposób przygotowania:")
+    linie.extend(f"{k.numer}. {k.opis}" for k in przepis.kroki)
+    if przepis.sugestie.strip():
+        linie.extend(["", "Sugestie:", przepis.sugestie])
+    return "\n".join(linie) + "\n"
+
+
+class PamiecWidokow:
+    """
+    LRU gotowych widoków: (rodzaj, skrót przepisu, numer) -> napis.
+    Wspólna dla sesji i wątków – ten sam przepis z cache renderuje się raz.
+    """
+
+    def __init__(self, rozmiar: int = ROZMIAR_PAMIECI):
+        self.rozmiar = rozmiar
+        self._widoki: "OrderedDict[Tuple[str, str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.trafienia = 0
+        self.chybienia = 0
+
+    def pobierz(self, rodzaj: str, idx: int, przepis: Przepis, zbuduj: Callable[[int, Przepis], str]) -> str:
+        klucz = (rodzaj, skrot_przepisu(przepis), idx)
+        with self._lock:
+            widok = self._widoki.get(klucz)
+            if widok is not None:
+                self._widoki.move_to_end(klucz)
+                self.trafienia += 1
+                return widok
+            self.chybienia += 1
+        widok = zbuduj(idx, przepis)
+        with self._lock:
+            self._widoki[klucz] = widok
+            while len(self._widoki) > self.rozmiar:
+                self._widoki.popitem(last=False)
+        return widok
+
+    def raport(self) -> Dict[str, float]:
+        with self._lock:
+            wszystkie = self.trafienia + self.chybienia
+            return {
+                "widoki": len(self._widoki),
+                "trafienia": self.trafienia,
+                "chybienia": self.chybienia,
+                "wspolczynnik_trafien": self.trafienia / wszystkie if wszystkie else 0.0,
+            }
+
+
+PAMIEC = PamiecWidokow()
+
+
+def html_przepisu(idx: int, przepis: Przepis) -> str:
+    """Karta przepisu jako jeden blok HTML (do st.markdown(..., unsafe_allow_html=True))."""
+    return PAMIEC.pobierz("html", idx, przepis, zbuduj_html)
+
+
+def tekst_przepisu(przepis: Przepis) -> str:
+    """Zwykły tekst przepisu do pola tekstowego."""
+    return PAMIEC.pobierz("tekst", 0, przepis, zbuduj_tekst)
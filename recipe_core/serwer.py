@@ -0,0 +1,263 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Asynchroniczne API HTTP (Tornado): składniki -> przepisy JSON / SSE
+#
+#  python -m recipe_core.serwer --port 8600 --provider gemini
+#
+#  POST /api/przepisy            {"skladniki": "jajka, mąka" | [...], "provider": "gemini"}
+#                                -> Przepisy jako JSON (504 po RECIPE_DEADLINE, z częściowymi
+#                                   przepisami w polu "przepisy", jeśli zdążyły powstać)
+#  POST /api/przepisy/strumien   to samo ciało (albo GET ?skladniki=...&provider=...)
+#                                -> text/event-stream: "przepis" po każdym domkniętym
+#                                   przepisie, na końcu "koniec" (całe Przepisy) lub "blad"
+#  GET  /zdrowie, GET /metrics
+#
+#  Serwer działa na wspólnej pętli klientów (recipe_core.clients): obsługa
+#  zapytań i wywołania modeli to zadania asyncio na jednym wątku, bez wątku
+#  na zapytanie. Cache i klienty dostawców są te same co w aplikacjach.
+# ─────────────────────────────────────────────────────────────────────────────
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tornado.web
+from tornado.iostream import StreamClosedError
+
+from recipe_core.agent import RecipeAgent, jako_liste_skladnikow
+from recipe_core.cache import CachePrzepisow
+from recipe_core.clients import petla_klientow
+from recipe_core.fanout import BladGenerowaniaRownoleglego
+from recipe_core.generator import BladGenerowania
+from recipe_core.models import Przepis, Przepisy
+from recipe_core.providers import GeminiProvider
+from recipe_core.ratelimit import PrzekroczonyLimit, czy_przeciazenie, retry_after
+from recipe_core.telemetry import TELEMETRIA, uruchom_eksport
+from recipe_core.terminy import PrzekroczonyTermin
+
+PORT = int(os.getenv("RECIPE_API_PORT", "8600"))
+HOST = os.getenv("RECIPE_API_HOST", "127.0.0.1")
+DOMYSLNY_PROVIDER = os.getenv("RECIPE_API_PROVIDER", GeminiProvider.nazwa)
+MAKS_SKLADNIKOW = int(os.getenv("RECIPE_API_MAX_INGREDIENTS", "50"))
+MAKS_ROZMIAR_CIALA = 64 * 1024
+
+AgentDla = Callable[[str], RecipeAgent]
+
+
+def status_bledu(blad: BaseException) -> Tuple[int, Optional[float]]:
+    """Kod HTTP dla błędu generowania i ewentualny nagłówek Retry-After."""
+    if isinstance(blad, PrzekroczonyTermin):
+        return 504, None
+    if isinstance(blad, PrzekroczonyLimit) or czy_przeciazenie(blad):
+        return (429 if isinstance(blad, PrzekroczonyLimit) else 503), retry_after(blad)
+    if isinstance(blad, (BladGenerowania, BladGenerowaniaRownoleglego)):
+        return 502, None
+    return 500, None
+
+
+class _Obsluga(tornado.web.RequestHandler):
+    def initialize(self, agent_dla: AgentDla, domyslny_provider: str) -> None:
+        self.agent_dla = agent_dla
+        self.domyslny_provider = domyslny_provider
+
+    def _parametry(self) -> Dict[str, Any]:
+        if not self.request.body:
+            return {"skladniki": self.get_query_argument("skladniki", ""),
+                    "provider": self.get_query_argument("provider", None)}
+        try:
+            dane = json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Ciało zapytania nie jest poprawnym JSON-em.")
+        if isinstance(dane, (str, list)):
+            dane = {"skladniki": dane}
+        if not isinstance(dane, dict):
+            raise tornado.web.HTTPError(400, reason="Oczekiwano obiektu JSON.")
+        return dane
+
+    def _zapytanie(self) -> Tuple[RecipeAgent, List[str]]:
+        dane = self._parametry()
+        skladniki = dane.get("skladniki")
+        if not isinstance(skladniki, (str, list)) or not all(isinstance(s, str) for s in skladniki):
+            raise tornado.web.HTTPError(400, reason="Pole 'skladniki' to napis albo lista napisów.")
+        lista = jako_liste_skladnikow(skladniki)
+        if not lista:
+            raise tornado.web.HTTPError(400, reason="Nie podano składników.")
+        if len(lista) > MAKS_SKLADNIKOW:
+            raise tornado.web.HTTPError(400, reason=f"Najwyżej {MAKS_SKLADNIKOW} składników.")
+        provider = dane.get("provider") or self.domyslny_provider
+        try:
+            agent = self.agent_dla(provider)
+        except ValueError as e:
+            raise tornado.web.HTTPError(503, reason=str(e))
+        return agent, lista
+
+    def _json(self, dane: Any) -> None:
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(dane if isinstance(dane, str) else json.dumps(dane, ensure_ascii=False))
+
+    def write_error(self, status_code: int, **kwargs) -> None:
+        self._json({"blad": self._reason})
+
+    def on_finish(self) -> None:
+        TELEMETRIA.licz("recipe_api_requests_total", endpoint=self.request.path, status=str(self.get_status()))
+
+
+class _ObslugaPrzepisow(_Obsluga):
+    async def post(self) -> None:
+        agent, skladniki = self._zapytanie()
+        try:
+            wynik = await agent.generuj_async(skladniki)
+        except Exception as e:
+            status, po_ilu = status_bledu(e)
+            self.set_status(status)
+            if po_ilu is not None:
+                self.set_header("Retry-After", str(max(1, round(po_ilu))))
+            odpowiedz = {"blad": f"{type(e).__name__}: {e}"}
+            if getattr(e, "czesciowe", None) is not None:
+                odpowiedz["przepisy"] = e.czesciowe.model_dump(mode="json")["przepisy"]
+            self._json(odpowiedz)
+            return
+        self._json(wynik.model_dump_json())
+
+
+class _ObslugaStrumienia(_Obsluga):
+    """
+    Server-sent events. Przepisy z cache są wysyłane od razu, a generowane –
+    po domknięciu każdego w strumieniu odpowiedzi modelu. Rozłączenie klienta
+    anuluje jego zapytanie (wywołanie modelu trwa dalej, jeśli czekają na nie
+    inni klienci).
+    """
+
+    _zadanie: Optional[asyncio.Future] = None
+
+    async def get(self) -> None:
+        await self._strumieniuj()
+
+    async def post(self) -> None:
+        await self._strumieniuj()
+
+    def on_connection_close(self) -> None:
+        if self._zadanie is not None:
+            self._zadanie.cancel()
+
+    async def _zdarzenie(self, nazwa: str, dane: str) -> None:
+        self.write(f"event: {nazwa}\ndata: {dane}\n\n")
+        await self.flush()
+
+    async def _przepis(self, numer: int, przepis: Przepis) -> None:
+        await self._zdarzenie("przepis", f'{{"numer": {numer}, "przepis": {przepis.model_dump_json()}}}')
+
+    async def _strumieniuj(self) -> None:
+        agent, skladniki = self._zapytanie()
+        self.set_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+
+        kolejka: "asyncio.Queue[Optional[Tuple[int, Przepis]]]" = asyncio.Queue()
+        self._zadanie = asyncio.ensure_future(
+            agent.generuj_async(skladniki, on_przepis=lambda numer, p: kolejka.put_nowait((numer, p)))
+        )
+        self._zadanie.add_done_callback(lambda _: kolejka.put_nowait(None))
+        wyslane = 0
+        try:
+            while (element := await kolejka.get()) is not None:
+                await self._przepis(*element)
+                wyslane = element[0]
+            if self._zadanie.cancelled():
+                return
+            blad = self._zadanie.exception()
+            if blad is not None:
+                status, _ = status_bledu(blad)
+                await self._zdarzenie("blad", json.dumps(
+                    {"status": status, "blad": f"{type(blad).__name__}: {blad}"}, ensure_ascii=False
+                ))
+            else:
+                wynik: Przepisy = self._zadanie.result()
+                for numer, przepis in enumerate(wynik.przepisy[wyslane:], wyslane + 1):
+                    await self._przepis(numer, przepis)
+                await self._zdarzenie("koniec", wynik.model_dump_json())
+            self.finish()
+        except StreamClosedError:
+            self._zadanie.cancel()
+
+
+class _ObslugaZdrowia(_Obsluga):
+    def get(self) -> None:
+        self._json({"status": "ok"})
+
+
+class _ObslugaMetryk(tornado.web.RequestHandler):
+    def get(self) -> None:
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.finish(TELEMETRIA.prometheus())
+
+
+def utworz_aplikacje(agent_dla: AgentDla, domyslny_provider: str = DOMYSLNY_PROVIDER) -> tornado.web.Application:
+    """Aplikacja Tornado; `agent_dla(nazwa)` zwraca agenta dostawcy (ValueError – niedostępny)."""
+    opcje = {"agent_dla": agent_dla, "domyslny_provider": domyslny_provider}
+    return tornado.web.Application([
+        (r"/api/przepisy", _ObslugaPrzepisow, opcje),
+        (r"/api/przepisy/strumien", _ObslugaStrumienia, opcje),
+        (r"/zdrowie", _ObslugaZdrowia, opcje),
+        (r"/metrics", _ObslugaMetryk),
+    ])
+
+
+def agenci_dostawcow(cache: Optional[CachePrzepisow], modele: Optional[Dict[str, str]] = None) -> AgentDla:
+    """Jeden `RecipeAgent` na dostawcę, tworzony przy pierwszym zapytaniu, ze wspólnym cache."""
+    modele = modele or {}
+    agenci: Dict[str, RecipeAgent] = {}
+
+    def _agent_dla(provider: str) -> RecipeAgent:
+        if provider not in agenci:
+            agenci[provider] = RecipeAgent(provider=provider, model=modele.get(provider), cache=cache or False)
+        return agenci[provider]
+
+    return _agent_dla
+
+
+def uruchom_serwer(
+    agent_dla: AgentDla,
+    port: int = PORT,
+    host: str = HOST,
+    domyslny_provider: str = DOMYSLNY_PROVIDER,
+):
+    """Startuje serwer na wspólnej pętli klientów i zwraca `tornado.httpserver.HTTPServer`."""
+    async def _start():
+        aplikacja = utworz_aplikacje(agent_dla, domyslny_provider)
+        return aplikacja.listen(port, host, max_body_size=MAKS_ROZMIAR_CIALA)
+
+    return asyncio.run_coroutine_threadsafe(_start(), petla_klientow()).result()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Asynchroniczne API HTTP generatora przepisów")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--provider", default=DOMYSLNY_PROVIDER, help="domyślny dostawca")
+    parser.add_argument("--model", action="append", default=[], metavar="DOSTAWCA=MODEL")
+    parser.add_argument("--bez-cache", action="store_true", help="nie używaj cache przepisów")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if not args.bez_cache:
+        cache = CachePrzepisow()
+        cache.rozgrzej(Przepisy)
+    modele = dict(m.partition("=")[::2] for m in args.model)
+    uruchom_eksport()
+    uruchom_serwer(agenci_dostawcow(cache, modele), args.port, args.host, args.provider)
+    print(f"API przepisów: http://{args.host}:{args.port}/api/przepisy", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if cache is not None:
+            cache.zamknij()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
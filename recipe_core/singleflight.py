@@ -0,0 +1,239 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Single-flight: jednakowe zapytania w locie współdzielą jedno wywołanie modelu
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+from recipe_core.terminy import ZapytanieAnulowane
+
+T = TypeVar("T")
+
+Opublikuj = Callable[[Any], None]
+
+
+class _Lot(Generic[T]):
+    """Jedno wywołanie w locie: wynik albo błąd oraz elementy opublikowane po drodze."""
+
+    def __init__(self):
+        self.warunek = threading.Condition()
+        self.elementy: List[Any] = []
+        self.gotowy = False
+        self.przerwany = False
+        self.wynik: Optional[T] = None
+        self.blad: Optional[BaseException] = None
+
+    def opublikuj(self, element: Any) -> None:
+        with self.warunek:
+            self.elementy.append(element)
+            self.warunek.notify_all()
+
+    def zakoncz(self, wynik: Optional[T] = None, blad: Optional[BaseException] = None,
+                przerwany: bool = False) -> None:
+        with self.warunek:
+            self.wynik, self.blad, self.przerwany = wynik, blad, przerwany
+            self.gotowy = True
+            self.warunek.notify_all()
+
+
+class _LotPrzerwany(Exception):
+    pass
+
+
+class PojedynczyLot:
+    """
+    Koalescencja zapytań: pierwszy wywołujący z danym kluczem (prowadzący)
+    wykonuje `fn`, pozostali czekają na jego wynik zamiast wołać model ponownie.
+
+    - wyjątek `fn` (Exception) trafia do wszystkich czekających;
+    - przerwanie prowadzącego (BaseException, np. rerun/stop w Streamlit,
+      KeyboardInterrupt, oraz `ZapytanieAnulowane`) nie jest błędem zapytania –
+      czekający ponawiają i jeden z nich zostaje nowym prowadzącym;
+    - przekroczenie `timeout` przez czekającego nie przerywa prowadzącego.
+
+    `fn` dostaje funkcję `opublikuj(element)`; opublikowane elementy (np. kolejne
+    przepisy ze strumienia) są przekazywane do `on_element` każdego wywołującego,
+    w jego własnym wątku – także tym, którzy dołączyli w trakcie.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loty: Dict[str, _Lot] = {}
+        self.statystyki = {"prowadzace": 0, "dolaczone": 0, "ponowione": 0}
+
+    def w_locie(self) -> int:
+        with self._lock:
+            return len(self._loty)
+
+    def wykonaj(
+        self,
+        klucz: str,
+        fn: Callable[[Opublikuj], T],
+        on_element: Optional[Callable[[Any], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> T:
+        while True:
+            with self._lock:
+                lot = self._loty.get(klucz)
+                prowadzacy = lot is None
+                if prowadzacy:
+                    lot = self._loty[klucz] = _Lot()
+                    self.statystyki["prowadzace"] += 1
+                else:
+                    self.statystyki["dolaczone"] += 1
+            if prowadzacy:
+                return self._prowadz(klucz, lot, fn, on_element)
+            try:
+                return self._czekaj(lot, on_element, timeout)
+            except _LotPrzerwany:
+                with self._lock:
+                    self.statystyki["ponowione"] += 1
+
+    def _zwolnij(self, klucz: str, lot: _Lot) -> None:
+        # najpierw usuwamy lot ze słownika, potem budzimy czekających –
+        # ponawiający po przerwaniu nie trafi już na zakończony lot
+        with self._lock:
+            if self._loty.get(klucz) is lot:
+                del self._loty[klucz]
+
+    def _prowadz(self, klucz: str, lot: _Lot, fn: Callable[[Opublikuj], T],
+                 on_element: Optional[Callable[[Any], None]]) -> T:
+        def _opublikuj(element: Any) -> None:
+            lot.opublikuj(element)
+            if on_element is not None:
+                on_element(element)
+
+        try:
+            wynik = fn(_opublikuj)
+        except ZapytanieAnulowane:
+            # prowadzący zrezygnował – czekający ponawiają, jak po przerwaniu
+            self._zwolnij(klucz, lot)
+            lot.zakoncz(przerwany=True)
+            raise
+        except Exception as e:
+            self._zwolnij(klucz, lot)
+            lot.zakoncz(blad=e)
+            raise
+        except BaseException:
+            self._zwolnij(klucz, lot)
+            lot.zakoncz(przerwany=True)
+            raise
+        self._zwolnij(klucz, lot)
+        lot.zakoncz(wynik=wynik)
+        return wynik
+
+    @staticmethod
+    def _czekaj(lot: _Lot, on_element: Optional[Callable[[Any], None]],
+                timeout: Optional[float]) -> T:
+        termin = None if timeout is None else time.monotonic() + timeout
+        przekazane = 0
+        while True:
+            with lot.warunek:
+                while len(lot.elementy) == przekazane and not lot.gotowy:
+                    pozostalo = None if termin is None else termin - time.monotonic()
+                    if pozostalo is not None and pozostalo <= 0:
+                        raise TimeoutError("Przekroczono czas oczekiwania na trwające zapytanie.")
+                    lot.warunek.wait(pozostalo)
+                nowe = lot.elementy[przekazane:]
+                przekazane = len(lot.elementy)
+                gotowy = lot.gotowy
+            if on_element is not None:
+                for element in nowe:
+                    on_element(element)
+            if gotowy:
+                break
+        if lot.przerwany:
+            raise _LotPrzerwany()
+        if lot.blad is not None:
+            raise lot.blad
+        return lot.wynik
+
+
+class _LotAsync:
+    """Wywołanie w locie na pętli asyncio: zadanie, elementy i liczba czekających."""
+
+    def __init__(self):
+        self.elementy: List[Any] = []
+        self.czekajacy = 0
+        self.zmiana = asyncio.Event()
+        self.zadanie: Optional[asyncio.Task] = None
+
+    def opublikuj(self, element: Any) -> None:
+        self.elementy.append(element)
+        self.powiadom()
+
+    def powiadom(self) -> None:
+        zmiana, self.zmiana = self.zmiana, asyncio.Event()
+        zmiana.set()
+
+
+class PojedynczyLotAsync:
+    """
+    `PojedynczyLot` dla kodu asynchronicznego (jedna pętla, bez wątków).
+
+    `fn(opublikuj)` działa jako osobne zadanie asyncio, a wszyscy wywołujący
+    z tym samym kluczem – także pierwszy – tylko na nie czekają. Anulowanie
+    jednego wywołującego (np. klient HTTP się rozłączył) nie przerywa
+    generowania dla pozostałych; dopiero gdy odejdzie ostatni, zadanie jest
+    anulowane. Zadanie anulowane z zewnątrz pozostali traktują jak przerwanie
+    prowadzącego – ponawiają.
+    """
+
+    def __init__(self):
+        self._loty: Dict[str, _LotAsync] = {}
+        self.statystyki = {"prowadzace": 0, "dolaczone": 0, "ponowione": 0, "porzucone": 0}
+
+    def w_locie(self) -> int:
+        return len(self._loty)
+
+    def _rozpocznij(self, klucz: str, fn: Callable[[Opublikuj], Awaitable[T]]) -> _LotAsync:
+        lot = self._loty[klucz] = _LotAsync()
+
+        def _koniec(_: asyncio.Task) -> None:
+            if self._loty.get(klucz) is lot:
+                del self._loty[klucz]
+            lot.powiadom()
+
+        lot.zadanie = asyncio.ensure_future(fn(lot.opublikuj))
+        lot.zadanie.add_done_callback(_koniec)
+        self.statystyki["prowadzace"] += 1
+        return lot
+
+    async def wykonaj(
+        self,
+        klucz: str,
+        fn: Callable[[Opublikuj], Awaitable[T]],
+        on_element: Optional[Callable[[Any], None]] = None,
+    ) -> T:
+        while True:
+            lot = self._loty.get(klucz)
+            if lot is None:
+                lot = self._rozpocznij(klucz, fn)
+            else:
+                self.statystyki["dolaczone"] += 1
+            lot.czekajacy += 1
+            try:
+                await self._czekaj(lot, on_element)
+            finally:
+                lot.czekajacy -= 1
+                if not lot.czekajacy and not lot.zadanie.done():
+                    lot.zadanie.cancel()
+                    self.statystyki["porzucone"] += 1
+            if not lot.zadanie.cancelled():
+                return lot.zadanie.result()
+            self.statystyki["ponowione"] += 1
+
+    @staticmethod
+    async def _czekaj(lot: _LotAsync, on_element: Optional[Callable[[Any], None]]) -> None:
+        przekazane = 0
+        while True:
+            zmiana = lot.zmiana
+            nowe = lot.elementy[przekazane:]
+            przekazane += len(nowe)
+            if on_element is not None:
+                for element in nowe:
+                    on_element(element)
+            if lot.zadanie.done():
+                return
+            await zmiana.wait()
@@ -0,0 +1,163 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Słownik składników – kategorie z panelu wyboru (wspólne dla aplikacji i korpusu)
+# ─────────────────────────────────────────────────────────────────────────────
+from typing import Dict, List
+
+KATEGORIE_SKLADNIKOW = {
+    "Przyprawy i dodatki smakowe": [
+        "Sól",
+        "Pieprz czarny",
+        "Czosnek granulowany",
+        "Papryka słodka",
+        "Papryka ostra",
+        "Oregano",
+        "Bazylia",
+        "Curry",
+        "Kminek",
+        "Tymianek",
+        "Liść laurowy",
+        "Ziele angielskie",
+        "Imbir mielony",
+        "Sos sojowy",
+    ],
+    "Produkty zbożowe i mączne": [
+        "Makaron",
+        "Ryż biały",
+        "Kasza gryczana",
+        "Kasza jaglana",
+        "Mąka pszenna",
+        "Mąka żytnia",
+        "Płatki owsiane",
+        "Płatki kukurydziane",
+        "Bułka tarta",
+        "Chleb",
+        "Tortilla pszenna",
+        "Kuskus",
+        "Quinoa",
+    ],
+    "Produkty białkowe": [
+        "Jajka",
+        "Filet z kurczaka",
+        "Mięso mielone",
+        "Tuńczyk w puszce",
+        "Soczewica czerwona",
+        "Soczewica zielona",
+        "Ciecierzyca",
+        "Fasola czerwona",
+        "Fasola biała",
+        "Groszek zielony",
+        "Tofu",
+        "Tempeh",
+        "Parówki",
+        "Ser biały (twaróg)",
+    ],
+    "Produkty mleczne i zamienniki": [
+        "Mleko",
+        "Mleko roślinne (np. owsiane)",
+        "Masło",
+        "Margaryna",
+        "Jogurt naturalny",
+        "Ser żółty",
+        "Ser feta",
+        "Śmietana",
+        "Maślanka",
+        "Serek wiejski",
+        "Kefir",
+    ],
+    "Warzywa": [
+        "Ziemniaki",
+        "Marchewka",
+        "Cebula",
+        "Czosnek świeży",
+        "Kapusta",
+        "Ogórek",
+        "Papryka",
+        "Pomidory świeże",
+        "Pomidory w puszce",
+        "Cukinia",
+        "Brokuł",
+        "Kalafior",
+        "Sałata",
+        "Por",
+    ],
+    "Owoce": [
+        "Jabłko",
+        "Banan",
+        "Cytryna",
+        "Gruszka",
+        "Śliwka",
+        "Truskawki",
+        "Maliny",
+        "Winogrona",
+        "Ananas w puszce",
+        "Brzoskwinia",
+        "Awokado",
+    ],
+    "Tłuszcze i oleje": [
+        "Olej rzepakowy",
+        "Oliwa z oliwek",
+        "Olej kokosowy",
+        "Masło klarowane",
+        "Smalec",
+        "Olej lniany",
+        "Olej słonecznikowy",
+    ],
+    "Dodatki słodzące i konserwujące": [
+        "Cukier biały",
+        "Cukier trzcinowy",
+        "Miód",
+        "Syrop klonowy",
+        "Ocet spirytusowy",
+        "Ocet jabłkowy",
+        "Sól peklująca",
+        "Dżem",
+        "Musztarda",
+        "Ketchup",
+    ],
+}
+
+# Wszystkie składniki z kategorii w kolejności panelu wyboru
+SLOWNIK_SKLADNIKOW: List[str] = [s for lista in KATEGORIE_SKLADNIKOW.values() for s in lista]
+
+# Inne nazwy tych samych składników -> pozycja słownika (odmiany, kolejność słów
+# i "świeży" rozpoznaje recipe_core.kanonizacja – tu tylko prawdziwe synonimy)
+SYNONIMY: Dict[str, str] = {
+    "jaja": "Jajka",
+    "jajo": "Jajka",
+    "kurczak": "Filet z kurczaka",
+    "pierś z kurczaka": "Filet z kurczaka",
+    "mielone": "Mięso mielone",
+    "tuńczyk": "Tuńczyk w puszce",
+    "cieciorka": "Ciecierzyca",
+    "groszek": "Groszek zielony",
+    "ryż": "Ryż biały",
+    "mąka": "Mąka pszenna",
+    "owsianka": "Płatki owsiane",
+    "cornflakes": "Płatki kukurydziane",
+    "kasza kuskus": "Kuskus",
+    "komosa ryżowa": "Quinoa",
+    "mleko owsiane": "Mleko roślinne (np. owsiane)",
+    "mleko sojowe": "Mleko roślinne (np. owsiane)",
+    "mleko migdałowe": "Mleko roślinne (np. owsiane)",
+    "jogurt": "Jogurt naturalny",
+    "feta": "Ser feta",
+    "ser": "Ser żółty",
+    "gouda": "Ser żółty",
+    "twarożek": "Ser biały (twaróg)",
+    "marchew": "Marchewka",
+    "kapusta biała": "Kapusta",
+    "papryka czerwona": "Papryka",
+    "chili": "Papryka ostra",
+    "pomidory z puszki": "Pomidory w puszce",
+    "pomidory krojone": "Pomidory w puszce",
+    "ananas": "Ananas w puszce",
+    "oliwa": "Oliwa z oliwek",
+    "olej": "Olej rzepakowy",
+    "ghee": "Masło klarowane",
+    "cukier": "Cukier biały",
+    "pieprz": "Pieprz czarny",
+    "laur": "Liść laurowy",
+}
+
+# Składniki, które zakładamy w każdej kuchni – nie liczą się jako brakujące
+ZAWSZE_DOSTEPNE = frozenset({"woda", "sól", "pieprz", "pieprz czarny"})
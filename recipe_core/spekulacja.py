@@ -0,0 +1,303 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Generowanie spekulatywne: gdy wybór składników przestaje się zmieniać,
+#  przepisy są generowane w tle do cache, zanim użytkownik kliknie "Generuj"
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError as PrzyszloscAnulowana
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from recipe_core.clients import petla_klientow
+from recipe_core.ratelimit import KubelekTokenow, PrzekroczonyLimit
+from recipe_core.telemetry import TELEMETRIA
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ile sekund wybór musi się nie zmieniać, zanim zaczniemy generować
+OPOZNIENIE = float(os.getenv("RECIPE_SPECULATE_DELAY", "1.5"))
+# spekulatywne wywołania na sesję (łącznie) i na cały proces (na minutę)
+BUDZET_SESJI = int(os.getenv("RECIPE_SPECULATE_SESSION_BUDGET", "10"))
+BUDZET_NA_MINUTE = float(os.getenv("RECIPE_SPECULATE_RPM", "30"))
+# jednocześnie generowane zestawy; nadmiar jest pomijany, a nie kolejkowany
+WATKI = int(os.getenv("RECIPE_SPECULATE_WORKERS", "4"))
+MAKS_SESJI = 10_000
+MAKS_WYNIKOW = 10_000
+
+Wykonaj = Callable[[Awaitable[T]], T]
+
+CZEKA, W_LOCIE, GOTOWA, ANULOWANA, POMINIETA, BLAD = (
+    "czeka", "w_locie", "gotowa", "anulowana", "pominieta", "blad",
+)
+
+
+class _Spekulacja:
+    """Jedno spekulatywne generowanie dla zestawu `klucz`."""
+
+    def __init__(self, klucz: str):
+        self.klucz = klucz
+        self.stan = CZEKA
+        self.wykorzystana = False
+        # korutyna wykonywana na pętli klientów – uchwyt do anulowania
+        self.przyszlosc: Optional[Future] = None
+
+
+class _Sesja:
+    def __init__(self):
+        self.zuzyte = 0
+        self.spekulacja: Optional[_Spekulacja] = None
+
+
+class Spekulator:
+    """
+    Debounce, anulowanie i budżety dla generowania w tle.
+
+    `zaplanuj(sesja, klucz, zadanie)` po każdej zmianie wyboru odkłada start
+    o `opoznienie` sekund; kolejna zmiana w tym czasie zastępuje plan. Gdy
+    wybór się ustali, `zadanie(wykonaj)` startuje w puli wątków. `wykonaj(korutyna)`
+    uruchamia wywołanie modelu na wspólnej pętli klientów – dzięki temu
+    zastąpiona spekulacja jest naprawdę przerywana (anulowanie zadania asyncio
+    zamyka zapytanie HTTP), a `wykonaj` rzuca wtedy `asyncio.CancelledError`.
+    To BaseException, więc `PojedynczyLot` traktuje je jak przerwanie: sesje,
+    które zdążyły dołączyć do tego lotu, ponawiają zapytanie same.
+
+    Spekulacja, na którą ktoś już czeka (`wykorzystaj`), nie jest anulowana.
+    Limity: `budzet_sesji` wywołań na sesję, kubełek `na_minute` wywołań na
+    proces i najwyżej `watki` jednoczesnych generowań – ponad limit spekulacja
+    jest pomijana (przycisk wygeneruje przepisy jak zwykle).
+    """
+
+    def __init__(
+        self,
+        opoznienie: float = OPOZNIENIE,
+        budzet_sesji: int = BUDZET_SESJI,
+        na_minute: float = BUDZET_NA_MINUTE,
+        watki: int = WATKI,
+    ):
+        self.opoznienie = opoznienie
+        self.budzet_sesji = budzet_sesji
+        self.watki = watki
+        self._kubelek = KubelekTokenow(na_minute)
+        self._pula = ThreadPoolExecutor(max_workers=watki, thread_name_prefix="spekulacja")
+        # odliczanie i same wywołania – na pętli klientów async (recipe_core.clients)
+        self._petla = petla_klientow()
+        self._lock = threading.Lock()
+        self._sesje: "OrderedDict[str, _Sesja]" = OrderedDict()
+        # klucz -> ostatnia uruchomiona spekulacja (do rozpoznania trafień)
+        self._wyniki: "OrderedDict[str, _Spekulacja]" = OrderedDict()
+        self._w_locie = 0
+        self.statystyki: Dict[str, int] = {
+            "zaplanowane": 0,
+            "uruchomione": 0,
+            "trafienia": 0,
+            "trafienia_w_locie": 0,
+            "anulowane": 0,
+            "poza_budzetem": 0,
+            "pominiete": 0,
+            "bledy": 0,
+        }
+
+    def _licz(self, statystyka: str, wynik: str) -> None:
+        self.statystyki[statystyka] += 1
+        TELEMETRIA.licz("recipe_speculation_total", result=wynik)
+
+    def _sesja(self, sesja: str) -> _Sesja:
+        stan = self._sesje.get(sesja)
+        if stan is None:
+            stan = self._sesje[sesja] = _Sesja()
+            if len(self._sesje) > MAKS_SESJI:
+                self._sesje.popitem(last=False)
+        else:
+            self._sesje.move_to_end(sesja)
+        return stan
+
+    def _zastap(self, sesja: _Sesja) -> None:
+        """Porzuca bieżącą spekulację sesji; trwające wywołanie jest przerywane."""
+        poprzednia, sesja.spekulacja = sesja.spekulacja, None
+        if poprzednia is None or poprzednia.wykorzystana:
+            return
+        if poprzednia.stan == CZEKA:
+            poprzednia.stan = ANULOWANA
+        elif poprzednia.stan == W_LOCIE:
+            # bez przyszłości – wątek jeszcze nie wysłał zapytania i sam je pominie
+            if poprzednia.przyszlosc is None or poprzednia.przyszlosc.cancel():
+                poprzednia.stan = ANULOWANA
+                self._wyniki.pop(poprzednia.klucz, None)
+                self._licz("anulowane", "cancelled")
+
+    # ------------------------------------------------------------ publiczne --
+    def zaplanuj(
+        self,
+        sesja: str,
+        klucz: str,
+        zadanie: Callable[[Wykonaj], Any],
+        gotowe: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """
+        Nowy wybór w sesji `sesja`. `gotowe()` jest sprawdzane tuż przed startem
+        (np. czy wynik jest już w cache) – wtedy spekulacja nie zużywa budżetu.
+        """
+        with self._lock:
+            stan = self._sesja(sesja)
+            biezaca = stan.spekulacja
+            if biezaca is not None and biezaca.klucz == klucz and biezaca.stan in (W_LOCIE, GOTOWA):
+                return
+            self._zastap(stan)
+            spekulacja = stan.spekulacja = _Spekulacja(klucz)
+            self.statystyki["zaplanowane"] += 1
+        self._petla.call_soon_threadsafe(
+            self._petla.call_later, self.opoznienie, self._uruchom, stan, spekulacja, zadanie, gotowe
+        )
+
+    def anuluj(self, sesja: str) -> None:
+        """Wybór wyczyszczony – porzucamy plan i przerywamy generowanie sesji."""
+        with self._lock:
+            stan = self._sesje.get(sesja)
+            if stan is not None:
+                self._zastap(stan)
+
+    def wykorzystaj(self, sesja: str, klucz: str) -> Optional[str]:
+        """
+        Kliknięcie "Generuj" dla zestawu `klucz`. Zwraca stan spekulacji, która
+        go przygotowała (`gotowa` – wynik jest w cache, `w_locie` – przycisk
+        dołączy do trwającego wywołania) albo None. Odłożony start w tej sesji
+        jest porzucany – przycisk i tak generuje.
+        """
+        with self._lock:
+            stan = self._sesje.get(sesja)
+            if stan is not None and stan.spekulacja is not None and stan.spekulacja.stan == CZEKA:
+                stan.spekulacja.stan = ANULOWANA
+                stan.spekulacja = None
+            spekulacja = self._wyniki.get(klucz)
+            if spekulacja is None or spekulacja.stan not in (W_LOCIE, GOTOWA):
+                return None
+            if not spekulacja.wykorzystana:
+                spekulacja.wykorzystana = True
+                self.statystyki["trafienia"] += 1
+                if spekulacja.stan == W_LOCIE:
+                    self._licz("trafienia_w_locie", "hit_in_flight")
+                else:
+                    TELEMETRIA.licz("recipe_speculation_total", result="hit")
+            return spekulacja.stan
+
+    # ------------------------------------------------------------- w tle --
+    def _uruchom(
+        self,
+        stan: _Sesja,
+        spekulacja: _Spekulacja,
+        zadanie: Callable[[Wykonaj], Any],
+        gotowe: Optional[Callable[[], bool]],
+    ) -> None:
+        """Koniec odliczania (na pętli klientów): sprawdzenie `gotowe()` i start."""
+        if spekulacja.stan != CZEKA:
+            return
+        if gotowe is None:
+            self._start(stan, spekulacja, zadanie)
+            return
+        # gotowe() czyta cache (SQLite pod blokadą) – poza pętlą, na której trwają strumienie
+        sprawdzenie = self._petla.run_in_executor(None, gotowe)
+        sprawdzenie.add_done_callback(lambda f: self._po_sprawdzeniu(f, stan, spekulacja, zadanie))
+
+    def _po_sprawdzeniu(
+        self,
+        sprawdzenie: "asyncio.Future[bool]",
+        stan: _Sesja,
+        spekulacja: _Spekulacja,
+        zadanie: Callable[[Wykonaj], Any],
+    ) -> None:
+        if sprawdzenie.cancelled():
+            return
+        blad = sprawdzenie.exception()
+        if blad is not None:
+            # nie wiemy, czy wynik jest w cache – generujemy jak bez `gotowe`
+            logger.warning("Sprawdzenie przed spekulacją nie powiodło się: %s: %s", type(blad).__name__, blad)
+        elif sprawdzenie.result():
+            with self._lock:
+                if spekulacja.stan == CZEKA:
+                    spekulacja.stan = POMINIETA
+                    self._licz("pominiete", "skipped")
+            return
+        self._start(stan, spekulacja, zadanie)
+
+    def _start(self, stan: _Sesja, spekulacja: _Spekulacja, zadanie: Callable[[Wykonaj], Any]) -> None:
+        """Sprawdzenie limitów i przekazanie zadania do puli wątków."""
+        with self._lock:
+            if stan.spekulacja is not spekulacja or spekulacja.stan != CZEKA:
+                return
+            if stan.zuzyte >= self.budzet_sesji or self._w_locie >= self.watki or not self._rezerwuj():
+                spekulacja.stan = POMINIETA
+                self._licz("poza_budzetem", "over_budget")
+                return
+            stan.zuzyte += 1
+            self._w_locie += 1
+            spekulacja.stan = W_LOCIE
+            self._wyniki[spekulacja.klucz] = spekulacja
+            self._wyniki.move_to_end(spekulacja.klucz)
+            if len(self._wyniki) > MAKS_WYNIKOW:
+                self._wyniki.popitem(last=False)
+            self._licz("uruchomione", "started")
+        self._pula.submit(self._wykonaj, spekulacja, zadanie)
+
+    def _rezerwuj(self) -> bool:
+        try:
+            self._kubelek.zarezerwuj(1, maks_oczekiwanie=0)
+        except PrzekroczonyLimit:
+            return False
+        return True
+
+    def _wykonaj(self, spekulacja: _Spekulacja, zadanie: Callable[[Wykonaj], Any]) -> None:
+        def wykonaj(korutyna: Awaitable[T]) -> T:
+            with self._lock:
+                if spekulacja.stan == ANULOWANA:
+                    korutyna.close()
+                    raise asyncio.CancelledError()
+                spekulacja.przyszlosc = asyncio.run_coroutine_threadsafe(korutyna, self._petla)
+            try:
+                return spekulacja.przyszlosc.result()
+            except PrzyszloscAnulowana:
+                raise asyncio.CancelledError() from None
+
+        koniec = GOTOWA
+        try:
+            zadanie(wykonaj)
+        except asyncio.CancelledError:
+            koniec = ANULOWANA
+        except Exception as e:
+            koniec = BLAD
+            logger.warning("Spekulatywne generowanie nie powiodło się: %s: %s", type(e).__name__, e)
+        with self._lock:
+            self._w_locie -= 1
+            if spekulacja.stan == W_LOCIE:
+                spekulacja.stan = koniec
+                if koniec == BLAD:
+                    self._licz("bledy", "error")
+
+    def raport(self) -> Dict[str, float]:
+        """
+        Współczynnik trafień = uruchomione spekulacje, z których skorzystał
+        przycisk, do wszystkich uruchomionych. Zmarnowane = zakończone lub
+        anulowane bez wykorzystania (trwające nie są jeszcze liczone).
+        """
+        with self._lock:
+            uruchomione = self.statystyki["uruchomione"]
+            trwajace = sum(
+                1 for s in self._wyniki.values() if s.stan == W_LOCIE and not s.wykorzystana
+            )
+            return {
+                **self.statystyki,
+                "w_locie": self._w_locie,
+                "sesje": len(self._sesje),
+                "zmarnowane": uruchomione - self.statystyki["trafienia"] - trwajace,
+                "wspolczynnik_trafien": self.statystyki["trafienia"] / uruchomione if uruchomione else 0.0,
+            }
+
+    def zamknij(self) -> None:
+        with self._lock:
+            for stan in self._sesje.values():
+                self._zastap(stan)
+        self._pula.shutdown(wait=False)
@@ -0,0 +1,123 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Przyrostowy parser JSON dla odpowiedzi strumieniowanych przez model
+# ─────────────────────────────────────────────────────────────────────────────
+import json
+import re
+from typing import List, Optional, Union
+
+_NAZWA = re.compile(r'"nazwa"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class StrumieniowyParserPrzepisow:
+    """
+    Przyjmuje kolejne fragmenty tekstu odpowiedzi i zwraca każdy obiekt
+    z tablicy "przepisy" w chwili, gdy jego nawias klamrowy zostanie zamknięty.
+
+    Parser nie buduje drzewa – śledzi jedynie głębokość zagnieżdżenia,
+    stan wewnątrz/na zewnątrz stringa oraz ostatni klucz najwyższego poziomu.
+    Tekst przed pierwszym "{" (np. znacznik ```json) jest ignorowany.
+
+    Z `surowe=True` zamiast słowników zwracane są fragmenty tekstu z JSON-em
+    obiektów – do walidacji bezpośrednio przez pydantic-core.
+    """
+
+    def __init__(self, klucz_tablicy: str = "przepisy", surowe: bool = False):
+        self.klucz_tablicy = klucz_tablicy
+        self.surowe = surowe
+        self._tekst = ""
+        self._pozycja = 0
+        self._glebokosc = 0
+        self._w_stringu = False
+        self._escape = False
+        self._start_stringu = -1
+        self._ostatni_string: Optional[str] = None
+        self._klucz_najwyzszego_poziomu: Optional[str] = None
+        self._glebokosc_tablicy = -1
+        self._start_obiektu = -1
+        self.liczba_obiektow = 0
+
+    @property
+    def tekst(self) -> str:
+        """Cały dotychczas otrzymany tekst odpowiedzi."""
+        return self._tekst
+
+    @property
+    def biezacy_obiekt(self) -> Optional[str]:
+        """Początek obiektu, który właśnie napływa (jeszcze niedomknięty) – do podglądu postępu."""
+        return self._tekst[self._start_obiektu:] if self._start_obiektu >= 0 else None
+
+    def feed(self, fragment: str) -> List[Union[dict, str]]:
+        """Dokłada fragment odpowiedzi; zwraca listę nowo domkniętych przepisów."""
+        if not fragment:
+            return []
+        self._tekst += fragment
+        tekst = self._tekst
+        gotowe: List[Union[dict, str]] = []
+
+        i = self._pozycja
+        n = len(tekst)
+        while i < n:
+            znak = tekst[i]
+            if self._w_stringu:
+                if self._escape:
+                    self._escape = False
+                elif znak == "\\":
+                    self._escape = True
+                elif znak == '"':
+                    self._w_stringu = False
+                    if self._glebokosc == 1:
+                        self._ostatni_string = tekst[self._start_stringu + 1:i]
+            elif znak == '"':
+                self._w_stringu = True
+                self._start_stringu = i
+            elif znak == ":" and self._glebokosc == 1:
+                self._klucz_najwyzszego_poziomu = self._ostatni_string
+            elif znak in "{[":
+                self._glebokosc += 1
+                if (
+                    znak == "["
+                    and self._glebokosc == 2
+                    and self._klucz_najwyzszego_poziomu == self.klucz_tablicy
+                ):
+                    self._glebokosc_tablicy = self._glebokosc
+                elif (
+                    znak == "{"
+                    and self._glebokosc_tablicy > 0
+                    and self._glebokosc == self._glebokosc_tablicy + 1
+                ):
+                    self._start_obiektu = i
+            elif znak in "}]":
+                if (
+                    znak == "}"
+                    and self._start_obiektu >= 0
+                    and self._glebokosc == self._glebokosc_tablicy + 1
+                ):
+                    obiekt = tekst[self._start_obiektu:i + 1]
+                    if self.surowe:
+                        gotowe.append(obiekt)
+                        self.liczba_obiektow += 1
+                    else:
+                        try:
+                            gotowe.append(json.loads(obiekt))
+                            self.liczba_obiektow += 1
+                        except json.JSONDecodeError:
+                            pass
+                    self._start_obiektu = -1
+                elif znak == "]" and self._glebokosc == self._glebokosc_tablicy:
+                    self._glebokosc_tablicy = -1
+                self._glebokosc = max(self._glebokosc - 1, 0)
+            i += 1
+
+        self._pozycja = n
+        return gotowe
+
+
+def czesciowa_nazwa(obiekt: str) -> Optional[str]:
+    """Pole "nazwa" z niedomkniętego obiektu przepisu, gdy już w całości dotarło."""
+    dopasowanie = _NAZWA.search(obiekt)
+    if dopasowanie is None:
+        return None
+    try:
+        return json.loads(f'"{dopasowanie.group(1)}"')
+    except json.JSONDecodeError:
+        return dopasowanie.group(1)
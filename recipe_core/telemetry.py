@@ -0,0 +1,293 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Telemetria ścieżki generowania: wywołania LLM, cache, dekodowanie, render
+#
+#  Eksport:
+#   • tekst Prometheus – `Telemetria.prometheus()`, serwowany przez
+#     `uruchom_eksport()` pod http://127.0.0.1:$RECIPE_METRICS_PORT/metrics,
+#   • zdarzenia JSONL z rotacją – gdy ustawiono RECIPE_TELEMETRY_LOG
+#     (zapis w wątku w tle, ścieżka zapytania nie czeka na dysk).
+# ─────────────────────────────────────────────────────────────────────────────
+import asyncio
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PORT_METRYK = int(os.getenv("RECIPE_METRICS_PORT", "0"))  # 0 = bez serwera
+SCIEZKA_DZIENNIKA = os.getenv("RECIPE_TELEMETRY_LOG", "")  # pusta = bez JSONL
+ROZMIAR_DZIENNIKA = int(os.getenv("RECIPE_TELEMETRY_LOG_BYTES", str(10 * 1024 * 1024)))
+KOPIE_DZIENNIKA = int(os.getenv("RECIPE_TELEMETRY_LOG_BACKUPS", "5"))
+# ostatnie N pomiarów na serię – z nich liczymy p50/p95/p99
+ROZMIAR_PROBKI = int(os.getenv("RECIPE_TELEMETRY_WINDOW", "2048"))
+
+KUBELKI_CZASU = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+KUBELKI_LICZBY = (0, 1, 2, 3)
+
+# nazwa metryki -> (typ, opis, kubełki histogramu)
+OPISY: Dict[str, Tuple[str, str, Sequence[float]]] = {
+    "recipe_llm_requests_total": ("counter", "Wywołania dostawcy LLM (po ponowieniach) wg statusu", ()),
+    "recipe_llm_errors_total": ("counter", "Nieudane wywołania LLM wg klasy błędu", ()),
+    "recipe_llm_retries_total": ("counter", "Ponowienia zapytań do dostawcy", ()),
+    "recipe_llm_latency_seconds": ("histogram", "Czas całego wywołania LLM, z ponowieniami", KUBELKI_CZASU),
+    "recipe_llm_ttft_seconds": ("histogram", "Czas do pierwszego fragmentu odpowiedzi (strumień)", KUBELKI_CZASU),
+    "recipe_llm_tokens_total": ("counter", "Tokeny z pola usage odpowiedzi: wejściowe, wyjściowe, odczyt/zapis cache promptu", ()),
+    "recipe_cache_lookups_total": ("counter", "Odczyty cache przepisów wg poziomu (l1/l2/chybienie)", ()),
+    "recipe_decode_total": ("counter", "Dekodowanie odpowiedzi wg wyniku (ok/odzyskane/rodzaj błędu)", ()),
+    "recipe_speculation_total": ("counter", "Generowanie spekulatywne wg wyniku (started/hit/hit_in_flight/cancelled/over_budget/skipped/error)", ()),
+    "recipe_delta_recipes_total": ("counter", "Przepisy przy zmianie wyboru: zachowane/wygenerowane ponownie/nieudane", ()),
+    "recipe_deadlines_total": ("counter", "Zapytania z terminem wg wyniku (ok/partial/expired/cancelled/error)", ()),
+    "recipe_api_requests_total": ("counter", "Zapytania do API HTTP wg endpointu i statusu", ()),
+    "recipe_rendered_recipes": ("histogram", "Liczba przepisów wyświetlonych po generowaniu", KUBELKI_LICZBY),
+}
+
+Etykiety = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Kubełki w stylu Prometheus + okno ostatnich pomiarów do kwantyli."""
+
+    def __init__(self, kubelki: Sequence[float], rozmiar_probki: int = ROZMIAR_PROBKI):
+        self.kubelki = tuple(kubelki)
+        self.liczniki = [0] * (len(self.kubelki) + 1)  # ostatni = +Inf
+        self.suma = 0.0
+        self.liczba = 0
+        self.probka: Deque[float] = deque(maxlen=rozmiar_probki)
+
+    def obserwuj(self, wartosc: float) -> None:
+        self.liczniki[bisect.bisect_left(self.kubelki, wartosc)] += 1
+        self.suma += wartosc
+        self.liczba += 1
+        self.probka.append(wartosc)
+
+    def kwantyle(self, qs: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, float]:
+        posortowane = sorted(self.probka)
+        if not posortowane:
+            return {f"p{round(q * 100)}": 0.0 for q in qs}
+        n = len(posortowane)
+        return {f"p{round(q * 100)}": posortowane[min(n - 1, int(q * n))] for q in qs}
+
+
+def _wartosc_etykiety(wartosc) -> str:
+    return str(wartosc).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_etykiet(etykiety: Etykiety, dodatkowe: str = "") -> str:
+    czesci = [f'{k}="{_wartosc_etykiety(v)}"' for k, v in etykiety]
+    if dodatkowe:
+        czesci.append(dodatkowe)
+    return "{" + ",".join(czesci) + "}" if czesci else ""
+
+
+def _status(blad: Optional[BaseException]) -> str:
+    if blad is None:
+        return "ok"
+    if isinstance(blad, (GeneratorExit, asyncio.CancelledError, KeyboardInterrupt)):
+        return "anulowane"  # hedging / fan-out / przerwany strumień
+    return "blad"
+
+
+class Telemetria:
+    """Rejestr metryk procesu; wszystkie metody są bezpieczne wątkowo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._liczniki: Dict[Tuple[str, Etykiety], float] = {}
+        self._histogramy: Dict[Tuple[str, Etykiety], Histogram] = {}
+        self._dziennik: Optional[logging.Logger] = None
+
+    # ── podstawowe operacje ──────────────────────────────────────────────────
+    def licz(self, nazwa: str, ile: float = 1, **etykiety: str) -> None:
+        klucz = (nazwa, tuple(sorted(etykiety.items())))
+        with self._lock:
+            self._liczniki[klucz] = self._liczniki.get(klucz, 0) + ile
+
+    def obserwuj(self, nazwa: str, wartosc: float, **etykiety: str) -> None:
+        klucz = (nazwa, tuple(sorted(etykiety.items())))
+        with self._lock:
+            histogram = self._histogramy.get(klucz)
+            if histogram is None:
+                histogram = self._histogramy[klucz] = Histogram(OPISY[nazwa][2])
+            histogram.obserwuj(wartosc)
+
+    def zdarzenie(self, rodzaj: str, **pola) -> None:
+        """Wiersz JSONL w dzienniku (jeśli włączony)."""
+        if self._dziennik is not None:
+            self._dziennik.info(json.dumps({"ts": time.time(), "rodzaj": rodzaj, **pola}, ensure_ascii=False))
+
+    def wlacz_dziennik(self, sciezka: str, rozmiar: int = ROZMIAR_DZIENNIKA, kopie: int = KOPIE_DZIENNIKA) -> None:
+        """Rotowany plik JSONL; zapis przez kolejkę w wątku w tle."""
+        katalog = os.path.dirname(sciezka)
+        if katalog:
+            os.makedirs(katalog, exist_ok=True)
+        plik = logging.handlers.RotatingFileHandler(sciezka, maxBytes=rozmiar, backupCount=kopie, encoding="utf-8")
+        plik.setFormatter(logging.Formatter("%(message)s"))
+        kolejka: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logging.handlers.QueueListener(kolejka, plik).start()
+        dziennik = logging.getLogger(f"{__name__}.jsonl")
+        dziennik.setLevel(logging.INFO)
+        dziennik.propagate = False
+        dziennik.addHandler(logging.handlers.QueueHandler(kolejka))
+        self._dziennik = dziennik
+
+    # ── punkty pomiarowe ─────────────────────────────────────────────────────
+    def wywolanie_llm(
+        self,
+        provider: str,
+        czas_s: float,
+        proby: int = 1,
+        ttft_s: Optional[float] = None,
+        blad: Optional[BaseException] = None,
+    ) -> None:
+        status = _status(blad)
+        self.licz("recipe_llm_requests_total", provider=provider, status=status)
+        if blad is not None and status == "blad":
+            self.licz("recipe_llm_errors_total", provider=provider, reason=type(blad).__name__)
+        if proby > 1:
+            self.licz("recipe_llm_retries_total", proby - 1, provider=provider)
+        if status == "ok":
+            self.obserwuj("recipe_llm_latency_seconds", czas_s, provider=provider)
+        if ttft_s is not None:
+            self.obserwuj("recipe_llm_ttft_seconds", ttft_s, provider=provider)
+        self.zdarzenie(
+            "llm", provider=provider, status=status, czas_s=round(czas_s, 4), proby=proby,
+            ttft_s=None if ttft_s is None else round(ttft_s, 4),
+            blad=None if blad is None else f"{type(blad).__name__}: {blad}"[:300],
+        )
+
+    def tokeny(
+        self, provider: str, tryb: str, wejscie: int, wyjscie: int, cache_odczyt: int = 0, cache_zapis: int = 0
+    ) -> None:
+        self.licz("recipe_llm_tokens_total", wejscie, provider=provider, mode=tryb, kind="input")
+        self.licz("recipe_llm_tokens_total", wyjscie, provider=provider, mode=tryb, kind="output")
+        dodatkowe = {}
+        if cache_odczyt or cache_zapis:
+            self.licz("recipe_llm_tokens_total", cache_odczyt, provider=provider, mode=tryb, kind="cache_read")
+            self.licz("recipe_llm_tokens_total", cache_zapis, provider=provider, mode=tryb, kind="cache_write")
+            dodatkowe = {"cache_odczyt": cache_odczyt, "cache_zapis": cache_zapis}
+        self.zdarzenie("tokeny", provider=provider, tryb=tryb, wejscie=wejscie, wyjscie=wyjscie, **dodatkowe)
+
+    def cache(self, poziom: str) -> None:
+        self.licz("recipe_cache_lookups_total", tier=poziom)
+        self.zdarzenie("cache", poziom=poziom)
+
+    def dekodowanie(self, wynik: str, czas_s: float, odzyskane: int = 0) -> None:
+        self.licz("recipe_decode_total", result=wynik)
+        if wynik != "ok":
+            self.zdarzenie("dekodowanie", wynik=wynik, czas_s=round(czas_s, 5), odzyskane=odzyskane)
+
+    def wyswietlone(self, liczba: int, aplikacja: str) -> None:
+        self.obserwuj("recipe_rendered_recipes", liczba, app=aplikacja)
+        self.zdarzenie("render", aplikacja=aplikacja, przepisy=liczba)
+
+    # ── eksport ──────────────────────────────────────────────────────────────
+    def prometheus(self) -> str:
+        """Wszystkie metryki w formacie tekstowym Prometheus (0.0.4)."""
+        with self._lock:
+            liczniki = dict(self._liczniki)
+            histogramy = {
+                k: (h.kubelki, list(h.liczniki), h.suma, h.liczba) for k, h in self._histogramy.items()
+            }
+        linie: List[str] = []
+        for nazwa, (typ, opis, _) in OPISY.items():
+            serie_l = sorted((e, v) for (n, e), v in liczniki.items() if n == nazwa)
+            serie_h = sorted((e, h) for (n, e), h in histogramy.items() if n == nazwa)
+            if not serie_l and not serie_h:
+                continue
+            linie.append(f"# HELP {nazwa} {opis}")
+            linie.append(f"# TYPE {nazwa} {typ}")
+            for etykiety, wartosc in serie_l:
+                linie.append(f"{nazwa}{_format_etykiet(etykiety)} {wartosc:g}")
+            for etykiety, (kubelki, liczby, suma, liczba) in serie_h:
+                narastajaco = 0
+                for granica, ile in zip(list(kubelki) + [float("inf")], liczby):
+                    narastajaco += ile
+                    le = "+Inf" if granica == float("inf") else f"{granica:g}"
+                    etykiety_kubelka = _format_etykiet(etykiety, f'le="{le}"')
+                    linie.append(f"{nazwa}_bucket{etykiety_kubelka} {narastajaco}")
+                linie.append(f"{nazwa}_sum{_format_etykiet(etykiety)} {suma:g}")
+                linie.append(f"{nazwa}_count{_format_etykiet(etykiety)} {liczba}")
+        return "\n".join(linie) + "\n"
+
+    def liczniki(self) -> Dict[str, Dict[str, float]]:
+        """Liczniki jako {metryka: {"etykieta=wartość,...": wartość}}."""
+        with self._lock:
+            wynik: Dict[str, Dict[str, float]] = {}
+            for (nazwa, etykiety), wartosc in sorted(self._liczniki.items()):
+                wynik.setdefault(nazwa, {})[",".join(f"{k}={v}" for k, v in etykiety)] = wartosc
+            return wynik
+
+    def histogramy(self) -> Dict[str, Dict[str, dict]]:
+        """Kwantyle p50/p95/p99 (z okna ostatnich pomiarów) i kubełki każdej serii."""
+        with self._lock:
+            wynik: Dict[str, Dict[str, dict]] = {}
+            for (nazwa, etykiety), h in sorted(self._histogramy.items(), key=lambda x: x[0]):
+                wynik.setdefault(nazwa, {})[",".join(f"{k}={v}" for k, v in etykiety)] = {
+                    "liczba": h.liczba,
+                    "srednia": h.suma / h.liczba if h.liczba else 0.0,
+                    **h.kwantyle(),
+                    "kubelki": dict(zip([f"{g:g}" for g in h.kubelki] + ["+Inf"], h.liczniki)),
+                }
+            return wynik
+
+    def zeruj(self) -> None:
+        with self._lock:
+            self._liczniki.clear()
+            self._histogramy.clear()
+
+
+TELEMETRIA = Telemetria()
+if SCIEZKA_DZIENNIKA:
+    TELEMETRIA.wlacz_dziennik(SCIEZKA_DZIENNIKA)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Lokalny endpoint /metrics
+# ─────────────────────────────────────────────────────────────────────────────
+_serwer: Optional[ThreadingHTTPServer] = None
+_serwer_lock = threading.Lock()
+
+
+class _ObslugaMetryk(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        tresc = TELEMETRIA.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(tresc)))
+        self.end_headers()
+        self.wfile.write(tresc)
+
+    def log_message(self, format, *args):  # bez logów dostępu na stderr
+        pass
+
+
+def uruchom_eksport(port: int = PORT_METRYK, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serwer /metrics w wątku w tle – raz na proces (kolejne wywołania zwracają
+    ten sam serwer). `port=0` wyłącza eksport. Zajęty port (np. druga
+    aplikacja na tej samej maszynie) nie przerywa działania aplikacji.
+    """
+    global _serwer
+    if not port:
+        return None
+    with _serwer_lock:
+        if _serwer is None:
+            try:
+                _serwer = ThreadingHTTPServer((host, port), _ObslugaMetryk)
+            except OSError as e:
+                logger.warning("Eksport metryk na porcie %s niedostępny: %s", port, e)
+                return None
+            _serwer.daemon_threads = True
+            threading.Thread(target=_serwer.serve_forever, name="recipe-metryki", daemon=True).start()
+        return _serwer
@@ -0,0 +1,199 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Terminy zapytań: łączny czas generowania, limit jednej próby i anulowanie
+# ─────────────────────────────────────────────────────────────────────────────
+# Termin ustawia punkt wejścia (kliknięcie "Generuj", zapytanie HTTP, wywołanie
+# RecipeAgent) przez `w_terminie`, a warstwy niżej czytają go z kontekstu
+# (contextvars) – ponowienia w `recipe_core.ratelimit` kończą się przed
+# terminem, a dostawcy przekazują SDK limit czasu jednej próby.
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, MutableMapping, Optional
+
+from recipe_core.telemetry import TELEMETRIA
+
+# Całe generowanie: kolejka w limitach, ponowienia i strumień (0 – bez terminu)
+CZAS_ZAPYTANIA = float(os.getenv("RECIPE_DEADLINE", "120"))
+# Jedna próba: limit czasu zapytania HTTP do dostawcy i przerwy między fragmentami strumienia
+CZAS_PROBY = float(os.getenv("RECIPE_ATTEMPT_TIMEOUT", "60"))
+
+
+class PrzekroczonyTermin(TimeoutError):
+    """
+    Minął termin zapytania. `czesciowe` to przepisy domknięte w strumieniu
+    przed terminem (`Przepisy`) albo None – nie trafiają do cache.
+    """
+
+    def __init__(self, komunikat: str = "Minął czas na wygenerowanie przepisów.", czesciowe: Any = None):
+        super().__init__(komunikat)
+        self.czesciowe = czesciowe
+
+
+class ZapytanieAnulowane(Exception):
+    """Wywołujący zrezygnował z zapytania (nowe zapytanie sesji, wyczyszczenie wyboru)."""
+
+
+class Termin:
+    """
+    Termin jednego zapytania: chwila końca (time.monotonic), limit pojedynczej
+    próby i flaga anulowania ustawiana z dowolnego wątku. `wynik` może ustawić
+    wywołujący, który obsłużył błąd sam (np. pokazał częściowe przepisy) –
+    trafia do `recipe_deadlines_total` zamiast "ok".
+    """
+
+    def __init__(self, czas: float = CZAS_ZAPYTANIA, czas_proby: float = CZAS_PROBY):
+        self.czas = czas
+        self.koniec = time.monotonic() + czas if czas > 0 else math.inf
+        self.czas_proby = czas_proby if czas_proby > 0 else math.inf
+        self._anulowany = threading.Event()
+        self.wynik: Optional[str] = None
+
+    def pozostalo(self) -> float:
+        return max(0.0, self.koniec - time.monotonic())
+
+    def limit_czekania(self) -> Optional[float]:
+        """`pozostalo()` jako timeout czekania (None – bez terminu)."""
+        return None if math.isinf(self.koniec) else self.pozostalo()
+
+    def minal(self) -> bool:
+        return time.monotonic() >= self.koniec
+
+    @property
+    def anulowany(self) -> bool:
+        return self._anulowany.is_set()
+
+    def anuluj(self) -> None:
+        self._anulowany.set()
+
+    def sprawdz(self) -> None:
+        """Rzuca `ZapytanieAnulowane` / `PrzekroczonyTermin`, gdy nie warto kontynuować."""
+        if self.anulowany:
+            raise ZapytanieAnulowane("Zapytanie anulowane.")
+        if self.minal():
+            raise PrzekroczonyTermin(f"Minął czas na wygenerowanie przepisów ({self.czas:g} s).")
+
+    def limit_proby(self) -> float:
+        """Limit czasu najbliższej próby – nie dłużej, niż zostało do terminu."""
+        self.sprawdz()
+        return min(self.czas_proby, self.pozostalo())
+
+    def czekaj(self, sekundy: float) -> None:
+        """Sen (backoff, kolejka w limitach) przerywany anulowaniem i kończony przed terminem."""
+        if sekundy >= self.pozostalo():
+            raise PrzekroczonyTermin(f"Minąłby czas na wygenerowanie przepisów ({self.czas:g} s).")
+        self._anulowany.wait(sekundy)
+        self.sprawdz()
+
+
+_BIEZACY: contextvars.ContextVar[Optional[Termin]] = contextvars.ContextVar("recipe_termin", default=None)
+
+
+def biezacy_termin() -> Optional[Termin]:
+    return _BIEZACY.get()
+
+
+def limit_proby() -> float:
+    """Limit czasu zapytania do SDK dostawcy: z bieżącego terminu albo `CZAS_PROBY`."""
+    termin = _BIEZACY.get()
+    return termin.limit_proby() if termin is not None else CZAS_PROBY
+
+
+def sprawdz_termin() -> None:
+    termin = _BIEZACY.get()
+    if termin is not None:
+        termin.sprawdz()
+
+
+def czekaj(sekundy: float) -> None:
+    """`time.sleep` w terminie bieżącego zapytania (backoff, kolejka w limitach)."""
+    termin = _BIEZACY.get()
+    if termin is None:
+        time.sleep(sekundy)
+    else:
+        termin.czekaj(sekundy)
+
+
+async def czekaj_async(sekundy: float) -> None:
+    termin = _BIEZACY.get()
+    if termin is not None:
+        termin.sprawdz()
+        if sekundy >= termin.pozostalo():
+            raise PrzekroczonyTermin(f"Minąłby czas na wygenerowanie przepisów ({termin.czas:g} s).")
+    await asyncio.sleep(sekundy)
+
+
+@asynccontextmanager
+async def proba_w_terminie() -> AsyncIterator[None]:
+    """
+    Jedna próba po stronie asyncio: blok przerywany po `limit_proby()`
+    (także ponowienia wewnątrz SDK). Przerwanie po terminie zapytania to
+    `PrzekroczonyTermin`, wcześniejsze – zwykły `TimeoutError` do ponowienia.
+    """
+    termin = _BIEZACY.get()
+    try:
+        async with asyncio.timeout(limit_proby()):
+            yield
+    except PrzekroczonyTermin:
+        raise
+    except TimeoutError:
+        if termin is not None:
+            termin.sprawdz()
+        raise
+
+
+def nowy_termin_sesji(stan: MutableMapping[str, Any], klucz: str = "termin_zapytania") -> Termin:
+    """
+    Nowy termin zapytania sesji (np. `st.session_state`); poprzednie zapytanie
+    tej sesji, jeśli jeszcze trwa, zostaje anulowane – nikt nie czeka na jego wynik.
+    """
+    poprzedni = stan.get(klucz)
+    if poprzedni is not None:
+        poprzedni.anuluj()
+    termin = stan[klucz] = Termin()
+    return termin
+
+
+def anuluj_termin_sesji(stan: MutableMapping[str, Any], klucz: str = "termin_zapytania") -> None:
+    """Sesja wyczyściła zapytanie – trwające generowanie nie jest już potrzebne."""
+    poprzedni = stan.pop(klucz, None)
+    if poprzedni is not None:
+        poprzedni.anuluj()
+
+
+@contextmanager
+def w_terminie(termin: Optional[Termin] = None) -> Iterator[Termin]:
+    """
+    Wykonuje blok w terminie `termin`. Bez argumentu zostaje termin już
+    ustawiony wyżej (np. aplikacja wołająca RecipeAgent), a gdy go nie ma –
+    powstaje nowy z `CZAS_ZAPYTANIA` / `CZAS_PROBY`. Termin ustawiony tutaj
+    liczymy w `recipe_deadlines_total` według wyniku.
+    """
+    if termin is None and _BIEZACY.get() is not None:
+        yield _BIEZACY.get()
+        return
+    termin = termin or Termin()
+    token = _BIEZACY.set(termin)
+    wynik = "ok"
+    try:
+        yield termin
+        wynik = termin.wynik or wynik
+    except PrzekroczonyTermin as e:
+        wynik = "partial" if e.czesciowe is not None else "expired"
+        raise
+    except ZapytanieAnulowane:
+        wynik = "cancelled"
+        raise
+    except BaseException as e:
+        # rerun / stop w Streamlit przerywa przebieg skryptu w trakcie zapytania
+        if termin.anulowany:
+            wynik = "cancelled"
+        else:
+            wynik = "expired" if isinstance(e, TimeoutError) and termin.minal() else "error"
+        raise
+    finally:
+        _BIEZACY.reset(token)
+        TELEMETRIA.licz("recipe_deadlines_total", result=wynik)
@@ -0,0 +1,185 @@
+# ─────────────────────────────────────────────────────────────────────────────
+#  Wspólny magazyn wyników: sesje trzymają uchwyt (skrót treści), a nie
+#  własną kopię obiektu Przepisy
+# ─────────────────────────────────────────────────────────────────────────────
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Generic, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+# Sesja bez przebiegu skryptu przez tyle sekund traci swoje uchwyty (zamknięta karta
+# nie daje Streamlit znać, że sesji już nie ma)
+DOMYSLNA_BEZCZYNNOSC = float(os.getenv("RECIPE_SESSION_IDLE", "1800"))
+# Jak często (najwyżej) szukać bezczynnych sesji przy okazji `dotknij`
+OKRES_SPRZATANIA = float(os.getenv("RECIPE_SESSION_SWEEP", "60"))
+
+
+def _skrot(dane: bytes) -> str:
+    return hashlib.sha256(dane).hexdigest()[:32]
+
+
+def uchwyt_wyniku(obiekt: BaseModel) -> str:
+    """Uchwyt wyniku: skrót SHA-256 JSON-a (32 znaki) – ta sama treść, ten sam uchwyt."""
+    return _skrot(obiekt.model_dump_json().encode("utf-8"))
+
+
+class _Sesja:
+    __slots__ = ("uchwyty", "ostatnio")
+
+    def __init__(self, teraz: float):
+        # uchwyt -> liczba miejsc sesji, które go trzymają (np. wynik i baza trybu zmian)
+        self.uchwyty: Counter = Counter()
+        self.ostatnio = teraz
+
+
+class MagazynWynikow(Generic[M]):
+    """
+    Wyniki współdzielone przez wszystkie sesje procesu. Jednakowa treść to
+    jeden obiekt pod jednym uchwytem, trzymany, dopóki wskazuje na niego
+    którakolwiek sesja (licznik referencji); ostatnie `zwolnij` go usuwa.
+    Obiekty są tylko do odczytu – inny wynik to nowy obiekt i nowy uchwyt.
+
+    Sesja, która od `maks_bezczynnosc` sekund nie wołała `dotknij`/`wynik`,
+    traci wszystkie uchwyty (`usun_bezczynne`, także samoczynnie przy
+    `dotknij`, najwyżej raz na `okres_sprzatania`). Jej uchwyty w
+    session_state stają się nieaktualne – `wynik` zwraca dla nich None.
+    """
+
+    def __init__(
+        self,
+        maks_bezczynnosc: float = DOMYSLNA_BEZCZYNNOSC,
+        okres_sprzatania: float = OKRES_SPRZATANIA,
+    ):
+        self.maks_bezczynnosc = maks_bezczynnosc
+        self.okres_sprzatania = okres_sprzatania
+        # uchwyt -> (obiekt, rozmiar JSON w bajtach, liczba referencji)
+        self._wyniki: Dict[str, Tuple[M, int, int]] = {}
+        self._sesje: Dict[str, _Sesja] = {}
+        self._ostatnie_sprzatanie = time.monotonic()
+        self._lock = threading.Lock()
+        self.statystyki: Dict[str, int] = {
+            "dodane": 0, "wspoldzielone": 0, "usuniete": 0, "bezczynne_sesje": 0, "nieaktualne": 0,
+        }
+
+    def zatrzymaj(self, sesja: str, obiekt: M) -> str:
+        """Dodaje referencję sesji do wyniku (wstawiając go, jeśli to nowa treść); zwraca uchwyt."""
+        dane = obiekt.model_dump_json().encode("utf-8")
+        uchwyt = _skrot(dane)
+        teraz = time.monotonic()
+        with self._lock:
+            wpis = self._wyniki.get(uchwyt)
+            if wpis is None:
+                self._wyniki[uchwyt] = (obiekt, len(dane), 1)
+                self.statystyki["dodane"] += 1
+            else:
+                self._wyniki[uchwyt] = (wpis[0], wpis[1], wpis[2] + 1)
+                self.statystyki["wspoldzielone"] += 1
+            stan = self._sesje.get(sesja)
+            if stan is None:
+                stan = self._sesje[sesja] = _Sesja(teraz)
+            stan.uchwyty[uchwyt] += 1
+            stan.ostatnio = teraz
+        return uchwyt
+
+    def _zwolnij(self, uchwyt: str, ile: int = 1) -> None:
+        wpis = self._wyniki.get(uchwyt)
+        if wpis is None:
+            return
+        if wpis[2] <= ile:
+            del self._wyniki[uchwyt]
+            self.statystyki["usuniete"] += 1
+        else:
+            self._wyniki[uchwyt] = (wpis[0], wpis[1], wpis[2] - ile)
+
+    def zwolnij(self, sesja: str, uchwyt: Optional[str]) -> None:
+        """Sesja przestała trzymać `uchwyt` w jednym miejscu (nowy wynik, wyczyszczenie)."""
+        if uchwyt is None:
+            return
+        with self._lock:
+            stan = self._sesje.get(sesja)
+            if stan is None or not stan.uchwyty[uchwyt]:
+                return  # uchwyt nieaktualny – sesja była już bezczynna
+            stan.uchwyty[uchwyt] -= 1
+            if not stan.uchwyty[uchwyt]:
+                del stan.uchwyty[uchwyt]
+            self._zwolnij(uchwyt)
+
+    def wynik(self, sesja: str, uchwyt: Optional[str]) -> Optional[M]:
+        """Wynik spod uchwytu sesji albo None (brak uchwytu, uchwyt nieaktualny)."""
+        if uchwyt is None:
+            return None
+        with self._lock:
+            stan = self._sesje.get(sesja)
+            if stan is None or not stan.uchwyty[uchwyt]:
+                self.statystyki["nieaktualne"] += 1
+                return None
+            stan.ostatnio = time.monotonic()
+            return self._wyniki[uchwyt][0]
+
+    def zamien(self, sesja: str, stary: Optional[str], obiekt: Optional[M]) -> Optional[str]:
+        """`zatrzymaj` nowego wyniku i `zwolnij` poprzedniego w tym samym miejscu sesji."""
+        uchwyt = self.zatrzymaj(sesja, obiekt) if obiekt is not None else None
+        self.zwolnij(sesja, stary)
+        return uchwyt
+
+    def dotknij(self, sesja: str) -> None:
+        """Przebieg skryptu sesji – sesja jest aktywna; przy okazji sprząta bezczynne."""
+        teraz = time.monotonic()
+        with self._lock:
+            stan = self._sesje.get(sesja)
+            if stan is not None:
+                stan.ostatnio = teraz
+            sprzataj = teraz - self._ostatnie_sprzatanie >= self.okres_sprzatania
+        if sprzataj:
+            self.usun_bezczynne()
+
+    def zwolnij_sesje(self, sesja: str) -> None:
+        with self._lock:
+            self._zwolnij_sesje(sesja)
+
+    def _zwolnij_sesje(self, sesja: str) -> None:
+        stan = self._sesje.pop(sesja, None)
+        if stan is not None:
+            for uchwyt, ile in stan.uchwyty.items():
+                self._zwolnij(uchwyt, ile)
+
+    def usun_bezczynne(self, maks_bezczynnosc: Optional[float] = None) -> int:
+        """Zwalnia uchwyty sesji bezczynnych dłużej niż `maks_bezczynnosc`; zwraca ich liczbę."""
+        prog = self.maks_bezczynnosc if maks_bezczynnosc is None else maks_bezczynnosc
+        teraz = time.monotonic()
+        with self._lock:
+            self._ostatnie_sprzatanie = teraz
+            bezczynne = [s for s, stan in self._sesje.items() if teraz - stan.ostatnio > prog]
+            for sesja in bezczynne:
+                self._zwolnij_sesje(sesja)
+            self.statystyki["bezczynne_sesje"] += len(bezczynne)
+        return len(bezczynne)
+
+    def raport(self) -> Dict[str, float]:
+        """
+        Zajęcie magazynu: bajty wyników (JSON – ta sama miara co L1 cache)
+        i bajty uchwytów po stronie sesji, także w przeliczeniu na sesję.
+        """
+        with self._lock:
+            sesje = len(self._sesje)
+            referencje = sum(w[2] for w in self._wyniki.values())
+            bajty_wynikow = sum(w[1] for w in self._wyniki.values())
+            bajty_uchwytow = sum(len(u) * ile for s in self._sesje.values() for u, ile in s.uchwyty.items())
+            return {
+                **self.statystyki,
+                "sesje": sesje,
+                "wyniki": len(self._wyniki),
+                "referencje": referencje,
+                "bajty_wynikow": bajty_wynikow,
+                "bajty_uchwytow": bajty_uchwytow,
+                "bajty_na_sesje": round((bajty_wynikow + bajty_uchwytow) / sesje, 1) if sesje else 0.0,
+                "bajty_kopii_na_sesje": round(
+                    sum(w[1] * w[2] for w in self._wyniki.values()) / sesje, 1
+                ) if sesje else 0.0,
+            }
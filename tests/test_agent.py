@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.agent import RecipeAgent
+from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni
+from recipe_core.models import CzesciowePrzepisy, Przepisy
+from recipe_core.providers import FakeProvider
+
+DANE = syntetyczne_przepisy(4, 3, 6)
+ODPOWIEDZ = json.dumps(DANE, ensure_ascii=False)
+# ucięta w połowie trzeciego przepisu – dekoder odzyskuje dwa pierwsze
+UCIETA = ODPOWIEDZ[: ODPOWIEDZ.index(json.dumps(DANE["przepisy"][2], ensure_ascii=False)) + 40]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CachePrzepisow(str(tmp_path / "przepisy.sqlite3"))
+    yield cache
+    cache.zamknij()
+
+
+def test_odzyskany_wynik_nie_trafia_do_cache(cache):
+    provider = FakeProvider(UCIETA)
+    agent = RecipeAgent(provider=provider, cache=cache)
+
+    wynik = agent.generuj("jajka, mleko")
+    assert isinstance(wynik, CzesciowePrzepisy)
+    assert len(wynik.przepisy) == 2
+    assert cache.pobierz(klucz_w_przestrzeni(agent.przestrzen, ["jajka", "mleko"]), Przepisy) is None
+
+    agent.generuj("jajka, mleko")
+    assert len(provider.wywolania) == 2
+
+
+def test_pelny_wynik_trafia_do_cache(cache):
+    provider = FakeProvider(ODPOWIEDZ)
+    agent = RecipeAgent(provider=provider, cache=cache)
+
+    agent.generuj("jajka, mleko")
+    assert len(agent.generuj("mleko, jajka").przepisy) == 3
+    assert len(provider.wywolania) == 1
@@ -0,0 +1,95 @@
+import pytest
+
+from benchmarks.atrapa_llm import AtrapaLLM, KonfiguracjaAtrapy, Rozklad
+from recipe_core.prompts import PREFIKS_PRZEPISOW, PREFIKSY, zbuduj_prompt, zbuduj_prompt_pojedynczy
+from recipe_core.providers import MIN_TOKENOW_CACHE, AnthropicProvider, szacuj_tokeny
+from recipe_core.terminy import CZAS_PROBY, Termin, w_terminie
+
+BLOK_SYSTEMOWY = [{"type": "text", "text": PREFIKS_PRZEPISOW, "cache_control": {"type": "ephemeral"}}]
+
+
+def test_parametry_staly_prefiks_w_bloku_systemowym():
+    provider = AnthropicProvider("klucz-testowy", cache_promptu=True)
+    parametry = provider._parametry(zbuduj_prompt("jajka, mleko"), 1000)
+    assert parametry["system"] == BLOK_SYSTEMOWY
+    # w wiadomości użytkownika tylko zmienna część – składniki
+    assert parametry["messages"] == [{"role": "user", "content": "Składniki do wykorzystania: jajka, mleko"}]
+    assert parametry["max_tokens"] == 1000
+    assert parametry["timeout"] == CZAS_PROBY
+
+
+def test_prefiks_identyczny_dla_roznych_skladnikow():
+    provider = AnthropicProvider("klucz-testowy", cache_promptu=True)
+    pierwsze = provider._parametry(zbuduj_prompt("jajka"), 1000)
+    drugie = provider._parametry(zbuduj_prompt("ryż, cebula, czosnek"), 1000)
+    assert pierwsze["system"] == drugie["system"]
+    assert pierwsze["messages"] != drugie["messages"]
+    pojedynczy = provider._parametry(zbuduj_prompt_pojedynczy("jajka", "coś na słodko", ["Omlet"]), 1000)
+    assert "Omlet" in pojedynczy["messages"][0]["content"]
+    assert "Omlet" not in pojedynczy["system"][0]["text"]
+
+
+def test_blok_z_cache_control_przekracza_minimum():
+    assert szacuj_tokeny(PREFIKS_PRZEPISOW) >= MIN_TOKENOW_CACHE
+    provider = AnthropicProvider("klucz-testowy", cache_promptu=True)
+    for prefiks in PREFIKSY:
+        blok = provider._parametry(prefiks + "\n\nSkładniki: jajka", 1000)["system"][0]
+        assert blok["text"] == prefiks
+        assert ("cache_control" in blok) == (szacuj_tokeny(prefiks) >= MIN_TOKENOW_CACHE)
+
+
+def test_krotki_prefiks_bez_cache_control_z_ostrzezeniem(caplog):
+    # Haiku zapisuje w cache dopiero prefiksy od 2048 tokenów
+    provider = AnthropicProvider("klucz-testowy", model="claude-3-5-haiku-testowy", cache_promptu=True)
+    with caplog.at_level("WARNING", logger="recipe_core.providers"):
+        parametry = provider._parametry(zbuduj_prompt("jajka"), 1000)
+        provider._parametry(zbuduj_prompt("ryż"), 1000)
+    assert parametry["system"] == [{"type": "text", "text": PREFIKS_PRZEPISOW}]
+    assert len([r for r in caplog.records if "cache_control" in r.getMessage()]) == 1
+
+
+def test_bez_cache_promptu_caly_prompt_w_wiadomosci():
+    provider = AnthropicProvider("klucz-testowy", cache_promptu=False)
+    prompt = zbuduj_prompt("jajka")
+    parametry = provider._parametry(prompt, 1000)
+    assert "system" not in parametry
+    assert parametry["messages"] == [{"role": "user", "content": prompt}]
+
+
+def test_limit_proby_z_terminu():
+    provider = AnthropicProvider("klucz-testowy")
+    with w_terminie(Termin(czas=5, czas_proby=60)):
+        assert 0 < provider._parametry(zbuduj_prompt("jajka"), 1000)["timeout"] <= 5
+
+
+@pytest.fixture(scope="module")
+def atrapa():
+    atrapa = AtrapaLLM(KonfiguracjaAtrapy(opoznienie=Rozklad("stala", (0.0,)), ttft=Rozklad("stala", (0.0,))))
+    atrapa.uruchom()
+    yield atrapa
+    atrapa.zatrzymaj()
+
+
+@pytest.fixture
+def provider(atrapa, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", atrapa.adres)
+    return AnthropicProvider("klucz-testowy", cache_promptu=True)
+
+
+def test_ksztalt_zapytania_na_atrapie(atrapa, provider):
+    zapisy, odczyty = atrapa.statystyki.cache_zapisy, atrapa.statystyki.cache_odczyty
+    provider.generuj(zbuduj_prompt("jajka, mleko"))
+    cialo = atrapa.statystyki.ostatnie["anthropic"]
+    assert cialo["system"] == BLOK_SYSTEMOWY
+    assert cialo["messages"] == [{"role": "user", "content": "Składniki do wykorzystania: jajka, mleko"}]
+    assert not cialo.get("stream")
+
+    # inne składniki – ten sam prefiks, więc odczyt z cache promptu atrapy
+    tekst = "".join(provider.strumieniuj(zbuduj_prompt("ryż, cebula")))
+    cialo = atrapa.statystyki.ostatnie["anthropic"]
+    assert tekst.startswith("{")
+    assert cialo["stream"] is True
+    assert cialo["system"] == BLOK_SYSTEMOWY
+    assert cialo["messages"] == [{"role": "user", "content": "Składniki do wykorzystania: ryż, cebula"}]
+    assert atrapa.statystyki.cache_odczyty - odczyty >= 1
+    assert atrapa.statystyki.cache_zapisy - zapisy <= 1
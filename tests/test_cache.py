@@ -0,0 +1,151 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni
+from recipe_core.models import Przepisy
+
+KATALOG_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRZESTRZEN = "fake/fake-model/v-test"
+PRZEPISY = Przepisy.model_validate(syntetyczne_przepisy(4, 3, 6))
+ROZMIAR = len(PRZEPISY.model_dump_json().encode("utf-8"))
+
+
+def _klucz(skladniki):
+    return klucz_w_przestrzeni(PRZESTRZEN, skladniki)
+
+
+@pytest.fixture
+def sciezka(tmp_path):
+    return str(tmp_path / "przepisy.sqlite3")
+
+
+@pytest.fixture
+def otworz(sciezka):
+    otwarte = []
+
+    def _otworz(**opcje):
+        cache = CachePrzepisow(sciezka, **opcje)
+        otwarte.append(cache)
+        return cache
+
+    yield _otworz
+    for cache in otwarte:
+        cache.zamknij()
+
+
+def test_zapis_trafia_w_l1(otworz):
+    cache = otworz()
+    cache.zapisz(_klucz(["jajka"]), PRZEPISY, ["jajka"], PRZESTRZEN)
+    assert cache.pobierz(_klucz(["jajka"]), Przepisy) is PRZEPISY
+    assert cache.pobierz(_klucz(["mleko"]), Przepisy) is None
+    assert cache.statystyki["trafienia_l1"] == 1
+    assert cache.statystyki["chybienia"] == 1
+
+
+def test_odczyt_z_l2_promuje_do_l1(otworz):
+    otworz().zapisz(_klucz(["jajka"]), PRZEPISY, ["jajka"], PRZESTRZEN)
+    cache = otworz(rozgrzewka=0)
+    pierwszy = cache.pobierz(_klucz(["jajka"]), Przepisy)
+    drugi = cache.pobierz(_klucz(["jajka"]), Przepisy)
+    assert pierwszy == PRZEPISY
+    assert drugi is pierwszy
+    assert cache.statystyki["trafienia_l2"] == 1
+    assert cache.statystyki["trafienia_l1"] == 1
+
+
+def test_limit_bajtow_l1_eksmituje_najstarszy(otworz):
+    cache = otworz(limit_bajtow=2 * ROZMIAR)
+    for skladnik in ("jajka", "mleko", "ryż"):
+        cache.zapisz(_klucz([skladnik]), PRZEPISY, [skladnik], PRZESTRZEN)
+    raport = cache.raport()
+    assert raport["wpisy_l1"] == 2
+    assert raport["bajty_l1"] <= 2 * ROZMIAR
+    assert cache.statystyki["eksmisje_l1"] == 1
+    # wyrzucony z L1 wpis wciąż jest w L2
+    assert cache.pobierz(_klucz(["jajka"]), Przepisy) == PRZEPISY
+    assert cache.statystyki["trafienia_l2"] == 1
+
+
+def test_rozgrzewka_laduje_najczesciej_trafiane(otworz):
+    cache = otworz()
+    for skladnik in ("jajka", "mleko"):
+        cache.zapisz(_klucz([skladnik]), PRZEPISY, [skladnik], PRZESTRZEN)
+    for _ in range(3):
+        cache.pobierz(_klucz(["mleko"]), Przepisy)
+    cache.zamknij()
+
+    nowy = otworz(rozgrzewka=0)
+    assert nowy.rozgrzej(Przepisy, limit=1) == 1
+    nowy.pobierz(_klucz(["mleko"]), Przepisy)
+    assert nowy.statystyki["trafienia_l1"] == 1
+
+
+def test_wygasly_wpis_to_chybienie(otworz):
+    cache = otworz(ttl=0.05)
+    cache.zapisz(_klucz(["jajka"]), PRZEPISY, ["jajka"], PRZESTRZEN)
+    assert cache.zawiera(_klucz(["jajka"]))
+    time.sleep(0.1)
+    assert not cache.zawiera(_klucz(["jajka"]))
+    assert cache.pobierz(_klucz(["jajka"]), Przepisy) is None
+    # kolejny proces też go nie widzi, a L2 usuwa wygasły wiersz przy odczycie
+    inny = otworz(rozgrzewka=0)
+    assert inny.pobierz(_klucz(["jajka"]), Przepisy) is None
+    assert cache.statystyki["wygasle_l2"] + inny.statystyki["wygasle_l2"] == 1
+
+
+def test_usun_przeterminowane_czysci_l2_i_indeks(otworz):
+    cache = otworz(ttl=0.05)
+    cache.zapisz(_klucz(["jajka", "mleko"]), PRZEPISY, ["jajka", "mleko"], PRZESTRZEN)
+    time.sleep(0.1)
+    assert cache.usun_przeterminowane() == 1
+    assert cache.wpisy() == []
+    assert cache.raport()["wpisy_indeksu"] == 0
+
+
+def _zapisz_w_innym_procesie(sciezka, skladniki_lista):
+    kod = (
+        "import json, sys\n"
+        "from recipe_core.cache import CachePrzepisow, klucz_w_przestrzeni\n"
+        "from recipe_core.models import Przepisy\n"
+        "sciezka, przestrzen, przepisy, lista = sys.argv[1:5]\n"
+        "cache = CachePrzepisow(sciezka, rozgrzewka=0)\n"
+        "obiekt = Przepisy.model_validate_json(przepisy)\n"
+        "for skladniki in json.loads(lista):\n"
+        "    cache.zapisz(klucz_w_przestrzeni(przestrzen, skladniki), obiekt, skladniki, przestrzen)\n"
+        "cache.zamknij()\n"
+    )
+    return subprocess.Popen(
+        [sys.executable, "-c", kod, sciezka, PRZESTRZEN, PRZEPISY.model_dump_json(), json.dumps(skladniki_lista)],
+        cwd=KATALOG_REPO,
+        env={**os.environ, "PYTHONPATH": KATALOG_REPO},
+    )
+
+
+def test_wpis_z_innego_procesu_widoczny_bez_ponownego_otwarcia(otworz):
+    cache = otworz(rozgrzewka=0, okres_synchronizacji=0.0)
+    assert cache._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert cache.pobierz(_klucz(["jajka", "mleko"]), Przepisy) is None
+
+    assert _zapisz_w_innym_procesie(cache.sciezka, [["jajka", "mleko"]]).wait(timeout=60) == 0
+
+    assert cache.pobierz(_klucz(["jajka", "mleko"]), Przepisy) == PRZEPISY
+    # indeks podzbiorów dociąga wpisy innych procesów przy synchronizacji
+    podobne = cache.podobne(PRZESTRZEN, ["jajka", "mleko", "sól"], Przepisy)
+    assert [pokrycie for pokrycie, _ in podobne] == [pytest.approx(2 / 3)]
+
+
+def test_rownolegle_zapisy_wielu_procesow(otworz):
+    cache = otworz(rozgrzewka=0)
+    procesy = [
+        _zapisz_w_innym_procesie(cache.sciezka, [[f"produkt{p}n{i}"] for i in range(30)])
+        for p in range(3)
+    ]
+    assert [p.wait(timeout=120) for p in procesy] == [0, 0, 0]
+    assert len(cache.wpisy(PRZESTRZEN)) == 90
+    assert cache.pobierz(_klucz(["produkt2n29"]), Przepisy) == PRZEPISY
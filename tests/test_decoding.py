@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.decoding import (
+    BladParsowania,
+    BladWalidacji,
+    PustaOdpowiedz,
+    dekoduj_przepis,
+    dekoduj_przepisy,
+    odzyskaj_przepisy,
+)
+from recipe_core.models import CzesciowePrzepisy
+
+DANE = syntetyczne_przepisy(4, 3, 6)
+ODPOWIEDZ = json.dumps(DANE, ensure_ascii=False)
+NAZWY = [p["nazwa"] for p in DANE["przepisy"]]
+
+
+def _uciete_w_trzecim() -> str:
+    """Odpowiedź ucięta w połowie trzeciego przepisu (np. limit tokenów)."""
+    trzeci = ODPOWIEDZ.index(json.dumps(DANE["przepisy"][2], ensure_ascii=False))
+    return ODPOWIEDZ[: trzeci + 40]
+
+
+def test_pelna_odpowiedz_w_markdown():
+    wynik = dekoduj_przepisy(f"Oto przepisy:\n```json\n{ODPOWIEDZ}\n```")
+    assert [p.nazwa for p in wynik.przepisy] == NAZWY
+    assert not isinstance(wynik, CzesciowePrzepisy)
+
+
+def test_ucieta_odpowiedz_zwraca_domkniete_przepisy():
+    wynik = dekoduj_przepisy(_uciete_w_trzecim())
+    assert [p.nazwa for p in wynik.przepisy] == NAZWY[:2]
+    assert isinstance(wynik, CzesciowePrzepisy)
+
+
+def test_ucieta_odpowiedz_jako_bytes():
+    assert len(dekoduj_przepisy(_uciete_w_trzecim().encode("utf-8")).przepisy) == 2
+    assert len(odzyskaj_przepisy(_uciete_w_trzecim().encode("utf-8"))) == 2
+
+
+def test_bez_odzyskiwania_ucieta_odpowiedz_to_blad():
+    with pytest.raises(BladParsowania) as blad:
+        dekoduj_przepisy(_uciete_w_trzecim(), odzyskuj=False)
+    assert blad.value.surowa_odpowiedz == _uciete_w_trzecim()
+
+
+def test_ucieta_przed_pierwszym_przepisem():
+    with pytest.raises(BladParsowania):
+        dekoduj_przepisy(ODPOWIEDZ[:60])
+
+
+def test_pusta_i_niepoprawna_odpowiedz():
+    with pytest.raises(PustaOdpowiedz):
+        dekoduj_przepisy("  \n")
+    with pytest.raises(BladWalidacji):
+        dekoduj_przepisy('{"przepisy": [{"nazwa": "bez reszty pól"}]}')
+
+
+def test_pojedynczy_przepis():
+    assert dekoduj_przepis(json.dumps(DANE["przepisy"][1], ensure_ascii=False)).nazwa == NAZWY[1]
+    with pytest.raises(BladParsowania):
+        dekoduj_przepis(json.dumps(DANE["przepisy"][1])[:-5])
@@ -0,0 +1,29 @@
+import asyncio
+import json
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.delta import uzupelnij_przepisy
+from recipe_core.generator import czy_kompletne
+from recipe_core.models import CzesciowePrzepisy, Przepisy
+from recipe_core.providers import FakeProvider
+
+DANE = syntetyczne_przepisy(4, 3, 6)
+PRZEPISY = Przepisy.model_validate(DANE)
+NOWY = json.dumps(syntetyczne_przepisy(4, 3, 6, ziarno=1)["przepisy"][0], ensure_ascii=False)
+
+
+def test_uzupelnione_miejsca_daja_pelny_wynik():
+    wynik = asyncio.run(uzupelnij_przepisy(FakeProvider(NOWY), "jajka", PRZEPISY, [1]))
+    assert [p.nazwa for p in wynik.przepisy] == [
+        PRZEPISY.przepisy[0].nazwa, json.loads(NOWY)["nazwa"], PRZEPISY.przepisy[2].nazwa,
+    ]
+    assert czy_kompletne(wynik)
+
+
+def test_nieudane_miejsce_daje_wynik_czesciowy():
+    provider = FakeProvider([NOWY, ValueError("przeciążenie")])
+    wynik = asyncio.run(uzupelnij_przepisy(provider, "jajka", PRZEPISY, [0, 2]))
+    assert isinstance(wynik, CzesciowePrzepisy)
+    assert len(wynik.przepisy) == 2
+    assert PRZEPISY.przepisy[1] in wynik.przepisy
+    assert not czy_kompletne(wynik)
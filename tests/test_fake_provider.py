@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from recipe_core.providers import FakeProvider
+from recipe_core.terminy import Termin, w_terminie
+
+
+def test_strumien_atrapy_konczy_sie_na_limicie_proby():
+    provider = FakeProvider("a" * 100, opoznienie=1.0, fragmenty=10)
+    fragmenty = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        with w_terminie(Termin(czas=5, czas_proby=0.25)):
+            for fragment in provider.strumieniuj("prompt"):
+                fragmenty.append(fragment)
+    czas = time.monotonic() - start
+
+    assert 0 < len(fragmenty) < 10
+    assert 0.2 <= czas < 0.6
+
+
+def test_strumien_atrapy_w_limicie_przychodzi_w_calosci():
+    provider = FakeProvider("a" * 100, opoznienie=0.05, fragmenty=10)
+    with w_terminie(Termin(czas=5, czas_proby=1)):
+        assert "".join(provider.strumieniuj("prompt")) == "a" * 100
+
+
+def test_strumien_async_atrapy_konczy_sie_na_limicie_proby():
+    provider = FakeProvider("a" * 100, opoznienie=1.0, fragmenty=10)
+
+    async def scenariusz():
+        fragmenty = []
+        with w_terminie(Termin(czas=5, czas_proby=0.25)):
+            async for fragment in provider.strumieniuj_async("prompt"):
+                fragmenty.append(fragment)
+        return fragmenty
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(scenariusz())
+
+    assert 0.2 <= time.monotonic() - start < 0.6
+    assert provider.anulowane == 0
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.fanout import WSKAZOWKI_ROZNORODNOSCI
+from recipe_core.generator import czy_kompletne, generuj_przepisy_rownolegle
+from recipe_core.models import CzesciowePrzepisy, Przepisy
+from recipe_core.providers import FakeProvider
+
+PRZEPIS = json.dumps(syntetyczne_przepisy(4, 3, 6)["przepisy"][0], ensure_ascii=False)
+
+
+def _odpowiedz(prompt: str) -> str:
+    if WSKAZOWKI_ROZNORODNOSCI[2] in prompt:
+        raise ValueError("przeciążenie")
+    return PRZEPIS
+
+
+def test_wszystkie_miejsca_daja_pelny_wynik():
+    wynik = asyncio.run(generuj_przepisy_rownolegle(FakeProvider(PRZEPIS), "jajka, mleko"))
+    assert len(wynik.przepisy) == len(WSKAZOWKI_ROZNORODNOSCI)
+    assert czy_kompletne(wynik)
+
+
+def test_nieudane_miejsce_daje_wynik_czesciowy():
+    wynik = asyncio.run(generuj_przepisy_rownolegle(FakeProvider(_odpowiedz), "jajka, mleko"))
+    assert isinstance(wynik, CzesciowePrzepisy)
+    assert len(wynik.przepisy) == len(WSKAZOWKI_ROZNORODNOSCI) - 1
+    assert not czy_kompletne(wynik)
+
+
+def test_krotki_wynik_nie_jest_kompletny():
+    przepisy = Przepisy.model_validate(syntetyczne_przepisy(4, 3, 6))
+    assert czy_kompletne(przepisy)
+    assert not czy_kompletne(Przepisy(przepisy=przepisy.przepisy[:2]))
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.hedging import PolitykaHedgingu, generuj_z_hedgingiem, z_hedgingiem
+from recipe_core.providers import FakeProvider
+
+ODPOWIEDZ = json.dumps(syntetyczne_przepisy(4, 3, 6), ensure_ascii=False)
+
+
+def _polityka(**opcje) -> PolitykaHedgingu:
+    return PolitykaHedgingu(**{"domyslne_opoznienie": 0.05, "min_opoznienie": 0.0, **opcje})
+
+
+def test_szybki_glowny_bez_hedgingu():
+    glowny, zapasowy = FakeProvider(ODPOWIEDZ), FakeProvider(ODPOWIEDZ, nazwa="zapas")
+    polityka = _polityka()
+    wynik = asyncio.run(generuj_z_hedgingiem(glowny, zapasowy, "jajka, mleko", polityka))
+    assert len(wynik.przepisy) == 3
+    assert len(zapasowy.wywolania) == 0
+    assert polityka.statystyki == {"wywolania": 1, "hedge": 0, "wygrane_zapasowego": 0, "uciete_probki": 0}
+
+
+def test_wolny_glowny_przegrywa_i_jest_anulowany():
+    glowny = FakeProvider(ODPOWIEDZ, opoznienie=2.0)
+    zapasowy = FakeProvider(ODPOWIEDZ, opoznienie=0.01, nazwa="zapas")
+    polityka = _polityka()
+
+    async def scenariusz():
+        wynik = await generuj_z_hedgingiem(glowny, zapasowy, "jajka, mleko", polityka)
+        await asyncio.sleep(0)  # anulowane zadanie głównego kończy się w kolejnym kroku pętli
+        return wynik
+
+    wynik = asyncio.run(scenariusz())
+    assert len(wynik.przepisy) == 3
+    assert glowny.anulowane == 1
+    assert polityka.statystyki["hedge"] == 1
+    assert polityka.statystyki["wygrane_zapasowego"] == 1
+    # przerwany główny zostawia uciętą próbkę – co najmniej opóźnienie hedgingu
+    assert polityka.statystyki["uciete_probki"] == 1
+    assert min(polityka._czasy["fake/fake-model"]) >= 0.05
+
+
+def test_glowny_wygrywa_po_starcie_zapasowego():
+    glowny = FakeProvider(ODPOWIEDZ, opoznienie=0.1)
+    zapasowy = FakeProvider(ODPOWIEDZ, opoznienie=2.0, nazwa="zapas")
+    polityka = _polityka()
+
+    async def scenariusz():
+        await generuj_z_hedgingiem(glowny, zapasowy, "jajka", polityka)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenariusz())
+    assert zapasowy.anulowane == 1
+    assert polityka.statystyki["hedge"] == 1
+    assert polityka.statystyki["wygrane_zapasowego"] == 0
+    assert polityka.statystyki["uciete_probki"] == 0
+
+
+def test_blad_glownego_uruchamia_zapasowego_od_razu():
+    wygrane = []
+
+    async def glowne():
+        raise ConnectionError("503")
+
+    async def zapasowe():
+        return "zapasowy"
+
+    async def scenariusz():
+        return await z_hedgingiem(glowne, zapasowe, 10.0, on_wygrana=wygrane.append)
+
+    assert asyncio.run(asyncio.wait_for(scenariusz(), 1.0)) == "zapasowy"
+    assert wygrane == [True]
+
+
+def test_obaj_zawodza_ostatni_blad():
+    async def glowne():
+        raise ConnectionError("główny")
+
+    async def zapasowe():
+        raise ValueError("zapasowy")
+
+    with pytest.raises(ValueError, match="zapasowy"):
+        asyncio.run(z_hedgingiem(glowne, zapasowe, 0.01))
+
+
+def test_opoznienie_z_percentyla_probek():
+    polityka = PolitykaHedgingu(percentyl=0.9, min_opoznienie=0.5, max_opoznienie=5.0, min_probek=10)
+    klucz = "fake/fake-model"
+    for i in range(1, 11):
+        polityka.zarejestruj(klucz, float(i))
+    assert polityka.opoznienie(klucz) == 5.0  # percentyl 10 s ograniczony do max
+    polityka = PolitykaHedgingu(percentyl=0.5, min_opoznienie=0.0, min_probek=10)
+    for i in range(1, 11):
+        polityka.zarejestruj(klucz, i / 10)
+    assert polityka.opoznienie(klucz) == pytest.approx(0.6)
+    assert polityka.opoznienie("inny") == polityka.domyslne_opoznienie
+
+
+def test_szybkie_bledy_glownego_nie_obnizaja_opoznienia():
+    polityka = _polityka(domyslne_opoznienie=0.5, min_probek=3)
+    klucz = "fake/fake-model"
+    for _ in range(3):
+        polityka.zarejestruj(klucz, 0.4)
+    przed = polityka.opoznienie(klucz)
+
+    glowny = FakeProvider(ConnectionError("429"))
+    zapasowy = FakeProvider(ODPOWIEDZ, nazwa="zapas")
+    for _ in range(20):
+        asyncio.run(generuj_z_hedgingiem(glowny, zapasowy, "jajka", polityka))
+
+    assert len(zapasowy.wywolania) == 20
+    assert polityka.opoznienie(klucz) == przed
+    assert list(polityka._czasy[klucz]) == [0.4] * 3
+
+
+def test_ucieta_probka_ponizej_opoznienia_pominieta():
+    polityka = _polityka(domyslne_opoznienie=1.0)
+    polityka.zarejestruj("k", 0.2, pelny=False)  # przerwanie przed startem zapasowego
+    polityka.zarejestruj("k", 1.5, pelny=False)
+    assert list(polityka._czasy["k"]) == [1.5]
+    assert polityka.statystyki["uciete_probki"] == 1
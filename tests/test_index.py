@@ -0,0 +1,53 @@
+from recipe_core.index import IndeksSkladnikow
+
+
+def _indeks() -> IndeksSkladnikow:
+    indeks = IndeksSkladnikow()
+    indeks.dodaj("a", ["jajka", "mleko"])
+    indeks.dodaj("b", ["jajka", "mleko", "mąka"])
+    indeks.dodaj("c", ["ser", "szynka"])
+    indeks.dodaj("d", ["jajka"])
+    return indeks
+
+
+def test_podzbiory_wyboru_wg_pokrycia():
+    wyniki = _indeks().podzbiory(["mąka", "mleko", "jajka", "cukier"], limit=5, min_pokrycie=0.25)
+    assert wyniki == [("b", 0.75), ("a", 0.5), ("d", 0.25)]
+
+
+def test_nadzbiory_i_rozlaczne_wpisy_pomijane():
+    wyniki = dict(_indeks().podzbiory(["jajka", "mleko"], limit=5, min_pokrycie=0.0))
+    assert set(wyniki) == {"a", "d"}  # "b" ma mąkę spoza wyboru, "c" nic wspólnego
+
+
+def test_prog_pokrycia_i_limit():
+    indeks = _indeks()
+    assert indeks.podzbiory(["jajka", "mleko", "mąka", "cukier"], min_pokrycie=0.5) == [("b", 0.75), ("a", 0.5)]
+    assert indeks.podzbiory(["jajka", "mleko", "mąka", "cukier"], limit=1, min_pokrycie=0.0) == [("b", 0.75)]
+    assert indeks.podzbiory([]) == []
+
+
+def test_usun_wpis_ze_wspolna_galezia():
+    indeks = _indeks()
+    indeks.usun("a")
+    assert len(indeks) == 3
+    assert indeks.zbior("a") == frozenset()
+    wyniki = dict(indeks.podzbiory(["jajka", "mleko", "mąka"], limit=5, min_pokrycie=0.0))
+    assert set(wyniki) == {"b", "d"}
+
+
+def test_usun_ostatni_wpis_galezi_i_ponowne_dodanie():
+    indeks = _indeks()
+    indeks.usun("b")
+    indeks.usun("b")  # drugi raz – bez błędu
+    assert dict(indeks.podzbiory(["jajka", "mleko", "mąka"], limit=5, min_pokrycie=0.0)).keys() == {"a", "d"}
+    indeks.dodaj("b", ["jajka", "mleko", "mąka"])
+    assert indeks.podzbiory(["jajka", "mleko", "mąka"], limit=1) == [("b", 1.0)]
+
+
+def test_dodaj_zastepuje_zbior_wpisu():
+    indeks = _indeks()
+    indeks.dodaj("c", ["jajka", "ser"])
+    assert indeks.zbior("c") == frozenset({"jajka", "ser"})
+    assert indeks.podzbiory(["ser", "szynka"], min_pokrycie=0.0) == []
+    assert indeks.podzbiory(["jajka", "ser"], limit=1) == [("c", 1.0)]
@@ -0,0 +1,70 @@
+import pytest
+
+from recipe_core.delta import niewykonalne
+from recipe_core.kanonizacja import dopasuj_skladnik, kanonizuj_liste, klucz_skladnika, podpowiedzi, rdzen
+from recipe_core.korpus import KorpusPrzepisow
+from recipe_core.models import Przepis, Przepisy
+
+
+def _przepis(nazwa, skladniki) -> Przepis:
+    return Przepis(
+        nazwa=nazwa,
+        czas_przygotowania="1 h",
+        poziom_trudnosci="średni",
+        skladniki=[{"nazwa": s, "ilosc": 1} for s in skladniki],
+        kroki=[{"numer": 1, "opis": "Upiec."}],
+        sugestie="",
+    )
+
+
+MAKOWIEC = _przepis("Makowiec", ["mak", "jajka", "cukier"])
+
+
+@pytest.mark.parametrize(
+    "warianty",
+    [
+        ["Jajka", "jajko", "jajek", "jaja"],
+        ["Pomidory świeże", "pomidory", "pomidor", "pomidorów"],
+        ["świeży imbir", "imbir świeży", "Imbir"],
+        ["Ser biały (twaróg)", "twaróg", "twarożek"],
+        ["Tuńczyk w puszce", "tuńczyk z puszki", "tuńczyka"],
+    ],
+)
+def test_odmiany_to_jeden_klucz(warianty):
+    assert len({klucz_skladnika(w) for w in warianty}) == 1
+
+
+def test_odmiany_trafiaja_w_pozycje_listy():
+    assert dopasuj_skladnik("jajko") == "Jajka"
+    assert dopasuj_skladnik("pomidory") == "Pomidory świeże"
+    assert dopasuj_skladnik("mąki") == "Mąka pszenna"
+
+
+def test_mak_to_nie_maka():
+    assert rdzen("mak") != rdzen("mąka")
+    assert dopasuj_skladnik("mak") is None
+    assert klucz_skladnika("mak") != klucz_skladnika("Mąka pszenna")
+    assert kanonizuj_liste(["mak", "mąka"]) == ["mak", "mąka pszenna"]
+
+
+def test_bez_polskich_znakow_tylko_dla_dlugich_rdzeni():
+    assert dopasuj_skladnik("maslo") == "Masło"
+    assert dopasuj_skladnik("smietana") == "Śmietana"
+    # "maka" bez ogonków ma ten sam rdzeń co "mak" – nie zgadujemy
+    assert dopasuj_skladnik("maka") is None
+
+
+def test_podpowiedzi_bez_polskich_znakow():
+    assert "Mąka pszenna" in podpowiedzi("mak")
+    assert podpowiedzi("") == []
+
+
+def test_mak_w_korpusie_i_delcie():
+    korpus = KorpusPrzepisow()
+    korpus.dodaj(MAKOWIEC)
+    assert korpus.szukaj(["Mąka pszenna", "Jajka", "Cukier biały"]) == []
+    assert [t.przepis.nazwa for t in korpus.szukaj(["mak", "Jajka", "Cukier biały"])] == ["Makowiec"]
+
+    przepisy = Przepisy(przepisy=[MAKOWIEC])
+    assert niewykonalne(przepisy, ["Mąka pszenna", "Jajka", "mak"], ["Jajka", "mak"]) == []
+    assert niewykonalne(przepisy, ["Mąka pszenna", "Jajka", "mak"], ["Jajka", "Mąka pszenna"]) == [0]
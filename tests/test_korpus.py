@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from recipe_core.korpus import BITY_SLOWA, KorpusPrzepisow
+from recipe_core.models import Przepis, Przepisy
+
+
+def _przepis(nazwa, skladniki) -> Przepis:
+    return Przepis(
+        nazwa=nazwa,
+        czas_przygotowania="20 minut",
+        poziom_trudnosci="łatwy",
+        skladniki=[{"nazwa": s, "ilosc": 1} for s in skladniki],
+        kroki=[{"numer": 1, "opis": "Przygotuj."}],
+        sugestie="",
+    )
+
+
+OMLET = _przepis("Omlet", ["jajka", "mleko", "sól"])
+NALESNIKI = _przepis("Naleśniki", ["jajka", "mleko", "mąka pszenna"])
+JAJECZNICA = _przepis("Jajecznica", ["jajka", "masło", "szczypiorek"])
+PLACKI = _przepis("Placki", ["ziemniaki", "jajka", "cebula", "mąka pszenna"])
+
+
+@pytest.fixture
+def korpus():
+    korpus = KorpusPrzepisow(pojemnosc=2)
+    korpus.dodaj_przepisy(Przepisy(przepisy=[OMLET, NALESNIKI, JAJECZNICA, PLACKI]))
+    return korpus
+
+
+def test_duplikat_nie_jest_dodawany(korpus):
+    assert len(korpus) == 4
+    assert not korpus.dodaj(OMLET)
+    assert korpus.dodaj_przepisy(Przepisy(przepisy=[OMLET, _przepis("Omlet", ["jajka"])])) == 1
+
+
+def test_ranking_najpierw_najmniej_brakujacych_potem_jaccard(korpus):
+    trafienia = korpus.szukaj(
+        ["Jajka", "Mleko", "Mąka pszenna", "Masło", "Cebula"], limit=4, maks_brakujacych=1, min_pokrycie=0.4,
+    )
+    # Placki mają lepszy Jaccard od Omletu, ale brakuje im ziemniaków
+    assert [t.przepis.nazwa for t in trafienia] == ["Naleśniki", "Omlet", "Placki", "Jajecznica"]
+    assert [t.brakujace for t in trafienia] == [0, 0, 1, 1]
+    assert [t.jaccard for t in trafienia] == pytest.approx([3 / 5, 2 / 5, 3 / 6, 2 / 6])
+    # sól zawsze dostępna – nie liczy się do składników Omletu
+    assert trafienia[1].pokrycie == pytest.approx(2 / 5)
+
+
+def test_progi_brakujacych_i_pokrycia(korpus):
+    assert korpus.szukaj(["jajka", "ziemniaki", "cebula"]) == []
+    placki = korpus.szukaj(["jajka", "ziemniaki", "cebula"], maks_brakujacych=1)
+    assert [(t.przepis.nazwa, t.brakujace) for t in placki] == [("Placki", 1)]
+    # Omlet ma komplet składników, ale używa tylko 2 z 5 wybranych
+    assert korpus.szukaj(["jajka", "mleko", "a", "b", "c"]) == []
+    assert [t.przepis.nazwa for t in korpus.szukaj(["jajka", "mleko", "a", "b", "c"], min_pokrycie=0.4)] == ["Omlet"]
+
+
+def test_przepisy_dla_tylko_z_pelna_liczba(korpus):
+    wybor = ["jajka", "mleko", "mąka pszenna", "sól"]
+    wynik = korpus.przepisy_dla(wybor, liczba=2)
+    assert [p.nazwa for p in wynik.przepisy] == ["Naleśniki", "Omlet"]
+    # trzeciego przepisu bez brakujących składników nie ma – app_g.py wtedy generuje
+    assert korpus.przepisy_dla(wybor) is None
+
+
+def test_kolumny_rosna_ponad_slowo():
+    korpus = KorpusPrzepisow(slownik=())
+    nowe = [f"produkt{i}" for i in range(BITY_SLOWA + 6)]
+    korpus.dodaj(_przepis("Początek", nowe[:3]))
+    assert korpus.raport()["slowa_na_przepis"] == 1
+    for i in range(0, len(nowe), 5):
+        korpus.dodaj(_przepis(f"Przepis {i}", nowe[i:i + 5]))
+    assert korpus.raport()["skladniki"] == len(nowe)
+    assert korpus.raport()["slowa_na_przepis"] == 2
+
+    # bity nad granicą słowa trafiają w przepis z kolumnami z obu słów
+    trafienia = korpus.szukaj(nowe[60:65])
+    assert [t.przepis.nazwa for t in trafienia] == ["Przepis 60"]
+    assert trafienia[0].brakujace == 0
+    # wcześniejsze wiersze dostały zerowe drugie słowo
+    assert [t.przepis.nazwa for t in korpus.szukaj(nowe[:3])] == ["Początek"]
+
+
+def test_zapis_i_wczytanie_npz(korpus, tmp_path):
+    sciezka = str(tmp_path / "korpus.npz")
+    korpus.dodaj(_przepis("Dużo", [f"produkt{i}" for i in range(BITY_SLOWA + 1)]))
+    korpus.zapisz(sciezka)
+    wczytany = KorpusPrzepisow.wczytaj(sciezka)
+
+    assert len(wczytany) == len(korpus)
+    assert wczytany.raport() == {**korpus.raport(), "bajty_macierzy": wczytany.raport()["bajty_macierzy"]}
+    zapytanie = ["Jajka", "Mleko", "Mąka pszenna", "Masło"]
+    for miara, wartosci in korpus.oceny(zapytanie).items():
+        np.testing.assert_allclose(wczytany.oceny(zapytanie)[miara], wartosci)
+    assert wczytany.szukaj(zapytanie, maks_brakujacych=1) == korpus.szukaj(zapytanie, maks_brakujacych=1)
+    # skróty przepisów wracają z pliku – duplikaty nadal są rozpoznawane
+    assert not wczytany.dodaj(OMLET)
+    assert wczytany.dodaj(_przepis("Nowy", ["jajka", "tofu"]))
+
+
+def test_z_tablic(korpus):
+    kolumny = ["jajk", "mlek"]
+    bity = np.array([[0b11], [0b01]], dtype=np.uint64)
+    dane = [OMLET.model_dump_json().encode(), JAJECZNICA.model_dump_json().encode()]
+    z_tablic = KorpusPrzepisow.z_tablic(kolumny, bity, dane)
+    assert [t.przepis.nazwa for t in z_tablic.szukaj(["jajka"], limit=2, maks_brakujacych=1)] == [
+        "Jajecznica", "Omlet",
+    ]
+    # bez skrótów duplikaty tych wierszy nie są rozpoznawane
+    assert z_tablic.dodaj(OMLET)
+
+
+def test_stara_wersja_kluczy_przebudowuje_korpus(korpus, tmp_path):
+    sciezka = str(tmp_path / "korpus.npz")
+    korpus.zapisz(sciezka)
+    with np.load(sciezka) as plik:
+        tablice = {k: plik[k] for k in plik.files if k != "wersja_kluczy"}
+    # kolumny z innej kanonizacji nie pasują do dzisiejszych kluczy
+    tablice["kolumny"] = np.array([f"stary{i}" for i in range(len(tablice["kolumny"]))])
+    np.savez(sciezka, **tablice)
+
+    wczytany = KorpusPrzepisow.wczytaj(sciezka)
+    assert len(wczytany) == 4
+    assert [t.przepis.nazwa for t in wczytany.szukaj(["jajka", "masło", "szczypiorek"])] == ["Jajecznica"]
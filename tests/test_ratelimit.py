@@ -0,0 +1,42 @@
+from recipe_core.providers import Provider
+from recipe_core.ratelimit import LimitowanyProvider
+from recipe_core.telemetry import TELEMETRIA
+
+
+class _Strumien(Provider):
+    nazwa = "strumien-testowy"
+
+    def __init__(self):
+        super().__init__("model")
+        self.zamkniete = 0
+
+    def strumieniuj(self, prompt, max_tokenow=4000, schemat=None):
+        try:
+            for _ in range(10):
+                yield '{"przepisy": '
+        finally:
+            self.zamkniete += 1
+
+
+def test_przerwany_strumien_zamyka_strumien_dostawcy():
+    wewnetrzny = _Strumien()
+    provider = LimitowanyProvider(wewnetrzny)
+    przed = TELEMETRIA.liczniki().get("recipe_llm_requests_total", {})
+
+    strumien = provider.strumieniuj("prompt")
+    next(strumien)
+    next(strumien)
+    strumien.close()  # wywołujący przestał czytać (termin, rerun sesji)
+
+    assert wewnetrzny.zamkniete == 1
+    assert provider.limity.wspolbieznosc.w_toku == 0
+    po = TELEMETRIA.liczniki()
+    klucz = f"provider={wewnetrzny.nazwa},status=anulowane"
+    assert po["recipe_llm_requests_total"][klucz] == przed.get(klucz, 0) + 1
+    assert not any(wewnetrzny.nazwa in k for k in po.get("recipe_llm_errors_total", {}))
+
+
+def test_pelny_strumien():
+    wewnetrzny = _Strumien()
+    assert len(list(LimitowanyProvider(wewnetrzny).strumieniuj("prompt"))) == 10
+    assert wewnetrzny.zamkniete == 1
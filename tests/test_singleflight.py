@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from recipe_core.singleflight import PojedynczyLot, PojedynczyLotAsync
+
+
+def _poczekaj_az(warunek, timeout: float = 5.0) -> None:
+    koniec = time.monotonic() + timeout
+    while not warunek():
+        assert time.monotonic() < koniec, "warunek nie został spełniony"
+        time.sleep(0.005)
+
+
+def test_czekajacy_dostaja_wynik_jednego_wywolania():
+    lot = PojedynczyLot()
+    start = threading.Event()
+    wywolania = []
+
+    def fn(opublikuj):
+        wywolania.append(1)
+        opublikuj("przepis 1")
+        start.wait(5)
+        opublikuj("przepis 2")
+        return "wynik"
+
+    elementy = {i: [] for i in range(4)}
+    with ThreadPoolExecutor(4) as pula:
+        prowadzacy = pula.submit(lot.wykonaj, "k", fn, elementy[0].append)
+        _poczekaj_az(lambda: lot.w_locie() == 1)
+        czekajacy = [pula.submit(lot.wykonaj, "k", fn, elementy[i].append) for i in (1, 2, 3)]
+        _poczekaj_az(lambda: lot.statystyki["dolaczone"] == 3)
+        start.set()
+        wyniki = [prowadzacy.result(5)] + [f.result(5) for f in czekajacy]
+
+    assert wyniki == ["wynik"] * 4
+    assert len(wywolania) == 1
+    # dołączający w trakcie dostają też elementy opublikowane przed ich dołączeniem
+    assert all(e == ["przepis 1", "przepis 2"] for e in elementy.values())
+    assert lot.w_locie() == 0
+
+
+def test_blad_trafia_do_wszystkich_czekajacych():
+    lot = PojedynczyLot()
+    start = threading.Event()
+
+    def fn(_):
+        start.wait(5)
+        raise ValueError("model nie odpowiedział")
+
+    with ThreadPoolExecutor(3) as pula:
+        zadania = [pula.submit(lot.wykonaj, "k", fn)]
+        _poczekaj_az(lambda: lot.w_locie() == 1)
+        zadania += [pula.submit(lot.wykonaj, "k", fn) for _ in range(2)]
+        _poczekaj_az(lambda: lot.statystyki["dolaczone"] == 2)
+        start.set()
+        for zadanie in zadania:
+            with pytest.raises(ValueError, match="model nie odpowiedział"):
+                zadanie.result(5)
+    assert lot.statystyki["prowadzace"] == 1
+    # kolejne zapytanie to nowy lot, a nie zapamiętany błąd
+    assert lot.wykonaj("k", lambda _: "ok") == "ok"
+
+
+def test_przerwanie_prowadzacego_czekajacy_ponawiaja():
+    lot = PojedynczyLot()
+    start = threading.Event()
+
+    def przerwane(_):
+        start.wait(5)
+        raise KeyboardInterrupt  # np. rerun sesji Streamlit prowadzącej zapytanie
+
+    with ThreadPoolExecutor(2) as pula:
+        prowadzacy = pula.submit(lot.wykonaj, "k", przerwane)
+        _poczekaj_az(lambda: lot.w_locie() == 1)
+        czekajacy = pula.submit(lot.wykonaj, "k", lambda _: "ponowione")
+        _poczekaj_az(lambda: lot.statystyki["dolaczone"] == 1)
+        start.set()
+        with pytest.raises(KeyboardInterrupt):
+            prowadzacy.result(5)
+        assert czekajacy.result(5) == "ponowione"
+    assert lot.statystyki["ponowione"] == 1
+    assert lot.statystyki["prowadzace"] == 2
+
+
+def test_timeout_czekajacego_nie_przerywa_prowadzacego():
+    lot = PojedynczyLot()
+    start = threading.Event()
+    with ThreadPoolExecutor(1) as pula:
+        prowadzacy = pula.submit(lot.wykonaj, "k", lambda _: start.wait(5) and "wynik")
+        _poczekaj_az(lambda: lot.w_locie() == 1)
+        with pytest.raises(TimeoutError):
+            lot.wykonaj("k", lambda _: "nie", timeout=0.05)
+        start.set()
+        assert prowadzacy.result(5) == "wynik"
+
+
+def test_async_wspolne_zadanie_i_porzucenie():
+    async def scenariusz():
+        lot = PojedynczyLotAsync()
+        start = asyncio.Event()
+        wywolania = []
+
+        async def fn(opublikuj):
+            wywolania.append(1)
+            opublikuj("przepis 1")
+            await start.wait()
+            return "wynik"
+
+        elementy = []
+        pierwszy = asyncio.ensure_future(lot.wykonaj("k", fn, elementy.append))
+        drugi = asyncio.ensure_future(lot.wykonaj("k", fn))
+        await asyncio.sleep(0.01)
+        # rozłączenie pierwszego nie przerywa generowania dla drugiego
+        pierwszy.cancel()
+        await asyncio.sleep(0.01)
+        start.set()
+        assert await drugi == "wynik"
+        assert len(wywolania) == 1 and elementy == ["przepis 1"]
+
+        # odchodzi ostatni czekający – zadanie jest anulowane
+        wolne = asyncio.ensure_future(lot.wykonaj("x", lambda _: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        wolne.cancel()
+        await asyncio.sleep(0.01)
+        assert lot.statystyki["porzucone"] == 1 and lot.w_locie() == 0
+
+    asyncio.run(scenariusz())
+
+
+def test_async_blad_trafia_do_wszystkich():
+    async def scenariusz():
+        lot = PojedynczyLotAsync()
+
+        async def fn(_):
+            await asyncio.sleep(0.01)
+            raise ValueError("błąd")
+
+        wyniki = await asyncio.gather(*(lot.wykonaj("k", fn) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(w, ValueError) for w in wyniki)
+        assert lot.statystyki == {"prowadzace": 1, "dolaczone": 2, "ponowione": 0, "porzucone": 0}
+
+    asyncio.run(scenariusz())
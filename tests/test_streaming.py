@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.korpus import syntetyczne_przepisy
+from recipe_core.decoding import BladWalidacji
+from recipe_core.generator import czy_kompletne, generuj_przepisy, generuj_przepisy_async
+from recipe_core.models import CzesciowePrzepisy
+from recipe_core.providers import FakeProvider
+from recipe_core.streaming import StrumieniowyParserPrzepisow, czesciowa_nazwa
+
+DANE = syntetyczne_przepisy(4, 3, 6)
+ODPOWIEDZ = json.dumps(DANE, ensure_ascii=False)
+NAZWY = [p["nazwa"] for p in DANE["przepisy"]]
+
+
+def _bez_pola(numer: int) -> str:
+    """Odpowiedź, w której przepis `numer` (od 0) nie ma pola "kroki"."""
+    dane = json.loads(ODPOWIEDZ)
+    del dane["przepisy"][numer]["kroki"]
+    return json.dumps(dane, ensure_ascii=False)
+
+
+def test_parser_zwraca_obiekty_w_chwili_domkniecia():
+    parser = StrumieniowyParserPrzepisow()
+    domkniete = []
+    for znak in f"```json\n{ODPOWIEDZ}\n```":
+        domkniete.append([p["nazwa"] for p in parser.feed(znak)])
+    assert [n for lista in domkniete for n in lista] == NAZWY
+    assert all(len(lista) <= 1 for lista in domkniete)
+    assert parser.liczba_obiektow == len(NAZWY)
+
+
+def test_parser_nawiasy_w_stringach_i_biezacy_obiekt():
+    tekst = '{"przepisy": [{"nazwa": "Ciasto {z} \\"kremem\\" ]", "x": [1, {"y": "}"}]}, {"nazwa": "Dr'
+    parser = StrumieniowyParserPrzepisow(surowe=True)
+    obiekty = parser.feed(tekst)
+    assert len(obiekty) == 1
+    assert json.loads(obiekty[0])["nazwa"] == 'Ciasto {z} "kremem" ]'
+    assert parser.biezacy_obiekt == '{"nazwa": "Dr'
+    assert czesciowa_nazwa(parser.biezacy_obiekt) is None
+    parser.feed('ugie"')
+    assert czesciowa_nazwa(parser.biezacy_obiekt) == "Drugie"
+
+
+def test_strumien_pelnej_odpowiedzi():
+    pokazane = []
+    wynik = generuj_przepisy(FakeProvider(ODPOWIEDZ), "jajka", on_przepis=lambda i, p: pokazane.append((i, p.nazwa)))
+    assert pokazane == list(enumerate(NAZWY, start=1))
+    assert [p.nazwa for p in wynik.przepisy] == NAZWY
+    assert czy_kompletne(wynik)
+
+
+def test_niepoprawny_przepis_w_strumieniu_daje_to_co_pokazane():
+    pokazane = []
+    wynik = generuj_przepisy(
+        FakeProvider(_bez_pola(1)), "jajka", on_przepis=lambda i, p: pokazane.append((i, p))
+    )
+    assert [i for i, _ in pokazane] == [1, 2]
+    assert isinstance(wynik, CzesciowePrzepisy)
+    assert wynik.przepisy == [p for _, p in pokazane]
+    assert [p.nazwa for p in wynik.przepisy] == [NAZWY[0], NAZWY[2]]
+
+
+def test_niepoprawny_jedyny_przepis_to_blad():
+    dane = json.loads(_bez_pola(0))
+    dane["przepisy"] = dane["przepisy"][:1]
+    with pytest.raises(BladWalidacji):
+        generuj_przepisy(FakeProvider(json.dumps(dane)), "jajka", on_przepis=lambda i, p: None)
+
+
+def test_strumien_async_uciety():
+    tekst = ODPOWIEDZ[: ODPOWIEDZ.index(json.dumps(DANE["przepisy"][2], ensure_ascii=False)) + 40]
+    pokazane = []
+    wynik = asyncio.run(
+        generuj_przepisy_async(FakeProvider(tekst), "jajka", on_przepis=lambda i, p: pokazane.append(p))
+    )
+    assert isinstance(wynik, CzesciowePrzepisy)
+    assert wynik.przepisy == pokazane